@@ -65,6 +65,10 @@ class ExternalServices(BaseCog, name="ExternalServices"):
 
                 self.ao3_session = session
                 self.ao3_login_successful = True
+                # Let the work cache scrape restricted works too
+                ao3_cache = getattr(self.bot, "ao3_cache", None)
+                if ao3_cache is not None:
+                    ao3_cache.session = session
                 self.logger.info("AO3 login successful")
                 self.ao3_login_in_progress = False
                 return
@@ -177,24 +181,16 @@ class ExternalServices(BaseCog, name="ExternalServices"):
 
             await interaction.response.defer()
 
-            try:
-                self.ao3_session.refresh_auth_token()
-            except Exception as e:
-                logging.error(
-                    f"EXTERNAL AO3 ERROR: Failed to refresh auth token for user {interaction.user.id}: {e}"
-                )
-                raise ExternalServiceError(
-                    message="Failed to authenticate with AO3"
-                ) from e
-
             try:
                 ao3_id = AO3.utils.workid_from_url(ao3_url)
-                work = AO3.Work(ao3_id)
-                work.set_session(self.ao3_session)
+                # Cached works are answered without contacting AO3
+                work = await self.bot.ao3_cache.get(ao3_id)
             except AO3.utils.InvalidIdError:
                 raise ValidationError(
                     message="Could not find that work on AO3. Please check the URL and try again."
                 )
+            except ExternalServiceError:
+                raise
             except Exception as e:
                 logging.error(
                     f"EXTERNAL AO3 ERROR: Failed to create work object for user {interaction.user.id}: {e}"
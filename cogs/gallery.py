@@ -2,8 +2,6 @@ import asyncio
 import contextlib
 import csv
 import io
-import logging
-import mimetypes
 import os
 import re
 from datetime import UTC, datetime
@@ -18,6 +16,7 @@ from utils.command_groups import gallery_admin
 from utils.decorators import log_command
 from utils.error_handling import handle_interaction_errors
 from utils.gallery_data_extractor import GalleryDataExtractor
+from utils.media_pipeline import FetchedMedia, fetch_media, pack_uploads
 from utils.permissions import (
     app_admin_or_me_check,
 )
@@ -38,6 +37,19 @@ discord_file_pattern = (
 )
 
 
+def _extract_tweet(url: str) -> tuple[gallery_dl.job.DownloadJob, dict | None]:
+    """Get a gallery-dl job for a tweet and the tweet's metadata.
+
+    Blocking: gallery-dl fetches the tweet, so run this on the scraper pool.
+    """
+    gallery_dl.config.load()
+    job = gallery_dl.job.DownloadJob(url)
+    for message in job.extractor:
+        if message[0] == 2 and message[1] is not None:
+            return job, message[1]
+    return job, None
+
+
 class RepostModal(discord.ui.Modal, title="Repost"):
     def __init__(
         self, mention: str, jump_url: str, title: str, extra_description=None
@@ -943,7 +955,7 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
         self.logger.debug(f"Processing AO3 message: {message.content}")
         url = re.search(ao3_pattern, message.content).group(0)
         self.logger.debug(f"Extracted AO3 URL: {url}")
-        work = AO3.Work(AO3.utils.workid_from_url(url))
+        work = await self.bot.ao3_cache.get(AO3.utils.workid_from_url(url))
         menu = RepostMenu(
             jump_url=message.jump_url,
             mention=message.author.mention,
@@ -1003,13 +1015,7 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
         self, interaction: discord.Interaction, message: discord.Message
     ) -> None:
         url = re.search(twitter_pattern, message.content).group(0)
-        gallery_dl.config.load()
-        tweet = gallery_dl.job.DownloadJob(url)
-        tweet_content = None
-        for x in tweet.extractor:
-            if x[0] == 2 and x[1] is not None:
-                tweet_content = x[1]
-                break
+        tweet, tweet_content = await self.bot.scraper_pool.run(_extract_tweet, url)
         if tweet_content is not None:
             content = tweet_content["content"]
             tweet_id = tweet_content["tweet_id"]
@@ -1033,8 +1039,11 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
                 view=menu,
             )
             menu.message = await interaction.original_response()
-            tweet.run()
-            if not await menu.wait() and menu.channel_select.values:
+            # Download while the user picks a channel
+            download = asyncio.create_task(self.bot.scraper_pool.run(tweet.run))
+            chosen = not await menu.wait() and menu.channel_select.values
+            await download
+            if chosen:
                 embed_list = []
                 files_list = []
                 await interaction.delete_original_response()
@@ -1157,11 +1166,8 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
     async def repost_discord_file(
         self, interaction: discord.Interaction, message: discord.Message
     ) -> None:
-        boost_level = interaction.guild.premium_tier
-        if boost_level >= 2:
-            max_file_size = 50 * 1024 * 1024  # 50 MB
-        else:
-            max_file_size = 8 * 1024 * 1024  # 8 MB
+        # The guild's upload limit depends on its boost tier
+        max_file_size = interaction.guild.filesize_limit
         menu = RepostMenu(
             jump_url=message.jump_url,
             mention=message.author.mention,
@@ -1178,39 +1184,42 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
             ephemeral=True,
             view=menu,
         )
-        os.makedirs(f"{interaction.guild_id}_temp_files", exist_ok=True)
         urls = re.findall(discord_file_pattern, message.content)
 
-        # Use the bot's HTTP client for connection pooling
-        for counter, url in enumerate(urls, start=1):
-            # Download the file using the HTTP client
-            filename = f"{message.id}_{counter}.{url.split('.')[-1]}"
-            file_path = f"{interaction.guild_id}_temp_files/{filename}"
-
-            success = await self.bot.http_client.download_file(url, file_path)
-            if not success:
-                logging.error(f"Failed to download {url}")
-                continue
-
+        # Download while the user picks a channel; files stay in memory or
+        # anonymous temporary files, so concurrent reposts can't collide
+        downloads = asyncio.create_task(
+            fetch_media(
+                self.bot.http_client,
+                urls,
+                max_file_size,
+                name_prefix=str(message.id),
+            )
+        )
         menu.message = await interaction.original_response()
-        if not await menu.wait() and menu.channel_select.values:
+        chosen = not await menu.wait() and menu.channel_select.values
+        media = await downloads
+        try:
             await interaction.delete_original_response()
-            counter = 1
-            embed_list = []
-            files_list = []
-            current_size = 0
+            if not chosen:
+                return
+            if not media:
+                await interaction.followup.send(
+                    "I could not find any images to repost", ephemeral=True
+                )
+                return
             repost_channel = interaction.guild.get_channel(
                 int(menu.channel_select.values[0])
             )
             creator_links = await self.creator_link_repo.get_by_user_id(
                 message.author.id
             )
-            for image in sorted(os.listdir(f"{interaction.guild_id}_temp_files")):
-                file = discord.File(f"{interaction.guild_id}_temp_files/{image}")
+
+            def make_embed(item: FetchedMedia) -> discord.Embed:
                 embed = discord.Embed(
                     title=menu.title_item,
                     description=f"{menu.description_item}",
-                    url=url,
+                    url=item.url,
                 )
                 if creator_links:
                     for link in creator_links:
@@ -1221,56 +1230,24 @@ class GalleryCog(BaseCog, name="Gallery & Mementos"):
                                 inline=False,
                             )
                 embed.set_thumbnail(url=message.author.display_avatar.url)
-                # Check if file is an image using mimetypes
-                mime_type, _ = mimetypes.guess_type(
-                    f"{interaction.guild_id}_temp_files/{image}"
-                )
-                if mime_type and mime_type.startswith("image/"):
-                    embed.set_image(url=f"attachment://{image}")
-                    embed_list.append(embed)
-                    counter += 1
-                    if counter == 5:
-                        try:
-                            await repost_channel.send(embeds=embed_list)
-                        except (
-                            discord.HTTPException,
-                            discord.Forbidden,
-                            ValueError,
-                        ) as e:
-                            await interaction.response.send_message(
-                                f"Error: {str(e)}", ephemeral=True
-                            )
-                            raise
-                        embed_list.clear()
-                        counter = 1
-                files_list.append(file)
-                current_size += os.path.getsize(
-                    f"{interaction.guild_id}_temp_files/{image}"
-                )
-                if current_size >= max_file_size:
-                    try:
-                        await repost_channel.send(files=files_list, embed=embed)
-                    except (discord.HTTPException, discord.Forbidden, ValueError) as e:
-                        await interaction.response.send_message(
-                            f"Error: {str(e)}", ephemeral=True
-                        )
-                        raise
-                    files_list.clear()
-                    current_size = 0
-            if embed_list and files_list:
-                await repost_channel.send(embeds=embed_list, files=files_list)
-            elif embed_list and not files_list:
-                await repost_channel.send(embeds=embed_list)
-            elif files_list and not embed_list:
-                await repost_channel.send(files=files_list, embed=embed)
-            else:
-                await interaction.response.send_message(
-                    "I could not find any images to repost", ephemeral=True
-                )
-            for file in os.listdir(f"{interaction.guild_id}_temp_files"):
-                os.remove(f"{interaction.guild_id}_temp_files/{file}")
-        else:
-            await interaction.delete_original_response()
+                if item.is_image:
+                    embed.set_image(url=f"attachment://{item.filename}")
+                return embed
+
+            for upload in pack_uploads(media, max_file_size):
+                # Images get an embed each; other files share the first one
+                embeds = [make_embed(item) for item in upload if item.is_image]
+                try:
+                    await repost_channel.send(
+                        embeds=embeds or [make_embed(upload[0])],
+                        files=[item.to_file() for item in upload],
+                    )
+                except (discord.HTTPException, discord.Forbidden, ValueError) as e:
+                    await interaction.followup.send(f"Error: {str(e)}", ephemeral=True)
+                    raise
+        finally:
+            for item in media:
+                item.close()
 
     @gallery_admin.command(
         name="set_repost", description="Add or remove a channel from repost channels"
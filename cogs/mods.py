@@ -24,6 +24,10 @@ class ModCogs(commands.Cog):
         self.logger = logging.getLogger(__name__)
         self.webhook_manager = WebhookManager(bot.http_client)
 
+    async def cog_unload(self) -> None:
+        """Deliver queued webhook messages before the cog is unloaded."""
+        await self.webhook_manager.close()
+
     async def cog_load(self) -> None:
         """Bind commands in the mod group to this cog instance.
 
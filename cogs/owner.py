@@ -3,6 +3,7 @@ import logging
 import re
 import shlex
 import subprocess
+from datetime import datetime
 from typing import Literal
 
 import asyncpg
@@ -10,6 +11,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+import config
 from utils.command_groups import admin
 from utils.error_handling import handle_interaction_errors
 from utils.exceptions import (
@@ -19,6 +21,8 @@ from utils.exceptions import (
     QueryError,
     ValidationError,
 )
+from utils.parquet_export import DEFAULT_EXPORT_DIR, ParquetExporter
+from utils.safe_query import SafeQueryRunner
 
 # Import pgvector schema search functions
 from utils.schema_search import (
@@ -48,6 +52,12 @@ cogs = [
 class OwnerCog(commands.Cog, name="Owner"):
     def __init__(self, bot) -> None:
         self.bot = bot
+        # Guards and caches the SQL generated by ask_db
+        self.query_runner = SafeQueryRunner(
+            bot.db,
+            max_cost=config.ask_db_max_cost,
+            statement_timeout=config.ask_db_timeout,
+        )
 
     async def cog_load(self) -> None:
         """Bind commands in the admin group to this cog instance.
@@ -67,6 +77,7 @@ class OwnerCog(commands.Cog, name="Owner"):
             "exit",
             "resources",
             "sql_query",
+            "export_history",
             "ask_database",
         }
 
@@ -970,15 +981,53 @@ class OwnerCog(commands.Cog, name="Owner"):
             # Add HTTP client statistics
             try:
                 http_stats = self.bot.http_client.get_stats()
+                cache_stats = http_stats.get("cache", {})
+                connection_stats = http_stats.get("connections", {})
                 embed.add_field(
                     name="🌐 HTTP Client Statistics",
                     value=(
                         f"**Requests:** {http_stats.get('requests', 0)}\n"
                         f"**Errors:** {http_stats.get('errors', 0)}\n"
-                        f"**Timeouts:** {http_stats.get('timeouts', 0)}"
+                        f"**Timeouts:** {http_stats.get('timeouts', 0)}\n"
+                        f"**Cache:** {cache_stats.get('hits', 0)} hits, "
+                        f"{cache_stats.get('revalidated', 0)} revalidated, "
+                        f"{cache_stats.get('misses', 0)} misses\n"
+                        f"**Requests Saved:** {cache_stats.get('requests_saved', 0)} "
+                        f"({cache_stats.get('coalesced', 0)} coalesced)\n"
+                        f"**Connections:** {connection_stats.get('reuse_ratio', 0):.0%} "
+                        f"reused, {connection_stats.get('created', 0)} opened "
+                        f"({connection_stats.get('tls_handshakes', 0)} TLS)"
                     ),
                     inline=True,
                 )
+
+                latency = http_stats.get("latency", {})
+                latency_lines = [
+                    f"**All:** p50 {latency.get('p50_ms', 0):.0f}ms · "
+                    f"p95 {latency.get('p95_ms', 0):.0f}ms · "
+                    f"p99 {latency.get('p99_ms', 0):.0f}ms"
+                ]
+                busiest = sorted(
+                    http_stats.get("endpoints", {}).items(),
+                    key=lambda item: item[1]["latency"]["count"],
+                    reverse=True,
+                )[:5]
+                for endpoint, endpoint_stats in busiest:
+                    endpoint_latency = endpoint_stats["latency"]
+                    name = endpoint.split("://", 1)[-1]
+                    if len(name) > 45:
+                        name = "…" + name[-44:]
+                    latency_lines.append(
+                        f"`{name}` ({endpoint_latency['count']}): "
+                        f"p50 {endpoint_latency['p50_ms']:.0f} · "
+                        f"p95 {endpoint_latency['p95_ms']:.0f} · "
+                        f"p99 {endpoint_latency['p99_ms']:.0f}ms"
+                    )
+                embed.add_field(
+                    name="⏱️ HTTP Latency",
+                    value="\n".join(latency_lines)[:1024],
+                    inline=False,
+                )
             except Exception as e:
                 logging.warning(
                     f"OWNER RESOURCES WARNING: Failed to get HTTP client stats: {e}"
@@ -989,6 +1038,85 @@ class OwnerCog(commands.Cog, name="Owner"):
                     inline=True,
                 )
 
+            # Add OpenAI client statistics
+            openai_service = getattr(self.bot, "openai", None)
+            if openai_service is not None:
+                try:
+                    openai_stats = openai_service.get_stats()
+                    embed.add_field(
+                        name="🤖 OpenAI Client Statistics",
+                        value=(
+                            f"**Requests:** {openai_stats.get('requests', 0)} "
+                            f"({openai_stats.get('errors', 0)} errors)\n"
+                            f"**Tokens:** {openai_stats.get('total_tokens', 0):,}\n"
+                            f"**Latency p50/p95:** {openai_stats.get('latency_p50_ms', 0):.0f}/"
+                            f"{openai_stats.get('latency_p95_ms', 0):.0f} ms\n"
+                            f"**Cache hits:** {openai_stats.get('cache_hits', 0)}"
+                        ),
+                        inline=True,
+                    )
+                except Exception as e:
+                    logging.warning(
+                        f"OWNER RESOURCES WARNING: Failed to get OpenAI client stats: {e}"
+                    )
+
+            # Add Google search statistics
+            google_search = getattr(self.bot, "google_search", None)
+            if google_search is not None:
+                try:
+                    search_stats = google_search.get_stats()
+                    embed.add_field(
+                        name="🔍 Google Search",
+                        value=(
+                            f"**Quota:** {search_stats['quota_used']} used, "
+                            f"{search_stats['quota_remaining']} left today\n"
+                            f"**Requests:** {search_stats['requests']} "
+                            f"({search_stats['errors']} errors)\n"
+                            f"**Cache hits:** {search_stats['cache_hits']} "
+                            f"(+{search_stats['stale_hits'] + search_stats['local_hits']} degraded)"
+                        ),
+                        inline=True,
+                    )
+                except Exception as e:
+                    logging.warning(
+                        f"OWNER RESOURCES WARNING: Failed to get Google search stats: {e}"
+                    )
+
+            # Add scraper pool statistics
+            scraper_pool = getattr(self.bot, "scraper_pool", None)
+            if scraper_pool is not None:
+                try:
+                    pool_stats = scraper_pool.get_stats()
+                    ao3_cache = getattr(self.bot, "ao3_cache", None)
+                    ao3_stats = ao3_cache.get_stats() if ao3_cache else {}
+                    embed.add_field(
+                        name="🧵 Scraper Pool",
+                        value=(
+                            f"**Running:** {pool_stats['running']}/{pool_stats['workers']} "
+                            f"· **Queued:** {pool_stats['queued']} "
+                            f"(max {pool_stats['max_queued']})\n"
+                            f"**Done:** {pool_stats['completed']} · "
+                            f"**Failed:** {pool_stats['failed']} · "
+                            f"**Timed out:** {pool_stats['timed_out']} · "
+                            f"**Rejected:** {pool_stats['rejected']}\n"
+                            f"**Wait p95:** {pool_stats['wait']['p95_ms']:.0f} ms · "
+                            f"**Run p95:** {pool_stats['run']['p95_ms']:.0f} ms"
+                            + (
+                                f"\n**AO3 cache:** {ao3_stats['hits'] + ao3_stats['db_hits']} "
+                                f"hits, {ao3_stats['stale_hits']} stale, "
+                                f"{ao3_stats['misses']} misses, "
+                                f"{ao3_stats['refreshes']} refreshed"
+                                if ao3_stats
+                                else ""
+                            )
+                        ),
+                        inline=True,
+                    )
+                except Exception as e:
+                    logging.warning(
+                        f"OWNER RESOURCES WARNING: Failed to get scraper pool stats: {e}"
+                    )
+
             # Add database cache statistics
             try:
                 db_cache_stats = await self.bot.db.get_cache_stats()
@@ -1293,6 +1421,68 @@ class OwnerCog(commands.Cog, name="Owner"):
             logging.error(f"OWNER SQL ERROR: Unexpected error for query: {e}")
             raise QueryError(message=error_msg) from e
 
+    @admin.command(name="export", description="Export message history to Parquet files")
+    @commands.is_owner()
+    @handle_interaction_errors
+    async def export_history(
+        self,
+        interaction: discord.Interaction,
+        guild_id: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        table: Literal["all", "messages", "reactions", "attachments"] = "all",
+    ) -> None:
+        """Export messages, reactions and attachments to Parquet on local disk.
+
+        Exports are incremental: each run continues after the last exported
+        message for the guild, within the optional date range. A start date
+        before the last exported message is rejected.
+
+        Args:
+            interaction: The Discord interaction object
+            guild_id: Guild to export (defaults to the current server)
+            start: Optional start date (YYYY-MM-DD, UTC)
+            end: Optional end date (YYYY-MM-DD, UTC, exclusive)
+            table: Table to export, or all of them
+
+        Raises:
+            ValidationError: If the guild ID or dates are invalid
+            ExternalServiceError: If pyarrow is not installed
+            DatabaseError: If the export query fails
+        """
+        await interaction.response.defer()
+
+        try:
+            target_guild = int(guild_id) if guild_id else interaction.guild_id
+            start_date = datetime.strptime(start, "%Y-%m-%d") if start else None
+            end_date = datetime.strptime(end, "%Y-%m-%d") if end else None
+        except ValueError as e:
+            raise ValidationError(
+                message="Guild ID must be numeric and dates must be YYYY-MM-DD"
+            ) from e
+
+        if target_guild is None:
+            raise ValidationError(message="A guild ID is required outside a server")
+
+        exporter = ParquetExporter(self.bot.db, DEFAULT_EXPORT_DIR)
+        logging.info(
+            f"OWNER EXPORT: User {interaction.user.id} exporting {table} for guild {target_guild}"
+        )
+        result = await exporter.export_guild(
+            target_guild,
+            start=start_date,
+            end=end_date,
+            tables=None if table == "all" else [table],
+        )
+
+        lines = [
+            f"📦 **Parquet Export** for guild `{target_guild}`",
+            *(f"**{name}:** {rows:,} rows" for name, rows in result.rows.items()),
+            f"**Files written:** {len(result.files)}",
+            f"**Output:** `{exporter.output_dir.resolve()}`",
+        ]
+        await interaction.followup.send("\n".join(lines))
+
     @admin.command(
         name="ask_db", description="Ask a natural language question about the database"
     )
@@ -1351,7 +1541,11 @@ class OwnerCog(commands.Cog, name="Owner"):
                         message="❌ Schema embeddings not available. Run `populate_schema_embeddings.py` to create them."
                     )
 
-                relevant_schema = await search_schema(self.bot.db, question)
+                relevant_schema = await search_schema(
+                    self.bot.db,
+                    question,
+                    openai_service=getattr(self.bot, "openai", None),
+                )
                 if not relevant_schema:
                     raise ExternalServiceError(
                         message="❌ No relevant database schema found for your question"
@@ -1385,6 +1579,7 @@ class OwnerCog(commands.Cog, name="Owner"):
                     server_id=server_id,
                     channel_id=channel_id,
                     user_id=user_id,
+                    openai_service=getattr(self.bot, "openai", None),
                 )
                 if not raw_sql_response:
                     raise ExternalServiceError(
@@ -1446,16 +1641,16 @@ class OwnerCog(commands.Cog, name="Owner"):
             )
 
             try:
-                results = await self.bot.db.fetch(sql_query)
+                # Read-only, cost-gated, time-limited and row-limited
+                query_result = await self.query_runner.run(sql_query)
+                results = query_result.rows
                 logging.info(
-                    f"OWNER ASK_DB: Query executed successfully, returned {len(results) if results else 0} rows"
-                )
-            except asyncpg.PostgresError as e:
-                error_msg = f"❌ **Database Error**\n**Error Code:** {e.sqlstate if hasattr(e, 'sqlstate') else 'Unknown'}\n**Message:** {str(e)}"
-                logging.error(
-                    f"OWNER ASK_DB ERROR: PostgreSQL error executing generated query: {e}"
+                    f"OWNER ASK_DB: Query executed successfully, returned {len(results)} rows "
+                    f"(estimated cost {query_result.estimated_cost:.0f}, cached: {query_result.cached})"
                 )
-                raise DatabaseError(message=error_msg) from e
+            except QueryError as e:
+                logging.error(f"OWNER ASK_DB ERROR: Generated query not run: {e}")
+                raise
             except Exception as e:
                 logging.error(
                     f"OWNER ASK_DB ERROR: Database query execution failed: {e}"
@@ -1506,9 +1701,11 @@ class OwnerCog(commands.Cog, name="Owner"):
                     table_text = table_text[:1200] + "\n... (truncated)"
 
                 # Add information about total rows
-                result_info = f"Query returned {len(results)} row(s)"
+                result_info = f"Query returned {len(results)}{'+' if query_result.truncated else ''} row(s)"
                 if len(results) > 20:
                     result_info += " (showing first 20)"
+                if query_result.cached:
+                    result_info += " (cached)"
 
                 # Format final response
                 response = f"**Question:** {question}\n\n**Generated SQL:**\n```sql\n{sql_query}\n```\n\n**Results:** ✅ {result_info}\n```\n{table_text}\n```"
@@ -52,15 +52,23 @@ from utils.permissions import (
     is_bot_channel,
 )
 
+# Seconds live poll results are reused before asking Patreon again
+POLL_CACHE_TTL = 60
 
-async def fetch(session, url, cookies=None, headers=None):
-    """Fetch data from a URL using the provided session.
+
+async def fetch(client, url, cookies=None, headers=None, ttl=None):
+    """Fetch data from a URL through the HTTP client's response cache.
+
+    Repeated fetches of an unchanged URL are answered from the cache or
+    revalidated with a conditional request instead of downloading the body.
 
     Args:
-        session: The aiohttp ClientSession to use
+        client: The bot's HTTPClient
         url: The URL to fetch
         cookies: Optional cookies to send with the request
         headers: Optional headers to send with the request
+        ttl: Optional seconds the response stays fresh, overriding the
+            server's caching headers
 
     Returns:
         The response text
@@ -68,8 +76,8 @@ async def fetch(session, url, cookies=None, headers=None):
     cookies = cookies or config.cookies
     headers = headers or config.headers
 
-    async with session.get(url, cookies=cookies, headers=headers) as response:
-        return await response.text()
+    response = await client.get_cached(url, cookies=cookies, headers=headers, ttl=ttl)
+    return response.text()
 
 
 async def get_poll(bot):
@@ -114,8 +122,7 @@ async def get_poll(bot):
             try:
                 # Fetch page data
                 async with TimingContext(logger, "fetch_page_data") as timing_ctx:
-                    session = await bot.http_client.get_session_with_retry()
-                    html = await fetch(session, url)
+                    html = await fetch(bot.http_client, url)
                     timing_ctx.add_info(page_number=stats["pages_processed"], url=url)
 
                 # Parse JSON data
@@ -165,11 +172,8 @@ async def get_poll(bot):
                                 async with TimingContext(
                                     logger, "fetch_poll_details"
                                 ) as timing_ctx:
-                                    session = (
-                                        await bot.http_client.get_session_with_retry()
-                                    )
                                     html = await fetch(
-                                        session,
+                                        bot.http_client,
                                         posts["relationships"]["poll"]["links"][
                                             "related"
                                         ],
@@ -360,8 +364,7 @@ async def check_and_update_expired_polls(bot, polls):
 
             try:
                 # Fetch latest poll data from Patreon API to get final vote counts
-                session = await bot.http_client.get_session_with_retry()
-                html = await fetch(session, poll["api_url"])
+                html = await fetch(bot.http_client, poll["api_url"])
                 json_data = json.loads(html)
 
                 # Calculate total votes
@@ -469,9 +472,9 @@ async def p_poll(polls, interaction, bot) -> None:
                 # Fetch live poll data from Patreon API
                 logger.info("fetching_live_poll_data", poll_id=poll["id"])
                 try:
-                    # Use the bot's shared HTTP client session for connection pooling
-                    session = await bot.http_client.get_session_with_retry()
-                    html = await fetch(session, poll["api_url"])
+                    html = await fetch(
+                        bot.http_client, poll["api_url"], ttl=POLL_CACHE_TTL
+                    )
                     json_data = json.loads(html)
 
                     # Extract poll options and vote counts
@@ -0,0 +1,373 @@
+"""Message search cog for the Twi Bot Shard.
+
+This module provides the /search command for searching archived messages.
+Full-text queries use the generated ``messages.content_tsv`` column and its
+GIN index; substring queries use the optional pg_trgm index on
+``messages.content``. Results are paginated with keyset cursors so later
+pages cost the same as the first.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.error_handling import handle_interaction_errors
+from utils.exceptions import DatabaseError, ValidationError
+
+RESULTS_PER_PAGE = 5
+SNIPPET_LENGTH = 300
+HEADLINE_OPTIONS = "StartSel=**,StopSel=**,MaxWords=35,MinWords=15,MaxFragments=2"
+
+
+@dataclass
+class SearchFilters:
+    """Filters applied to a message search.
+
+    Attributes:
+        query: The search text.
+        guild_id: The guild to search in.
+        visible_channel_ids: Channels the searching user can read; messages in
+            threads are matched against their parent channel.
+        substring: Match the text anywhere in the content instead of by words.
+        channel_id: Restrict to a channel and its threads.
+        user_id: Restrict to one author.
+        after: Only messages created at or after this time.
+        before: Only messages created before this time.
+    """
+
+    query: str
+    guild_id: int
+    visible_channel_ids: list[int]
+    substring: bool = False
+    channel_id: int | None = None
+    user_id: int | None = None
+    after: datetime | None = None
+    before: datetime | None = None
+
+
+@dataclass
+class SearchPage:
+    """One page of search results.
+
+    Attributes:
+        rows: The result rows for this page.
+        next_cursor: Keyset cursor for the following page, if any.
+    """
+
+    rows: list = field(default_factory=list)
+    next_cursor: tuple | None = None
+
+
+def escape_like(text: str) -> str:
+    """Escape LIKE wildcards so the text is matched literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_search_query(
+    filters: SearchFilters, cursor: tuple | None, limit: int
+) -> tuple[str, list]:
+    """Build the SQL for one page of search results.
+
+    Full-text results are ordered by rank and then recency, substring results
+    by recency only. The cursor holds the sort key of the last row of the
+    previous page, so each page is a bounded index scan rather than an OFFSET.
+    Snippets are only generated for the rows that are returned.
+
+    Args:
+        filters: The search filters.
+        cursor: (rank, message_id) of the last row of the previous page.
+        limit: Maximum number of rows to return.
+
+    Returns:
+        The query text and its arguments.
+    """
+    args: list = [
+        escape_like(filters.query) if filters.substring else filters.query,
+        filters.guild_id,
+        filters.visible_channel_ids,
+    ]
+    conditions = [
+        "m.server_id = $2",
+        "m.deleted IS NOT TRUE",
+        "COALESCE(t.parent_id, m.channel_id) = ANY($3::bigint[])",
+        "t.is_private IS NOT TRUE",
+    ]
+
+    def add(condition: str, value: object) -> None:
+        args.append(value)
+        conditions.append(condition.format(f"${len(args)}"))
+
+    if filters.substring:
+        conditions.append("m.content ILIKE '%' || $1 || '%'")
+        rank = "NULL::real"
+    else:
+        conditions.append("m.content_tsv @@ q")
+        rank = "ts_rank(m.content_tsv, q)"
+
+    if filters.channel_id is not None:
+        add("COALESCE(t.parent_id, m.channel_id) = {}", filters.channel_id)
+    if filters.user_id is not None:
+        add("m.user_id = {}", filters.user_id)
+    if filters.after is not None:
+        add("m.created_at >= {}", filters.after)
+    if filters.before is not None:
+        add("m.created_at < {}", filters.before)
+
+    if cursor is not None:
+        last_rank, last_id = cursor
+        if filters.substring:
+            add("m.message_id < {}", last_id)
+        else:
+            args.append(last_rank)
+            add(f"({rank}, m.message_id) < (${len(args)}::real, {{}})", last_id)
+
+    args.append(limit)
+    limit_param = f"${len(args)}"
+    where = "\n              AND ".join(conditions)
+
+    if filters.substring:
+        query_source = ""
+        snippet = "m.content"
+        order = "m.message_id DESC"
+    else:
+        query_source = "CROSS JOIN websearch_to_tsquery('english', $1) q"
+        snippet = f"ts_headline('english', m.content, q, '{HEADLINE_OPTIONS}')"
+        order = "rank DESC, m.message_id DESC"
+
+    sql = f"""
+        WITH hits AS (
+            SELECT m.message_id, {rank} AS rank
+            FROM messages m
+            {query_source}
+            LEFT JOIN threads t ON t.id = m.channel_id
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT {limit_param}
+        )
+        SELECT h.message_id, h.rank, m.channel_id, m.user_id, m.user_name,
+               m.created_at, m.jump_url, {snippet} AS snippet
+        FROM hits h
+        JOIN messages m ON m.message_id = h.message_id
+        {query_source}
+        ORDER BY h.rank DESC NULLS LAST, h.message_id DESC
+    """
+    return sql, args
+
+
+def substring_snippet(content: str, needle: str) -> str:
+    """Cut an excerpt of content around the first match and bold the match."""
+    index = content.lower().find(needle.lower())
+    if index < 0:
+        return content[:SNIPPET_LENGTH]
+    start = max(0, index - SNIPPET_LENGTH // 3)
+    end = index + len(needle)
+    excerpt = (
+        f"{'…' if start else ''}{content[start:index]}"
+        f"**{content[index:end]}**"
+        f"{content[end : start + SNIPPET_LENGTH]}"
+        f"{'…' if start + SNIPPET_LENGTH < len(content) else ''}"
+    )
+    return excerpt
+
+
+class SearchResultsView(discord.ui.View):
+    """Previous/next navigation over keyset-paginated search results."""
+
+    def __init__(
+        self, cog: "Search", filters: SearchFilters, invoker: discord.abc.User
+    ) -> None:
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.filters = filters
+        self.invoker = invoker
+        # Cursor used to fetch each page visited so far
+        self.cursors: list[tuple | None] = [None]
+        self.page: SearchPage | None = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only let the user who searched turn the pages."""
+        return interaction.user.id == self.invoker.id
+
+    def update_buttons(self) -> None:
+        """Enable the buttons that lead to an existing page."""
+        self.previous_page.disabled = len(self.cursors) <= 1
+        self.next_page.disabled = self.page is None or self.page.next_cursor is None
+
+    async def load(self) -> discord.Embed:
+        """Fetch the current page and build its embed."""
+        self.page = await self.cog.fetch_page(self.filters, self.cursors[-1])
+        self.update_buttons()
+        return self.cog.build_embed(self.filters, self.page, len(self.cursors))
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        self.cursors.pop()
+        await interaction.response.edit_message(embed=await self.load(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        self.cursors.append(self.page.next_cursor)
+        await interaction.response.edit_message(embed=await self.load(), view=self)
+
+
+class Search(commands.Cog, name="Search"):
+    """Search archived messages."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    async def fetch_page(
+        self, filters: SearchFilters, cursor: tuple | None
+    ) -> SearchPage:
+        """Fetch one page of results.
+
+        Args:
+            filters: The search filters.
+            cursor: Keyset cursor from the previous page, or None.
+
+        Returns:
+            The page rows and the cursor for the next page.
+
+        Raises:
+            DatabaseError: If the search query fails.
+        """
+        sql, args = build_search_query(filters, cursor, RESULTS_PER_PAGE + 1)
+        try:
+            rows = await self.bot.db.fetch(sql, *args, use_cache=False)
+        except Exception as e:
+            logging.error(f"SEARCH ERROR: Query failed for {filters.query!r}: {e}")
+            raise DatabaseError(message=f"Search failed: {e}") from e
+
+        page = SearchPage(rows=list(rows[:RESULTS_PER_PAGE]))
+        if len(rows) > RESULTS_PER_PAGE:
+            last = page.rows[-1]
+            page.next_cursor = (last["rank"], last["message_id"])
+        return page
+
+    def build_embed(
+        self, filters: SearchFilters, page: SearchPage, page_number: int
+    ) -> discord.Embed:
+        """Render a page of results."""
+        embed = discord.Embed(
+            title=f"🔎 Search: {filters.query[:200]}",
+            color=discord.Color.blurple(),
+        )
+        if not page.rows:
+            embed.description = "No messages found."
+            return embed
+
+        for row in page.rows:
+            snippet = row["snippet"] or ""
+            if filters.substring:
+                snippet = substring_snippet(snippet, filters.query)
+            snippet = snippet.replace("\n", " ")[:SNIPPET_LENGTH]
+            embed.add_field(
+                name=(
+                    f"{row['user_name']} in #{self._channel_name(row['channel_id'])}"
+                    f" · {row['created_at'].strftime('%Y-%m-%d')}"
+                ),
+                value=f"{snippet or '*no text*'}\n[Jump to message]({row['jump_url']})",
+                inline=False,
+            )
+        embed.set_footer(text=f"Page {page_number}")
+        return embed
+
+    def _channel_name(self, channel_id: int) -> str:
+        """Resolve a channel or thread name from the cache."""
+        channel = self.bot.get_channel(channel_id)
+        return getattr(channel, "name", str(channel_id))
+
+    @staticmethod
+    def visible_channel_ids(guild: discord.Guild, member: discord.Member) -> list[int]:
+        """Get the channels whose history a member can read."""
+        return [
+            channel.id
+            for channel in guild.channels
+            if not isinstance(channel, discord.CategoryChannel)
+            and channel.permissions_for(member).read_message_history
+        ]
+
+    @app_commands.command(name="search", description="Search archived messages")
+    @app_commands.describe(
+        query="Words to search for (supports quotes, OR and -exclusions)",
+        channel="Only search this channel and its threads",
+        user="Only search messages from this user",
+        after="Only messages on or after this date (YYYY-MM-DD)",
+        before="Only messages on or before this date (YYYY-MM-DD)",
+        substring="Match the text anywhere, including inside words",
+    )
+    @handle_interaction_errors
+    async def search(
+        self,
+        interaction: discord.Interaction,
+        query: str,
+        channel: discord.TextChannel | None = None,
+        user: discord.User | None = None,
+        after: str | None = None,
+        before: str | None = None,
+        substring: bool = False,
+    ) -> None:
+        """Search the server's archived messages.
+
+        Args:
+            interaction: The Discord interaction object
+            query: The search text
+            channel: Optional channel filter
+            user: Optional author filter
+            after: Optional start date (YYYY-MM-DD)
+            before: Optional end date (YYYY-MM-DD, inclusive)
+            substring: Whether to match the text anywhere in the content
+
+        Raises:
+            ValidationError: If the query or dates are invalid
+            DatabaseError: If the search query fails
+        """
+        if not interaction.guild:
+            raise ValidationError(message="Search can only be used in a server")
+
+        query = query.strip()
+        if len(query) < (3 if substring else 1) or len(query) > 200:
+            raise ValidationError(
+                message="Query must be 1-200 characters (3+ for substring search)"
+            )
+
+        try:
+            after_date = datetime.strptime(after, "%Y-%m-%d") if after else None
+            before_date = (
+                datetime.strptime(before, "%Y-%m-%d") + timedelta(days=1)
+                if before
+                else None
+            )
+        except ValueError as e:
+            raise ValidationError(message="Dates must be in YYYY-MM-DD format") from e
+
+        filters = SearchFilters(
+            query=query,
+            guild_id=interaction.guild.id,
+            visible_channel_ids=self.visible_channel_ids(
+                interaction.guild, interaction.user
+            ),
+            substring=substring,
+            channel_id=channel.id if channel else None,
+            user_id=user.id if user else None,
+            after=after_date,
+            before=before_date,
+        )
+
+        await interaction.response.defer(ephemeral=True)
+        view = SearchResultsView(self, filters, interaction.user)
+        embed = await view.load()
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+
+
+async def setup(bot: commands.Bot) -> None:
+    """Set up the Search cog."""
+    await bot.add_cog(Search(bot))
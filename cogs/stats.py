@@ -25,6 +25,9 @@ import structlog
 from discord.ext import commands, tasks
 
 import config
+from utils.heavy_hitters import ActivityTopKTracker
+from utils.hyperloglog import UniqueUserSketches
+from utils.reaction_buffer import ReactionBuffer
 
 from .stats_commands import StatsCommandsMixin, StatsQueriesMixin
 from .stats_listeners import StatsListenersMixin
@@ -67,9 +70,22 @@ class StatsCogs(
         self.bot = bot
         self.logger = structlog.get_logger("cogs.stats")
 
+        # In-memory leaderboards fed by the message ingestion path
+        self.activity_topk = ActivityTopKTracker()
+        self.unique_users = UniqueUserSketches()
+
+        # Reaction events, message edits and deletions are coalesced and
+        # written in bulk
+        self.reaction_buffer = ReactionBuffer()
+        self.pending_edits: list[tuple[int, str, datetime]] = []
+        self.pending_deletes: set[int] = set()
+        self.flush_tasks: set[asyncio.Task] = set()
+
         # Start the background stats loop if not in test mode
         if config.logfile != "test":
             self.stats_loop.start()
+            self.topk_checkpoint_loop.start()
+            self.unique_users_flush_loop.start()
             self.logger.info("stats_loop_started")
         else:
             self.logger.info("stats_loop_disabled", reason="test_mode")
@@ -77,12 +93,34 @@ class StatsCogs(
     async def cog_unload(self) -> None:
         """Cleanup when the cog is unloaded.
 
-        Stops the background stats loop to prevent resource leaks.
+        Stops the background loops to prevent resource leaks, writes a final
+        checkpoint of the activity leaderboards and flushes buffered reactions,
+        edits and deletions.
         """
         if hasattr(self, "stats_loop") and self.stats_loop.is_running():
             self.stats_loop.cancel()
             self.logger.info("stats_loop_stopped")
 
+        if self.topk_checkpoint_loop.is_running():
+            self.topk_checkpoint_loop.cancel()
+            try:
+                await self.activity_topk.checkpoint(self.bot.db)
+            except Exception as e:
+                self.logger.error("topk_final_checkpoint_failed", error=str(e))
+
+        for task in self.flush_tasks:
+            task.cancel()
+        await self.flush_reactions()
+        await self.flush_edits()
+        await self.flush_deletes()
+
+        if self.unique_users_flush_loop.is_running():
+            self.unique_users_flush_loop.cancel()
+            try:
+                await self.unique_users.flush(self.bot.db)
+            except Exception as e:
+                self.logger.error("unique_users_final_flush_failed", error=str(e))
+
     async def cog_load(self) -> None:
         """Setup when the cog is loaded.
 
@@ -377,6 +415,52 @@ class StatsCogs(
         except Exception as e:
             self.logger.error("owner_notification_failed", error=str(e))
 
+    @tasks.loop(minutes=5)
+    async def topk_checkpoint_loop(self) -> None:
+        """Periodically persist the activity leaderboard sketches.
+
+        Only buckets modified since the previous run are written, and buckets
+        that have fallen out of their window are deleted. A failed checkpoint
+        is logged and retried on the next run.
+        """
+        try:
+            written = await self.activity_topk.checkpoint(self.bot.db)
+            self.logger.debug("topk_checkpoint_written", buckets=written)
+        except Exception as e:
+            self.logger.error(
+                "topk_checkpoint_error", error=str(e), error_type=type(e).__name__
+            )
+
+    @topk_checkpoint_loop.before_loop
+    async def before_topk_checkpoint_loop(self) -> None:
+        """Restore checkpointed sketches before the first checkpoint runs."""
+        await self.bot.wait_until_ready()
+        try:
+            restored = await self.activity_topk.restore(self.bot.db)
+            self.logger.info("topk_sketches_restored", buckets=restored)
+        except Exception as e:
+            self.logger.error("topk_restore_failed", error=str(e))
+
+    @tasks.loop(minutes=1)
+    async def unique_users_flush_loop(self) -> None:
+        """Periodically write the hourly distinct-user sketches to the database.
+
+        A failed flush is logged and retried on the next run; the sketches stay
+        marked as modified until they are written.
+        """
+        try:
+            written = await self.unique_users.flush(self.bot.db)
+            self.logger.debug("unique_users_flushed", sketches=written)
+        except Exception as e:
+            self.logger.error(
+                "unique_users_flush_error", error=str(e), error_type=type(e).__name__
+            )
+
+    @unique_users_flush_loop.before_loop
+    async def before_unique_users_flush_loop(self) -> None:
+        """Wait until the bot is ready before flushing sketches."""
+        await self.bot.wait_until_ready()
+
 
 async def setup(bot: "Bot") -> None:
     """Setup function to add the cog to the bot.
@@ -5,7 +5,7 @@ This module contains:
 - User-facing query commands (StatsQueriesMixin)
 """
 
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 import asyncpg
@@ -14,7 +14,14 @@ from discord import app_commands
 from discord.ext import commands
 
 from utils.error_handling import handle_command_errors, handle_interaction_errors
-from utils.exceptions import DatabaseError, QueryError, ValidationError
+from utils.exceptions import (
+    DatabaseError,
+    OwnerOnlyError,
+    QueryError,
+    ValidationError,
+)
+from utils.hyperloglog import GUILD_CHANNEL_ID
+from utils.reaction_buffer import EMOJI_USAGE_UPSERT
 
 from .stats_listeners import perform_comprehensive_save, save_message
 
@@ -22,6 +29,65 @@ if TYPE_CHECKING:
     from discord import Interaction
     from discord.ext.commands import Context
 
+# Look-back periods (in days) that the in-memory activity sketches can answer
+SKETCH_WINDOWS = {1: "24h", 7: "7d"}
+
+
+def format_estimate(value: int, relative_error: float | None) -> str:
+    """Format a count for an embed, marking estimates with their error bound.
+
+    Args:
+        value: The count to display
+        relative_error: Relative standard error, or None for exact counts
+
+    Returns:
+        The formatted field value
+    """
+    if relative_error is None:
+        return f"**{value:,}**"
+    return f"**≈{value:,}** (±{relative_error:.1%})"
+
+
+def rank_emote_usage(rows: list, guild_emojis: list) -> tuple[list[dict], list]:
+    """Split emoji usage into a ranking of used emoji and unused guild emoji.
+
+    Args:
+        rows: Usage rows with emoji_key, emoji_id, emoji_name, reactions and
+            messages columns
+        guild_emojis: The guild's custom emoji
+
+    Returns:
+        The used emoji, most used first, and the guild emoji with no usage,
+        oldest first
+    """
+    used = sorted(
+        (
+            {
+                "emoji_key": row["emoji_key"],
+                "emoji_id": row["emoji_id"],
+                "emoji_name": row["emoji_name"],
+                "reactions": row["reactions"],
+                "messages": row["messages"],
+                "total": row["reactions"] + row["messages"],
+            }
+            for row in rows
+        ),
+        key=lambda usage: (-usage["total"], usage["emoji_key"]),
+    )
+    used_keys = {usage["emoji_key"] for usage in used}
+    unused = sorted(
+        (emoji for emoji in guild_emojis if str(emoji.id) not in used_keys),
+        key=lambda emoji: emoji.created_at,
+    )
+    return used, unused
+
+
+def format_emoji(emoji_id: int | None, emoji_name: str, animated: bool = False) -> str:
+    """Render a rolled-up emoji for an embed."""
+    if emoji_id is None:
+        return emoji_name
+    return str(discord.PartialEmoji(name=emoji_name, id=emoji_id, animated=animated))
+
 
 class StatsCommandsMixin:
     """Mixin class containing all stats-related command methods."""
@@ -1324,10 +1390,314 @@ class StatsCommandsMixin:
                 "Unexpected error during recent message save operation"
             ) from e
 
+    @commands.command(name="backfill_unique_users", hidden=True)
+    @commands.is_owner()
+    @handle_command_errors
+    async def backfill_unique_users(self, ctx: "Context", days: int = 30) -> None:
+        """Build unique-user sketches from the stored message history.
+
+        Sketches are only used for periods they fully cover, so this lets
+        /stats channel and /stats server estimate periods that predate the
+        bot's live tracking.
+
+        Args:
+            ctx: The command context
+            days: Number of days to backfill (default: 30)
+
+        Raises:
+            DatabaseError: If database operations fail
+        """
+        if days <= 0 or days > 365:
+            await ctx.send("❌ Days must be between 1 and 365.")
+            return
+
+        until = datetime.now()
+        since = until - timedelta(days=days)
+        progress_msg = await ctx.send(
+            f"🔄 Backfilling unique-user sketches for the last {days} days..."
+        )
+
+        total = 0
+        try:
+            for guild in self.bot.guilds:
+                total += await self.unique_users.backfill(
+                    self.bot.db, guild.id, since, until
+                )
+        except asyncpg.PostgresError as e:
+            raise DatabaseError(f"Failed to backfill sketches: {e}") from e
+
+        await progress_msg.edit(
+            content=f"✅ Built {total:,} hourly channel sketches across {len(self.bot.guilds)} guilds."
+        )
+
+    @commands.command(name="backfill_emoji_usage", hidden=True)
+    @commands.is_owner()
+    @handle_command_errors
+    async def backfill_emoji_usage(self, ctx: "Context", days: int = 30) -> None:
+        """Rebuild the daily emoji usage rollups from stored history.
+
+        The rollups are maintained on ingest; this recomputes them for the
+        given period from the reactions and messages tables, e.g. after
+        deploying the rollups or restoring a backup.
+
+        Args:
+            ctx: The command context
+            days: Number of days to rebuild (default: 30)
+
+        Raises:
+            DatabaseError: If database operations fail
+        """
+        if days <= 0 or days > 365:
+            await ctx.send("❌ Days must be between 1 and 365.")
+            return
+
+        since = datetime.combine(
+            (datetime.now() - timedelta(days=days)).date(), datetime.min.time()
+        )
+        progress_msg = await ctx.send(
+            f"🔄 Rebuilding emoji usage for the last {days} days..."
+        )
+
+        try:
+            async with await self.bot.db.transaction() as trans:
+                await trans.conn.execute(
+                    "DELETE FROM emoji_usage_daily WHERE day >= $1", since.date()
+                )
+                reaction_rows = await trans.conn.fetch(
+                    """
+                    SELECT m.server_id AS guild_id,
+                           r.emoji_key,
+                           r.date::date AS day,
+                           MAX(r.emoji_id) AS emoji_id,
+                           MAX(r.emoji_name) AS emoji_name,
+                           COUNT(*) AS uses
+                    FROM reactions r
+                    JOIN messages m ON m.message_id = r.message_id
+                    WHERE r.date >= $1
+                      AND r.removed = FALSE
+                      AND m.server_id IS NOT NULL
+                      AND r.emoji_key IS NOT NULL
+                    GROUP BY 1, 2, 3
+                    """,
+                    since,
+                )
+                message_rows = await trans.conn.fetch(
+                    r"""
+                    SELECT m.server_id AS guild_id,
+                           e.match[2] AS emoji_key,
+                           m.created_at::date AS day,
+                           e.match[2]::bigint AS emoji_id,
+                           MAX(e.match[1]) AS emoji_name,
+                           COUNT(DISTINCT m.message_id) AS uses
+                    FROM messages m
+                    CROSS JOIN LATERAL regexp_matches(
+                        m.content, '<a?:(\w+):(\d+)>', 'g'
+                    ) AS e(match)
+                    WHERE m.created_at >= $1
+                      AND m.server_id IS NOT NULL
+                      AND m.content LIKE '%<%:%>%'
+                    GROUP BY 1, 2, 3
+                    """,
+                    since,
+                )
+                rows = [
+                    (
+                        row["guild_id"],
+                        row["emoji_key"],
+                        row["day"],
+                        row["emoji_id"],
+                        row["emoji_name"],
+                        row["uses"],
+                        0,
+                    )
+                    for row in reaction_rows
+                ] + [
+                    (
+                        row["guild_id"],
+                        row["emoji_key"],
+                        row["day"],
+                        row["emoji_id"],
+                        row["emoji_name"],
+                        0,
+                        row["uses"],
+                    )
+                    for row in message_rows
+                ]
+                if rows:
+                    await trans.conn.executemany(EMOJI_USAGE_UPSERT, rows)
+        except asyncpg.PostgresError as e:
+            raise DatabaseError(f"Failed to rebuild emoji usage: {e}") from e
+
+        await progress_msg.edit(
+            content=(
+                f"✅ Rebuilt emoji usage from {len(reaction_rows):,} reaction and "
+                f"{len(message_rows):,} message rollup rows."
+            )
+        )
+
 
 class StatsQueriesMixin:
     """Mixin class containing all stats-related query commands."""
 
+    async def fetch_top_users(
+        self, channel_id: int, d_time: datetime, days: int, limit: int = 5
+    ) -> list:
+        """Get the most active users of a channel or thread.
+
+        Served from the activity sketches when the period matches a tracked
+        window, otherwise from the messages table.
+
+        Args:
+            channel_id: The channel or thread ID
+            d_time: Start of the period for the SQL fallback
+            days: Number of days the period spans
+            limit: Maximum number of users to return
+
+        Returns:
+            Rows with user_id and message_count, most active first
+        """
+        window = SKETCH_WINDOWS.get(days)
+        if window is not None:
+            top_users = self.activity_topk.top_users(channel_id, window, limit)
+            if top_users is not None:
+                return top_users
+
+        return await self.bot.db.fetch(
+            """
+            SELECT user_id, COUNT(*) as message_count
+            FROM messages
+            WHERE created_at > $1 AND channel_id = $2
+            GROUP BY user_id
+            ORDER BY message_count DESC
+            LIMIT $3
+            """,
+            d_time,
+            channel_id,
+            limit,
+        )
+
+    async def count_unique_users(
+        self,
+        guild_id: int,
+        d_time: datetime,
+        channel_id: int | None = None,
+        exact: bool = False,
+    ) -> tuple[int, float | None]:
+        """Count the distinct message authors of a channel or server.
+
+        Uses the hourly HyperLogLog sketches when they cover the period, and
+        an exact COUNT(DISTINCT) otherwise or when exact mode is requested.
+
+        Args:
+            guild_id: The guild ID
+            d_time: Start of the period
+            channel_id: The channel ID, or None for the whole server
+            exact: Whether to force the exact SQL count
+
+        Returns:
+            The count and its relative standard error (None when exact)
+        """
+        if not exact:
+            estimate = await self.unique_users.estimate(
+                self.bot.db,
+                guild_id,
+                d_time,
+                GUILD_CHANNEL_ID if channel_id is None else channel_id,
+            )
+            if estimate is not None:
+                return estimate, self.unique_users.relative_error
+
+        if channel_id is None:
+            count = await self.bot.db.fetchval(
+                "SELECT COUNT(DISTINCT user_id) FROM messages WHERE created_at > $1 AND server_id = $2",
+                d_time,
+                guild_id,
+            )
+        else:
+            count = await self.bot.db.fetchval(
+                "SELECT COUNT(DISTINCT user_id) FROM messages WHERE created_at > $1 AND channel_id = $2",
+                d_time,
+                channel_id,
+            )
+        return count or 0, None
+
+    async def fetch_top_channels(
+        self,
+        guild_id: int,
+        channel_ids: list[int],
+        d_time: datetime,
+        days: int,
+        limit: int = 5,
+    ) -> list:
+        """Get the most active channels among a set of guild channels.
+
+        Served from the activity sketches when the period matches a tracked
+        window and the sketches are exact, otherwise from the messages table.
+
+        Args:
+            guild_id: The guild the channels belong to
+            channel_ids: The channel IDs to rank
+            d_time: Start of the period for the SQL fallback
+            days: Number of days the period spans
+            limit: Maximum number of channels to return
+
+        Returns:
+            Rows with channel_id and message_count, most active first
+        """
+        window = SKETCH_WINDOWS.get(days)
+        if window is not None:
+            top_channels = self.activity_topk.top_channels(
+                guild_id, window, limit, among=channel_ids
+            )
+            if top_channels is not None:
+                return top_channels
+
+        return await self.bot.db.fetch(
+            """
+            SELECT channel_id, COUNT(*) as message_count
+            FROM messages
+            WHERE created_at > $1 AND channel_id = ANY($2)
+            GROUP BY channel_id
+            ORDER BY message_count DESC
+            LIMIT $3
+            """,
+            d_time,
+            channel_ids,
+            limit,
+        )
+
+    async def fetch_most_reacted(
+        self, guild_id: int, d_time: datetime, limit: int = 3
+    ) -> list:
+        """Get the guild's most reacted messages since a point in time.
+
+        Reads the per-message reaction counts, and bounds the period by the
+        message snowflake so no join with messages or reactions is needed.
+
+        Args:
+            guild_id: The guild ID
+            d_time: Start of the period (UTC)
+            limit: Maximum number of messages to return
+
+        Returns:
+            Rows with message_id, channel_id and reaction_count, most reacted
+            first
+        """
+        return await self.bot.db.fetch(
+            """
+            SELECT message_id, MAX(channel_id) AS channel_id, SUM(count)::int AS reaction_count
+            FROM message_reaction_counts
+            WHERE guild_id = $1 AND message_id >= $2
+            GROUP BY message_id
+            HAVING SUM(count) > 0
+            ORDER BY reaction_count DESC, message_id DESC
+            LIMIT $3
+            """,
+            guild_id,
+            discord.utils.time_snowflake(d_time.replace(tzinfo=UTC)),
+            limit,
+        )
+
     @app_commands.command(
         name="messagecount",
         description="Retrieve message count from a channel in the last x hours",
@@ -1436,7 +1806,11 @@ class StatsQueriesMixin:
     )
     @handle_interaction_errors
     async def channel_stats(
-        self, interaction: "Interaction", channel: discord.TextChannel, days: int = 7
+        self,
+        interaction: "Interaction",
+        channel: discord.TextChannel,
+        days: int = 7,
+        exact: bool = False,
     ) -> None:
         """Get comprehensive statistics for a specific channel.
 
@@ -1444,12 +1818,17 @@ class StatsQueriesMixin:
             interaction: The Discord interaction object
             channel: The text channel to get statistics for
             days: Number of days to look back (default: 7, max: 365)
+            exact: Count unique users exactly instead of estimating (owner only)
 
         Raises:
             ValidationError: If the days parameter is invalid
+            OwnerOnlyError: If exact mode is requested by a non-owner
             DatabaseError: If database query fails
             QueryError: If there's an issue with the SQL query
         """
+        if exact and not await self.bot.is_owner(interaction.user):
+            raise OwnerOnlyError("Exact counts can only be requested by the bot owner")
+
         # Validate days parameter
         if days <= 0:
             raise ValidationError(
@@ -1469,7 +1848,6 @@ class StatsQueriesMixin:
             stats_query = """
             SELECT
                 COUNT(*) as total_messages,
-                COUNT(DISTINCT user_id) as unique_users,
                 AVG(LENGTH(content)) as avg_message_length,
                 COUNT(*) FILTER (WHERE attachments.id IS NOT NULL) as messages_with_attachments,
                 COUNT(*) FILTER (WHERE embeds.id IS NOT NULL) as messages_with_embeds
@@ -1484,17 +1862,12 @@ class StatsQueriesMixin:
             if results is None:
                 raise QueryError("Database query returned no results")
 
-            # Query for top users in the channel
-            top_users_query = """
-            SELECT user_id, COUNT(*) as message_count
-            FROM messages
-            WHERE created_at > $1 AND channel_id = $2
-            GROUP BY user_id
-            ORDER BY message_count DESC
-            LIMIT 5
-            """
+            unique_users, unique_error = await self.count_unique_users(
+                channel.guild.id, d_time, channel_id=channel.id, exact=exact
+            )
 
-            top_users = await self.bot.db.fetch(top_users_query, d_time, channel.id)
+            # Top users in the channel
+            top_users = await self.fetch_top_users(channel.id, d_time, days)
 
             # Create a formatted response
             embed = discord.Embed(
@@ -1512,7 +1885,7 @@ class StatsQueriesMixin:
 
             embed.add_field(
                 name="👥 Unique Users",
-                value=f"**{results['unique_users']:,}**",
+                value=format_estimate(unique_users, unique_error),
                 inline=True,
             )
 
@@ -1585,15 +1958,19 @@ class StatsQueriesMixin:
         description="Get comprehensive statistics for the current server",
     )
     @handle_interaction_errors
-    async def server_stats(self, interaction: "Interaction", days: int = 7) -> None:
+    async def server_stats(
+        self, interaction: "Interaction", days: int = 7, exact: bool = False
+    ) -> None:
         """Get comprehensive statistics for the current server.
 
         Args:
             interaction: The Discord interaction object
             days: Number of days to look back (default: 7, max: 365)
+            exact: Count active users exactly instead of estimating (owner only)
 
         Raises:
             ValidationError: If the days parameter is invalid
+            OwnerOnlyError: If exact mode is requested by a non-owner
             DatabaseError: If database query fails
             QueryError: If there's an issue with the SQL query
         """
@@ -1603,6 +1980,9 @@ class StatsQueriesMixin:
             )
             return
 
+        if exact and not await self.bot.is_owner(interaction.user):
+            raise OwnerOnlyError("Exact counts can only be requested by the bot owner")
+
         # Validate days parameter
         if days <= 0:
             raise ValidationError(
@@ -1622,7 +2002,6 @@ class StatsQueriesMixin:
             stats_query = """
             SELECT
                 COUNT(*) as total_messages,
-                COUNT(DISTINCT user_id) as active_users,
                 COUNT(DISTINCT channel_id) as active_channels
             FROM messages
             WHERE created_at > $1 AND server_id = $2
@@ -1632,6 +2011,12 @@ class StatsQueriesMixin:
                 stats_query, d_time, interaction.guild.id
             )
 
+            active_users, active_error = await self.count_unique_users(
+                interaction.guild.id, d_time, exact=exact
+            )
+
+            most_reacted = await self.fetch_most_reacted(interaction.guild.id, d_time)
+
             # Query for member join/leave statistics
             member_stats_query = """
             SELECT
@@ -1664,7 +2049,7 @@ class StatsQueriesMixin:
 
             embed.add_field(
                 name="👥 Active Users",
-                value=f"**{results['active_users']:,}**",
+                value=format_estimate(active_users, active_error),
                 inline=True,
             )
 
@@ -1711,6 +2096,18 @@ class StatsQueriesMixin:
                 inline=True,
             )
 
+            if most_reacted:
+                embed.add_field(
+                    name="🔥 Most Reacted Messages",
+                    value="\n".join(
+                        f"{i}. [Message in <#{row['channel_id']}>]"
+                        f"(https://discord.com/channels/{interaction.guild.id}/{row['channel_id']}/{row['message_id']})"
+                        f": {row['reaction_count']:,} reactions"
+                        for i, row in enumerate(most_reacted, 1)
+                    ),
+                    inline=False,
+                )
+
             embed.add_field(
                 name="📅 Time Period",
                 value=f"Last {days} day{'s' if days != 1 else ''}\n"
@@ -2160,18 +2557,9 @@ class StatsQueriesMixin:
             if results is None:
                 raise QueryError("Database query returned no results")
 
-            # Query for top channels in the category
-            top_channels_query = """
-            SELECT channel_id, COUNT(*) as message_count
-            FROM messages
-            WHERE created_at > $1 AND channel_id = ANY($2)
-            GROUP BY channel_id
-            ORDER BY message_count DESC
-            LIMIT 5
-            """
-
-            top_channels = await self.bot.db.fetch(
-                top_channels_query, d_time, category_channel_ids
+            # Top channels in the category
+            top_channels = await self.fetch_top_channels(
+                interaction.guild.id, category_channel_ids, d_time, days
             )
 
             # Create a formatted response
@@ -2326,17 +2714,8 @@ class StatsQueriesMixin:
             if results is None:
                 raise QueryError("Database query returned no results")
 
-            # Query for top users in the thread
-            top_users_query = """
-            SELECT user_id, COUNT(*) as message_count
-            FROM messages
-            WHERE created_at > $1 AND channel_id = $2
-            GROUP BY user_id
-            ORDER BY message_count DESC
-            LIMIT 5
-            """
-
-            top_users = await self.bot.db.fetch(top_users_query, d_time, thread.id)
+            # Top users in the thread
+            top_users = await self.fetch_top_users(thread.id, d_time, days)
 
             # Create a formatted response
             embed = discord.Embed(
@@ -2435,3 +2814,126 @@ class StatsQueriesMixin:
             raise DatabaseError(f"Database query failed: {e}") from e
         except Exception as e:
             raise QueryError(f"Unexpected error during thread stats query: {e}") from e
+
+    @stats.command(
+        name="emotes",
+        description="Rank the server's emotes by use, including unused ones",
+    )
+    @handle_interaction_errors
+    async def emote_stats(self, interaction: "Interaction", days: int = 30) -> None:
+        """Rank emoji by reactions and in-message use.
+
+        Reads the daily emoji usage rollups, so the ranking is instant even
+        for long periods. Custom emotes with no recorded use are listed
+        separately to help when pruning emoji slots.
+
+        Args:
+            interaction: The Discord interaction object
+            days: Number of days to look back (default: 30, max: 365)
+
+        Raises:
+            ValidationError: If the days parameter is invalid
+            DatabaseError: If database query fails
+            QueryError: If there's an issue with the SQL query
+        """
+        if not interaction.guild:
+            await interaction.response.send_message(
+                "❌ This command can only be used in a server!", ephemeral=True
+            )
+            return
+
+        if days <= 0:
+            raise ValidationError(
+                field="days", message="Days must be a positive number"
+            )
+
+        if days > 365:
+            raise ValidationError(
+                field="days", message="Days cannot exceed 365 (1 year)"
+            )
+
+        since = (datetime.now() - timedelta(days=days)).date()
+
+        try:
+            rows = await self.bot.db.fetch(
+                """
+                SELECT emoji_key,
+                       MAX(emoji_id) AS emoji_id,
+                       (ARRAY_AGG(emoji_name ORDER BY day DESC))[1] AS emoji_name,
+                       SUM(reaction_count)::int AS reactions,
+                       SUM(message_count)::int AS messages
+                FROM emoji_usage_daily
+                WHERE guild_id = $1 AND day >= $2
+                GROUP BY emoji_key
+                """,
+                interaction.guild.id,
+                since,
+            )
+
+            used, unused = rank_emote_usage(rows, list(interaction.guild.emojis))
+            guild_emojis = {emoji.id: emoji for emoji in interaction.guild.emojis}
+
+            def render(usage: dict) -> str:
+                emoji = guild_emojis.get(usage["emoji_id"])
+                if emoji is not None:
+                    return str(emoji)
+                return format_emoji(usage["emoji_id"], usage["emoji_name"])
+
+            embed = discord.Embed(
+                title=f"😀 Emote Statistics: {interaction.guild.name}",
+                color=discord.Color.yellow(),
+                timestamp=datetime.now(),
+            )
+
+            if used:
+                embed.add_field(
+                    name="🏆 Most Used",
+                    value="\n".join(
+                        f"{i}. {render(usage)} **{usage['total']:,}** "
+                        f"({usage['reactions']:,} reactions, {usage['messages']:,} messages)"
+                        for i, usage in enumerate(used[:10], 1)
+                    ),
+                    inline=False,
+                )
+            else:
+                embed.description = "No emote usage recorded in this period."
+
+            least_used = [usage for usage in used if usage["emoji_id"] in guild_emojis]
+            if len(least_used) > 10:
+                embed.add_field(
+                    name="📉 Least Used Server Emotes",
+                    value="\n".join(
+                        f"{render(usage)} **{usage['total']:,}**"
+                        for usage in least_used[-10:][::-1]
+                    ),
+                    inline=False,
+                )
+
+            if unused:
+                unused_text = " ".join(str(emoji) for emoji in unused)
+                if len(unused_text) > 1024:
+                    unused_text = unused_text[:1000].rsplit(" ", 1)[0] + " …"
+                embed.add_field(
+                    name=f"💤 Unused Server Emotes ({len(unused)})",
+                    value=unused_text,
+                    inline=False,
+                )
+
+            embed.add_field(
+                name="📅 Time Period",
+                value=f"Last {days} day{'s' if days != 1 else ''}\n"
+                f"From: {since.isoformat()} UTC",
+                inline=False,
+            )
+
+            embed.set_footer(
+                text=f"Requested by {interaction.user.display_name}",
+                icon_url=interaction.user.display_avatar.url,
+            )
+
+            await interaction.response.send_message(embed=embed)
+
+        except asyncpg.PostgresError as e:
+            raise DatabaseError(f"Database query failed: {e}") from e
+        except Exception as e:
+            raise QueryError(f"Unexpected error during emote stats query: {e}") from e
@@ -7,25 +7,163 @@ This module contains:
 """
 
 import asyncio
-from datetime import datetime
-from typing import TYPE_CHECKING
+import re
+from collections.abc import Coroutine, Iterable
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any
 
 import discord
 import structlog
 from discord.ext.commands import Cog
 
+from utils.message_window import CachedMessage
+from utils.reaction_buffer import EMOJI_USAGE_UPSERT
+
 if TYPE_CHECKING:
     from discord.ext import commands
 
 # Module-level logger for utility functions
 logger = structlog.get_logger("cogs.stats_listeners")
 
+# Seconds to collect message edits before writing them together
+EDIT_FLUSH_WINDOW = 0.5
+
+# Seconds to collect message deletions before marking them in one statement
+DELETE_FLUSH_WINDOW = 1.0
+
+# Custom emoji as they appear in message content: <:name:id> or <a:name:id>
+CUSTOM_EMOJI_PATTERN = re.compile(r"<a?:(\w+):(\d+)>")
+
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
 
+def emoji_key(emoji: discord.PartialEmoji | discord.Emoji | str) -> str:
+    """Get the key identifying an emoji in the usage rollups.
+
+    Custom emoji are keyed by their ID so renames don't split their history,
+    unicode emoji by the emoji itself.
+
+    Args:
+        emoji: The emoji to identify
+
+    Returns:
+        The emoji key
+    """
+    if isinstance(emoji, str):
+        return emoji
+    if emoji.id is not None:
+        return str(emoji.id)
+    return emoji.name
+
+
+def custom_emoji_usage(
+    message: discord.Message,
+) -> list[tuple[int, str, date, int, str, int, int]]:
+    """Build emoji usage rows for the custom emoji used in a message.
+
+    Each emoji counts once per message no matter how often it is repeated.
+
+    Args:
+        message: The Discord message to scan
+
+    Returns:
+        Rows for EMOJI_USAGE_UPSERT, one per distinct custom emoji
+    """
+    if message.guild is None or not message.content:
+        return []
+    names = {}
+    for name, emoji_id in CUSTOM_EMOJI_PATTERN.findall(message.content):
+        names[int(emoji_id)] = name
+    day = message.created_at.date()
+    return [
+        (message.guild.id, str(emoji_id), day, emoji_id, name, 0, 1)
+        for emoji_id, name in names.items()
+    ]
+
+
+# Captures the previous content, records the edit and updates the message in
+# one statement. FOR UPDATE makes concurrent edits of one message queue up, so
+# each edit row sees the content written by the edit before it.
+MESSAGE_EDIT_CAPTURE = """
+    WITH old AS (
+        SELECT content FROM messages WHERE message_id = $1 FOR UPDATE
+    ),
+    updated AS (
+        UPDATE messages SET content = $2 WHERE message_id = $1
+    )
+    INSERT INTO message_edit(id, old_content, new_content, edit_timestamp)
+    VALUES ($1, (SELECT content FROM old), $2, $3)
+"""
+
+# Batched form of MESSAGE_EDIT_CAPTURE. Several edits of one message in a
+# batch chain together: each edit's old content is the previous edit's new
+# content, and the message ends up with the last one.
+MESSAGE_EDIT_CAPTURE_BATCH = """
+    WITH input AS (
+        SELECT *
+        FROM unnest($1::bigint[], $2::varchar[], $3::timestamp[])
+            WITH ORDINALITY AS t(message_id, new_content, edit_timestamp, ord)
+    ),
+    old AS (
+        SELECT message_id, content
+        FROM messages
+        WHERE message_id = ANY($1::bigint[])
+        FOR UPDATE
+    ),
+    latest AS (
+        SELECT DISTINCT ON (message_id) message_id, new_content
+        FROM input
+        ORDER BY message_id, ord DESC
+    ),
+    updated AS (
+        UPDATE messages m SET content = latest.new_content
+        FROM latest
+        WHERE m.message_id = latest.message_id
+    )
+    INSERT INTO message_edit(id, old_content, new_content, edit_timestamp)
+    SELECT i.message_id,
+           CASE
+               WHEN ROW_NUMBER() OVER w = 1 THEN o.content
+               ELSE LAG(i.new_content) OVER w
+           END,
+           i.new_content,
+           i.edit_timestamp
+    FROM input i
+    LEFT JOIN old o ON o.message_id = i.message_id
+    WINDOW w AS (PARTITION BY i.message_id ORDER BY i.ord)
+    ORDER BY i.ord
+"""
+
+
+async def save_message_edits(
+    bot: "commands.Bot", edits: list[tuple[int, str, datetime]]
+) -> None:
+    """Record message edits and update the stored message content.
+
+    A single edit uses one statement; bursts of edits (e.g. several quick
+    corrections) are written together with the batched statement.
+
+    Args:
+        bot: The Discord bot instance
+        edits: (message_id, new_content, edit_timestamp) tuples, oldest first
+
+    Raises:
+        Exception: If database operations fail
+    """
+    if not edits:
+        return
+    if len(edits) == 1:
+        await bot.db.execute(MESSAGE_EDIT_CAPTURE, *edits[0])
+        return
+    message_ids, contents, timestamps = (
+        list(column) for column in zip(*edits, strict=True)
+    )
+    await bot.db.execute(MESSAGE_EDIT_CAPTURE_BATCH, message_ids, contents, timestamps)
+
+
 async def save_reaction(bot: "commands.Bot", reaction: discord.Reaction) -> None:
     """Save reaction data to the database.
 
@@ -69,7 +207,7 @@ async def save_reaction(bot: "commands.Bot", reaction: discord.Reaction) -> None
                     """
                     INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
                     VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                    ON CONFLICT (message_id, user_id, emoji_id) DO UPDATE SET removed = FALSE
+                    ON CONFLICT (message_id, user_id, emoji_key) DO UPDATE SET removed = FALSE
                     """,
                     reaction_data,
                 )
@@ -96,7 +234,7 @@ async def save_reaction(bot: "commands.Bot", reaction: discord.Reaction) -> None
                     """
                     INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
                     VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                    ON CONFLICT (message_id, user_id, emoji_id) DO UPDATE SET removed = FALSE
+                    ON CONFLICT (message_id, user_id, emoji_key) DO UPDATE SET removed = FALSE
                     """,
                     reaction_data,
                 )
@@ -123,11 +261,28 @@ async def save_reaction(bot: "commands.Bot", reaction: discord.Reaction) -> None
                     """
                     INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
                     VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                    ON CONFLICT (message_id, user_id, emoji_id) DO UPDATE SET removed = FALSE
+                    ON CONFLICT (message_id, user_id, emoji_key) DO UPDATE SET removed = FALSE
                     """,
                     reaction_data,
                 )
 
+        # Discord's count is authoritative, so overwrite rather than add
+        message = reaction.message
+        await bot.db.execute(
+            """
+            INSERT INTO message_reaction_counts(message_id, emoji_key, guild_id, channel_id, emoji_id, emoji_name, count)
+            VALUES($1,$2,$3,$4,$5,$6,$7)
+            ON CONFLICT (message_id, emoji_key) DO UPDATE SET count = EXCLUDED.count
+            """,
+            message.id,
+            emoji_key(reaction.emoji),
+            message.guild.id if message.guild else None,
+            message.channel.id,
+            getattr(reaction.emoji, "id", None),
+            getattr(reaction.emoji, "name", reaction.emoji),
+            reaction.count,
+        )
+
     except Exception as e:
         logger.error("save_reaction_failed", error=str(e))
         raise
@@ -154,7 +309,7 @@ async def save_message(bot: "commands.Bot", message: discord.Message) -> None:
         )
 
         # Insert the message (with conflict handling for duplicates)
-        await bot.db.execute(
+        status = await bot.db.execute(
             """
             INSERT INTO messages(message_id, created_at, content, user_name, server_name, server_id, channel_id, channel_name, user_id, user_nick, jump_url, is_bot, deleted, reference)
             VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14)
@@ -176,6 +331,17 @@ async def save_message(bot: "commands.Bot", message: discord.Message) -> None:
             message.reference.message_id if message.reference else None,
         )
 
+        # Only feed the aggregates for rows that were actually new, so
+        # re-saving history during backfills doesn't double count
+        if status == "INSERT 0 1":
+            stats_cog = bot.get_cog("stats")
+            if stats_cog is not None:
+                stats_cog.record_ingested_message(message)
+
+            emoji_rows = custom_emoji_usage(message)
+            if emoji_rows:
+                await bot.db.execute_many(EMOJI_USAGE_UPSERT, emoji_rows)
+
         # Handle attachments
         if message.attachments:
             attachment_data = [
@@ -544,6 +710,13 @@ async def perform_comprehensive_save(
                     stats_cog.message_deleted, name="on_raw_message_delete"
                 )
                 listeners_enabled += 1
+            if stats_cog.messages_bulk_deleted not in bot.extra_events.get(
+                "on_raw_bulk_message_delete", []
+            ):
+                bot.add_listener(
+                    stats_cog.messages_bulk_deleted, name="on_raw_bulk_message_delete"
+                )
+                listeners_enabled += 1
             if stats_cog.message_edited not in bot.extra_events.get(
                 "on_raw_message_edit", []
             ):
@@ -590,6 +763,22 @@ async def perform_comprehensive_save(
 class StatsListenersMixin:
     """Mixin class containing all stats-related event listeners."""
 
+    def record_ingested_message(self, message: discord.Message) -> None:
+        """Feed a newly stored message into the in-memory activity aggregates.
+
+        Args:
+            message: The Discord message that was just inserted
+        """
+        if message.guild is None:
+            return
+        timestamp = message.created_at.timestamp()
+        self.activity_topk.observe(
+            message.guild.id, message.channel.id, message.author.id, timestamp
+        )
+        self.unique_users.observe(
+            message.guild.id, message.channel.id, message.author.id, timestamp
+        )
+
     @Cog.listener("on_message")
     async def save_listener(self, message: discord.Message) -> None:
         """Listen for new messages and save them to the database.
@@ -598,6 +787,9 @@ class StatsListenersMixin:
             message: The Discord message object
         """
         if not isinstance(message.channel, discord.channel.DMChannel):
+            window = getattr(self.bot, "message_window", None)
+            if window is not None:
+                window.add(message.channel.id, CachedMessage.from_message(message))
             try:
                 await save_message(self.bot, message)
             except Exception as e:
@@ -605,7 +797,9 @@ class StatsListenersMixin:
 
     @Cog.listener("on_raw_message_edit")
     async def message_edited(self, payload: discord.RawMessageUpdateEvent) -> None:
-        """Listen for message edits and update the database.
+        """Listen for message edits and queue them for the database.
+
+        Edits arriving within a short window are written together.
 
         Args:
             payload: The raw message update event payload
@@ -617,30 +811,24 @@ class StatsListenersMixin:
                 and payload.data["edited_timestamp"] is not None
             ):
                 logger.debug("message_edited", message_id=payload.data.get("id"))
-                old_content = await self.bot.db.fetchval(
-                    "SELECT content FROM messages where message_id = $1 LIMIT 1",
-                    int(payload.data["id"]),
-                )
-                logger.debug(
-                    "old_content_fetched",
-                    content_length=len(old_content) if old_content else 0,
-                )
-                await self.bot.db.execute(
-                    "INSERT INTO message_edit(id, old_content, new_content, edit_timestamp) VALUES ($1,$2,$3,$4)",
-                    int(payload.data["id"]),
-                    old_content,
-                    payload.data["content"],
-                    datetime.fromisoformat(payload.data["edited_timestamp"]).replace(
-                        tzinfo=None
-                    ),
-                )
-                logger.debug("message_edit_inserted")
-                await self.bot.db.execute(
-                    "UPDATE messages set content = $1 WHERE message_id = $2",
-                    payload.data["content"],
-                    int(payload.data["id"]),
+                window = getattr(self.bot, "message_window", None)
+                if window is not None:
+                    window.update_content(
+                        payload.channel_id,
+                        int(payload.data["id"]),
+                        payload.data["content"],
+                    )
+                self.pending_edits.append(
+                    (
+                        int(payload.data["id"]),
+                        payload.data["content"],
+                        datetime.fromisoformat(
+                            payload.data["edited_timestamp"]
+                        ).replace(tzinfo=None),
+                    )
                 )
-                logger.debug("message_content_updated")
+                if len(self.pending_edits) == 1:
+                    self.schedule_flush(self.flush_edits(delay=EDIT_FLUSH_WINDOW))
         except Exception as e:
             logger.exception(
                 "message_edited_error",
@@ -648,108 +836,154 @@ class StatsListenersMixin:
                 error=str(e),
             )
 
+    async def flush_edits(self, delay: float = 0) -> None:
+        """Write the queued message edits to the database.
+
+        Args:
+            delay: Seconds to wait before flushing, letting the window fill
+        """
+        if delay:
+            await asyncio.sleep(delay)
+        edits, self.pending_edits = self.pending_edits, []
+        try:
+            await save_message_edits(self.bot, edits)
+            if edits:
+                logger.debug("message_edits_flushed", count=len(edits))
+        except Exception as e:
+            logger.exception("message_edit_flush_error", count=len(edits), error=str(e))
+
     @Cog.listener("on_raw_message_delete")
     async def message_deleted(self, payload: discord.RawMessageDeleteEvent) -> None:
-        """Listen for message deletions and mark them as deleted in the database.
+        """Listen for message deletions and queue them to be marked as deleted.
 
         Args:
             payload: The raw message delete event payload
         """
-        await self.bot.db.execute(
-            "UPDATE public.messages SET deleted = true WHERE message_id = $1",
-            payload.message_id,
+        window = getattr(self.bot, "message_window", None)
+        if window is not None:
+            window.remove([payload.message_id], payload.channel_id)
+        self.queue_deletes([payload.message_id])
+
+    @Cog.listener("on_raw_bulk_message_delete")
+    async def messages_bulk_deleted(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ) -> None:
+        """Listen for bulk deletions (purges) and queue them as deleted.
+
+        Args:
+            payload: The raw bulk message delete event payload
+        """
+        logger.debug(
+            "messages_bulk_deleted",
+            channel_id=payload.channel_id,
+            count=len(payload.message_ids),
         )
+        window = getattr(self.bot, "message_window", None)
+        if window is not None:
+            window.remove(payload.message_ids, payload.channel_id)
+        self.queue_deletes(payload.message_ids)
+
+    def queue_deletes(self, message_ids: Iterable[int]) -> None:
+        """Queue message IDs for the next batched soft-delete.
+
+        Args:
+            message_ids: The deleted message IDs
+        """
+        first = not self.pending_deletes
+        self.pending_deletes.update(message_ids)
+        if first and self.pending_deletes:
+            self.schedule_flush(self.flush_deletes(delay=DELETE_FLUSH_WINDOW))
+
+    async def flush_deletes(self, delay: float = 0) -> None:
+        """Mark all queued messages as deleted with one statement.
+
+        Args:
+            delay: Seconds to wait before flushing, letting the window fill
+        """
+        if delay:
+            await asyncio.sleep(delay)
+        message_ids, self.pending_deletes = list(self.pending_deletes), set()
+        if not message_ids:
+            return
+        try:
+            status = await self.bot.db.execute(
+                "UPDATE public.messages SET deleted = true WHERE message_id = ANY($1::bigint[]) AND deleted IS NOT TRUE",
+                message_ids,
+            )
+            logger.debug(
+                "message_deletes_flushed", queued=len(message_ids), status=status
+            )
+        except Exception as e:
+            logger.exception(
+                "message_delete_flush_error", count=len(message_ids), error=str(e)
+            )
 
     @Cog.listener("on_raw_reaction_add")
     async def reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
-        """Listen for reaction additions and save them to the database.
+        """Listen for reaction additions and buffer them for the next flush.
 
         Args:
             payload: The raw reaction action event payload
         """
-        try:
-            current_time = datetime.now().replace(tzinfo=None)
-
-            # Use transaction for consistency
-            async with await self.bot.db.transaction() as trans:
-                if payload.emoji.is_custom_emoji():
-                    await trans.conn.execute(
-                        """
-                        INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
-                        VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                        ON CONFLICT (message_id, user_id, emoji_id) DO UPDATE SET removed = FALSE
-                        """,
-                        None,
-                        payload.message_id,
-                        payload.user_id,
-                        payload.emoji.name,
-                        payload.emoji.animated,
-                        payload.emoji.id,
-                        f"https://cdn.discordapp.com/emojis/{payload.emoji.id}.{'gif' if payload.emoji.animated else 'png'}",
-                        current_time,
-                        payload.emoji.is_custom_emoji(),
-                    )
-                elif isinstance(payload.emoji, str):
-                    await trans.conn.execute(
-                        """
-                        INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
-                        VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                        ON CONFLICT (message_id, user_id, emoji_id) DO UPDATE SET removed = FALSE
-                        """,
-                        payload.emoji,
-                        payload.message_id,
-                        payload.user_id,
-                        None,
-                        False,
-                        None,
-                        None,
-                        current_time,
-                        False,
-                    )
-                else:
-                    await trans.conn.execute(
-                        """
-                        INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
-                        VALUES($1,$2,$3,$4,$5,$6,$7,$8,$9)
-                        ON CONFLICT (message_id, user_id, unicode_emoji) DO UPDATE SET removed = FALSE
-                        """,
-                        payload.emoji.name,
-                        payload.message_id,
-                        payload.user_id,
-                        payload.emoji.name,
-                        None,
-                        None,
-                        None,
-                        current_time,
-                        payload.emoji.is_custom_emoji(),
-                    )
-        except Exception as e:
-            logger.exception("reaction_add_error", error=str(e))
+        self.buffer_reaction(payload, added=True)
 
     @Cog.listener("on_raw_reaction_remove")
     async def reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
-        """Listen for reaction removals and mark them as removed in the database.
+        """Listen for reaction removals and buffer them for the next flush.
 
         Args:
             payload: The raw reaction action event payload
         """
+        self.buffer_reaction(payload, added=False)
+
+    def buffer_reaction(
+        self, payload: discord.RawReactionActionEvent, added: bool
+    ) -> None:
+        """Record a reaction event and make sure a flush is scheduled.
+
+        Events for the same message, user and emoji within one window collapse
+        to the last one, so reaction storms cost one write per window.
+
+        Args:
+            payload: The raw reaction action event payload
+            added: Whether the reaction was added or removed
+        """
+        first = self.reaction_buffer.record(payload, added, emoji_key(payload.emoji))
+        if self.reaction_buffer.full:
+            self.schedule_flush(self.flush_reactions())
+        elif first:
+            self.schedule_flush(self.flush_reactions(delay=self.reaction_buffer.window))
+
+    def schedule_flush(self, flush: Coroutine[Any, Any, None]) -> None:
+        """Run a buffer flush in the background.
+
+        Args:
+            flush: The flush coroutine to run
+        """
+        task = asyncio.create_task(flush)
+        # Keep a reference so pending flushes aren't garbage collected
+        self.flush_tasks.add(task)
+        task.add_done_callback(self.flush_tasks.discard)
+
+    async def flush_reactions(self, delay: float = 0) -> None:
+        """Write the buffered reaction changes to the database.
+
+        Args:
+            delay: Seconds to wait before flushing, letting the window fill
+        """
+        if delay:
+            await asyncio.sleep(delay)
         try:
-            if payload.emoji.is_custom_emoji():
-                await self.bot.db.execute(
-                    "UPDATE reactions SET removed = TRUE WHERE message_id = $1 AND user_id = $2 AND emoji_id = $3",
-                    payload.message_id,
-                    payload.user_id,
-                    payload.emoji.id,
-                )
-            else:
-                await self.bot.db.execute(
-                    "UPDATE reactions SET removed = TRUE WHERE message_id = $1 AND user_id = $2 AND unicode_emoji = $3",
-                    payload.message_id,
-                    payload.user_id,
-                    str(payload.emoji),
+            added, removed = await self.reaction_buffer.flush(self.bot.db)
+            if added or removed:
+                logger.debug(
+                    "reactions_flushed",
+                    added=added,
+                    removed=removed,
+                    **self.reaction_buffer.get_stats(),
                 )
         except Exception as e:
-            logger.exception("reaction_remove_error", error=str(e))
+            logger.exception("reaction_flush_error", error=str(e))
 
     @Cog.listener("on_member_join")
     async def member_join(self, member: discord.Member) -> None:
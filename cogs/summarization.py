@@ -1,19 +1,35 @@
+from functools import partial
+
 import discord
 import openai
 import structlog
 from discord import app_commands
 from discord.ext import commands
-from openai import OpenAI
 
-import config
+from utils.chunked_summary import ChunkSummaryCache, map_reduce_summary
 from utils.error_handling import handle_interaction_errors
 from utils.exceptions import (
     APIError,
     ExternalServiceError,
     ValidationError,
 )
+from utils.message_window import CachedMessage, load_recent_messages
 
-client = OpenAI(api_key=config.openai_api_key)
+# Estimated tokens per chunk of conversation sent in one completion
+CHUNK_TOKEN_BUDGET = 3000
+# Completions in flight at once for one command
+CHUNK_CONCURRENCY = 4
+
+SUMMARY_PROMPT = "Summarize the following conversation with attention to each user's messages. Be concise but comprehensive."
+SUMMARY_REDUCE_PROMPT = (
+    "The following are summaries of consecutive parts of one conversation, oldest first. "
+    "Combine them into a single summary with attention to each user's messages. Be concise but comprehensive."
+)
+MODERATION_REDUCE_PROMPT = (
+    "The following are moderation reports on consecutive parts of one conversation, oldest first. "
+    "Combine them into a single report: summarize the conversation and keep every specific example of a possible rule violation. "
+    "If no part found violations, state that clearly."
+)
 
 
 class SummarizationCog(commands.Cog):
@@ -21,12 +37,62 @@ class SummarizationCog(commands.Cog):
         self.bot = bot
         self.server_rules = server_rules
         self.logger = structlog.get_logger("cogs.summarization")
+        self.chunk_cache = ChunkSummaryCache()
+
+    async def complete(
+        self, system: str, content: str, max_tokens: int, temperature: float
+    ) -> str:
+        """Run one chat completion through the bot's shared OpenAI client.
+
+        Args:
+            system: The system prompt
+            content: The user message
+            max_tokens: Maximum length of the response
+            temperature: Sampling temperature
+
+        Returns:
+            The completion text
+
+        Raises:
+            APIError: If OpenAI returns an empty response
+        """
+        text = await self.bot.openai.chat(
+            [
+                {"role": "system", "content": system},
+                {"role": "user", "content": content},
+            ],
+            model="gpt-5",
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if not text:
+            raise APIError("OpenAI API returned empty response")
+        return text
+
+    async def fetch_recent_messages(
+        self, channel: discord.abc.Messageable, limit: int
+    ) -> list[CachedMessage]:
+        """Get the last messages of a channel, newest first.
+
+        Args:
+            channel: The channel to read
+            limit: Number of messages to return
+
+        Returns:
+            The messages, newest first
+        """
+        return await load_recent_messages(
+            channel,
+            limit,
+            window=getattr(self.bot, "message_window", None),
+            db=getattr(self.bot, "db", None),
+        )
 
     async def summarize_messages(self, messages):
         """Summarize a list of Discord messages using OpenAI API.
 
         Args:
-            messages: List of Discord message objects to summarize
+            messages: Message records to summarize, newest first
 
         Returns:
             str: The summarized content from OpenAI
@@ -41,7 +107,7 @@ class SummarizationCog(commands.Cog):
 
         # Filter out messages from bots and reverse the list
         valid_messages = [
-            msg for msg in messages if not msg.author.bot and msg.content.strip()
+            msg for msg in messages if not msg.is_bot and msg.content.strip()
         ]
 
         if not valid_messages:
@@ -49,45 +115,27 @@ class SummarizationCog(commands.Cog):
                 message="No valid messages found to summarize (all messages are from bots or empty)"
             )
 
-        conversation = "\n".join(
-            [
-                f"{msg.author.display_name}: {msg.content}"
-                for msg in reversed(valid_messages)
-            ]
-        )
-
-        # Limit conversation length to prevent API errors
-        max_length = 8000  # Conservative limit for GPT-4o-mini
-        if len(conversation) > max_length:
-            conversation = (
-                conversation[:max_length] + "\n[Conversation truncated due to length]"
-            )
-            self.logger.warning(
-                f"Conversation truncated to {max_length} characters for summarization"
-            )
+        lines = [
+            (msg.id, f"{msg.author_name}: {msg.content}")
+            for msg in reversed(valid_messages)
+        ]
 
         self.logger.info(
-            f"Summarizing conversation with {len(valid_messages)} messages, {len(conversation)} characters"
+            f"Summarizing conversation with {len(valid_messages)} messages, {sum(len(line) for _, line in lines)} characters"
         )
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-5",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Summarize the following conversation with attention to each user's messages. Be concise but comprehensive.",
-                    },
-                    {"role": "user", "content": conversation},
-                ],
-                max_tokens=500,  # Limit response length
-                temperature=0.3,  # Lower temperature for more consistent summaries
+            # Long conversations are summarized in chunks and then combined
+            summary = await map_reduce_summary(
+                lines,
+                # Lower temperature for more consistent summaries
+                partial(self.complete, max_tokens=500, temperature=0.3),
+                SUMMARY_PROMPT,
+                SUMMARY_REDUCE_PROMPT,
+                budget=CHUNK_TOKEN_BUDGET,
+                concurrency=CHUNK_CONCURRENCY,
+                cache=self.chunk_cache,
             )
-
-            if not response.choices or not response.choices[0].message.content:
-                raise APIError("OpenAI API returned empty response")
-
-            summary = response.choices[0].message.content.strip()
             self.logger.info(
                 f"Successfully generated summary of {len(summary)} characters"
             )
@@ -117,7 +165,7 @@ class SummarizationCog(commands.Cog):
         """Moderate a list of Discord messages using OpenAI API to check for rule violations.
 
         Args:
-            messages: List of Discord message objects to moderate
+            messages: Message records to moderate, newest first
 
         Returns:
             str: The moderation report from OpenAI
@@ -132,7 +180,7 @@ class SummarizationCog(commands.Cog):
 
         # Filter out messages from bots and reverse the list
         valid_messages = [
-            msg for msg in messages if not msg.author.bot and msg.content.strip()
+            msg for msg in messages if not msg.is_bot and msg.content.strip()
         ]
 
         if not valid_messages:
@@ -140,51 +188,33 @@ class SummarizationCog(commands.Cog):
                 message="No valid messages found to moderate (all messages are from bots or empty)"
             )
 
-        conversation = "\n".join(
-            [
-                f"{msg.author.display_name}: {msg.content}"
-                for msg in reversed(valid_messages)
-            ]
-        )
-
-        # Limit conversation length to prevent API errors
-        max_length = 7000  # Conservative limit for GPT-4o-mini (leaving room for rules)
-        if len(conversation) > max_length:
-            conversation = (
-                conversation[:max_length] + "\n[Conversation truncated due to length]"
-            )
-            self.logger.warning(
-                f"Conversation truncated to {max_length} characters for moderation"
-            )
+        lines = [
+            (msg.id, f"{msg.author_name}: {msg.content}")
+            for msg in reversed(valid_messages)
+        ]
 
         rule_check = "\n".join(
             [f"{i + 1}. {rule}" for i, rule in enumerate(self.server_rules)]
         )
 
         self.logger.info(
-            f"Moderating conversation with {len(valid_messages)} messages, {len(conversation)} characters"
+            f"Moderating conversation with {len(valid_messages)} messages, {sum(len(line) for _, line in lines)} characters"
         )
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-5",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a content moderator. Summarize the conversation and check if any of these rules were broken:\n{rule_check}\n\n"
-                        f"Provide specific examples if you think a message might have broken a rule, even if unsure, so a human moderator can decide. "
-                        f"Be objective and highlight potential issues clearly. If no violations are found, state that clearly.",
-                    },
-                    {"role": "user", "content": conversation},
-                ],
-                max_tokens=600,  # Limit response length
-                temperature=0.2,  # Lower temperature for more consistent moderation
+            # Long conversations are checked in chunks and the reports combined
+            report = await map_reduce_summary(
+                lines,
+                # Lower temperature for more consistent moderation
+                partial(self.complete, max_tokens=600, temperature=0.2),
+                f"You are a content moderator. Summarize the conversation and check if any of these rules were broken:\n{rule_check}\n\n"
+                f"Provide specific examples if you think a message might have broken a rule, even if unsure, so a human moderator can decide. "
+                f"Be objective and highlight potential issues clearly. If no violations are found, state that clearly.",
+                f"{MODERATION_REDUCE_PROMPT}\n\nThe rules are:\n{rule_check}",
+                budget=CHUNK_TOKEN_BUDGET,
+                concurrency=CHUNK_CONCURRENCY,
+                cache=self.chunk_cache,
             )
-
-            if not response.choices or not response.choices[0].message.content:
-                raise APIError("OpenAI API returned empty response")
-
-            report = response.choices[0].message.content.strip()
             self.logger.info(
                 f"Successfully generated moderation report of {len(report)} characters"
             )
@@ -241,10 +271,9 @@ class SummarizationCog(commands.Cog):
 
         try:
             # Fetch messages from the channel
-            messages = [
-                message
-                async for message in interaction.channel.history(limit=num_messages)
-            ]
+            messages = await self.fetch_recent_messages(
+                interaction.channel, num_messages
+            )
 
             self.logger.info(
                 f"Summarize command called by {interaction.user.name} ({interaction.user.id}) for {num_messages} messages in {interaction.channel.name}"
@@ -317,10 +346,9 @@ class SummarizationCog(commands.Cog):
 
         try:
             # Fetch messages from the channel
-            messages = [
-                message
-                async for message in interaction.channel.history(limit=num_messages)
-            ]
+            messages = await self.fetch_recent_messages(
+                interaction.channel, num_messages
+            )
 
             self.logger.info(
                 f"Moderate command called by {interaction.user.name} ({interaction.user.id}) for {num_messages} messages in {interaction.channel.name}"
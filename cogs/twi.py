@@ -12,7 +12,6 @@ import logging
 import discord
 from discord import app_commands
 from discord.ext import commands
-from googleapiclient.discovery import build
 
 import config
 from cogs.patreon_poll import fetch
@@ -28,22 +27,27 @@ from utils.permissions import (
     app_is_bot_channel,
 )
 
+# Seconds wiki search results are reused before asking the wiki again
+WIKI_CACHE_TTL = 3600
 
-def google_search(search_term, api_key, cse_id, **kwargs):
+
+async def google_search(search_term, api_key, cse_id, client, **kwargs):
     """Perform a Google Custom Search using the provided API credentials.
 
     Args:
         search_term (str): The search query to execute
         api_key (str): Google API key for authentication
         cse_id (str): Custom Search Engine ID
+        client (GoogleSearchClient): The bot's search client, which caches
+            results and tracks the daily quota
         **kwargs: Additional parameters to pass to the search API
 
     Returns:
-        dict: The search results as returned by the Google API
+        dict: The search results in the shape of the Google API response,
+            with a ``source`` key telling whether they came from the API or
+            the cache
     """
-    service = build("customsearch", "v1", developerKey=api_key)
-    res = service.cse().list(q=search_term, cx=cse_id, num=9, **kwargs).execute()
-    return res
+    return await client.search(search_term, api_key, cse_id, num=9, **kwargs)
 
 
 class TwiCog(commands.Cog, name="The Wandering Inn"):
@@ -296,21 +300,10 @@ class TwiCog(commands.Cog, name="The Wandering Inn"):
             # Defer response since API calls might take time
             await interaction.response.defer()
 
-            # Use the bot's shared HTTP client session for connection pooling
-            try:
-                session = await self.bot.http_client.get_session_with_retry()
-            except Exception as e:
-                logging.error(
-                    f"TWI WIKI ERROR: Failed to get HTTP session for user {interaction.user.id}: {e}"
-                )
-                raise ExternalServiceError(
-                    message="❌ **Connection Error**\nFailed to establish connection to wiki"
-                ) from e
-
             # Search for articles
             try:
                 search_url = f"https://thewanderinginn.fandom.com/api.php?action=query&generator=search&gsrsearch={query}&format=json&prop=info|images&inprop=url"
-                html = await fetch(session, search_url)
+                html = await fetch(self.bot.http_client, search_url, ttl=WIKI_CACHE_TTL)
 
                 if not html:
                     raise ExternalServiceError(
@@ -402,7 +395,9 @@ class TwiCog(commands.Cog, name="The Wandering Inn"):
                     image_title = sorted_json_data[0]["images"][0]["title"]
                     image_url = f"https://thewanderinginn.fandom.com/api.php?action=query&format=json&titles={image_title}&prop=imageinfo&iiprop=url"
 
-                    image_json = await fetch(session, image_url)
+                    image_json = await fetch(
+                        self.bot.http_client, image_url, ttl=WIKI_CACHE_TTL
+                    )
                     if image_json:
                         image_data = json.loads(image_json)
                         image_pages = image_data.get("query", {}).get("pages", {})
@@ -488,8 +483,11 @@ class TwiCog(commands.Cog, name="The Wandering Inn"):
 
             # Perform Google search with error handling
             try:
-                results = google_search(
-                    query, config.google_api_key, config.google_cse_id
+                results = await google_search(
+                    query,
+                    config.google_api_key,
+                    config.google_cse_id,
+                    client=self.bot.google_search,
                 )
 
                 if not results:
@@ -501,6 +499,10 @@ class TwiCog(commands.Cog, name="The Wandering Inn"):
                 logging.error(
                     f"TWI FIND ERROR: Google search failed for user {interaction.user.id}: {e}"
                 )
+                if self.bot.google_search.remaining == 0:
+                    raise ExternalServiceError(
+                        message="❌ **Search Limit Reached**\nThe daily search limit has been reached. Please try again tomorrow."
+                    ) from e
                 raise ExternalServiceError(
                     message="❌ **Search Failed**\nFailed to search wanderinginn.com. Please try again later."
                 ) from e
@@ -587,7 +589,12 @@ class TwiCog(commands.Cog, name="The Wandering Inn"):
                     inline=False,
                 )
 
-            embed.set_footer(text="Search powered by Google Custom Search")
+            if results.get("source") == "local":
+                embed.set_footer(
+                    text="Daily search limit nearly reached, showing matches from earlier searches"
+                )
+            else:
+                embed.set_footer(text="Search powered by Google Custom Search")
 
             await interaction.followup.send(embed=embed)
             logging.info(
@@ -97,6 +97,9 @@ class BotConfig(BaseModel):
     google_cse_id: str | None = Field(
         None, description="Google Custom Search Engine ID"
     )
+    google_search_daily_quota: int = Field(
+        100, description="Google Custom Search queries allowed per day"
+    )
     client_id: str | None = Field(None, description="Client ID")
     client_secret: str | None = Field(
         None, description="Client secret", json_schema_extra={"sensitive": True}
@@ -219,6 +222,21 @@ class BotConfig(BaseModel):
         description="Whether to sync commands globally on startup (set via SYNC_ON_START)",
     )
 
+    # ask_db settings
+    ask_db_max_cost: float = Field(
+        100000.0,
+        description="Highest planner cost estimate a generated ask_db query may have",
+    )
+    ask_db_timeout: float = Field(
+        10.0, description="Seconds after which a generated ask_db query is cancelled"
+    )
+
+    # HTTP client settings
+    http_prewarm_urls: list[str] = Field(
+        default_factory=list,
+        description="URLs whose hosts get pooled connections opened at startup",
+    )
+
     # Class variables to track configuration
     _sensitive_fields: set[str] = {
         "bot_token",
@@ -425,6 +443,7 @@ def load_from_env() -> BotConfig:
     # Get optional API keys and credentials
     google_api_key = get_env("GOOGLE_API_KEY")
     google_cse_id = get_env("GOOGLE_CSE_ID")
+    google_search_daily_quota = int(get_env("GOOGLE_SEARCH_DAILY_QUOTA", "100"))
     client_id = get_env("CLIENT_ID")
     client_secret = get_env("CLIENT_SECRET")
     openai_api_key = get_env("OPENAI_API_KEY")
@@ -460,6 +479,17 @@ def load_from_env() -> BotConfig:
     sync_on_start_str = get_env("SYNC_ON_START", "false")
     sync_on_start = sync_on_start_str.lower() in ("true", "1", "yes")
 
+    # ask_db settings
+    ask_db_max_cost = float(get_env("ASK_DB_MAX_COST", "100000"))
+    ask_db_timeout = float(get_env("ASK_DB_TIMEOUT", "10"))
+
+    # HTTP client settings
+    http_prewarm_urls = [
+        url.strip()
+        for url in get_env("HTTP_PREWARM_URLS", "").split(",")
+        if url.strip()
+    ]
+
     # Check for missing required variables
     if missing_vars:
         raise ValueError(
@@ -505,6 +535,7 @@ def load_from_env() -> BotConfig:
             bot_token=bot_token,
             google_api_key=google_api_key,
             google_cse_id=google_cse_id,
+            google_search_daily_quota=google_search_daily_quota,
             host=host,
             db_user=db_user,
             db_password=db_password,
@@ -536,6 +567,9 @@ def load_from_env() -> BotConfig:
             staging_guild_id=staging_guild_id,
             webhooks_enabled=webhooks_enabled,
             sync_on_start=sync_on_start,
+            ask_db_max_cost=ask_db_max_cost,
+            ask_db_timeout=ask_db_timeout,
+            http_prewarm_urls=http_prewarm_urls,
         )
     except ValueError as e:
         # Add more context to validation errors
@@ -580,6 +614,7 @@ if log_level_override is not None:
 bot_token = config.bot_token
 google_api_key = config.google_api_key
 google_cse_id = config.google_cse_id
+google_search_daily_quota = config.google_search_daily_quota
 host = config.host
 DB_user = config.db_user
 DB_password = config.db_password
@@ -621,6 +656,13 @@ staging_guild_id = config.staging_guild_id
 webhooks_enabled = config.webhooks_enabled
 sync_on_start = config.sync_on_start
 
+# ask_db exports
+ask_db_max_cost = config.ask_db_max_cost
+ask_db_timeout = config.ask_db_timeout
+
+# HTTP client exports
+http_prewarm_urls = config.http_prewarm_urls
+
 
 # Helper functions for environment checks
 def is_staging() -> bool:
@@ -0,0 +1,21 @@
+-- Migration: Add checkpoint table for the in-memory activity top-k sketches
+-- The stats cog keeps Space-Saving sketches of the most active users per channel
+-- and the most active channels per guild; their buckets are persisted here so
+-- leaderboards survive restarts.
+
+CREATE TABLE IF NOT EXISTS activity_topk_checkpoints (
+    scope         VARCHAR   NOT NULL,  -- 'channel_users' or 'guild_channels'
+    scope_id      BIGINT    NOT NULL,  -- channel_id or guild_id depending on scope
+    window_name   VARCHAR   NOT NULL,  -- '1h', '24h' or '7d'
+    bucket_start  TIMESTAMP NOT NULL,
+    counters      JSONB     NOT NULL,
+    tracked_since TIMESTAMP NOT NULL,
+    updated_at    TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (scope, scope_id, window_name, bucket_start)
+);
+
+-- Expired buckets are deleted per window by bucket_start
+CREATE INDEX IF NOT EXISTS idx_activity_topk_window_bucket
+ON activity_topk_checkpoints (window_name, bucket_start);
+
+COMMENT ON TABLE activity_topk_checkpoints IS 'Checkpointed Space-Saving sketches backing the /stats leaderboards';
@@ -0,0 +1,22 @@
+-- Migration: Add HyperLogLog sketches for distinct-user counts
+-- The stats cog keeps one sketch per (guild, channel, hour) of message authors.
+-- channel_id 0 holds the guild-wide sketch for the hour. /stats channel and
+-- /stats server merge these instead of running COUNT(DISTINCT user_id).
+
+CREATE TABLE IF NOT EXISTS unique_user_sketches (
+    guild_id    BIGINT    NOT NULL,
+    channel_id  BIGINT    NOT NULL,  -- 0 for the guild-wide sketch
+    hour_start  TIMESTAMP NOT NULL,
+    registers   BYTEA     NOT NULL,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (guild_id, channel_id, hour_start)
+);
+
+-- Earliest time from which each guild's sketches are complete
+CREATE TABLE IF NOT EXISTS unique_user_sketch_coverage (
+    guild_id      BIGINT    PRIMARY KEY,
+    tracked_since TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE unique_user_sketches IS 'Hourly HyperLogLog sketches of message authors per channel and guild';
+COMMENT ON TABLE unique_user_sketch_coverage IS 'Start of complete sketch coverage per guild';
@@ -0,0 +1,13 @@
+-- Migration: Full-text search over archived messages
+-- Adds a generated tsvector column on messages and a GIN index for /search.
+-- Adding a STORED generated column rewrites the messages table; run it during
+-- a maintenance window on large databases.
+
+ALTER TABLE messages
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_messages_content_tsv
+ON messages USING GIN (content_tsv);
+
+COMMENT ON COLUMN messages.content_tsv IS 'English full-text vector of content, used by /search';
@@ -0,0 +1,9 @@
+-- Migration (optional): Substring search over archived messages
+-- Enables /search substring:True to use an index for ILIKE '%text%' matches.
+-- Requires the pg_trgm extension; without this migration substring searches
+-- still work but scan the guild's messages sequentially.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_messages_content_trgm
+ON messages USING GIN (content gin_trgm_ops);
@@ -0,0 +1,21 @@
+-- Migration: Add daily emoji usage rollups
+-- The stats listeners add to these counters as reactions and messages are
+-- ingested, so /stats emotes can rank emoji without scanning reactions or
+-- parsing messages.content. Custom emoji are keyed by their ID, unicode emoji
+-- by the emoji itself.
+
+CREATE TABLE IF NOT EXISTS emoji_usage_daily (
+    guild_id       BIGINT  NOT NULL,
+    emoji_key      VARCHAR NOT NULL,
+    day            DATE    NOT NULL,
+    emoji_id       BIGINT,            -- NULL for unicode emoji
+    emoji_name     VARCHAR,
+    reaction_count INTEGER NOT NULL DEFAULT 0,
+    message_count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, emoji_key, day)
+);
+
+CREATE INDEX IF NOT EXISTS emoji_usage_daily_guild_day_idx
+    ON emoji_usage_daily (guild_id, day);
+
+COMMENT ON TABLE emoji_usage_daily IS 'Reactions and messages using each emoji per guild and day';
@@ -0,0 +1,68 @@
+-- Migration: Normalized reaction emoji key and per-message reaction counts
+-- Unicode reactions store emoji_id = NULL, so the old (message_id, user_id,
+-- emoji_id) conflict target never matched them and every add/remove cycle
+-- inserted another row. emoji_key covers both kinds of emoji (the custom
+-- emoji ID, or the unicode emoji itself) and gets a single unique index.
+-- message_reaction_counts is kept up to date by the stats listeners so
+-- "most reacted" queries don't scan the reactions table.
+-- Adding a STORED generated column rewrites the reactions table; run it
+-- during a maintenance window on large databases.
+
+-- Keep only the latest row for each (message, user, emoji); older duplicates
+-- were left behind by earlier add/remove cycles
+DELETE FROM reactions
+WHERE id IN (
+    SELECT id
+    FROM (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY message_id, user_id, COALESCE(emoji_id::text, unicode_emoji)
+                   ORDER BY id DESC
+               ) AS rn
+        FROM reactions
+    ) ranked
+    WHERE rn > 1
+);
+
+ALTER TABLE reactions
+    ADD COLUMN IF NOT EXISTS emoji_key VARCHAR
+    GENERATED ALWAYS AS (COALESCE(emoji_id::text, unicode_emoji)) STORED;
+
+CREATE UNIQUE INDEX IF NOT EXISTS reactions_message_id_user_id_emoji_key_uindex
+    ON reactions (message_id, user_id, emoji_key);
+
+-- Superseded by the emoji_key index
+DROP INDEX IF EXISTS reactions_message_id_user_id_emoji_id_uindex;
+DROP INDEX IF EXISTS reactions_message_id_user_id_unicode_emoji_uindex;
+
+COMMENT ON COLUMN reactions.emoji_key IS 'Custom emoji ID, or the unicode emoji itself';
+
+CREATE TABLE IF NOT EXISTS message_reaction_counts (
+    message_id BIGINT  NOT NULL,
+    emoji_key  VARCHAR NOT NULL,
+    guild_id   BIGINT,
+    channel_id BIGINT,
+    emoji_id   BIGINT,            -- NULL for unicode emoji
+    emoji_name VARCHAR,
+    count      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (message_id, emoji_key)
+);
+
+CREATE INDEX IF NOT EXISTS message_reaction_counts_guild_message_idx
+    ON message_reaction_counts (guild_id, message_id);
+
+INSERT INTO message_reaction_counts(message_id, emoji_key, guild_id, channel_id, emoji_id, emoji_name, count)
+SELECT r.message_id,
+       r.emoji_key,
+       m.server_id,
+       m.channel_id,
+       MAX(r.emoji_id),
+       MAX(COALESCE(r.emoji_name, r.unicode_emoji)),
+       COUNT(*)
+FROM reactions r
+LEFT JOIN messages m ON m.message_id = r.message_id
+WHERE r.removed = FALSE AND r.emoji_key IS NOT NULL
+GROUP BY r.message_id, r.emoji_key, m.server_id, m.channel_id
+ON CONFLICT (message_id, emoji_key) DO NOTHING;
+
+COMMENT ON TABLE message_reaction_counts IS 'Current number of reactions per message and emoji';
@@ -0,0 +1,16 @@
+-- Migration: Add AO3 work metadata cache
+-- /ao3 and AO3 gallery reposts read work metadata from here instead of
+-- scraping the work page every time. Works requested recently are refreshed
+-- in the background before their entry goes stale.
+
+CREATE TABLE IF NOT EXISTS ao3_work_cache (
+    work_id           BIGINT      PRIMARY KEY,
+    metadata          JSONB       NOT NULL,
+    fetched_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_requested_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ao3_work_cache_last_requested_idx
+    ON ao3_work_cache (last_requested_at);
+
+COMMENT ON TABLE ao3_work_cache IS 'Scraped AO3 work metadata shown by /ao3 and gallery reposts';
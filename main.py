@@ -21,15 +21,21 @@ import time
 import traceback
 from collections.abc import Sequence
 from itertools import cycle
+from pathlib import Path
 
 import asyncpg
 import discord
 from discord.ext import commands
 
 import config
+from utils.ao3_cache import AO3WorkCache
+from utils.blocking_pool import BlockingPool
 from utils.command_groups import admin, gallery_admin, mod
 from utils.error_handling import setup_global_exception_handler
-from utils.http_client import HTTPClient
+from utils.google_search import GoogleSearchClient
+from utils.http_client import HTTPCache, HTTPClient
+from utils.message_window import RecentMessageWindow
+from utils.openai_client import OpenAIService
 from utils.permissions import setup_permissions
 from utils.resource_monitor import ResourceMonitor
 
@@ -160,11 +166,40 @@ class Cognita(commands.Bot):
         )
         self.session_maker = async_session_maker  # SQLAlchemy session maker
 
+        # Recent messages per channel, fed by the stats listeners
+        self.message_window = RecentMessageWindow()
+
         # Track startup time
         self.startup_times: dict[str, float] = {}
 
         # Initialize resource monitor with improved settings
         self.logger = logging.getLogger("bot")
+
+        # Shared async OpenAI client for summarization and schema search
+        self.openai = OpenAIService(
+            api_key=config.openai_api_key,
+            logger=self.logger.getChild("openai"),
+        )
+        # Blocking scrapers (gallery-dl, AO3) run here instead of on the loop
+        self.scraper_pool = BlockingPool(
+            "scraper",
+            max_workers=4,
+            max_queue=16,
+            timeout=60.0,
+            logger=self.logger.getChild("scraper_pool"),
+        )
+        # AO3 work metadata shared by /ao3 and gallery reposts
+        self.ao3_cache = AO3WorkCache(
+            self.db,
+            self.scraper_pool,
+            logger=self.logger.getChild("ao3_cache"),
+        )
+        # Google Custom Search for /find, with result cache and quota tracking
+        self.google_search = GoogleSearchClient(
+            http_client,
+            daily_quota=config.google_search_daily_quota,
+            logger=self.logger.getChild("google_search"),
+        )
         self.resource_monitor = ResourceMonitor(
             check_interval=300,  # Check every 5 minutes
             memory_threshold=85.0,
@@ -182,6 +217,11 @@ class Cognita(commands.Bot):
         self.container.register("db", self.db)
         self.container.register("http_client", http_client)
         self.container.register("resource_monitor", self.resource_monitor)
+        self.container.register("message_window", self.message_window)
+        self.container.register("openai", self.openai)
+        self.container.register("scraper_pool", self.scraper_pool)
+        self.container.register("ao3_cache", self.ao3_cache)
+        self.container.register("google_search", self.google_search)
         self.container.register_factory("db_session", self.get_db_session)
 
     async def get_db_session(self) -> AsyncSession:
@@ -227,6 +267,8 @@ class Cognita(commands.Bot):
         async def init_web_client() -> None:
             start_time = time.time()
             self.web_client = await self.http_client.get_session()
+            if config.http_prewarm_urls:
+                await self.http_client.prewarm(config.http_prewarm_urls)
             self.startup_times["web_client_init"] = time.time() - start_time
             self.logger.info(
                 f"Web client initialized in {self.startup_times['web_client_init']:.2f}s"
@@ -867,28 +909,15 @@ class Cognita(commands.Bot):
                 collected = gc.collect()
                 self.logger.info(f"Periodic cleanup: collected {collected} objects")
 
-                # Only recreate the shared session if it's been idle
-                # The webhook operations now use fresh sessions, so this won't cause conflicts
-                if hasattr(self.http_client, "_session") and self.http_client._session:
-                    # Check if the session has any active connections
-                    connector = self.http_client._session.connector
-                    if connector and hasattr(connector, "_conns"):
-                        active_connections = sum(
-                            len(conns) for conns in connector._conns.values()
-                        )
-                        if (
-                            active_connections == 0
-                        ):  # Only recreate if no active connections
-                            old_session = self.http_client._session
-                            self.http_client._session = None
-                            await old_session.close()
-                            self.logger.info(
-                                "HTTP session recreated for cleanup (no active connections)"
-                            )
-                        else:
-                            self.logger.debug(
-                                f"Skipping session recreation: {active_connections} active connections"
-                            )
+                # Recycle old connections one by one; the shared session, its
+                # DNS cache and the remaining warm connections are kept
+                recycled = self.http_client.recycle_connections()
+                connection_stats = self.http_client.get_stats()["connections"]
+                self.logger.info(
+                    f"Recycled {recycled} idle HTTP connections; "
+                    f"reuse ratio {connection_stats.get('reuse_ratio', 0):.0%}, "
+                    f"{connection_stats.get('created', 0)} connections opened"
+                )
 
                 # Log current resource usage after cleanup
                 if hasattr(self, "resource_monitor"):
@@ -905,7 +934,7 @@ class Cognita(commands.Bot):
         """Close the bot and clean up resources.
 
         This method is called when the bot is shutting down. It stops the resource monitoring,
-        closes the HTTP client, and performs any other necessary cleanup before calling the
+        closes the HTTP and OpenAI clients, and performs any other necessary cleanup before calling the
         parent class's close method.
         """
         # Stop resource monitoring
@@ -918,6 +947,19 @@ class Cognita(commands.Bot):
             await self.http_client.close()
             self.logger.info("HTTP client closed")
 
+        # Close the OpenAI client
+        if hasattr(self, "openai") and self.openai:
+            await self.openai.close()
+            self.logger.info("OpenAI client closed")
+
+        # Stop refreshing AO3 works before the pool that scrapes them
+        if hasattr(self, "ao3_cache") and self.ao3_cache:
+            await self.ao3_cache.close()
+
+        # Stop the scraper pool; running scrapes finish in the background
+        if hasattr(self, "scraper_pool") and self.scraper_pool:
+            self.scraper_pool.shutdown()
+
         # Call the parent class's close method
         await super().close()
 
@@ -1020,6 +1062,7 @@ async def main() -> None:
         max_connections=50,  # Reduce from 100
         max_keepalive_connections=10,  # Reduce from 30
         keepalive_timeout=30,  # Reduce from 60
+        cache=HTTPCache(path=Path(".cache") / "http_cache.sqlite3"),
         logger=root_logger.getChild("http_client"),
     )
 
@@ -1049,6 +1092,7 @@ async def main() -> None:
             "cogs.info",
             "cogs.pins",
             "cogs.quotes",
+            "cogs.search",
             "cogs.external_services",
             "cogs.roles",
             "cogs.mods",
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Parquet export script.
+
+Streams messages, reactions and attachments for one or more guilds into
+month-partitioned Parquet files for offline analytics. Runs are incremental:
+each table continues after the last exported message recorded in the output
+directory's state file.
+
+Usage:
+    python scripts/database/export_parquet.py GUILD_ID [GUILD_ID ...]
+        [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--output DIR]
+        [--table messages|reactions|attachments] [--batch-size N]
+
+Requires the optional pyarrow dependency (pip install .[analytics]).
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scripts.database.optimize import create_pool
+from utils.db import Database
+from utils.parquet_export import DEFAULT_EXPORT_DIR, EXPORT_TABLES, ParquetExporter
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()],
+)
+logger = logging.getLogger("parquet_export")
+
+
+async def main(args: argparse.Namespace) -> bool:
+    """Export the requested guilds.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        True if every export succeeded, False otherwise
+    """
+    pool = None
+    try:
+        pool = await create_pool()
+        exporter = ParquetExporter(
+            Database(pool), args.output, batch_size=args.batch_size, logger=logger
+        )
+
+        for guild_id in args.guild_ids:
+            result = await exporter.export_guild(
+                guild_id,
+                start=args.start,
+                end=args.end,
+                tables=args.table,
+            )
+            logger.info(
+                f"Guild {guild_id}: {result.total_rows} rows in {len(result.files)} files"
+            )
+        return True
+    except Exception as e:
+        error_details = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Export failed: {e}\n{error_details}")
+        return False
+    finally:
+        if pool:
+            await pool.close()
+
+
+def parse_date(value: str) -> datetime:
+    """Parse a YYYY-MM-DD date argument."""
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Export message history to Parquet",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("guild_ids", type=int, nargs="+", help="Guilds to export")
+    parser.add_argument("--start", type=parse_date, help="Start date (UTC)")
+    parser.add_argument("--end", type=parse_date, help="End date (UTC, exclusive)")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_EXPORT_DIR,
+        help=f"Output directory (default: {DEFAULT_EXPORT_DIR})",
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=sorted(EXPORT_TABLES),
+        help="Table to export; repeat for several (default: all)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50000,
+        help="Rows per cursor fetch and Parquet row group (default: 50000)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main(parse_args()))
+    sys.exit(0 if success else 1)
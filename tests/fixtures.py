@@ -9,7 +9,8 @@ import asyncio
 import os
 import sys
 from collections.abc import AsyncGenerator, Callable
-from typing import Any
+from typing import TYPE_CHECKING, Any
+from unittest.mock import AsyncMock, MagicMock
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
@@ -33,6 +34,9 @@ from models.tables.servers import Server
 
 # Import test utilities
 
+if TYPE_CHECKING:
+    from cogs.stats import StatsCogs
+
 
 class DatabaseFixture:
     """
@@ -289,6 +293,56 @@ class TestDataFixture:
         return creator_links
 
 
+class FakeTransaction:
+    """
+    Stand-in for ``Database.transaction()`` with a mocked connection.
+
+    Used as an async context manager; the connection is ``trans.conn``.
+    """
+
+    def __init__(self, fetch_results: list[Any] | None = None) -> None:
+        """
+        Initialize the transaction.
+
+        Args:
+            fetch_results: What successive ``conn.fetch`` calls return.
+        """
+        self.conn = MagicMock()
+        self.conn.fetch = AsyncMock(side_effect=fetch_results)
+        self.conn.execute = AsyncMock()
+        self.conn.executemany = AsyncMock()
+
+    async def __aenter__(self) -> "FakeTransaction":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+
+def make_stats_cog(**attributes: Any) -> "StatsCogs":
+    """
+    Create a stats cog on a mocked bot without running its ``__init__``.
+
+    The bot's database is a MagicMock, there is no message window, and no
+    flush task is scheduled yet.
+
+    Args:
+        **attributes: Cog attributes to set, such as the pending queues.
+
+    Returns:
+        A StatsCogs instance.
+    """
+    from cogs.stats import StatsCogs
+
+    cog = StatsCogs.__new__(StatsCogs)
+    cog.bot = MagicMock()
+    cog.bot.message_window = None
+    cog.flush_tasks = set()
+    for name, value in attributes.items():
+        setattr(cog, name, value)
+    return cog
+
+
 async def create_db_fixture() -> AsyncGenerator[DatabaseFixture, None]:
     """
     Create a database fixture for testing.
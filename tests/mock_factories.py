@@ -635,6 +635,70 @@ class MockMessageFactory:
 
         return message
 
+    @staticmethod
+    def create_raw_update(
+        data: dict[str, Any], channel_id: int = None
+    ) -> discord.RawMessageUpdateEvent:
+        """
+        Create a mock raw message edit event.
+
+        Args:
+            data: The partial message data Discord sent, including its "id".
+            channel_id: The channel ID. If None, generates a random Discord ID.
+
+        Returns:
+            A mock raw message update event.
+        """
+        payload = MagicMock(spec=discord.RawMessageUpdateEvent)
+        payload.data = data
+        payload.message_id = int(data["id"])
+        payload.channel_id = channel_id or generate_discord_id()
+        payload.guild_id = None
+        payload.cached_message = None
+        return payload
+
+    @staticmethod
+    def create_raw_delete(
+        message_id: int = None, channel_id: int = None
+    ) -> discord.RawMessageDeleteEvent:
+        """
+        Create a mock raw message delete event.
+
+        Args:
+            message_id: The deleted message's ID. If None, generates a random Discord ID.
+            channel_id: The channel ID. If None, generates a random Discord ID.
+
+        Returns:
+            A mock raw message delete event.
+        """
+        payload = MagicMock(spec=discord.RawMessageDeleteEvent)
+        payload.message_id = message_id or generate_discord_id()
+        payload.channel_id = channel_id or generate_discord_id()
+        payload.guild_id = None
+        payload.cached_message = None
+        return payload
+
+    @staticmethod
+    def create_raw_bulk_delete(
+        message_ids: set[int], channel_id: int = None
+    ) -> discord.RawBulkMessageDeleteEvent:
+        """
+        Create a mock raw bulk message delete event, as sent for a purge.
+
+        Args:
+            message_ids: The deleted messages' IDs.
+            channel_id: The channel ID. If None, generates a random Discord ID.
+
+        Returns:
+            A mock raw bulk message delete event.
+        """
+        payload = MagicMock(spec=discord.RawBulkMessageDeleteEvent)
+        payload.message_ids = message_ids
+        payload.channel_id = channel_id or generate_discord_id()
+        payload.guild_id = None
+        payload.cached_messages = []
+        return payload
+
 
 class MockRoleFactory:
     """Factory for creating mock Discord roles."""
@@ -881,6 +945,36 @@ class MockReactionFactory:
 
         return reaction
 
+    @staticmethod
+    def create_raw_event(
+        emoji: discord.PartialEmoji | None = None,
+        message_id: int = None,
+        user_id: int = None,
+        guild_id: int = None,
+        channel_id: int = None,
+    ) -> discord.RawReactionActionEvent:
+        """
+        Create a mock raw reaction add or remove event.
+
+        Args:
+            emoji: The partial emoji reacted with. If None, uses a thumbs up.
+            message_id: The reacted message's ID. If None, generates a random Discord ID.
+            user_id: The reacting user's ID. If None, generates a random Discord ID.
+            guild_id: The guild ID. If None, generates a random Discord ID.
+            channel_id: The channel ID. If None, generates a random Discord ID.
+
+        Returns:
+            A mock raw reaction action event.
+        """
+        payload = MagicMock(spec=discord.RawReactionActionEvent)
+        payload.emoji = emoji or discord.PartialEmoji(name="👍")
+        payload.message_id = message_id or generate_discord_id()
+        payload.user_id = user_id or generate_discord_id()
+        payload.guild_id = guild_id or generate_discord_id()
+        payload.channel_id = channel_id or generate_discord_id()
+        payload.member = None
+        return payload
+
 
 class MockInteractionFactory:
     """Factory for creating mock Discord interactions."""
@@ -0,0 +1,202 @@
+"""
+Tests for the AO3 work metadata cache.
+
+Tests that cached works are served without scraping, that concurrent lookups
+share one scrape, that stale works are returned while they refresh in the
+background, that works round-trip through the database, and that recently
+requested works are loaded from it after a restart.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import utils.ao3_cache as ao3_cache
+from utils.ao3_cache import AO3WorkCache, CachedWork
+
+
+class FakeAuthor:
+    """An ``AO3.User`` with just the attributes the cache reads."""
+
+    def __init__(self, username: str) -> None:
+        self.username = username
+        self.url = f"https://archiveofourown.org/users/{username}"
+
+
+class FakeWork:
+    """An ``AO3.Work`` that counts how often it was scraped."""
+
+    scrapes = 0
+
+    def __init__(self, workid: int, session=None, load_chapters: bool = True) -> None:
+        FakeWork.scrapes += 1
+        time.sleep(0.05)
+        self.id = workid
+        self.title = f"Work {workid} v{FakeWork.scrapes}"
+        self.summary = "A summary"
+        self.url = f"https://archiveofourown.org/works/{workid}"
+        self.authors = [FakeAuthor("author")]
+        self.fandoms = ["The Wandering Inn"]
+        self.words = 1000
+        self.date_published = datetime(2024, 1, 2)
+
+    @property
+    def kudos(self) -> int:
+        raise AttributeError("no kudos element")
+
+
+class InlinePool:
+    """A BlockingPool stand-in that runs calls in a thread."""
+
+    async def run(self, func, *args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+class FakeDatabase:
+    """Keeps ``ao3_work_cache`` rows in a dictionary."""
+
+    def __init__(self) -> None:
+        self.rows: dict[int, str] = {}
+        self.requested: dict[int, datetime] = {}
+
+    async def fetchrow(self, query: str, work_id: int):
+        if work_id in self.rows:
+            return {"metadata": self.rows[work_id]}
+        return None
+
+    async def fetch(self, query: str, since: datetime, limit: int):
+        recent = sorted(
+            (work_id for work_id, at in self.requested.items() if at > since),
+            key=self.requested.get,
+            reverse=True,
+        )[:limit]
+        return [
+            {
+                "metadata": self.rows[work_id],
+                "last_requested_at": self.requested[work_id],
+            }
+            for work_id in recent
+        ]
+
+    async def execute(
+        self,
+        query: str,
+        work_id: int,
+        metadata: str,
+        fetched_at: datetime,
+        requested_at: datetime,
+    ) -> None:
+        self.rows[work_id] = metadata
+        self.requested[work_id] = max(
+            requested_at, self.requested.get(work_id, requested_at)
+        )
+
+
+@pytest.fixture(autouse=True)
+def fake_work(monkeypatch):
+    """Replace the AO3 scraper with FakeWork."""
+    FakeWork.scrapes = 0
+    monkeypatch.setattr(ao3_cache.AO3, "Work", FakeWork)
+
+
+@pytest.fixture
+async def cache():
+    """A cache with a fake database and no periodic refresh."""
+    cache = AO3WorkCache(FakeDatabase(), InlinePool(), refresh_interval=0)
+    yield cache
+    await cache.close()
+
+
+async def test_cached_works_are_not_scraped_again(cache):
+    """Repeated lookups are answered from memory."""
+    first = await cache.get(1)
+    second = await cache.get(1)
+
+    assert first is second
+    assert first.title == "Work 1 v1"
+    assert first.kudos is None
+    assert [str(author) for author in first.authors] == ["author"]
+    assert FakeWork.scrapes == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+async def test_concurrent_lookups_share_one_scrape(cache):
+    """Lookups of an uncached work while it is scraped wait for that scrape."""
+    works = await asyncio.gather(*(cache.get(2) for _ in range(5)))
+
+    assert FakeWork.scrapes == 1
+    assert all(work.title == "Work 2 v1" for work in works)
+
+
+async def test_stale_works_are_returned_and_refreshed(cache):
+    """A stale work is returned at once and replaced in the background."""
+    await cache.get(3)
+    cache._entries[3].work.fetched_at -= cache.ttl + 1
+
+    stale = await cache.get(3)
+    assert stale.title == "Work 3 v1"
+    await asyncio.sleep(0.2)
+
+    fresh = await cache.get(3)
+    assert fresh.title == "Work 3 v2"
+    stats = cache.get_stats()
+    assert stats["stale_hits"] == 1
+    assert stats["refreshes"] == 1
+
+
+async def test_works_are_loaded_from_the_database(cache):
+    """Works scraped before a restart are read back with their types."""
+    await cache.get(4)
+    restarted = AO3WorkCache(cache.db, InlinePool(), refresh_interval=0)
+
+    work = await restarted.get(4)
+
+    assert FakeWork.scrapes == 1
+    assert restarted.get_stats()["db_hits"] == 1
+    assert work.date_published == datetime(2024, 1, 2)
+    assert work.authors[0].url.endswith("/author")
+    assert json.loads(cache.db.rows[4])["fandoms"] == ["The Wandering Inn"]
+
+
+async def test_refresh_due_only_refreshes_requested_works(cache):
+    """Works about to go stale are refreshed unless nobody asked for them lately."""
+    await cache.get(5)
+    await cache.get(6)
+    for work_id in (5, 6):
+        cache._entries[work_id].work.fetched_at -= cache.ttl
+    cache._entries[6].requested_at -= cache.refresh_window + 1
+
+    assert await cache.refresh_due() == 1
+    assert cache._entries[5].work.title == "Work 5 v3"
+    assert cache._entries[6].work.title == "Work 6 v2"
+
+
+async def test_recently_requested_works_are_loaded(cache):
+    """After a restart, works requested within the refresh window are loaded."""
+    await cache.get(8)
+    await cache.get(9)
+    cache.db.requested[9] -= timedelta(seconds=cache.refresh_window + 1)
+    restarted = AO3WorkCache(cache.db, InlinePool(), refresh_interval=0)
+
+    assert await restarted.load_recent() == 1
+    assert list(restarted._entries) == [8]
+    assert restarted._entries[8].requested_at == pytest.approx(
+        cache._entries[8].requested_at
+    )
+
+
+def test_json_round_trip():
+    """Serialized works deserialize to equal works."""
+    work = CachedWork.from_work(FakeWork(7))
+
+    assert CachedWork.from_json(work.to_json()) == work
@@ -0,0 +1,106 @@
+"""
+Tests for the bounded thread pool used by blocking scrapers.
+
+Tests that blocking calls don't stall the event loop, that exceptions and
+results come back to the caller, and that timeouts, cancellation and a full
+queue are handled and counted.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.blocking_pool import BlockingPool
+from utils.exceptions import ExternalServiceError
+
+
+@pytest.fixture
+def pool():
+    """A pool with one worker and a short queue."""
+    pool = BlockingPool("test", max_workers=1, max_queue=2, timeout=5.0)
+    yield pool
+    pool.shutdown()
+
+
+async def test_blocking_calls_leave_the_loop_running(pool):
+    """The loop keeps ticking while a call blocks its thread."""
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    result = await pool.run(lambda: time.sleep(0.2) or threading.current_thread().name)
+    ticker.cancel()
+
+    assert result.startswith("test")
+    assert ticks >= 5
+    stats = pool.get_stats()
+    assert stats["completed"] == 1
+    assert stats["run"]["count"] == 1
+
+
+async def test_exceptions_are_raised_to_the_caller(pool):
+    """Errors of the blocking call propagate unchanged."""
+
+    def fail() -> None:
+        raise ValueError("bad id")
+
+    with pytest.raises(ValueError, match="bad id"):
+        await pool.run(fail)
+    assert pool.get_stats()["failed"] == 1
+
+
+async def test_timeouts_drop_queued_calls(pool):
+    """A timed out call that never started never runs."""
+    release = threading.Event()
+    ran = []
+
+    blocker = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.05)
+    with pytest.raises(ExternalServiceError, match="took too long"):
+        await pool.run(ran.append, "queued", timeout=0.05)
+    release.set()
+    await blocker
+    await pool.run(lambda: None)
+
+    assert ran == []
+    stats = pool.get_stats()
+    assert stats["timed_out"] == 1
+    assert stats["queued"] == 0
+    assert stats["running"] == 0
+
+
+async def test_full_queue_rejects_and_cancel_frees_slots(pool):
+    """Calls beyond the queue are rejected; cancelled calls leave the queue."""
+    release = threading.Event()
+    blocker = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.05)
+    queued = [asyncio.create_task(pool.run(lambda: "done")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ExternalServiceError, match="busy"):
+        await pool.run(lambda: "rejected")
+
+    queued[0].cancel()
+    await asyncio.gather(queued[0], return_exceptions=True)
+    assert pool.get_stats()["queued"] == 1
+
+    release.set()
+    await blocker
+    assert await queued[1] == "done"
+    stats = pool.get_stats()
+    assert stats["rejected"] == 1
+    assert stats["cancelled"] == 1
+    assert stats["max_queued"] == 2
+    assert stats["queued"] == 0
@@ -0,0 +1,132 @@
+"""
+Unit tests for map-reduce summarization.
+
+Tests token-budget chunking, bounded concurrency, the reduce step and reusing
+cached chunk summaries when the window shifts.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.chunked_summary import (
+    ChunkSummaryCache,
+    estimate_tokens,
+    map_reduce_summary,
+    split_by_tokens,
+)
+
+
+def make_lines(start: int, count: int, length: int = 200) -> list[tuple[int, str]]:
+    """Create conversation lines with consecutive message IDs."""
+    return [(i, f"user{i}: " + "x" * length) for i in range(start, start + count)]
+
+
+class FakeCompleter:
+    """Records completions and tracks how many run at once."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, prompt: str, text: str) -> str:
+        self.calls.append((prompt, text))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        return f"{prompt} summary of {len(text)} chars"
+
+
+def test_split_respects_budget_and_keeps_every_line():
+    """Chunks stay within the budget and contain all lines in order."""
+    lines = make_lines(0, 100)
+    chunks = split_by_tokens(lines, budget=500)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 500 + 1 for chunk in chunks)
+    assert "\n".join(chunks).split("\n") == [line for _, line in lines]
+
+
+def test_split_cuts_oversized_lines():
+    """A single line larger than the budget is cut into pieces."""
+    chunks = split_by_tokens([(1, "y" * 1000)], budget=100)
+
+    assert [len(chunk) for chunk in chunks] == [400, 400, 200]
+
+
+async def test_short_conversation_is_one_call():
+    """A conversation within the budget needs no reduce step."""
+    complete = FakeCompleter()
+
+    result = await map_reduce_summary(make_lines(0, 3), complete, "map", "reduce")
+
+    assert len(complete.calls) == 1
+    assert result.startswith("map summary")
+
+
+async def test_long_conversation_maps_concurrently_then_reduces():
+    """Chunks are summarized under the concurrency bound and then combined."""
+    complete = FakeCompleter()
+
+    result = await map_reduce_summary(
+        make_lines(0, 200), complete, "map", "reduce", budget=500, concurrency=2
+    )
+
+    map_calls = [c for c in complete.calls if c[0] == "map"]
+    reduce_calls = [c for c in complete.calls if c[0] == "reduce"]
+    assert len(map_calls) > 2
+    assert len(reduce_calls) == 1
+    assert "Part 1 of" in reduce_calls[0][1]
+    assert complete.max_running == 2
+    assert result.startswith("reduce summary")
+
+
+async def test_shifted_window_reuses_cached_chunks():
+    """Re-running over a shifted window only summarizes the changed chunks."""
+    cache = ChunkSummaryCache()
+    first = FakeCompleter()
+    await map_reduce_summary(
+        make_lines(0, 300), first, "map", "reduce", budget=500, cache=cache
+    )
+
+    second = FakeCompleter()
+    await map_reduce_summary(
+        make_lines(10, 300), second, "map", "reduce", budget=500, cache=cache
+    )
+
+    first_maps = sum(1 for c in first.calls if c[0] == "map")
+    second_maps = sum(1 for c in second.calls if c[0] == "map")
+    assert cache.hits > 0
+    assert second_maps < first_maps / 2
+
+
+async def test_failure_is_raised_as_is():
+    """The first completion error propagates unwrapped."""
+
+    async def complete(prompt: str, text: str) -> str:
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        await map_reduce_summary(
+            make_lines(0, 200), complete, "map", "reduce", budget=500
+        )
+
+
+def test_cache_evicts_least_recently_used():
+    """The cache keeps at most max_entries summaries."""
+    cache = ChunkSummaryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get_stats()["entries"] == 2
@@ -207,6 +207,17 @@ class TestBot(commands.Bot):
         self.http_client.get_session = AsyncMock(return_value=mock_session)
         self.http_client.get_session_with_retry = AsyncMock(return_value=mock_session)
 
+        # Responses fetched through the HTTP cache are already read
+        mock_cached_response = MagicMock()
+        mock_cached_response.text = MagicMock(return_value='{"test": "response"}')
+        mock_cached_response.status = 200
+        self.http_client.get_cached = AsyncMock(return_value=mock_cached_response)
+
+        # Google search client on the mock http_client
+        from utils.google_search import GoogleSearchClient
+
+        self.google_search = GoogleSearchClient(self.http_client)
+
         # Mock the latency property to return a valid float instead of NaN
         self._latency = 0.05  # 50ms latency
 
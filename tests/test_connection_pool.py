@@ -0,0 +1,113 @@
+"""
+Tests for the recycling connection pool of the HTTP client.
+
+Tests that keep-alive connections are reused and counted, that connections
+past their maximum age are replaced one by one without closing the session,
+that idle connections to a host are dropped after a connection error, and
+that pre-warming opens a connection ahead of the first request.
+"""
+
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.http_client import HTTPClient
+
+
+@pytest.fixture
+async def server_url():
+    """A local server answering every GET and HEAD request."""
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+async def get_many(client: HTTPClient, url: str, count: int) -> None:
+    """Make sequential requests, releasing each connection."""
+    for i in range(count):
+        response = await client.get(f"{url}/item/{i}")
+        await response.read()
+        response.release()
+
+
+async def test_connections_are_reused(server_url):
+    """Sequential requests share one keep-alive connection."""
+    client = HTTPClient(retry_attempts=0)
+    try:
+        await get_many(client, server_url, 5)
+        stats = client.get_stats()["connections"]
+    finally:
+        await client.close()
+
+    assert stats["created"] == 1
+    assert stats["reused"] == 4
+    assert stats["reuse_ratio"] == pytest.approx(0.8)
+    assert stats["tls_handshakes"] == 0
+    assert stats["idle"] == 1
+
+
+async def test_old_connections_are_recycled(server_url):
+    """Connections past their age are replaced, the session is kept."""
+    client = HTTPClient(retry_attempts=0, max_connection_age=0.0)
+    try:
+        session = await client.get_session()
+        await get_many(client, server_url, 3)
+        stats = client.get_stats()["connections"]
+        assert await client.get_session() is session
+    finally:
+        await client.close()
+
+    assert stats["created"] == 3
+    assert stats["reused"] == 0
+    assert stats["recycled_age"] == 3
+
+
+async def test_recycle_idle_and_drop_host(server_url):
+    """Idle connections are closed by age and after errors on their host."""
+    client = HTTPClient(retry_attempts=0)
+    try:
+        await get_many(client, server_url, 1)
+        assert client.recycle_connections() == 0
+
+        connector = client._connector()
+        connector.max_connection_age = 0.0
+        assert client.recycle_connections() == 1
+
+        connector.max_connection_age = 600.0
+        await get_many(client, server_url, 1)
+        client._drop_host_connections(f"{server_url}/item/0")
+        stats = client.get_stats()["connections"]
+    finally:
+        await client.close()
+
+    assert stats["recycled_error"] == 1
+    assert stats["idle"] == 0
+
+
+async def test_prewarm_opens_connections(server_url):
+    """The first request after pre-warming reuses the warm connection."""
+    client = HTTPClient(retry_attempts=0)
+    try:
+        assert await client.prewarm([f"{server_url}/", "http://127.0.0.1:1/"]) == 1
+        await get_many(client, server_url, 1)
+        stats = client.get_stats()["connections"]
+    finally:
+        await client.close()
+
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
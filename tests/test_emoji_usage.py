@@ -0,0 +1,89 @@
+"""
+Unit tests for the daily emoji usage rollups.
+
+Tests emoji keys, custom emoji extraction from message content, and the
+used/unused ranking behind /stats emotes.
+"""
+
+import os
+import sys
+from datetime import UTC, date, datetime
+from types import SimpleNamespace
+
+import discord
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from cogs.stats_commands import format_emoji, rank_emote_usage
+from cogs.stats_listeners import custom_emoji_usage, emoji_key
+
+
+def make_message(content: str, guild_id: int | None = 1) -> SimpleNamespace:
+    """Build a message stub with the attributes the extractor reads."""
+    return SimpleNamespace(
+        content=content,
+        guild=SimpleNamespace(id=guild_id) if guild_id else None,
+        created_at=datetime(2024, 6, 1, 23, 30, tzinfo=UTC),
+    )
+
+
+def test_emoji_key_uses_id_for_custom_emoji():
+    """Custom emoji are keyed by ID and unicode emoji by the emoji itself."""
+    assert emoji_key(discord.PartialEmoji(name="pog", id=123)) == "123"
+    assert emoji_key(discord.PartialEmoji(name="👍")) == "👍"
+    assert emoji_key("👍") == "👍"
+
+
+def test_custom_emoji_usage_counts_each_emoji_once_per_message():
+    """Repeated emoji in one message count once; animated emoji are included."""
+    message = make_message("<:pog:123> hi <:pog:123> <a:dance:456> :notemoji:")
+
+    rows = custom_emoji_usage(message)
+
+    assert sorted(rows) == [
+        (1, "123", date(2024, 6, 1), 123, "pog", 0, 1),
+        (1, "456", date(2024, 6, 1), 456, "dance", 0, 1),
+    ]
+
+
+def test_custom_emoji_usage_skips_direct_messages():
+    """Messages outside guilds produce no rows."""
+    assert custom_emoji_usage(make_message("<:pog:123>", guild_id=None)) == []
+
+
+def test_rank_emote_usage_orders_used_and_lists_unused():
+    """Used emoji rank by total use; unused guild emoji are oldest first."""
+    rows = [
+        {
+            "emoji_key": "👍",
+            "emoji_id": None,
+            "emoji_name": "👍",
+            "reactions": 3,
+            "messages": 0,
+        },
+        {
+            "emoji_key": "123",
+            "emoji_id": 123,
+            "emoji_name": "pog",
+            "reactions": 2,
+            "messages": 4,
+        },
+    ]
+    guild_emojis = [
+        SimpleNamespace(id=123, created_at=datetime(2020, 1, 1)),
+        SimpleNamespace(id=789, created_at=datetime(2022, 1, 1)),
+        SimpleNamespace(id=456, created_at=datetime(2021, 1, 1)),
+    ]
+
+    used, unused = rank_emote_usage(rows, guild_emojis)
+
+    assert [usage["emoji_key"] for usage in used] == ["123", "👍"]
+    assert used[0]["total"] == 6
+    assert [emoji.id for emoji in unused] == [456, 789]
+
+
+def test_format_emoji():
+    """Custom emoji render as mentions and unicode emoji as themselves."""
+    assert format_emoji(123, "pog") == "<:pog:123>"
+    assert format_emoji(None, "👍") == "👍"
@@ -48,7 +48,7 @@ from tests.mock_factories import (
 class TestGoogleSearchIntegration:
     """Test Google Search API integration."""
 
-    def mock_google_search_success(
+    async def mock_google_search_success(
         self, query: str, api_key: str, cse_id: str, **kwargs
     ) -> dict[str, Any]:
         """Mock successful Google search response."""
@@ -69,13 +69,13 @@ class TestGoogleSearchIntegration:
             ]
         }
 
-    def mock_google_search_empty(
+    async def mock_google_search_empty(
         self, query: str, api_key: str, cse_id: str, **kwargs
     ) -> dict[str, Any]:
         """Mock empty Google search response."""
         return {"items": []}
 
-    def mock_google_search_error(
+    async def mock_google_search_error(
         self, query: str, api_key: str, cse_id: str, **kwargs
     ) -> Never:
         """Mock Google search API error."""
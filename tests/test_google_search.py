@@ -0,0 +1,143 @@
+"""
+Tests for the async Google Custom Search client.
+
+Tests that results are cached per normalized query, that searches fall back
+to cached and matching earlier results when the daily quota is nearly used
+up, and that only errors naming the daily limit mark the day as used up.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import utils.google_search as google_search
+from utils.exceptions import APIError, ExternalServiceError
+from utils.google_search import GoogleSearchClient
+from utils.http_client import HTTPClient
+
+
+class SearchServer:
+    """Local stand-in for the Custom Search JSON API."""
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.error: dict | None = None
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.query))
+        if self.error is not None:
+            return web.json_response({"error": self.error}, status=self.error["code"])
+        query = request.query["q"]
+        return web.json_response(
+            {
+                "searchInformation": {"totalResults": "1"},
+                "items": [
+                    {
+                        "title": f"Chapter about {query}",
+                        "link": f"https://wanderinginn.com/{query.replace(' ', '-')}",
+                        "snippet": f"Erin meets {query}.",
+                        "displayLink": "wanderinginn.com",
+                    }
+                ],
+            }
+        )
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    """A search client talking to a local server, with a quota of 5."""
+    server = SearchServer()
+    app = web.Application()
+    app.router.add_get("/customsearch/v1", server.search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(
+        google_search, "SEARCH_URL", f"http://127.0.0.1:{port}/customsearch/v1"
+    )
+    http_client = HTTPClient(retry_attempts=0)
+    client = GoogleSearchClient(http_client, daily_quota=5, reserve=2)
+    client.server = server
+    yield client
+    await http_client.close()
+    await runner.cleanup()
+
+
+async def test_results_are_cached_per_normalized_query(client):
+    """Queries differing only in case and spacing share one request."""
+    first = await client.search("Pisces  Jealnet", "key", "cse")
+    second = await client.search("pisces jealnet", "key", "cse")
+
+    assert first["source"] == "api"
+    assert second["source"] == "cache"
+    assert second["items"] == first["items"]
+    assert len(client.server.requests) == 1
+    request = client.server.requests[0]
+    assert request["cx"] == "cse"
+    assert request["num"] == "9"
+    assert "items(" in request["fields"]
+    stats = client.get_stats()
+    assert stats["quota_used"] == 1
+    assert stats["cache_hits"] == 1
+
+
+async def test_nearly_used_quota_prefers_cached_results(client):
+    """With the reserve reached, stale and matching cached results are used."""
+    for query in ("Ryoka", "Erin Solstice", "Relc"):
+        await client.search(query, "key", "cse")
+    assert client.remaining == 2
+    ryoka = next(iter(client._cache))
+    client._cache[ryoka] = (time.monotonic() - client.ttl - 1, client._cache[ryoka][1])
+
+    stale = await client.search("ryoka", "key", "cse")
+    local = await client.search("solstice", "key", "cse")
+    spent = await client.search("Numbtongue", "key", "cse")
+
+    assert stale["source"] == "stale"
+    assert local["source"] == "local"
+    assert local["items"][0]["title"] == "Chapter about Erin Solstice"
+    assert spent["source"] == "api"
+    assert len(client.server.requests) == 4
+    stats = client.get_stats()
+    assert stats["stale_hits"] == 1
+    assert stats["local_hits"] == 1
+
+
+async def test_used_up_quota_stops_requests(client):
+    """A daily limit error uses up the day; uncached queries then fail locally."""
+    client.server.error = {
+        "code": 403,
+        "message": "Daily Limit Exceeded",
+        "errors": [{"reason": "dailyLimitExceeded"}],
+    }
+    with pytest.raises(APIError):
+        await client.search("Magnolia", "key", "cse")
+    assert client.remaining == 0
+
+    with pytest.raises(ExternalServiceError, match="quota"):
+        await client.search("Teriarch", "key", "cse")
+    assert len(client.server.requests) == 1
+
+
+@pytest.mark.parametrize(
+    ("limit", "remaining"), [("Queries per minute", 4), ("Queries per day", 0)]
+)
+async def test_only_the_daily_limit_uses_up_the_day(client, limit, remaining):
+    """A 429 for the per-minute limit is transient; one for the day is not."""
+    client.server.error = {
+        "code": 429,
+        "message": f"Quota exceeded for quota metric 'Queries' and limit '{limit}'",
+        "errors": [{"reason": "rateLimitExceeded"}],
+    }
+    with pytest.raises(APIError):
+        await client.search("Magnolia", "key", "cse")
+
+    assert client.remaining == remaining
@@ -0,0 +1,134 @@
+"""
+Unit tests for the activity heavy-hitter trackers.
+
+Tests the Space-Saving sketch, window coverage and expiry, the filtered
+channel leaderboard, and checkpoint serialization.
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.heavy_hitters import WINDOWS, ActivityTopKTracker, SpaceSaving, merge_top
+
+
+def test_space_saving_exact_below_capacity():
+    """Counts are exact while the sketch has spare counters."""
+    sketch = SpaceSaving(capacity=4)
+    for key, count in ((1, 5), (2, 3), (3, 1)):
+        for _ in range(count):
+            sketch.add(key)
+
+    assert sketch.is_exact
+    assert sketch.top(2) == [(1, 5), (2, 3)]
+
+
+def test_space_saving_eviction_bounds():
+    """Heavy hitters survive eviction and counts stay within the error bound."""
+    sketch = SpaceSaving(capacity=3)
+    for _ in range(50):
+        sketch.add(1)
+    for key in range(100, 120):
+        sketch.add(key)
+    for _ in range(30):
+        sketch.add(2)
+
+    assert not sketch.is_exact
+    top = dict(sketch.top(2))
+    assert top[1] == 50
+    # Key 2 inherited the evicted minimum, so it may be overestimated
+    assert 30 <= top[2] <= 30 + sketch.errors[2]
+    assert len(sketch.counts) == 3
+
+
+def test_space_saving_json_round_trip():
+    """A sketch restored from JSON reports the same counters."""
+    sketch = SpaceSaving(capacity=2)
+    for key in (1, 1, 2, 3):
+        sketch.add(key)
+
+    restored = SpaceSaving.from_json(sketch.to_json())
+
+    assert restored.counts == sketch.counts
+    assert restored.errors == sketch.errors
+    assert restored.evictions == sketch.evictions
+    restored.add(4)
+    assert len(restored.counts) == 2
+
+
+def test_merge_top_filters_keys():
+    """merge_top sums across sketches and honours the key filter."""
+    a, b = SpaceSaving(), SpaceSaving()
+    a.add(1, 3)
+    a.add(2, 1)
+    b.add(2, 4)
+    b.add(3, 10)
+
+    top, exact = merge_top([a, b], 5, among={1, 2})
+
+    assert exact
+    assert top == [(2, 5), (1, 3)]
+
+
+def test_tracker_requires_full_coverage():
+    """Leaderboards are unavailable until the whole window has been observed."""
+    tracker = ActivityTopKTracker()
+    tracker.observe(10, 20, 30)
+
+    assert tracker.top_users(20, "24h") is None
+    assert tracker.top_channels(10, "24h") is None
+
+    tracker.tracked_since -= WINDOWS["24h"].span
+    assert tracker.covers("24h")
+    assert not tracker.covers("7d")
+    assert tracker.top_users(20, "24h") == [{"user_id": 30, "message_count": 1}]
+
+
+def test_tracker_leaderboards():
+    """Per-channel users and per-guild channels are ranked by message count."""
+    tracker = ActivityTopKTracker()
+    tracker.tracked_since -= WINDOWS["7d"].span
+    for channel_id, user_id, count in ((1, 100, 3), (1, 101, 1), (2, 100, 5)):
+        for _ in range(count):
+            tracker.observe(9, channel_id, user_id)
+
+    assert tracker.top_users(1, "1h") == [
+        {"user_id": 100, "message_count": 3},
+        {"user_id": 101, "message_count": 1},
+    ]
+    assert tracker.top_channels(9, "7d") == [
+        {"channel_id": 2, "message_count": 5},
+        {"channel_id": 1, "message_count": 4},
+    ]
+    assert tracker.top_channels(9, "7d", among=[1]) == [
+        {"channel_id": 1, "message_count": 4}
+    ]
+
+
+def test_tracker_filtered_query_needs_exact_sketch():
+    """Filtered channel leaderboards fall back once counters were evicted."""
+    tracker = ActivityTopKTracker(channel_capacity=2)
+    tracker.tracked_since -= WINDOWS["24h"].span
+    for channel_id in (1, 2, 3):
+        tracker.observe(9, channel_id, 100)
+
+    assert tracker.top_channels(9, "24h") is not None
+    assert tracker.top_channels(9, "24h", among=[1, 2, 3]) is None
+
+
+def test_tracker_ignores_and_prunes_old_messages():
+    """Messages older than a window are skipped and stale buckets pruned."""
+    tracker = ActivityTopKTracker()
+    tracker.observe(9, 1, 100, timestamp=time.time() - 2 * 3600)
+
+    # Too old for the 1h window, but counted in the 24h and 7d windows
+    assert tracker.get_stats()["sketch_keys"] == 4
+
+    spec = WINDOWS["24h"]
+    old_bucket = int(time.time()) - spec.span - 2 * spec.bucket_seconds
+    tracker._buckets[("channel_users", 1, "24h")][old_bucket] = SpaceSaving()
+
+    assert tracker.prune() == 1
@@ -0,0 +1,306 @@
+"""
+Tests for the HTTP response cache against a local stub server.
+
+Tests Cache-Control parsing, fresh hits, ETag and Last-Modified revalidation,
+per-call TTL overrides, no-store responses, serving stale responses on
+errors, the SQLite backing file, keeping credentialed responses apart and in
+memory, coalescing of concurrent identical requests and per-endpoint metrics.
+"""
+
+import asyncio
+import os
+import sys
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.http_client import (
+    HTTPCache,
+    HTTPClient,
+    freshness_lifetime,
+    parse_cache_control,
+)
+
+
+class StubAPI:
+    """JSON API whose caching headers can be set per test."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.conditional = 0
+        self.cache_control = "no-cache"
+        self.etag: str | None = '"v1"'
+        self.last_modified: str | None = None
+        self.body = '{"version": 1}'
+        self.delay = 0.0
+        self.set_cookie: str | None = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        headers = {"Cache-Control": self.cache_control}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        if self.set_cookie:
+            headers["Set-Cookie"] = self.set_cookie
+
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_none_match or if_modified_since:
+            self.conditional += 1
+            if (self.etag and if_none_match == self.etag) or (
+                self.last_modified and if_modified_since == self.last_modified
+            ):
+                return web.Response(status=304, headers=headers)
+        return web.Response(
+            text=self.body, content_type="application/json", headers=headers
+        )
+
+
+@pytest.fixture
+async def stub_api():
+    """Start a stub API on a free local port and yield (stub, url)."""
+    stub = StubAPI()
+    app = web.Application()
+    app.router.add_get("/api.php", stub.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    stub.runner = runner
+    yield stub, f"http://127.0.0.1:{port}/api.php"
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def client():
+    """Create an HTTP client with an in-memory cache."""
+    http_client = HTTPClient(retry_attempts=0)
+    yield http_client
+    await http_client.close()
+
+
+def test_cache_control_and_lifetime():
+    """Directives are parsed and turned into a remaining lifetime."""
+    directives = parse_cache_control('public, Max-Age=60, community="x"')
+    assert directives == {"public": None, "max-age": "60", "community": "x"}
+
+    assert freshness_lifetime({"Cache-Control": "max-age=60", "Age": "20"}) == 40
+    assert freshness_lifetime({"Cache-Control": "no-cache, max-age=60"}) == 0
+    assert (
+        freshness_lifetime(
+            {
+                "Date": "Mon, 01 Jan 2024 00:00:00 GMT",
+                "Expires": "Mon, 01 Jan 2024 00:05:00 GMT",
+            }
+        )
+        == 300
+    )
+    assert freshness_lifetime({"Expires": "0"}) == 0
+
+
+async def test_etag_revalidation(stub_api, client):
+    """A no-cache response is revalidated and a 304 reuses the cached body."""
+    stub, url = stub_api
+
+    first = await client.get_cached(url, params={"q": "erin"})
+    second = await client.get_cached(url, params={"q": "erin"})
+
+    assert first.json() == {"version": 1}
+    assert not first.from_cache
+    assert second.revalidated and second.from_cache
+    assert second.status == 200
+    assert second.json() == {"version": 1}
+    assert stub.conditional == 1
+
+    # A changed resource is downloaded again
+    stub.etag = '"v2"'
+    stub.body = '{"version": 2}'
+    third = await client.get_cached(url, params={"q": "erin"})
+    assert third.json() == {"version": 2}
+    assert not third.from_cache
+
+
+async def test_last_modified_revalidation(stub_api, client):
+    """Without an ETag, If-Modified-Since is used for revalidation."""
+    stub, url = stub_api
+    stub.etag = None
+    stub.last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    await client.get_cached(url)
+    second = await client.get_cached(url)
+
+    assert second.revalidated
+    assert stub.conditional == 1
+
+
+async def test_max_age_and_ttl_override(stub_api, client):
+    """Fresh responses are served without a request; ttl overrides headers."""
+    stub, url = stub_api
+    stub.cache_control = "max-age=60"
+
+    await client.get_cached(url, params={"page": 1})
+    hit = await client.get_cached(url, params={"page": 1})
+    assert hit.from_cache and not hit.revalidated
+    assert stub.requests == 1
+
+    # An explicit ttl of 0 forces revalidation despite max-age
+    await client.get_cached(url, params={"page": 1}, ttl=0)
+    assert stub.requests == 2
+    assert stub.conditional == 1
+
+    # A ttl makes a no-cache response fresh
+    stub.cache_control = "no-cache"
+    await client.get_cached(url, params={"page": 2}, ttl=60)
+    await client.get_cached(url, params={"page": 2}, ttl=60)
+    assert stub.requests == 3
+
+
+async def test_no_store_is_not_cached(stub_api, client):
+    """no-store responses are never stored, even with a ttl."""
+    stub, url = stub_api
+    stub.cache_control = "no-store"
+
+    await client.get_cached(url, ttl=60)
+    await client.get_cached(url, ttl=60)
+
+    assert stub.requests == 2
+    assert stub.conditional == 0
+    assert len(client.cache) == 0
+
+
+async def test_stale_response_served_on_error(stub_api, client):
+    """A connection error during revalidation serves the stale response."""
+    stub, url = stub_api
+    await client.get_cached(url)
+
+    await stub.runner.cleanup()
+    response = await client.get_cached(url)
+
+    assert response.from_cache and not response.revalidated
+    assert response.json() == {"version": 1}
+    assert client.get_stats()["cache"]["stale"] == 1
+
+    # Without a cached response the error is raised
+    with pytest.raises(aiohttp.ClientError):
+        await client.get_cached(url, params={"q": "uncached"})
+
+
+async def test_disk_cache_and_metrics(stub_api, tmp_path):
+    """Responses persist across clients and metrics are kept per endpoint."""
+    stub, url = stub_api
+    path = tmp_path / "http_cache.sqlite3"
+
+    first = HTTPClient(retry_attempts=0, cache=HTTPCache(path=path))
+    await first.get_cached(url, params={"q": "a"})
+    await first.close()
+
+    second = HTTPClient(retry_attempts=0, cache=HTTPCache(path=path))
+    response = await second.get_cached(url, params={"q": "a"})
+    stats = second.get_stats()["cache"]
+    await second.close()
+
+    assert response.revalidated
+    assert response.json() == {"version": 1}
+    assert stats["endpoints"][url] == {
+        "hits": 0,
+        "revalidated": 1,
+        "misses": 0,
+        "stale": 0,
+        "coalesced": 0,
+    }
+    assert stats["revalidated"] == 1
+
+
+async def test_credentialed_responses_stay_private(stub_api, tmp_path):
+    """Cookies key the cache, and such responses and Set-Cookie aren't stored."""
+    stub, url = stub_api
+    stub.cache_control = "max-age=60"
+    stub.set_cookie = "session=renewed"
+    path = tmp_path / "http_cache.sqlite3"
+
+    first = HTTPClient(retry_attempts=0, cache=HTTPCache(path=path))
+    await first.get_cached(url, cookies={"session": "a"})
+    cached = await first.get_cached(url, cookies={"session": "a"})
+    await first.get_cached(url, cookies={"session": "b"})
+    await first.get_cached(url)
+    await first.close()
+    assert cached.from_cache
+    assert "Set-Cookie" not in cached.headers
+    assert stub.requests == 3
+
+    second = HTTPClient(retry_attempts=0, cache=HTTPCache(path=path))
+    public = await second.get_cached(url)
+    await second.get_cached(url, cookies={"session": "a"})
+    await second.close()
+    assert public.from_cache
+    assert "Set-Cookie" not in public.headers
+    assert stub.requests == 4
+
+
+async def test_concurrent_requests_are_coalesced(stub_api, client):
+    """Identical concurrent GETs share one request; different ones don't."""
+    stub, url = stub_api
+    stub.delay = 0.05
+
+    responses = await asyncio.gather(
+        *(client.get_cached(url, params={"q": "wiki"}) for _ in range(5)),
+        client.get_cached(url, params={"q": "wiki"}, headers={"Accept": "text/html"}),
+    )
+    stats = client.get_stats()["cache"]
+
+    assert stub.requests == 2
+    assert all(r.json() == {"version": 1} for r in responses)
+    assert stats["coalesced"] == 4
+    assert stats["requests_saved"] == 4
+    assert stats["in_flight"] == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_request(stub_api, client):
+    """Cancelling one waiter leaves the shared request running for the rest."""
+    stub, url = stub_api
+    stub.delay = 0.05
+
+    first = asyncio.ensure_future(client.get_cached(url))
+    second = asyncio.ensure_future(client.get_cached(url))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    response = await second
+    assert first.cancelled()
+    assert response.json() == {"version": 1}
+    assert stub.requests == 1
+
+
+async def test_caller_after_last_waiter_cancels_starts_new_request(
+    stub_api, client, monkeypatch
+):
+    """A request still cancelling isn't joined by the next caller."""
+    stub, url = stub_api
+    fetch_cached = client._fetch_cached
+
+    async def slow_to_cancel(*args, **kwargs):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)
+            raise
+
+    monkeypatch.setattr(client, "_fetch_cached", slow_to_cancel)
+    first = asyncio.ensure_future(client.get_cached(url))
+    await asyncio.sleep(0.01)
+    monkeypatch.setattr(client, "_fetch_cached", fetch_cached)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+
+    response = await client.get_cached(url)
+    assert first.cancelled()
+    assert response.json() == {"version": 1}
+    assert stub.requests == 1
@@ -0,0 +1,116 @@
+"""
+Unit tests for the HyperLogLog distinct-user sketches.
+
+Tests estimate accuracy, merging, the storage encodings, and the hourly
+tracker's coverage handling.
+"""
+
+import os
+import sys
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.hyperloglog import GUILD_CHANNEL_ID, HyperLogLog, UniqueUserSketches
+
+
+def test_hyperloglog_small_counts_are_close_to_exact():
+    """Linear counting keeps small cardinalities nearly exact."""
+    sketch = HyperLogLog()
+    for user_id in range(100):
+        sketch.add(10**17 + user_id)
+        sketch.add(10**17 + user_id)
+
+    assert abs(sketch.count() - 100) <= 2
+
+
+def test_hyperloglog_large_counts_within_error_bound():
+    """Large cardinalities stay within a few standard errors."""
+    sketch = HyperLogLog()
+    for user_id in range(50_000):
+        sketch.add(user_id * 7919)
+
+    assert abs(sketch.count() - 50_000) / 50_000 < 4 * sketch.relative_error
+
+
+def test_hyperloglog_merge_is_union_and_idempotent():
+    """Merging counts the union and merging twice changes nothing."""
+    a, b = HyperLogLog(), HyperLogLog()
+    for user_id in range(0, 600):
+        a.add(user_id)
+    for user_id in range(400, 1000):
+        b.add(user_id)
+
+    a.merge(b)
+    once = a.count()
+    a.merge(b)
+
+    assert a.count() == once
+    assert abs(once - 1000) / 1000 < 4 * a.relative_error
+
+
+def test_hyperloglog_encodings_round_trip():
+    """Sparse and dense encodings decode to the same registers."""
+    sparse, dense = HyperLogLog(), HyperLogLog()
+    for user_id in range(20):
+        sparse.add(user_id)
+    for user_id in range(20_000):
+        dense.add(user_id)
+
+    sparse_bytes = sparse.to_bytes()
+    dense_bytes = dense.to_bytes()
+
+    assert len(sparse_bytes) < 100
+    assert len(dense_bytes) == 2 + len(dense.registers)
+    assert HyperLogLog.from_bytes(sparse_bytes).registers == sparse.registers
+    assert HyperLogLog.from_bytes(dense_bytes).registers == dense.registers
+
+
+async def test_tracker_estimate_requires_coverage():
+    """Estimates are only served for windows the sketches fully cover."""
+    tracker = UniqueUserSketches()
+    now = datetime.now(UTC).replace(tzinfo=None)
+    for user_id in range(5):
+        tracker.observe(1, 2, user_id, now.replace(tzinfo=UTC).timestamp())
+    tracker.observe(1, 3, 99, now.replace(tzinfo=UTC).timestamp())
+
+    db = AsyncMock()
+    db.fetch.return_value = []
+
+    db.fetchval.return_value = None
+    assert await tracker.estimate(db, 1, now - timedelta(days=1)) is None
+
+    db.fetchval.return_value = now - timedelta(days=2)
+    assert await tracker.estimate(db, 1, now - timedelta(days=1)) == 6
+    assert await tracker.estimate(db, 1, now - timedelta(days=1), channel_id=2) == 5
+
+
+async def test_tracker_flush_merges_stored_sketch():
+    """The first flush of an hour merges the registers already stored."""
+    tracker = UniqueUserSketches()
+    now = datetime.now(UTC).timestamp()
+    tracker.observe(1, 2, 10, now)
+
+    stored = HyperLogLog()
+    stored.add(11)
+    hour_start = datetime.fromtimestamp(now - now % 3600, UTC).replace(tzinfo=None)
+    db = AsyncMock()
+    db.fetch.return_value = [
+        {
+            "guild_id": 1,
+            "channel_id": 2,
+            "hour_start": hour_start,
+            "registers": stored.to_bytes(),
+        }
+    ]
+
+    assert await tracker.flush(db) == 2
+
+    written = {
+        (row[0], row[1]): HyperLogLog.from_bytes(row[3]).count()
+        for row in db.execute_many.await_args_list[0].args[1]
+    }
+    assert written == {(1, 2): 2, (1, GUILD_CHANNEL_ID): 1}
+    assert tracker.get_stats()["dirty"] == 0
@@ -0,0 +1,126 @@
+"""
+Tests for the constant-memory latency histograms and HTTP endpoint stats.
+
+Tests percentile accuracy, fixed memory, endpoint normalization and the
+bounded, least-recently-used endpoint table of the HTTP client.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.http_client import HTTPClient
+from utils.latency_histogram import LatencyHistogram, normalize_endpoint
+
+
+def test_percentiles_are_close_to_exact():
+    """Percentile estimates stay within the bucket error of exact values."""
+    rng = random.Random(42)
+    durations = [rng.lognormvariate(-3, 1) for _ in range(10_000)]
+    histogram = LatencyHistogram()
+    for duration in durations:
+        histogram.record(duration)
+
+    ordered = sorted(durations)
+    for p in (0.5, 0.95, 0.99):
+        exact = ordered[int(p * len(ordered)) - 1]
+        assert histogram.percentile(p) == pytest.approx(exact, rel=0.1)
+    assert histogram.count == len(durations)
+    assert histogram.max == max(durations)
+
+
+def test_memory_is_fixed():
+    """Recording more durations never grows the bucket array."""
+    histogram = LatencyHistogram()
+    buckets = len(histogram.counts)
+    for duration in (0.0, 1e-6, 0.5, 1e6):
+        histogram.record(duration)
+    assert len(histogram.counts) == buckets
+    assert histogram.percentile(1.0) == 1e6
+    assert LatencyHistogram().summary()["p99_ms"] == 0.0
+
+
+def test_normalize_endpoint():
+    """Query strings are stripped and ID-like segments templated."""
+    assert (
+        normalize_endpoint("https://www.patreon.com/api/posts?filter[campaign_id]=5")
+        == "https://www.patreon.com/api/posts"
+    )
+    assert (
+        normalize_endpoint(
+            "https://discord.com/api/webhooks/1234567890/"
+            "aB3dEfGhIjKlMnOpQrStUvWxYz0123456789"
+        )
+        == "https://discord.com/api/webhooks/{id}/{id}"
+    )
+    assert (
+        normalize_endpoint(
+            "https://api.example.com/items/3f2b8c1e-4d5a-4b6c-8d7e-9f0a1b2c3d4e/tags"
+        )
+        == "https://api.example.com/items/{id}/tags"
+    )
+    # Ordinary words are kept, and normalizing is idempotent
+    assert normalize_endpoint("https://example.com/wiki/Erin_Solstice") == (
+        "https://example.com/wiki/Erin_Solstice"
+    )
+    assert (
+        normalize_endpoint("https://example.com/polls/{id}")
+        == "https://example.com/polls/{id}"
+    )
+
+
+def test_endpoint_table_is_bounded():
+    """The least recently used endpoints are evicted beyond the limit."""
+    client = HTTPClient(max_endpoints=2)
+    client._record_latency("https://a.example/polls/1", 0.1)
+    client._record_latency("https://b.example/x", 0.2)
+    client._record_latency("https://a.example/polls/2?page=3", 0.3)
+    client._record_latency("https://c.example/y", 0.4)
+
+    stats = client.get_stats()
+    assert set(stats["endpoints"]) == {
+        "https://a.example/polls/{id}",
+        "https://c.example/y",
+    }
+    assert stats["evicted_endpoints"] == 1
+    assert stats["endpoints"]["https://a.example/polls/{id}"]["latency"]["count"] == 2
+    assert stats["latency"]["count"] == 4
+    assert client.get_endpoint_stats("https://c.example/y?q=1")["latency"][
+        "max_ms"
+    ] == pytest.approx(400)
+
+
+async def test_requests_are_timed_per_endpoint():
+    """Requests made by the client are recorded under their endpoint."""
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.json_response({"id": request.match_info["id"]})
+
+    app = web.Application()
+    app.router.add_get("/polls/{id}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = HTTPClient(retry_attempts=0)
+    try:
+        for poll_id in range(3):
+            response = await client.get(f"http://127.0.0.1:{port}/polls/{poll_id}")
+            response.release()
+        stats = client.get_endpoint_stats()
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    endpoint = stats[f"http://127.0.0.1:{port}/polls/{{id}}"]
+    assert endpoint["requests"] == 3
+    assert endpoint["latency"]["count"] == 3
+    assert endpoint["latency"]["p99_ms"] > 0
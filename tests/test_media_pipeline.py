@@ -0,0 +1,145 @@
+"""
+Tests for the repost media pipeline.
+
+Tests that media is downloaded concurrently into buffers in request order,
+that oversize files are rejected from Content-Length or aborted mid-stream,
+that failed downloads are skipped, and that files are packed into messages
+within Discord's limits.
+"""
+
+import asyncio
+import os
+import sys
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.http_client import HTTPClient
+from utils.media_pipeline import FetchedMedia, fetch_media, pack_uploads
+
+LIMIT = 1000
+
+
+class MediaServer:
+    """Local server with small, large and streamed files."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.streamed_bytes = 0
+
+    async def small(self, request: web.Request) -> web.Response:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return web.Response(
+            body=request.match_info["name"].encode(), content_type="image/png"
+        )
+
+    async def large(self, request: web.Request) -> web.Response:
+        return web.Response(body=b"x" * (LIMIT + 1))
+
+    async def stream(self, request: web.Request) -> web.StreamResponse:
+        # No Content-Length: the size is only known while reading
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        try:
+            for _ in range(1000):
+                await response.write(b"y" * 100)
+                self.streamed_bytes += 100
+                await asyncio.sleep(0.001)
+        except (ConnectionResetError, RuntimeError):
+            pass
+        return response
+
+
+@pytest.fixture
+async def media_server():
+    """Start the media server and yield it with its base URL."""
+    server = MediaServer()
+    app = web.Application()
+    app.router.add_get("/small/{name}", server.small)
+    app.router.add_get("/large.bin", server.large)
+    app.router.add_get("/stream.mp4", server.stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    server.url = f"http://127.0.0.1:{port}"
+    yield server
+    await runner.cleanup()
+
+
+async def test_downloads_are_concurrent_and_ordered(media_server):
+    """Files are fetched in parallel and returned in URL order."""
+    urls = [f"{media_server.url}/small/{name}.png" for name in "abcd"]
+    client = HTTPClient(retry_attempts=0)
+    try:
+        media = await fetch_media(client, urls, LIMIT)
+    finally:
+        await client.close()
+
+    assert [item.filename for item in media] == ["a.png", "b.png", "c.png", "d.png"]
+    assert [item.buffer.read() for item in media] == [
+        b"a.png",
+        b"b.png",
+        b"c.png",
+        b"d.png",
+    ]
+    assert all(item.is_image for item in media)
+    assert media_server.max_active > 1
+
+
+async def test_oversize_and_failed_downloads_are_skipped(media_server):
+    """Too large, aborted and missing files are left out."""
+    urls = [
+        f"{media_server.url}/large.bin",
+        f"{media_server.url}/stream.mp4",
+        f"{media_server.url}/missing.png",
+        f"{media_server.url}/small/ok.png",
+    ]
+    client = HTTPClient(retry_attempts=0)
+    try:
+        media = await fetch_media(client, urls, LIMIT)
+    finally:
+        await client.close()
+
+    assert [item.filename for item in media] == ["ok.png"]
+    # The stream was abandoned long before the server finished it
+    assert media_server.streamed_bytes < 100 * 1000
+
+
+async def test_duplicate_names_are_made_unique(media_server):
+    """Attachments that share a file name get distinct names."""
+    urls = [f"{media_server.url}/small/image.png"] * 2
+    client = HTTPClient(retry_attempts=0)
+    try:
+        media = await fetch_media(client, urls, LIMIT)
+    finally:
+        await client.close()
+
+    assert [item.filename for item in media] == ["image.png", "2_image.png"]
+
+
+def test_pack_uploads():
+    """Messages stay within the attachment count and upload size."""
+
+    def item(size: int) -> FetchedMedia:
+        buffer = SpooledTemporaryFile()
+        buffer.write(b"z" * size)
+        return FetchedMedia("https://example.com/f", "f.bin", size, buffer)
+
+    media = [item(400), item(400), item(400)] + [item(1) for _ in range(12)]
+    packed = pack_uploads(media, LIMIT)
+
+    assert [len(upload) for upload in packed] == [2, 10, 3]
+    assert all(sum(i.size for i in upload) <= LIMIT for upload in packed)
+    file = packed[0][0].to_file()
+    assert file.fp.read() == b"z" * 400
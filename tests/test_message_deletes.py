@@ -0,0 +1,59 @@
+"""
+Unit tests for batched message soft-deletes.
+
+Tests that single and bulk deletions within a window are marked deleted with
+one statement.
+"""
+
+import os
+import sys
+from unittest.mock import AsyncMock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from cogs.stats import StatsCogs
+from tests.fixtures import make_stats_cog
+from tests.mock_factories import MockMessageFactory
+
+
+def make_cog() -> StatsCogs:
+    """Create a stats cog with a mocked database and empty delete queue."""
+    cog = make_stats_cog(pending_deletes=set())
+    cog.bot.db.execute = AsyncMock(return_value="UPDATE 4")
+    return cog
+
+
+async def test_deletes_and_purges_share_one_update():
+    """A purge and a single delete in one window become one ANY($1) update."""
+    cog = make_cog()
+
+    await cog.message_deleted(
+        MockMessageFactory.create_raw_delete(message_id=1, channel_id=10)
+    )
+    await cog.messages_bulk_deleted(
+        MockMessageFactory.create_raw_bulk_delete({2, 3, 1}, channel_id=10)
+    )
+
+    assert len(cog.flush_tasks) == 1
+    cog.bot.db.execute.assert_not_called()
+
+    for task in cog.flush_tasks:
+        task.cancel()
+    await cog.flush_deletes()
+
+    query, message_ids = cog.bot.db.execute.await_args.args
+    assert "message_id = ANY($1::bigint[])" in query
+    # Older rows have NULL in deleted and must be marked too
+    assert "deleted IS NOT TRUE" in query
+    assert sorted(message_ids) == [1, 2, 3]
+    assert cog.pending_deletes == set()
+
+
+async def test_flush_without_deletes_skips_database():
+    """An empty queue doesn't issue a statement."""
+    cog = make_cog()
+
+    await cog.flush_deletes()
+
+    cog.bot.db.execute.assert_not_called()
@@ -0,0 +1,85 @@
+"""
+Unit tests for message edit capture.
+
+Tests that single edits use the one-statement capture, that bursts use the
+batched statement, and that the listener queues edits for a flush.
+"""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from cogs.stats_listeners import (
+    MESSAGE_EDIT_CAPTURE,
+    MESSAGE_EDIT_CAPTURE_BATCH,
+    save_message_edits,
+)
+from tests.fixtures import make_stats_cog
+from tests.mock_factories import MockMessageFactory
+
+EDITED_AT = datetime(2024, 6, 1, 12, 0)
+
+
+def make_bot() -> MagicMock:
+    """Create a bot with a mocked database."""
+    bot = MagicMock()
+    bot.db.execute = AsyncMock()
+    return bot
+
+
+async def test_single_edit_is_one_statement():
+    """One edit runs the capture CTE once with its own arguments."""
+    bot = make_bot()
+
+    await save_message_edits(bot, [(1, "new", EDITED_AT)])
+
+    bot.db.execute.assert_awaited_once_with(MESSAGE_EDIT_CAPTURE, 1, "new", EDITED_AT)
+
+
+async def test_burst_of_edits_is_one_batched_statement():
+    """Several edits are passed as parallel arrays in their original order."""
+    bot = make_bot()
+    edits = [(1, "a", EDITED_AT), (2, "b", EDITED_AT), (1, "c", EDITED_AT)]
+
+    await save_message_edits(bot, edits)
+
+    bot.db.execute.assert_awaited_once_with(
+        MESSAGE_EDIT_CAPTURE_BATCH, [1, 2, 1], ["a", "b", "c"], [EDITED_AT] * 3
+    )
+
+
+async def test_listener_queues_edits_until_flush():
+    """Edits are queued and written together when the window flushes."""
+    cog = make_stats_cog(pending_edits=[])
+    cog.bot.db.execute = AsyncMock()
+
+    for message_id, content in [(1, "a"), (2, "b")]:
+        await cog.message_edited(
+            MockMessageFactory.create_raw_update(
+                {
+                    "id": str(message_id),
+                    "content": content,
+                    "edited_timestamp": "2024-06-01T12:00:00+00:00",
+                },
+                channel_id=10,
+            )
+        )
+    # Embed unfurls carry no edit timestamp and are ignored
+    await cog.message_edited(
+        MockMessageFactory.create_raw_update({"id": "3", "embeds": []}, channel_id=10)
+    )
+
+    assert len(cog.pending_edits) == 2
+    assert len(cog.flush_tasks) == 1
+    cog.bot.db.execute.assert_not_called()
+
+    for task in cog.flush_tasks:
+        task.cancel()
+    await cog.flush_edits()
+
+    assert cog.pending_edits == []
+    assert cog.bot.db.execute.await_args.args[0] == MESSAGE_EDIT_CAPTURE_BATCH
@@ -0,0 +1,161 @@
+"""
+Unit tests for the per-channel recent-message window.
+
+Tests the ring buffer bound, the global memory cap with LRU eviction, keeping
+the buffer in sync with edits and deletions, and loading recent messages from
+the window, the archive and the API.
+"""
+
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.message_window import (
+    CachedMessage,
+    RecentMessageWindow,
+    load_recent_messages,
+)
+
+
+def make_record(message_id: int, content: str = "hello") -> CachedMessage:
+    """Build a message record."""
+    return CachedMessage(message_id, 1, "user", False, content, datetime(2024, 1, 1))
+
+
+def test_channel_buffer_keeps_last_messages_newest_first():
+    """Each channel keeps only its last per_channel messages."""
+    window = RecentMessageWindow(per_channel=3)
+    for message_id in range(5):
+        window.add(10, make_record(message_id))
+
+    assert [r.id for r in window.recent(10, 3)] == [4, 3, 2]
+    assert window.bytes == sum(r.size for r in window.recent(10, 3))
+
+
+def test_short_buffer_counts_as_miss():
+    """Asking for more messages than are buffered returns a partial result."""
+    window = RecentMessageWindow()
+    window.add(10, make_record(1))
+
+    assert len(window.recent(10, 5)) == 1
+    assert window.recent(20, 5) == []
+    assert window.get_stats()["misses"] == 2
+
+
+def test_memory_cap_evicts_least_recently_used_channel():
+    """Exceeding the byte budget drops the idlest channel first."""
+    size = make_record(0).size
+    window = RecentMessageWindow(max_bytes=size * 3)
+    window.add(1, make_record(1))
+    window.add(2, make_record(2))
+    window.recent(1, 1)  # channel 1 is now more recent than channel 2
+    window.add(3, make_record(3))
+    window.add(3, make_record(4))
+
+    assert window.recent(2, 1) == []
+    assert [r.id for r in window.recent(1, 1)] == [1]
+    assert window.get_stats()["evicted_channels"] == 1
+    assert window.bytes <= window.max_bytes
+
+
+def test_edits_and_deletes_keep_buffer_in_sync():
+    """Edits replace content and deletions remove records."""
+    window = RecentMessageWindow()
+    for message_id in range(3):
+        window.add(10, make_record(message_id))
+
+    assert window.update_content(10, 1, "edited") == "hello"
+    assert window.update_content(10, 99, "missing") is None
+    assert window.remove([0, 2], channel_id=10) == 2
+    assert [(r.id, r.content) for r in window.recent(10, 3)] == [(1, "edited")]
+
+
+class FakeChannel:
+    """Channel whose history serves discord-like messages and records calls."""
+
+    def __init__(self, message_ids: list[int], last_message_id: int) -> None:
+        self.id = 10
+        self.last_message_id = last_message_id
+        self.message_ids = message_ids
+        self.calls = []
+
+    async def history(self, limit, before=None, after=None, oldest_first=None):
+        self.calls.append((limit, before and before.id, after and after.id))
+        ids = sorted(self.message_ids, reverse=True)
+        if before is not None:
+            ids = [i for i in ids if i < before.id]
+        if after is not None:
+            ids = [i for i in ids if i > after.id]
+        for message_id in ids[:limit]:
+            yield SimpleNamespace(
+                id=message_id,
+                author=SimpleNamespace(id=1, display_name="user", bot=False),
+                content=f"api {message_id}",
+                created_at=datetime(2024, 1, 1),
+            )
+
+
+def make_db(message_ids: list[int]) -> MagicMock:
+    """Create a database serving archived rows for the given IDs."""
+    db = MagicMock()
+    db.fetch = AsyncMock(
+        return_value=[
+            {
+                "message_id": message_id,
+                "user_id": 1,
+                "author_name": "user",
+                "is_bot": False,
+                "content": f"db {message_id}",
+                "created_at": datetime(2024, 1, 1),
+            }
+            for message_id in sorted(message_ids, reverse=True)
+        ]
+    )
+    return db
+
+
+async def test_full_window_skips_archive_and_api():
+    """A full window answers without touching the database or the API."""
+    window = RecentMessageWindow()
+    for message_id in range(3):
+        window.add(10, make_record(message_id))
+    channel = FakeChannel([], last_message_id=2)
+    db = make_db([])
+
+    messages = await load_recent_messages(channel, 2, window=window, db=db)
+
+    assert [m.id for m in messages] == [2, 1]
+    db.fetch.assert_not_called()
+    assert channel.calls == []
+
+
+async def test_archive_serves_window_without_api_calls():
+    """An up-to-date archive with enough rows needs no API calls."""
+    channel = FakeChannel([], last_message_id=5)
+
+    db = make_db([3, 4, 5])
+    messages = await load_recent_messages(channel, 3, db=db)
+
+    # Older archived rows have NULL in deleted and must still be read
+    assert "deleted IS NOT TRUE" in db.fetch.await_args.args[0]
+    assert [(m.id, m.content) for m in messages] == [
+        (5, "db 5"),
+        (4, "db 4"),
+        (3, "db 3"),
+    ]
+    assert channel.calls == []
+
+
+async def test_api_fills_only_the_gaps():
+    """Newer and older messages missing from the archive come from the API."""
+    channel = FakeChannel([1, 2, 6, 7], last_message_id=7)
+
+    messages = await load_recent_messages(channel, 6, db=make_db([4, 5]))
+
+    assert [m.id for m in messages] == [7, 6, 5, 4, 2, 1]
+    assert channel.calls == [(6, None, 5), (2, 4, None)]
@@ -0,0 +1,200 @@
+"""
+Tests for the shared OpenAI client against a local stub server.
+
+Tests chat completions and embeddings over a pooled connection, the global
+concurrency limit, retries on server errors, token metrics and the response
+cache.
+"""
+
+import asyncio
+import os
+import sys
+
+import openai
+import pytest
+from aiohttp import web
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.openai_client import OpenAIService
+
+
+class StubOpenAI:
+    """Minimal OpenAI-compatible API served by aiohttp."""
+
+    def __init__(self, fail_first: int = 0, delay: float = 0.0) -> None:
+        self.requests = 0
+        self.running = 0
+        self.max_running = 0
+        self.fail_first = fail_first
+        self.delay = delay
+
+    async def chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return web.json_response({"error": {"message": "overloaded"}}, status=503)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return web.json_response(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": f" echo: {body['messages'][-1]['content']} ",
+                        },
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 5,
+                    "total_tokens": 15,
+                },
+            }
+        )
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        return web.json_response(
+            {
+                "object": "list",
+                "model": body["model"],
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": [float(len(t)), 1.0],
+                    }
+                    for i, t in enumerate(body["input"])
+                ],
+                "usage": {"prompt_tokens": 3, "total_tokens": 3},
+            }
+        )
+
+
+@pytest.fixture
+async def stub_server():
+    """Start a stub server on a free local port and yield (stub, base_url)."""
+
+    async def start(**kwargs):
+        stub = StubOpenAI(**kwargs)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", stub.chat)
+        app.router.add_post("/v1/embeddings", stub.embeddings)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        runners.append(runner)
+        return stub, f"http://127.0.0.1:{port}/v1"
+
+    runners = []
+    yield start
+    for runner in runners:
+        await runner.cleanup()
+
+
+def make_service(base_url: str, **kwargs) -> OpenAIService:
+    """Create a service pointing at the stub server."""
+    kwargs.setdefault("max_retries", 0)
+    return OpenAIService(api_key="test-key", base_url=base_url, **kwargs)
+
+
+async def test_chat_and_token_metrics(stub_server):
+    """Chat returns the stripped text and records token usage per model."""
+    stub, base_url = await stub_server()
+    service = make_service(base_url)
+
+    text = await service.chat([{"role": "user", "content": "hi"}], model="gpt-test")
+    stats = service.get_stats()
+    await service.close()
+
+    assert text == "echo: hi"
+    assert stats["requests"] == 1
+    assert stats["models"]["gpt-test"]["prompt_tokens"] == 10
+    assert stats["total_tokens"] == 15
+    assert stats["latency_p50_ms"] > 0
+
+
+async def test_concurrency_is_bounded(stub_server):
+    """No more than max_concurrency requests are in flight at once."""
+    stub, base_url = await stub_server(delay=0.05)
+    service = make_service(base_url, max_concurrency=2)
+
+    await asyncio.gather(
+        *(
+            service.chat([{"role": "user", "content": str(i)}], model="gpt-test")
+            for i in range(6)
+        )
+    )
+    stats = service.get_stats()
+    await service.close()
+
+    assert stub.max_running == 2
+    assert stats["max_in_flight"] == 2
+    assert stats["queued"] > 0
+
+
+async def test_server_errors_are_retried(stub_server):
+    """5xx responses are retried before succeeding."""
+    stub, base_url = await stub_server(fail_first=1)
+    service = make_service(base_url, max_retries=2)
+
+    text = await service.chat([{"role": "user", "content": "x"}], model="gpt-test")
+    await service.close()
+
+    assert text == "echo: x"
+    assert stub.requests == 2
+
+
+async def test_errors_are_counted_and_raised(stub_server):
+    """Errors propagate as OpenAI exceptions once retries are exhausted."""
+    stub, base_url = await stub_server(fail_first=5)
+    service = make_service(base_url)
+
+    with pytest.raises(openai.InternalServerError):
+        await service.chat([{"role": "user", "content": "x"}], model="gpt-test")
+    await service.close()
+
+    assert service.get_stats()["errors"] == 1
+
+
+async def test_cached_requests_skip_the_server(stub_server):
+    """Cached embedding and chat requests are only sent once."""
+    stub, base_url = await stub_server()
+    service = make_service(base_url)
+
+    first = await service.embed(["abc"], model="embed-test")
+    second = await service.embed(["abc"], model="embed-test")
+    for _ in range(2):
+        await service.chat(
+            [{"role": "user", "content": "q"}], model="gpt-test", cache=True
+        )
+    await service.chat([{"role": "user", "content": "q"}], model="gpt-test")
+    stats = service.get_stats()
+    await service.close()
+
+    assert first == second == [[3.0, 1.0]]
+    assert stub.requests == 3
+    assert stats["cache_hits"] == 2
+
+
+def test_missing_api_key_does_not_fail_until_used():
+    """The service can be created without a key for bots without OpenAI."""
+    service = OpenAIService(api_key=None)
+
+    assert not service.configured
+    with pytest.raises(openai.OpenAIError):
+        service.client
@@ -0,0 +1,123 @@
+"""
+Unit tests for the incremental Parquet export.
+
+Tests snowflake conversion, month partitioning, row-group batching and
+resuming from the last exported message.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from utils.exceptions import ValidationError
+from utils.parquet_export import (
+    ParquetExporter,
+    datetime_to_snowflake,
+    snowflake_to_datetime,
+)
+
+
+class FakeStreamDB:
+    """Serves message rows through the Database.stream interface."""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.calls = []
+
+    async def stream(self, query, guild_id, lower, upper, batch_size=10000):
+        self.calls.append((lower, upper))
+        selected = [r for r in self.rows if lower < r["message_id"] < upper]
+        for i in range(0, len(selected), batch_size):
+            yield selected[i : i + batch_size]
+
+
+def make_message(created_at: datetime, offset: int) -> dict:
+    """Build a messages row whose ID encodes its creation time."""
+    message_id = datetime_to_snowflake(created_at) + offset
+    return {
+        "message_id": message_id,
+        "created_at": created_at,
+        "content": f"message {offset}",
+        "user_id": 1,
+        "user_name": "user",
+        "user_nick": None,
+        "server_id": 42,
+        "channel_id": 7,
+        "channel_name": "general",
+        "is_bot": False,
+        "deleted": False,
+        "reference": None,
+    }
+
+
+def test_snowflake_round_trip():
+    """Snowflake lower bounds map back to their creation time."""
+    moment = datetime(2024, 3, 1, 12, 30)
+    assert snowflake_to_datetime(datetime_to_snowflake(moment)) == moment
+
+
+async def test_export_partitions_by_month_and_batches_row_groups(tmp_path):
+    """Rows are split into month partitions with one row group per batch."""
+    rows = [make_message(datetime(2024, 1, 31, 23), i) for i in range(3)]
+    rows += [make_message(datetime(2024, 2, 1, 1), i) for i in range(2)]
+    exporter = ParquetExporter(FakeStreamDB(rows), tmp_path, batch_size=2)
+
+    result = await exporter.export_guild(42, tables=["messages"])
+
+    assert result.rows == {"messages": 5}
+    assert [f.parent.name for f in result.files] == ["month=2024-01", "month=2024-02"]
+    january = pq.ParquetFile(result.files[0])
+    assert january.metadata.num_rows == 3
+    assert january.metadata.num_row_groups == 2
+    table = pq.read_table(result.files[1])
+    assert table.column("content").to_pylist() == ["message 0", "message 1"]
+
+
+async def test_export_resumes_after_last_snowflake(tmp_path):
+    """A second run only exports messages newer than the first run's last."""
+    rows = [make_message(datetime(2024, 5, 1), i) for i in range(3)]
+    db = FakeStreamDB(rows)
+    exporter = ParquetExporter(db, tmp_path)
+
+    await exporter.export_guild(42, tables=["messages"])
+    first_last_id = rows[-1]["message_id"]
+    newer = make_message(datetime(2024, 5, 2), 0)
+    db.rows.append(newer)
+    result = await exporter.export_guild(42, tables=["messages"])
+
+    assert result.rows == {"messages": 1}
+    assert db.calls[1][0] == first_last_id
+    assert exporter.load_state() == {"messages:42": newer["message_id"]}
+
+
+async def test_export_rejects_start_before_exported_range(tmp_path):
+    """An earlier start than the exported range is rejected, a later one is used."""
+    rows = [make_message(datetime(2024, 5, 1), i) for i in range(3)]
+    rows.append(make_message(datetime(2024, 7, 1), 0))
+    db = FakeStreamDB(rows)
+    exporter = ParquetExporter(db, tmp_path)
+    await exporter.export_guild(42, end=datetime(2024, 6, 1), tables=["messages"])
+
+    with pytest.raises(ValidationError, match="already exported"):
+        await exporter.export_guild(42, start=datetime(2024, 4, 1), tables=["messages"])
+    result = await exporter.export_guild(
+        42, start=datetime(2024, 6, 15), tables=["messages"]
+    )
+
+    assert len(db.calls) == 2
+    assert result.rows == {"messages": 1}
+
+
+async def test_export_unknown_table(tmp_path):
+    """Unknown tables are rejected."""
+    exporter = ParquetExporter(FakeStreamDB([]), tmp_path)
+
+    with pytest.raises(ValueError):
+        await exporter.export_guild(42, tables=["users"])
@@ -0,0 +1,132 @@
+"""
+Unit tests for the per-domain HTTP rate limiter.
+
+Tests independent buckets per domain, FIFO release by a single timer,
+cancellation, adapting to 429/Retry-After/X-RateLimit headers, and the
+wait-time histograms.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.http_client import RateLimiter, parse_retry_after
+
+A = "https://a.example"
+B = "https://b.example"
+
+
+async def test_burst_then_throttle_per_domain():
+    """A throttled domain doesn't delay requests to another domain."""
+    limiter = RateLimiter(requests_per_second=20, burst_size=2)
+    await limiter.acquire(A)
+    await limiter.acquire(A)
+
+    waiting = asyncio.create_task(limiter.acquire(A))
+    await asyncio.sleep(0)
+    start = time.monotonic()
+    await limiter.acquire(B)
+    assert time.monotonic() - start < 0.01
+    assert not waiting.done()
+
+    await asyncio.wait_for(waiting, 1)
+    stats = limiter.get_stats()
+    assert stats[A]["acquired"] == 3
+    assert stats[A]["waited"] == 1
+    assert stats[B]["waited"] == 0
+
+
+async def test_waiters_are_released_in_order_by_one_timer():
+    """Queued requests are granted FIFO without a task per waiter."""
+    limiter = RateLimiter(requests_per_second=100, burst_size=1)
+    await limiter.acquire(A)
+    order = []
+
+    async def request(i: int) -> None:
+        await limiter.acquire(A)
+        order.append(i)
+
+    tasks_before = len(asyncio.all_tasks())
+    tasks = [asyncio.create_task(request(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    assert len(asyncio.all_tasks()) == tasks_before + 5
+    assert limiter._buckets[A].timer is not None
+
+    await asyncio.wait_for(asyncio.gather(*tasks), 1)
+    assert order == [0, 1, 2, 3, 4]
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    """A cancelled request doesn't consume a token or block the queue."""
+    limiter = RateLimiter(requests_per_second=50, burst_size=1)
+    await limiter.acquire(A)
+    first = asyncio.create_task(limiter.acquire(A))
+    second = asyncio.create_task(limiter.acquire(A))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    await asyncio.wait_for(second, 1)
+
+    assert not limiter._buckets[A].waiters
+
+
+async def test_retry_after_pauses_the_domain():
+    """A 429 with Retry-After blocks the domain until the given delay."""
+    limiter = RateLimiter(requests_per_second=100, burst_size=10)
+    await limiter.acquire(A)
+
+    limiter.update_from_response(A, 429, {"Retry-After": "0.2"})
+    start = time.monotonic()
+    await limiter.acquire(A)
+
+    assert time.monotonic() - start >= 0.15
+    assert limiter.get_stats()[A]["rate_limited_responses"] == 1
+
+
+async def test_429_without_hint_halves_rate_and_recovers():
+    """Unexplained 429s halve the rate; successes restore it gradually."""
+    limiter = RateLimiter(requests_per_second=10, burst_size=5)
+    await limiter.acquire(A)
+
+    limiter.update_from_response(A, 429, {})
+    limiter.update_from_response(A, 429, {})
+    assert limiter.get_stats()[A]["rate"] == pytest.approx(2.5)
+
+    for _ in range(20):
+        limiter.update_from_response(A, 200, {})
+    assert limiter.get_stats()[A]["rate"] == pytest.approx(10)
+
+
+async def test_exhausted_quota_header_pauses_the_domain():
+    """X-RateLimit-Remaining: 0 pauses until the reset time."""
+    limiter = RateLimiter(requests_per_second=100, burst_size=10)
+    await limiter.acquire(A)
+
+    limiter.update_from_response(
+        A, 200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.15"}
+    )
+    start = time.monotonic()
+    await limiter.acquire(A)
+
+    assert time.monotonic() - start >= 0.1
+    histogram = limiter.get_stats()[A]["wait_histogram"]
+    assert sum(histogram.values()) == 2
+    assert histogram["<=0ms"] == 1
+
+
+def test_parse_retry_after():
+    """Retry-After accepts delay seconds and HTTP dates."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(
+        "Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0
+    ) == pytest.approx(10.0)
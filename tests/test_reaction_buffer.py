@@ -0,0 +1,148 @@
+"""
+Unit tests for the reaction event coalescing buffer.
+
+Tests that add/remove flapping collapses to the final state, that a flush
+writes one bulk upsert and one bulk update, and that the reaction counts
+only change for rows the database reports as changed.
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from tests.fixtures import FakeTransaction
+from tests.mock_factories import MockReactionFactory
+from utils.reaction_buffer import (
+    BULK_REACTION_REMOVE,
+    BULK_REACTION_UPSERT,
+    EMOJI_USAGE_UPSERT,
+    REACTION_COUNT_DECREMENT,
+    REACTION_COUNT_UPSERT,
+    ReactionBuffer,
+)
+
+
+def make_db(added_rows: list[dict], removed_rows: list[dict]) -> MagicMock:
+    """Create a database whose bulk statements report the given rows."""
+    db = MagicMock()
+    db.transaction = AsyncMock(return_value=FakeTransaction([added_rows, removed_rows]))
+    return db
+
+
+def make_payload(
+    user_id: int, emoji: discord.PartialEmoji
+) -> discord.RawReactionActionEvent:
+    """Build a raw reaction payload on message 100."""
+    return MockReactionFactory.create_raw_event(
+        emoji, message_id=100, user_id=user_id, guild_id=1, channel_id=10
+    )
+
+
+THUMBS = discord.PartialEmoji(name="👍")
+POG = discord.PartialEmoji(name="pog", id=123)
+
+
+def test_flapping_collapses_to_final_state():
+    """Repeated events for one key keep only the last and count as absorbed."""
+    buffer = ReactionBuffer()
+
+    assert buffer.record(make_payload(5, THUMBS), True, "👍") is True
+    assert buffer.record(make_payload(5, THUMBS), False, "👍") is False
+    assert buffer.record(make_payload(5, THUMBS), True, "👍") is False
+    buffer.record(make_payload(6, THUMBS), False, "👍")
+
+    pending = buffer.drain()
+    assert {key: p.added for key, p in pending.items()} == {
+        (100, 5, "👍"): True,
+        (100, 6, "👍"): False,
+    }
+    assert buffer.get_stats()["absorbed"] == 2
+    assert len(buffer) == 0
+
+
+async def test_flush_writes_one_upsert_and_one_update():
+    """Net adds and removes are each written with a single bulk statement."""
+    buffer = ReactionBuffer()
+    buffer.record(make_payload(5, THUMBS), True, "👍")
+    buffer.record(make_payload(6, POG), True, "123")
+    buffer.record(make_payload(7, POG), False, "123")
+    db = make_db(
+        added_rows=[{"message_id": 100, "user_id": 5, "emoji_key": "👍"}],
+        removed_rows=[{"message_id": 100, "user_id": 7, "emoji_key": "123"}],
+    )
+
+    assert await buffer.flush(db) == (1, 1)
+
+    conn = db.transaction.return_value.conn
+    upsert, remove = conn.fetch.await_args_list
+    assert upsert.args[0] == BULK_REACTION_UPSERT
+    assert upsert.args[1] == ["👍", None]
+    assert upsert.args[3] == [5, 6]
+    assert upsert.args[7][1] == "https://cdn.discordapp.com/emojis/123.png"
+    assert remove.args == (BULK_REACTION_REMOVE, [100], [7], ["123"])
+
+
+async def test_flush_counts_only_changed_rows():
+    """Counts follow the rows returned by the bulk statements, not the events."""
+    buffer = ReactionBuffer()
+    buffer.record(make_payload(5, THUMBS), True, "👍")
+    buffer.record(make_payload(6, THUMBS), True, "👍")
+    buffer.record(make_payload(7, POG), False, "123")
+    db = make_db(
+        added_rows=[{"message_id": 100, "user_id": 6, "emoji_key": "👍"}],
+        removed_rows=[{"message_id": 100, "user_id": 7, "emoji_key": "123"}],
+    )
+
+    await buffer.flush(db)
+
+    calls = {
+        call.args[0]: call.args[1]
+        for call in db.transaction.return_value.conn.executemany.await_args_list
+    }
+    assert calls[REACTION_COUNT_UPSERT] == [(100, "👍", 1, 10, None, "👍", 1)]
+    assert calls[EMOJI_USAGE_UPSERT][0][:2] == (1, "👍")
+    assert calls[EMOJI_USAGE_UPSERT][0][5:] == (1, 0)
+    assert calls[REACTION_COUNT_DECREMENT] == [(100, "123", 1)]
+    assert buffer.get_stats()["rows_changed"] == 2
+
+
+async def test_flush_of_empty_buffer_skips_database():
+    """Nothing is written when no events are pending."""
+    db = make_db([], [])
+
+    assert await ReactionBuffer().flush(db) == (0, 0)
+    db.transaction.assert_not_called()
+
+
+async def test_flushes_do_not_overlap():
+    """A flush started during another one waits for it to commit."""
+    buffer = ReactionBuffer()
+    log = []
+
+    class SlowTransaction(FakeTransaction):
+        async def __aenter__(self) -> "FakeTransaction":
+            log.append("begin")
+            await asyncio.sleep(0.05)
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            log.append("commit")
+
+    db = MagicMock()
+    db.transaction = AsyncMock(
+        side_effect=[SlowTransaction([[], []]), SlowTransaction([[], []])]
+    )
+
+    buffer.record(make_payload(5, THUMBS), True, "👍")
+    first = asyncio.create_task(buffer.flush(db))
+    await asyncio.sleep(0.01)
+    buffer.record(make_payload(5, THUMBS), False, "👍")
+    await asyncio.gather(first, buffer.flush(db))
+
+    assert log == ["begin", "commit", "begin", "commit"]
@@ -0,0 +1,56 @@
+"""
+Unit tests for reaction deduplication and per-message reaction counts.
+
+Tests that the reaction listeners go through the coalescing buffer, and the
+snowflake bound of the most-reacted query.
+"""
+
+import os
+import sys
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+
+import discord
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from tests.fixtures import make_stats_cog
+from tests.mock_factories import MockReactionFactory
+from utils.reaction_buffer import ReactionBuffer
+
+
+def make_payload(emoji: discord.PartialEmoji) -> discord.RawReactionActionEvent:
+    """Build a raw reaction payload."""
+    return MockReactionFactory.create_raw_event(
+        emoji, message_id=100, user_id=5, guild_id=1, channel_id=10
+    )
+
+
+async def test_reaction_events_are_buffered_and_flushed():
+    """Listener events only hit the database when the buffer flushes."""
+    cog = make_stats_cog(reaction_buffer=ReactionBuffer(window=60))
+    emoji = discord.PartialEmoji(name="pog", id=123)
+
+    await cog.reaction_add(make_payload(emoji))
+    await cog.reaction_remove(make_payload(emoji))
+
+    cog.bot.db.transaction.assert_not_called()
+    assert len(cog.reaction_buffer) == 1
+    assert len(cog.flush_tasks) == 1
+
+    for task in cog.flush_tasks:
+        task.cancel()
+
+
+async def test_most_reacted_bounds_period_by_snowflake():
+    """The period start is converted to the lowest snowflake for that time."""
+    cog = make_stats_cog()
+    cog.bot.db.fetch = AsyncMock(return_value=[])
+    since = datetime(2024, 1, 1)
+
+    await cog.fetch_most_reacted(1, since)
+
+    args = cog.bot.db.fetch.await_args.args
+    assert args[2] == discord.utils.time_snowflake(since.replace(tzinfo=UTC))
+    assert args[1:] == (1, args[2], 3)
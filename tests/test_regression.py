@@ -87,7 +87,7 @@ async def test_wiki_command() -> bool:
     )
 
     # Test with results
-    async def mock_fetch_func(session, url):
+    async def mock_fetch_func(client, url, **kwargs):
         if "generator=search" in url:
             return wiki_search_response
         else:
@@ -0,0 +1,134 @@
+"""
+Unit tests for guarded execution of generated SQL.
+
+Tests statement validation, LIMIT wrapping, the EXPLAIN cost gate, the
+read-only transaction with a statement timeout, and result caching.
+"""
+
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import asyncpg
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from utils.exceptions import QueryError
+from utils.safe_query import (
+    SafeQueryRunner,
+    apply_row_limit,
+    normalize_sql,
+    validate_read_only,
+)
+
+
+class FakeContext:
+    """Async context manager returning a fixed value."""
+
+    def __init__(self, value=None) -> None:
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def make_db(cost: float, rows: list[dict]) -> tuple[MagicMock, MagicMock]:
+    """Create a database whose pool hands out a scripted connection."""
+    conn = MagicMock()
+    conn.transaction = MagicMock(return_value=FakeContext())
+    conn.execute = AsyncMock()
+    conn.fetchval = AsyncMock(
+        return_value=json.dumps([{"Plan": {"Total Cost": cost, "Plan Rows": 42}}])
+    )
+    conn.fetch = AsyncMock(return_value=rows)
+    db = MagicMock()
+    db.pool.acquire = MagicMock(return_value=FakeContext(conn))
+    return db, conn
+
+
+def test_validate_read_only():
+    """Only single SELECT/WITH statements pass; literals may hold semicolons."""
+    assert validate_read_only(" SELECT 1; ") == "SELECT 1"
+    assert validate_read_only("with x as (select 1) select * from x")
+    assert validate_read_only("SELECT ';' AS s") == "SELECT ';' AS s"
+
+    with pytest.raises(QueryError):
+        validate_read_only("DELETE FROM messages")
+    with pytest.raises(QueryError):
+        validate_read_only("SELECT 1; DROP TABLE messages")
+
+
+def test_normalize_sql_keeps_literals():
+    """Whitespace and case are folded outside string literals only."""
+    assert normalize_sql("SELECT  *\nFROM t WHERE a = 'X  Y';") == (
+        "select * from t where a = 'X  Y'"
+    )
+
+
+def test_apply_row_limit_wraps_query():
+    """The original query, including its own LIMIT, is wrapped."""
+    sql = apply_row_limit("SELECT * FROM messages ORDER BY created_at LIMIT 5000", 500)
+
+    assert sql.startswith("SELECT * FROM (\nSELECT * FROM messages")
+    assert sql.endswith("LIMIT 501")
+
+
+async def test_run_uses_read_only_transaction_and_timeout():
+    """The query runs after EXPLAIN inside a read-only, time-limited transaction."""
+    db, conn = make_db(cost=10.0, rows=[{"n": 1}])
+    runner = SafeQueryRunner(db, statement_timeout=2.5)
+
+    result = await runner.run("SELECT count(*) AS n FROM users")
+
+    conn.transaction.assert_called_once_with(readonly=True)
+    conn.execute.assert_awaited_once_with("SET LOCAL statement_timeout = 2500")
+    assert conn.fetchval.await_args.args[0].startswith(
+        "EXPLAIN (FORMAT JSON) SELECT * FROM ("
+    )
+    assert result.rows == [{"n": 1}]
+    assert result.estimated_cost == 10.0
+    assert result.estimated_rows == 42
+    assert not result.truncated
+
+
+async def test_expensive_query_is_not_executed():
+    """Queries estimated above the cost ceiling are rejected before running."""
+    db, conn = make_db(cost=5_000_000.0, rows=[])
+    runner = SafeQueryRunner(db, max_cost=100_000)
+
+    with pytest.raises(QueryError, match="too expensive"):
+        await runner.run("SELECT * FROM messages")
+
+    conn.fetch.assert_not_awaited()
+    assert runner.get_stats()["rejected_cost"] == 1
+
+
+async def test_timeout_is_reported():
+    """A query cancelled by statement_timeout becomes a QueryError."""
+    db, conn = make_db(cost=10.0, rows=[])
+    conn.fetch.side_effect = asyncpg.QueryCanceledError("canceling statement")
+    runner = SafeQueryRunner(db, statement_timeout=1)
+
+    with pytest.raises(QueryError, match="cancelled after 1s"):
+        await runner.run("SELECT * FROM messages")
+
+
+async def test_results_are_cached_and_truncated():
+    """Repeated queries are served from the cache; extra rows are dropped."""
+    db, conn = make_db(cost=10.0, rows=[{"n": i} for i in range(4)])
+    runner = SafeQueryRunner(db, row_limit=3)
+
+    first = await runner.run("SELECT n FROM t")
+    second = await runner.run("select  n\nfrom t;")
+
+    assert len(first.rows) == 3
+    assert first.truncated
+    assert second.cached
+    assert second.rows == first.rows
+    conn.fetch.assert_awaited_once()
@@ -0,0 +1,119 @@
+"""
+Unit tests for the schema search vector index and question embedding cache.
+
+Tests exact cosine top-k, reloading when the table changes, the LRU and disk
+layers of the embedding cache, and that repeated questions skip the
+embedding request.
+"""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+pytest.importorskip("numpy")
+
+from utils import schema_search
+from utils.schema_index import EmbeddingCache, SchemaIndex, normalize_question
+
+ROWS = [
+    {"description": "messages table", "embedding": [1.0, 0.0, 0.0]},
+    {"description": "reactions table", "embedding": [0.0, 2.0, 0.0]},
+    {"description": "users table", "embedding": [0.7, 0.7, 0.0]},
+]
+
+
+def make_db(rows: list[dict], updated_at: datetime) -> MagicMock:
+    """Create a database serving schema_embeddings rows."""
+    db = MagicMock()
+    db.fetchrow = AsyncMock(return_value={"rows": len(rows), "updated_at": updated_at})
+    db.fetch = AsyncMock(return_value=rows)
+    return db
+
+
+def test_search_ranks_by_cosine_similarity():
+    """Results are ordered by cosine similarity, independent of magnitude."""
+    index = SchemaIndex()
+    index.load([(r["description"], r["embedding"]) for r in ROWS])
+
+    assert index.search([0.0, 5.0, 0.0], 2) == ["reactions table", "users table"]
+    assert index.search([1.0, 0.1, 0.0], 10) == [
+        "messages table",
+        "users table",
+        "reactions table",
+    ]
+
+
+async def test_refresh_reloads_only_when_table_changes():
+    """The vectors are reloaded when the row count or updated_at changes."""
+    index = SchemaIndex(refresh_interval=0)
+    db = make_db(ROWS, datetime(2024, 1, 1))
+
+    assert await index.refresh(db) is True
+    assert await index.refresh(db) is False
+    db.fetchrow.return_value = {"rows": 3, "updated_at": datetime(2024, 1, 2)}
+    assert await index.refresh(db) is True
+
+    assert db.fetch.await_count == 2
+    assert index.loads == 2
+
+
+async def test_refresh_is_throttled():
+    """Within the refresh interval the table isn't queried at all."""
+    index = SchemaIndex(refresh_interval=60)
+    db = make_db(ROWS, datetime(2024, 1, 1))
+
+    await index.refresh(db)
+    await index.refresh(db)
+
+    assert db.fetchrow.await_count == 1
+
+
+def test_normalize_question():
+    """Case, whitespace and trailing punctuation don't change the key."""
+    assert normalize_question("  How many   USERS? ") == "how many users"
+    assert EmbeddingCache.key("m", "How many users?") == EmbeddingCache.key(
+        "m", "how many users"
+    )
+
+
+async def test_embedding_cache_persists_to_disk(tmp_path):
+    """Embeddings evicted from memory or written by another run come from disk."""
+    path = tmp_path / "embeddings.sqlite3"
+    cache = EmbeddingCache(max_entries=1, path=path)
+    await cache.set("a", [0.5, 1.5])
+    await cache.set("b", [2.0, 3.0])
+    assert await cache.get("a") == [0.5, 1.5]
+    cache.close()
+
+    reopened = EmbeddingCache(path=path)
+    assert await reopened.get("b") == [2.0, 3.0]
+    assert await reopened.get("c") is None
+    assert reopened.get_stats()["disk_hits"] == 1
+    reopened.close()
+
+
+async def test_search_schema_reuses_embeddings_and_index(monkeypatch):
+    """A repeated question needs no embedding request and no vector query."""
+    monkeypatch.setattr(schema_search, "embedding_cache", EmbeddingCache(path=None))
+    monkeypatch.setattr(schema_search, "schema_index", SchemaIndex())
+    service = MagicMock()
+    service.configured = True
+    service.embed = AsyncMock(return_value=[[0.0, 1.0, 0.0]])
+    db = make_db(ROWS, datetime(2024, 1, 1))
+
+    first = await schema_search.search_schema(
+        db, "Top reactions?", top_k=1, openai_service=service
+    )
+    second = await schema_search.search_schema(
+        db, "top reactions", top_k=1, openai_service=service
+    )
+
+    assert first == second == ["reactions table"]
+    service.embed.assert_awaited_once()
+    assert db.fetch.await_count == 1
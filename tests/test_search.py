@@ -0,0 +1,100 @@
+"""
+Unit tests for the message search query builder.
+
+Tests filter placeholders, keyset cursors for both search modes, and the
+substring helpers.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from cogs.search import (
+    SearchFilters,
+    build_search_query,
+    escape_like,
+    substring_snippet,
+)
+
+
+def make_filters(**kwargs) -> SearchFilters:
+    """Create filters for guild 1 with two visible channels."""
+    return SearchFilters(
+        query=kwargs.pop("query", "innkeeper"),
+        guild_id=1,
+        visible_channel_ids=[10, 20],
+        **kwargs,
+    )
+
+
+def test_full_text_first_page():
+    """The first full-text page ranks by ts_rank and has no cursor condition."""
+    sql, args = build_search_query(make_filters(), None, 6)
+
+    assert "websearch_to_tsquery('english', $1)" in sql
+    assert "m.content_tsv @@ q" in sql
+    assert "ts_headline" in sql
+    assert "LIMIT $4" in sql
+    assert args == ["innkeeper", 1, [10, 20], 6]
+
+
+def test_full_text_filters_and_cursor_placeholders():
+    """Optional filters and the keyset cursor get consecutive placeholders."""
+    after = datetime(2024, 1, 1)
+    sql, args = build_search_query(
+        make_filters(channel_id=10, user_id=5, after=after), (0.25, 999), 6
+    )
+
+    assert "COALESCE(t.parent_id, m.channel_id) = $4" in sql
+    assert "m.user_id = $5" in sql
+    assert "m.created_at >= $6" in sql
+    assert "(ts_rank(m.content_tsv, q), m.message_id) < ($7::real, $8)" in sql
+    assert "LIMIT $9" in sql
+    assert args == ["innkeeper", 1, [10, 20], 10, 5, after, 0.25, 999, 6]
+
+
+def test_substring_mode_uses_message_id_cursor():
+    """Substring searches escape wildcards and page by message ID."""
+    sql, args = build_search_query(
+        make_filters(query="50%_off", substring=True), (None, 999), 6
+    )
+
+    assert "m.content ILIKE '%' || $1 || '%'" in sql
+    assert "m.message_id < $4" in sql
+    assert "tsquery" not in sql
+    assert args == ["50\\%\\_off", 1, [10, 20], 999, 6]
+
+
+def test_messages_with_null_deleted_flag_are_searched():
+    """Older rows whose deleted flag is NULL match, deleted rows don't."""
+    sql, _ = build_search_query(make_filters(), None, 6)
+    condition = re.search(r"m\.deleted [^\n]*", sql).group(0)
+
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE messages (message_id INTEGER, deleted BOOLEAN)")
+    db.executemany(
+        "INSERT INTO messages VALUES (?, ?)", [(1, None), (2, False), (3, True)]
+    )
+    rows = db.execute(f"SELECT message_id FROM messages m WHERE {condition}")
+
+    assert [row[0] for row in rows] == [1, 2]
+
+
+def test_escape_like():
+    """Backslashes are escaped before the wildcards."""
+    assert escape_like("a\\b%c_d") == "a\\\\b\\%c\\_d"
+
+
+def test_substring_snippet_highlights_match():
+    """The excerpt bolds the first case-insensitive match."""
+    content = "x" * 200 + " The Innkeeper arrives " + "y" * 400
+    snippet = substring_snippet(content, "innkeeper")
+
+    assert "**Innkeeper**" in snippet
+    assert snippet.startswith("…")
+    assert snippet.endswith("…")
@@ -0,0 +1,70 @@
+"""
+Unit tests for the summarization cog.
+
+Tests that summaries go through the bot's shared OpenAI client and that long
+conversations are summarized in chunks instead of being truncated.
+"""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from cogs.summarization import SummarizationCog
+from utils.exceptions import ValidationError
+from utils.message_window import CachedMessage
+
+
+def make_messages(count: int, length: int = 50) -> list[CachedMessage]:
+    """Create message records, newest first."""
+    return [
+        CachedMessage(i, 1, "user", False, f"{i:<{length}}", datetime(2024, 1, 1))
+        for i in reversed(range(count))
+    ]
+
+
+def make_cog() -> SummarizationCog:
+    """Create the cog with a mocked shared OpenAI service."""
+    bot = MagicMock()
+    bot.openai.chat = AsyncMock(return_value="summary")
+    return SummarizationCog(bot, ["Be nice."])
+
+
+async def test_summary_uses_shared_client():
+    """A short conversation is summarized in one call to the shared client."""
+    cog = make_cog()
+
+    summary = await cog.summarize_messages(make_messages(5))
+
+    assert summary == "summary"
+    cog.bot.openai.chat.assert_awaited_once()
+    assert cog.bot.openai.chat.await_args.kwargs["max_tokens"] == 500
+
+
+async def test_long_conversation_is_not_truncated():
+    """Every message reaches a completion when the conversation is long."""
+    cog = make_cog()
+
+    await cog.summarize_messages(make_messages(200, length=2000))
+
+    sent = "".join(
+        call.args[0][1]["content"] for call in cog.bot.openai.chat.await_args_list
+    )
+    assert sent.count("user: ") == 200
+    assert cog.bot.openai.chat.await_count > 2
+
+
+async def test_bot_messages_only_is_rejected():
+    """Conversations with only bot messages can't be summarized."""
+    cog = make_cog()
+    messages = make_messages(3)
+    for message in messages:
+        message.is_bot = True
+
+    with pytest.raises(ValidationError):
+        await cog.moderate_conversation(messages)
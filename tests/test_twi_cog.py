@@ -35,36 +35,36 @@ async def test_google_search_function() -> bool:
     # Import the google_search function
     from cogs.twi import google_search
 
-    # Mock the Google API build function
-    mock_service = MagicMock()
-    mock_cse = MagicMock()
-    mock_list = MagicMock()
-
-    # Set up the mock chain
-    mock_service.cse.return_value = mock_cse
-    mock_cse.list.return_value = mock_list
-    mock_list.execute.return_value = {
-        "items": [
-            {
-                "title": "Test Result",
-                "link": "https://example.com",
-                "snippet": "Test snippet",
-            }
-        ]
-    }
+    # Mock the search client
+    client = MagicMock()
+    client.search = AsyncMock(
+        return_value={
+            "items": [
+                {
+                    "title": "Test Result",
+                    "link": "https://example.com",
+                    "snippet": "Test snippet",
+                }
+            ],
+            "source": "api",
+        }
+    )
 
-    with patch("cogs.twi.build", return_value=mock_service):
-        # Call the function
-        result = google_search("test query", "fake_api_key", "fake_cse_id")
+    # Call the function
+    result = await google_search(
+        "test query", "fake_api_key", "fake_cse_id", client=client
+    )
 
-        # Verify the result
-        assert result is not None
-        assert "items" in result
-        assert len(result["items"]) == 1
-        assert result["items"][0]["title"] == "Test Result"
+    # Verify the result
+    assert result is not None
+    assert "items" in result
+    assert len(result["items"]) == 1
+    assert result["items"][0]["title"] == "Test Result"
 
-        # Verify the API was called correctly
-        mock_cse.list.assert_called_once_with(q="test query", cx="fake_cse_id", num=9)
+    # Verify the client was called correctly
+    client.search.assert_awaited_once_with(
+        "test query", "fake_api_key", "fake_cse_id", num=9
+    )
 
     print("✅ google_search function test passed")
     return True
@@ -190,7 +190,7 @@ async def test_find_command() -> bool:
     interaction = MockInteractionFactory.create()
 
     # Mock the google_search function
-    def mock_google_search(query, api_key, cse_id, **kwargs):
+    async def mock_google_search(query, api_key, cse_id, **kwargs):
         if "test_query" in query:
             return {
                 "searchInformation": {"totalResults": "1"},
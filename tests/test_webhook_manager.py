@@ -0,0 +1,166 @@
+"""
+Tests for queued webhook delivery.
+
+Tests that sends are packed into as few messages as Discord allows, that
+differing options and colliding file names are kept apart, that an overloaded
+queue drops sends, that a failed delivery doesn't stop the queue, and that
+webhook objects are reused per URL and session.
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+import aiohttp
+import discord
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import config
+from utils.webhook_manager import WebhookManager
+
+WEBHOOK_URL = "https://discord.com/api/webhooks/123456789012345678/" + "a" * 68
+
+
+class RecordingWebhook:
+    """Records the messages a webhook would send."""
+
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+
+    async def send(self, **kwargs) -> None:
+        self.messages.append(kwargs)
+
+
+class FakeHTTPClient:
+    """Hands out the current shared session."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self.session = session
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        return self.session
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """A manager delivering to a recording webhook."""
+    monkeypatch.setattr(config, "webhooks_enabled", True)
+    manager = WebhookManager(http_client=None, max_pending=2)
+    recorder = RecordingWebhook()
+
+    async def bound_webhook(state):
+        return recorder
+
+    monkeypatch.setattr(manager, "_get_bound_webhook", bound_webhook)
+    manager.recorder = recorder
+    return manager
+
+
+async def send_many(manager: WebhookManager, sends: list[dict]) -> None:
+    """Queue sends in one burst and wait for delivery."""
+    async with manager.get_webhook(WEBHOOK_URL) as webhook:
+        for kwargs in sends:
+            await webhook.send(**kwargs)
+    await manager.close()
+
+
+async def test_embeds_are_packed(manager):
+    """Fifteen embed sends go out as messages of ten and five embeds."""
+    await send_many(
+        manager, [{"embed": discord.Embed(title=str(i))} for i in range(15)]
+    )
+
+    messages = manager.recorder.messages
+    assert [len(m["embeds"]) for m in messages] == [10, 5]
+    assert [e.title for e in messages[0]["embeds"]] == [str(i) for i in range(10)]
+    stats = manager.get_stats()
+    assert stats["sent"] == 2
+    assert stats["merged"] == 13
+    assert stats["pending"] == 0
+
+
+async def test_content_is_joined_and_options_kept_apart(manager):
+    """Text sends are joined; sends with other options are not merged."""
+    quiet = discord.AllowedMentions.none()
+    await send_many(
+        manager,
+        [
+            {"content": "first", "allowed_mentions": discord.AllowedMentions.none()},
+            {"content": "second", "allowed_mentions": quiet},
+            {"content": "third", "username": "Logger"},
+        ],
+    )
+
+    messages = manager.recorder.messages
+    assert messages[0]["content"] == "first\nsecond"
+    assert messages[1]["content"] == "third"
+    assert messages[1]["username"] == "Logger"
+
+
+async def test_colliding_file_names_are_not_packed(manager):
+    """Attachments with the same name are sent in separate messages."""
+    await send_many(
+        manager,
+        [
+            {"file": discord.File(io.BytesIO(b"a"), "image.png")},
+            {"file": discord.File(io.BytesIO(b"b"), "other.png")},
+            {"file": discord.File(io.BytesIO(b"c"), "image.png")},
+        ],
+    )
+
+    assert [len(m["files"]) for m in manager.recorder.messages] == [2, 1]
+
+
+async def test_overload_drops_sends(manager):
+    """Sends that fit no queued message are dropped when the queue is full."""
+    full = [discord.Embed(title=str(i)) for i in range(10)]
+    await send_many(manager, [{"embeds": full}] * 3)
+
+    assert len(manager.recorder.messages) == 2
+    assert manager.get_stats()["dropped"] == 1
+
+
+async def test_failed_delivery_keeps_draining(manager):
+    """A send that times out is counted and the next message still goes out."""
+    send = manager.recorder.send
+    calls = 0
+
+    async def flaky_send(**kwargs) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise TimeoutError
+        await send(**kwargs)
+
+    manager.recorder.send = flaky_send
+    full = [discord.Embed(title=str(i)) for i in range(10)]
+    await send_many(manager, [{"embeds": full}] * 2)
+
+    assert len(manager.recorder.messages) == 1
+    stats = manager.get_stats()
+    assert stats["errors"] == 1
+    assert stats["sent"] == 1
+
+
+async def test_webhook_reused_per_session(monkeypatch):
+    """The webhook object is kept until the shared session changes."""
+    monkeypatch.setattr(config, "webhooks_enabled", True)
+    async with aiohttp.ClientSession() as first, aiohttp.ClientSession() as second:
+        http_client = FakeHTTPClient(first)
+        manager = WebhookManager(http_client)
+        async with manager.get_webhook(WEBHOOK_URL):
+            pass
+        state = manager._webhooks[WEBHOOK_URL]
+
+        webhook = await manager._get_bound_webhook(state)
+        assert await manager._get_bound_webhook(state) is webhook
+
+        http_client.session = second
+        rebound = await manager._get_bound_webhook(state)
+        assert rebound is not webhook
+        assert rebound.session is second
+    await asyncio.sleep(0)
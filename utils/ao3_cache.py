@@ -0,0 +1,421 @@
+"""Cache of AO3 work metadata with background refresh.
+
+Every ``/ao3`` and AO3 gallery repost used to scrape the full work page again
+through ``AO3.Work``, which is slow and is what gets the bot throttled by
+AO3. ``AO3WorkCache`` keeps the metadata those commands show, keyed by work
+ID, in memory and in the ``ao3_work_cache`` table, so repeated lookups of
+popular works are answered in milliseconds and survive restarts.
+
+Entries are fresh for ``ttl``. A stale entry is still returned right away
+while a refresh runs in the background, and a background task re-scrapes
+recently requested works before they go stale, one at a time so AO3 isn't
+hit in bursts. Concurrent lookups of the same uncached work share one scrape.
+When the background task starts, it loads the works requested within
+``refresh_window`` from the table, so they stay fresh across restarts.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+import AO3
+
+# Work attributes shown by /ao3 and the gallery repost embed
+LIST_FIELDS = ("warnings", "categories", "fandoms", "relationships", "characters")
+SCALAR_FIELDS = (
+    "title",
+    "summary",
+    "url",
+    "rating",
+    "language",
+    "status",
+    "words",
+    "nchapters",
+    "expected_chapters",
+    "comments",
+    "kudos",
+    "bookmarks",
+    "hits",
+)
+DATE_FIELDS = ("date_published", "date_updated")
+
+
+@dataclass
+class WorkAuthor:
+    """An author of a cached work.
+
+    Attributes:
+        name: The author's user name.
+        url: The author's profile URL.
+    """
+
+    name: str
+    url: str
+
+    def __str__(self) -> str:
+        """Return the author's user name."""
+        return self.name
+
+
+@dataclass
+class CachedWork:
+    """The metadata of an AO3 work, with the attribute names of ``AO3.Work``.
+
+    Attributes:
+        id: The work ID.
+        fetched_at: When the work page was scraped, as a Unix timestamp.
+    """
+
+    id: int
+    fetched_at: float
+    title: str | None = None
+    summary: str | None = None
+    url: str | None = None
+    rating: str | None = None
+    language: str | None = None
+    status: str | None = None
+    words: int | None = None
+    nchapters: int | None = None
+    expected_chapters: int | None = None
+    comments: int | None = None
+    kudos: int | None = None
+    bookmarks: int | None = None
+    hits: int | None = None
+    date_published: datetime | None = None
+    date_updated: datetime | None = None
+    authors: list[WorkAuthor] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+    fandoms: list[str] = field(default_factory=list)
+    relationships: list[str] = field(default_factory=list)
+    characters: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_work(cls, work: Any) -> "CachedWork":
+        """Copy the metadata of a loaded ``AO3.Work``.
+
+        Attributes that fail to parse are left empty, as /ao3 already shows
+        what it can of a partly readable work.
+        """
+
+        def read(name: str, default: Any = None) -> Any:
+            try:
+                value = getattr(work, name)
+            except Exception:
+                return default
+            return default if value is None else value
+
+        cached = cls(id=int(work.id), fetched_at=time.time())
+        for name in SCALAR_FIELDS + DATE_FIELDS:
+            setattr(cached, name, read(name))
+        for name in LIST_FIELDS:
+            setattr(cached, name, list(read(name, [])))
+        cached.authors = [
+            WorkAuthor(name=getattr(author, "username", str(author)), url=author.url)
+            for author in read("authors", [])
+        ]
+        return cached
+
+    def to_json(self) -> str:
+        """Serialize for the ``metadata`` column."""
+        data = asdict(self)
+        for name in DATE_FIELDS:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, payload: str | dict[str, Any]) -> "CachedWork":
+        """Deserialize from the ``metadata`` column."""
+        data = json.loads(payload) if isinstance(payload, str) else dict(payload)
+        for name in DATE_FIELDS:
+            if data.get(name):
+                data[name] = datetime.fromisoformat(data[name])
+        data["authors"] = [WorkAuthor(**author) for author in data.get("authors", [])]
+        return cls(**data)
+
+
+class _Entry:
+    """A cached work and when it was last asked for."""
+
+    __slots__ = ("work", "requested_at")
+
+    def __init__(self, work: CachedWork, requested_at: float) -> None:
+        self.work = work
+        self.requested_at = requested_at
+
+
+class AO3WorkCache:
+    """Work metadata cache in memory and the database, refreshed in the background.
+
+    Attributes:
+        db: The bot's Database, or None for a memory-only cache.
+        pool: The BlockingPool that runs the scrapes.
+        session: The AO3 session used for scraping, once logged in.
+        ttl: Seconds a scraped work is considered fresh.
+        refresh_window: Works requested within this many seconds are kept
+            fresh by the background refresh.
+        max_entries: Maximum number of works kept in memory.
+    """
+
+    def __init__(
+        self,
+        db,
+        pool,
+        ttl: float = 6 * 3600,
+        refresh_window: float = 24 * 3600,
+        refresh_interval: float = 15 * 60,
+        max_entries: int = 512,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            db: The bot's Database, or None to keep works in memory only.
+            pool: The BlockingPool that runs the blocking ``AO3.Work`` scrape.
+            ttl: Seconds a scraped work is considered fresh.
+            refresh_window: Seconds since the last request during which a work
+                is refreshed in the background.
+            refresh_interval: Seconds between background refresh passes.
+            max_entries: Maximum number of works kept in memory.
+            logger: Logger instance to use for logging.
+        """
+        self.db = db
+        self.pool = pool
+        self.session: Any = None
+        self.ttl = ttl
+        self.refresh_window = refresh_window
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self.logger = logger or logging.getLogger("ao3_cache")
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._in_flight: dict[int, asyncio.Future] = {}
+        self._refresher: asyncio.Task | None = None
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    async def get(self, work_id: int) -> CachedWork:
+        """Get a work's metadata, scraping it only if it isn't cached.
+
+        Stale entries are returned as they are and refreshed in the
+        background.
+
+        Args:
+            work_id: The AO3 work ID.
+
+        Returns:
+            The work's metadata.
+
+        Raises:
+            ExternalServiceError: If the scrape timed out or the pool is busy.
+            Exception: Whatever ``AO3.Work`` raises for an uncached work, e.g.
+                ``AO3.utils.InvalidIdError``.
+        """
+        self._start_refresher()
+        now = time.time()
+        entry = self._entries.get(work_id)
+        if entry is None:
+            work = await self._load(work_id)
+            if work is not None:
+                self._stats["db_hits"] += 1
+                entry = self._remember(work, now)
+        if entry is None:
+            self._stats["misses"] += 1
+            entry = self._remember(await self._fetch(work_id), now)
+        else:
+            self._entries.move_to_end(work_id)
+            if self._is_fresh(entry.work, now):
+                self._stats["hits"] += 1
+            else:
+                self._stats["stale_hits"] += 1
+                self._refresh_later(work_id)
+        entry.requested_at = now
+        return entry.work
+
+    def _is_fresh(self, work: CachedWork, now: float) -> bool:
+        return now - work.fetched_at < self.ttl
+
+    def _remember(self, work: CachedWork, requested_at: float) -> _Entry:
+        """Keep a work in memory, evicting the least recently used."""
+        entry = self._entries.get(work.id)
+        if entry is None:
+            entry = self._entries[work.id] = _Entry(work, requested_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            entry.work = work
+        return entry
+
+    async def _fetch(self, work_id: int) -> CachedWork:
+        """Scrape a work once, however many callers ask for it meanwhile."""
+        future = self._in_flight.get(work_id)
+        if future is None:
+            future = asyncio.ensure_future(self._scrape(work_id))
+            self._in_flight[work_id] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(work_id, None))
+        return await asyncio.shield(future)
+
+    async def _scrape(self, work_id: int) -> CachedWork:
+        """Scrape a work on the pool and store it."""
+        session = self.session
+
+        def load_work() -> CachedWork:
+            # Chapter text isn't shown, so skip parsing it
+            work = AO3.Work(work_id, session=session, load_chapters=False)
+            return CachedWork.from_work(work)
+
+        work = await self.pool.run(load_work)
+        entry = self._remember(work, time.time())
+        await self._store(work, entry.requested_at)
+        return work
+
+    def _refresh_later(self, work_id: int) -> None:
+        """Refresh a stale work in the background."""
+        if work_id in self._in_flight:
+            return
+        task = asyncio.ensure_future(self._fetch(work_id))
+        task.add_done_callback(self._log_refresh)
+
+    def _log_refresh(self, task: asyncio.Future) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._stats["refresh_errors"] += 1
+            self.logger.warning(f"Background AO3 refresh failed: {task.exception()}")
+        else:
+            self._stats["refreshes"] += 1
+
+    async def _load(self, work_id: int) -> CachedWork | None:
+        """Read a work from the database."""
+        if self.db is None:
+            return None
+        try:
+            row = await self.db.fetchrow(
+                "SELECT metadata FROM ao3_work_cache WHERE work_id = $1", work_id
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not read AO3 work {work_id} from cache: {e}")
+            return None
+        return CachedWork.from_json(row["metadata"]) if row else None
+
+    async def _store(self, work: CachedWork, requested_at: float) -> None:
+        """Write a work to the database."""
+        if self.db is None:
+            return
+        try:
+            await self.db.execute(
+                """
+                INSERT INTO ao3_work_cache(work_id, metadata, fetched_at, last_requested_at)
+                VALUES($1, $2::jsonb, $3, $4)
+                ON CONFLICT (work_id) DO UPDATE SET
+                    metadata = EXCLUDED.metadata,
+                    fetched_at = EXCLUDED.fetched_at,
+                    last_requested_at = GREATEST(
+                        ao3_work_cache.last_requested_at, EXCLUDED.last_requested_at
+                    )
+                """,
+                work.id,
+                work.to_json(),
+                datetime.fromtimestamp(work.fetched_at, UTC),
+                datetime.fromtimestamp(requested_at, UTC),
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not store AO3 work {work.id} in cache: {e}")
+
+    async def load_recent(self) -> int:
+        """Load the recently requested works from the database into memory.
+
+        Works already in memory are kept as they are.
+
+        Returns:
+            The number of works loaded.
+        """
+        if self.db is None:
+            return 0
+        since = datetime.fromtimestamp(time.time() - self.refresh_window, UTC)
+        try:
+            rows = await self.db.fetch(
+                """
+                SELECT metadata, last_requested_at FROM ao3_work_cache
+                WHERE last_requested_at > $1
+                ORDER BY last_requested_at DESC
+                LIMIT $2
+                """,
+                since,
+                self.max_entries,
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not load recent AO3 works from cache: {e}")
+            return 0
+        loaded = 0
+        # Oldest first, so the most recently requested end up least likely evicted
+        for row in reversed(rows):
+            work = CachedWork.from_json(row["metadata"])
+            if work.id not in self._entries:
+                self._remember(work, row["last_requested_at"].timestamp())
+                loaded += 1
+        return loaded
+
+    def _start_refresher(self) -> None:
+        if self.refresh_interval and (
+            self._refresher is None or self._refresher.done()
+        ):
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        """Periodically re-scrape recently requested works before they go stale."""
+        await self.load_recent()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_due()
+
+    async def refresh_due(self) -> int:
+        """Re-scrape the recently requested works that go stale before the next pass.
+
+        Works are refreshed one at a time to avoid bursts of AO3 requests.
+
+        Returns:
+            The number of works refreshed.
+        """
+        now = time.time()
+        due = [
+            work_id
+            for work_id, entry in self._entries.items()
+            if now - entry.requested_at < self.refresh_window
+            and not self._is_fresh(entry.work, now + self.refresh_interval)
+        ]
+        refreshed = 0
+        for work_id in due:
+            try:
+                await self._fetch(work_id)
+            except Exception as e:
+                self._stats["refresh_errors"] += 1
+                self.logger.warning(f"Background AO3 refresh of {work_id} failed: {e}")
+            else:
+                self._stats["refreshes"] += 1
+                refreshed += 1
+        return refreshed
+
+    def get_stats(self) -> dict[str, int]:
+        """Get hit, miss and refresh counts and the number of cached works."""
+        return {**self._stats, "entries": len(self._entries)}
+
+    async def close(self) -> None:
+        """Stop the background refresh."""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
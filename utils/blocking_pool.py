@@ -0,0 +1,183 @@
+"""Bounded thread pool for blocking scrapers.
+
+gallery-dl extraction and the ``AO3`` package do blocking HTTP requests.
+Calling them from a coroutine freezes the event loop, heartbeats included,
+for as long as the scrape takes. ``BlockingPool`` runs such calls on a small
+dedicated thread pool instead, so they neither block the loop nor take over
+the default executor used for everything else.
+
+Each call has a timeout. A call that times out or whose caller is cancelled
+is dropped if it hasn't started yet; a call already running can't be
+interrupted and finishes in the background, but its result is discarded.
+When the queue is full, new calls are rejected right away instead of piling
+up behind a slow site. Queue depth, queue wait and run times are tracked for
+``/admin resources``.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from utils.exceptions import ExternalServiceError
+from utils.latency_histogram import LatencyHistogram
+
+T = TypeVar("T")
+
+
+class BlockingPool:
+    """Runs blocking calls on a bounded thread pool with timeouts.
+
+    Attributes:
+        name: Name of the pool, used for thread names, logs and errors.
+        max_workers: Number of threads.
+        max_queue: Number of calls that may wait for a free thread.
+        timeout: Default timeout in seconds, including the time spent queued.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue: int = 16,
+        timeout: float = 60.0,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            name: Name of the pool.
+            max_workers: Number of threads.
+            max_queue: Number of calls that may wait for a free thread; calls
+                beyond this are rejected.
+            timeout: Default timeout in seconds.
+            logger: Logger instance to use for logging.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(f"blocking_pool.{name}")
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "max_queued": 0,
+        }
+        self._wait_times = LatencyHistogram()
+        self._run_times = LatencyHistogram()
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> T:
+        """Run a blocking call on the pool and wait for its result.
+
+        Args:
+            func: The blocking callable.
+            *args: Positional arguments for ``func``.
+            timeout: Timeout in seconds, defaulting to the pool's.
+            **kwargs: Keyword arguments for ``func``.
+
+        Returns:
+            The result of ``func``.
+
+        Raises:
+            ExternalServiceError: If the queue is full or the call timed out.
+            Exception: Whatever ``func`` raises.
+        """
+        if self._queued >= self.max_queue:
+            self._stats["rejected"] += 1
+            self.logger.warning(
+                f"{self.name} pool queue full ({self._queued} waiting), "
+                f"rejecting {getattr(func, '__qualname__', func)}"
+            )
+            raise ExternalServiceError(
+                service_name=self.name,
+                message=f"The {self.name} service is busy, please try again shortly.",
+            )
+
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_times.record(started - submitted)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_times.record(time.perf_counter() - started)
+
+        with self._lock:
+            self._queued += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._queued)
+        work = self._executor.submit(call)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(work), timeout or self.timeout
+            )
+        except TimeoutError:
+            self._stats["timed_out"] += 1
+            self._forget(work)
+            self.logger.warning(
+                f"{self.name} call {getattr(func, '__qualname__', func)} timed out "
+                f"after {timeout or self.timeout}s"
+            )
+            raise ExternalServiceError(
+                service_name=self.name,
+                message=f"The {self.name} service took too long to respond.",
+            ) from None
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            self._forget(work)
+            raise
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        self._stats["completed"] += 1
+        return result
+
+    def _forget(self, work: Future) -> None:
+        """Drop a call whose caller stopped waiting, if it hasn't started."""
+        # A call that already started can't be interrupted; it leaves the
+        # running count by itself when it finishes
+        if work.cancel():
+            with self._lock:
+                self._queued -= 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get queue depth, outcome counts and timings.
+
+        Returns:
+            A dictionary with pool statistics.
+        """
+        return {
+            **self._stats,
+            "workers": self.max_workers,
+            "queued": self._queued,
+            "running": self._running,
+            "wait": self._wait_times.summary(),
+            "run": self._run_times.summary(),
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting calls and drop the ones still queued."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
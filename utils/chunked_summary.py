@@ -0,0 +1,225 @@
+"""Map-reduce summarization of long conversations.
+
+Instead of truncating a conversation to fit one completion, the lines are
+split into chunks that fit a token budget, every chunk is summarized
+concurrently (bounded by a semaphore), and the chunk summaries are combined
+by a final reduce call. If the combined summaries are still over budget, they
+are reduced again in chunks.
+
+Chunk boundaries are content-defined: besides the hard budget, a chunk may
+end after any message whose ID hashes to a boundary. Re-running over a
+shifted window of the same channel (a few newer messages, a few older ones
+dropped) therefore reproduces most chunks exactly, and their summaries are
+served from a cache keyed by a hash of the prompt and chunk text.
+"""
+
+import asyncio
+import hashlib
+import logging
+import zlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+
+logger = logging.getLogger("chunked_summary")
+
+# Rough characters per token for English chat text
+CHARS_PER_TOKEN = 4
+
+# One in this many message IDs may end a chunk early
+BOUNDARY_MODULUS = 8
+
+# Completes (system prompt, user content) into text
+Completer = Callable[[str, str], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def is_boundary(message_id: int) -> bool:
+    """Whether a chunk may end after this message."""
+    return zlib.crc32(message_id.to_bytes(8, "little")) % BOUNDARY_MODULUS == 0
+
+
+def split_by_tokens(
+    lines: Sequence[tuple[int, str]], budget: int, min_fill: float = 0.5
+) -> list[str]:
+    """Split conversation lines into chunks that fit a token budget.
+
+    Args:
+        lines: (message_id, line) pairs, oldest first.
+        budget: Maximum estimated tokens per chunk.
+        min_fill: Fraction of the budget a chunk must reach before it can end
+            at a content-defined boundary.
+
+    Returns:
+        The chunk texts, oldest first. A single line over the budget is cut
+        into budget-sized pieces.
+    """
+    max_chars = budget * CHARS_PER_TOKEN
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    def close() -> None:
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for message_id, line in lines:
+        if len(line) > max_chars:
+            close()
+            chunks.extend(
+                line[i : i + max_chars] for i in range(0, len(line), max_chars)
+            )
+            continue
+
+        tokens = estimate_tokens(line)
+        if current_tokens + tokens > budget:
+            close()
+        current.append(line)
+        current_tokens += tokens
+        if current_tokens >= budget * min_fill and is_boundary(message_id):
+            close()
+
+    close()
+    return chunks
+
+
+class ChunkSummaryCache:
+    """LRU cache of chunk summaries keyed by a hash of prompt and content.
+
+    Attributes:
+        max_entries: Maximum number of summaries kept.
+        hits: Lookups served from the cache.
+        misses: Lookups that needed a completion.
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(prompt: str, text: str) -> str:
+        """Hash a prompt and chunk text into a cache key."""
+        digest = hashlib.sha256(prompt.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Get a cached summary and mark it as recently used."""
+        summary = self._entries.get(key)
+        if summary is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return summary
+
+    def set(self, key: str, summary: str) -> None:
+        """Store a summary, evicting the least recently used one if full."""
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get cache statistics.
+
+        Returns:
+            A dictionary with the size and hit counts.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+async def gather_all(coros: list[Awaitable[str]]) -> list[str]:
+    """Run coroutines concurrently, cancelling the rest if one fails.
+
+    Unlike a TaskGroup, the first exception is raised as-is so callers can
+    handle specific API errors.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def map_reduce_summary(
+    lines: Sequence[tuple[int, str]],
+    complete: Completer,
+    map_prompt: str,
+    reduce_prompt: str,
+    budget: int = 3000,
+    concurrency: int = 4,
+    cache: ChunkSummaryCache | None = None,
+) -> str:
+    """Summarize a conversation of any length.
+
+    A conversation that fits in one chunk is completed with the map prompt
+    alone, so short conversations still cost a single call.
+
+    Args:
+        lines: (message_id, line) pairs, oldest first.
+        complete: Coroutine function completing (system prompt, content).
+        map_prompt: System prompt for summarizing one chunk.
+        reduce_prompt: System prompt for combining chunk summaries.
+        budget: Maximum estimated tokens per chunk.
+        concurrency: Maximum completions in flight at once.
+        cache: Cache of chunk summaries, if any.
+
+    Returns:
+        The final summary.
+
+    Raises:
+        Exception: Whatever ``complete`` raises; remaining chunks are cancelled.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize(prompt: str, text: str) -> str:
+        key = ChunkSummaryCache.key(prompt, text)
+        if cache is not None and (summary := cache.get(key)) is not None:
+            return summary
+        async with semaphore:
+            summary = await complete(prompt, text)
+        if cache is not None:
+            cache.set(key, summary)
+        return summary
+
+    chunks = split_by_tokens(lines, budget)
+    if not chunks:
+        return ""
+    if len(chunks) == 1:
+        return await summarize(map_prompt, chunks[0])
+
+    summaries = await gather_all([summarize(map_prompt, chunk) for chunk in chunks])
+    logger.debug(f"Summarized {len(lines)} lines in {len(chunks)} chunks")
+
+    # Reduce, re-chunking the partial summaries while they don't fit
+    while True:
+        parts = [
+            (i, f"Part {i + 1} of {len(summaries)}:\n{summary}")
+            for i, summary in enumerate(summaries)
+        ]
+        combined = split_by_tokens(parts, budget, min_fill=1.0)
+        if len(combined) == 1 or len(combined) >= len(summaries):
+            return await summarize(reduce_prompt, "\n\n".join(p for _, p in parts))
+        summaries = await gather_all(
+            [summarize(reduce_prompt, chunk) for chunk in combined]
+        )
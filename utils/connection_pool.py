@@ -0,0 +1,149 @@
+"""Keep-alive connection pool that recycles connections instead of sessions.
+
+``RecyclingConnector`` is an ``aiohttp.TCPConnector`` that tracks when each
+connection was opened. Connections older than ``max_connection_age`` are
+closed when they are released (or found idle by ``recycle_idle``), and the
+idle connections to a host are dropped after a connection error there, since
+a server restart or NAT timeout usually kills them all. The session, its DNS
+cache and every other warm connection stay in place, so periodic cleanup no
+longer forces the next request to pay for a new DNS lookup, TCP connect and
+TLS handshake.
+
+The connector also counts new connections (handshakes) and reused ones, so
+the connection reuse ratio can be monitored.
+
+It hooks into private ``TCPConnector`` methods (``_create_connection``,
+``_get``, ``_release``) and the idle pool in ``_conns``, whose shapes were
+checked against aiohttp 3.11 to 3.13; the dependency is pinned to that range.
+"""
+
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+import aiohttp
+from aiohttp.client_proto import ResponseHandler
+from aiohttp.client_reqrep import ClientRequest, ConnectionKey
+from aiohttp.connector import Connection
+from aiohttp.tracing import Trace
+
+
+class RecyclingConnector(aiohttp.TCPConnector):
+    """TCP connector with per-connection age limits and reuse statistics.
+
+    Attributes:
+        max_connection_age: Seconds after which a connection is closed instead
+            of being returned to the pool.
+    """
+
+    def __init__(self, *, max_connection_age: float = 600.0, **kwargs: Any) -> None:
+        """Initialize the connector.
+
+        Args:
+            max_connection_age: Seconds after which a connection is recycled.
+            **kwargs: Arguments of ``aiohttp.TCPConnector``.
+        """
+        super().__init__(**kwargs)
+        self.max_connection_age = max_connection_age
+        self._opened_at: weakref.WeakKeyDictionary[ResponseHandler, float] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._counts = {
+            "created": 0,
+            "tls_handshakes": 0,
+            "reused": 0,
+            "recycled_age": 0,
+            "recycled_error": 0,
+        }
+
+    async def _create_connection(
+        self, req: ClientRequest, traces: list[Trace], timeout: aiohttp.ClientTimeout
+    ) -> ResponseHandler:
+        protocol = await super()._create_connection(req, traces, timeout)
+        self._opened_at[protocol] = time.monotonic()
+        self._counts["created"] += 1
+        if req.is_ssl():
+            self._counts["tls_handshakes"] += 1
+        return protocol
+
+    async def _get(self, key: ConnectionKey, traces: list[Trace]) -> Connection | None:
+        connection = await super()._get(key, traces)
+        if connection is not None:
+            self._counts["reused"] += 1
+        return connection
+
+    def _release(
+        self,
+        key: ConnectionKey,
+        protocol: ResponseHandler,
+        *,
+        should_close: bool = False,
+    ) -> None:
+        if not should_close and self._expired(protocol, time.monotonic()):
+            should_close = True
+            self._counts["recycled_age"] += 1
+        super()._release(key, protocol, should_close=should_close)
+
+    def _expired(self, protocol: ResponseHandler, now: float) -> bool:
+        """Whether a connection has outlived ``max_connection_age``."""
+        opened_at = self._opened_at.get(protocol)
+        return opened_at is not None and now - opened_at > self.max_connection_age
+
+    def _close_idle(
+        self, should_close: Callable[[ConnectionKey, ResponseHandler], bool]
+    ) -> int:
+        """Close the idle connections for which ``should_close(key, protocol)``."""
+        closed = 0
+        for key in list(self._conns):
+            kept = []
+            for protocol, released_at in self._conns[key]:
+                if should_close(key, protocol):
+                    protocol.close()
+                    closed += 1
+                else:
+                    kept.append((protocol, released_at))
+            if kept:
+                self._conns[key].clear()
+                self._conns[key].extend(kept)
+            else:
+                del self._conns[key]
+        return closed
+
+    def recycle_idle(self) -> int:
+        """Close idle pooled connections older than ``max_connection_age``.
+
+        Returns:
+            The number of connections closed.
+        """
+        now = time.monotonic()
+        closed = self._close_idle(lambda key, protocol: self._expired(protocol, now))
+        self._counts["recycled_age"] += closed
+        return closed
+
+    def drop_host(self, host: str) -> int:
+        """Close the idle connections to a host, e.g. after a connection error.
+
+        Args:
+            host: The host name.
+
+        Returns:
+            The number of connections closed.
+        """
+        closed = self._close_idle(lambda key, protocol: key.host == host)
+        self._counts["recycled_error"] += closed
+        return closed
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get connection statistics.
+
+        Returns:
+            Counts of created, TLS, reused and recycled connections, the reuse
+            ratio and the number of idle and in-use connections.
+        """
+        stats: dict[str, Any] = dict(self._counts)
+        acquisitions = stats["created"] + stats["reused"]
+        stats["reuse_ratio"] = stats["reused"] / acquisitions if acquisitions else 0.0
+        stats["idle"] = sum(len(conns) for conns in self._conns.values())
+        stats["in_use"] = len(self._acquired)
+        return stats
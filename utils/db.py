@@ -941,6 +941,42 @@ class Database:
             self.logger.error(f"Database error during pagination: {e}")
             raise DatabaseError(f"Failed to paginate query: {e}") from e
 
+    async def stream(
+        self, query: str, *args, batch_size: int = 10000
+    ) -> AsyncGenerator[Sequence[Record], None]:
+        """Execute a query through a server-side cursor and yield batches.
+
+        Unlike paginate, the query is executed once and rows are pulled from
+        an open cursor, so the cost per batch does not grow with the offset.
+        The connection is held inside a read-only transaction until the
+        generator is exhausted or closed.
+
+        Args:
+            query: The SQL query to execute.
+            *args: Parameters for the query.
+            batch_size: Number of records to fetch per batch.
+
+        Yields:
+            Batches of records from the query.
+
+        Raises:
+            DatabaseError: If the query fails.
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction(readonly=True):
+                    cursor = await conn.cursor(query, *args)
+                    while True:
+                        batch = await cursor.fetch(batch_size)
+                        if not batch:
+                            break
+                        yield batch
+                        if len(batch) < batch_size:
+                            break
+        except (asyncpg.PostgresConnectionError, asyncpg.PostgresError) as e:
+            self.logger.error(f"Database error during streaming: {e}")
+            raise DatabaseError(f"Failed to stream query: {e}") from e
+
     async def refresh_materialized_views(self) -> None:
         """Refresh all materialized views.
 
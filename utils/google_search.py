@@ -0,0 +1,258 @@
+"""Async Google Custom Search client with a result cache and quota tracking.
+
+``/find`` used to build a ``googleapiclient`` service on every call, which
+parses the Custom Search discovery document each time, and then ran the
+blocking ``execute()`` on the event loop. ``GoogleSearchClient`` calls the
+JSON API directly through the bot's ``HTTPClient`` instead. The only part of
+the service definition it needs is the ``cse.list`` endpoint, which is fixed
+below, so there is no discovery document to fetch or parse at all.
+
+Results are cached per normalized query for ``ttl`` and trimmed to the fields
+``/find`` shows, both in the request (``fields``) and in the cache. Queries
+are counted against the API key's daily quota, which Google resets at
+midnight Pacific time. Once only ``reserve`` queries are left, a search is
+answered from the cache (even an expired entry) or from matching results of
+other cached queries, and only spends one of the remaining queries when
+neither has anything. An error naming the per-day limit marks the day as
+used up; other rate limit errors, such as the per-minute limit, only fail the
+one request.
+"""
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import aiohttp
+
+from utils.exceptions import APIError, ExternalServiceError
+
+# The cse.list method of the Custom Search JSON API, from its discovery document
+SEARCH_URL = "https://customsearch.googleapis.com/customsearch/v1"
+
+# Partial response: only the fields shown by /find
+RESPONSE_FIELDS = "searchInformation/totalResults,items(title,link,snippet,displayLink)"
+
+# Google resets the daily query quota at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Error reason Google returns when the daily quota is used up. Per-day limits
+# set in the Cloud console come back as rateLimitExceeded, with the limit
+# named in the message instead.
+DAILY_LIMIT_REASON = "dailyLimitExceeded"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a cache key.
+
+    Args:
+        query: The search query.
+
+    Returns:
+        The query case-folded, with whitespace collapsed.
+    """
+    return " ".join(query.casefold().split())
+
+
+class GoogleSearchClient:
+    """Custom Search client on the shared HTTP client.
+
+    Attributes:
+        http_client: The bot's HTTPClient.
+        daily_quota: Queries allowed per day.
+        reserve: Queries kept back for searches that have no cached results.
+        ttl: Seconds a cached result is fresh.
+        max_entries: Maximum number of cached queries.
+    """
+
+    def __init__(
+        self,
+        http_client,
+        daily_quota: int = 100,
+        reserve: int = 10,
+        ttl: float = 6 * 3600,
+        max_entries: int = 512,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            http_client: The bot's HTTPClient.
+            daily_quota: Queries allowed per day.
+            reserve: Number of queries left at which searches prefer cached
+                results.
+            ttl: Seconds a cached result is fresh.
+            max_entries: Maximum number of cached queries.
+            logger: Logger instance to use for logging.
+        """
+        self.http_client = http_client
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logger or logging.getLogger("google_search")
+        self._cache: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._quota_day: date | None = None
+        self._used = 0
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "stale_hits": 0,
+            "local_hits": 0,
+        }
+
+    @property
+    def remaining(self) -> int:
+        """Queries left today."""
+        self._roll_quota()
+        return max(0, self.daily_quota - self._used)
+
+    def _roll_quota(self) -> None:
+        today = datetime.now(QUOTA_TIMEZONE).date()
+        if today != self._quota_day:
+            self._quota_day = today
+            self._used = 0
+
+    async def search(
+        self, query: str, api_key: str, cse_id: str, num: int = 9, **params: Any
+    ) -> dict[str, Any]:
+        """Search, answering from the cache where possible.
+
+        Args:
+            query: The search query.
+            api_key: The Google API key.
+            cse_id: The Custom Search Engine ID.
+            num: Number of results to ask for, at most 10.
+            **params: Additional ``cse.list`` parameters.
+
+        Returns:
+            The response, with ``searchInformation.totalResults`` and
+            ``items`` holding title, link, snippet and displayLink. ``source``
+            is ``"api"``, ``"cache"``, ``"stale"`` or ``"local"``.
+
+        Raises:
+            APIError: If Google rejected the request.
+            ExternalServiceError: If the request failed, or the quota is used
+                up and nothing is cached.
+        """
+        key = (cse_id, normalize_query(query), num, tuple(sorted(params.items())))
+        cached = self._cache.get(key)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.ttl:
+            self._cache.move_to_end(key)
+            self._stats["cache_hits"] += 1
+            return {**cached[1], "source": "cache"}
+
+        if self.remaining <= self.reserve:
+            if cached is not None:
+                self._stats["stale_hits"] += 1
+                return {**cached[1], "source": "stale"}
+            local = self._search_cached(query, num)
+            if local is not None:
+                self._stats["local_hits"] += 1
+                return {**local, "source": "local"}
+            if self.remaining == 0:
+                raise ExternalServiceError(
+                    service_name="Google Search",
+                    message="The daily search quota is used up, please try again tomorrow.",
+                )
+            self.logger.warning(
+                f"Google search quota nearly used up ({self.remaining} left), "
+                f"spending one on an uncached query"
+            )
+
+        result = await self._request(query, api_key, cse_id, num, params)
+        self._cache[key] = (time.monotonic(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return {**result, "source": "api"}
+
+    async def _request(
+        self,
+        query: str,
+        api_key: str,
+        cse_id: str,
+        num: int,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Call ``cse.list`` and count the query against the quota."""
+        self._roll_quota()
+        self._used += 1
+        self._stats["requests"] += 1
+        request_params = {
+            "key": api_key,
+            "cx": cse_id,
+            "q": query,
+            "num": num,
+            "fields": RESPONSE_FIELDS,
+            **params,
+        }
+        try:
+            response = await self.http_client.get(SEARCH_URL, params=request_params)
+            try:
+                body = await response.json(content_type=None)
+            finally:
+                response.release()
+        except (aiohttp.ClientError, TimeoutError, ValueError) as e:
+            self._stats["errors"] += 1
+            raise ExternalServiceError(
+                service_name="Google Search", message=f"Search request failed: {e}"
+            ) from e
+
+        if response.status != 200:
+            self._stats["errors"] += 1
+            error = (body or {}).get("error", {})
+            reasons = {item.get("reason") for item in error.get("errors", [])}
+            message = str(error.get("message", ""))
+            if DAILY_LIMIT_REASON in reasons or "per day" in message.lower():
+                self.logger.warning("Google search quota exhausted for today")
+                self._used = self.daily_quota
+            elif response.status == 429:
+                self.logger.warning(f"Google search rate limited: {message}")
+            raise APIError(
+                service_name="Google Search",
+                status_code=response.status,
+                response_body=error.get("message"),
+            )
+
+        return {
+            "searchInformation": {
+                "totalResults": body.get("searchInformation", {}).get(
+                    "totalResults", "0"
+                )
+            },
+            "items": body.get("items", []),
+        }
+
+    def _search_cached(self, query: str, num: int) -> dict[str, Any] | None:
+        """Find results of other cached queries that contain every query word."""
+        words = re.findall(r"\w+", query.casefold())
+        if not words:
+            return None
+        items: dict[str, dict[str, Any]] = {}
+        for _, result in reversed(self._cache.values()):
+            for item in result["items"]:
+                text = f"{item.get('title', '')} {item.get('snippet', '')}".casefold()
+                if all(word in text for word in words):
+                    items.setdefault(item.get("link"), item)
+        if not items:
+            return None
+        matches = list(items.values())[:num]
+        return {
+            "searchInformation": {"totalResults": str(len(matches))},
+            "items": matches,
+        }
+
+    def get_stats(self) -> dict[str, int]:
+        """Get request, cache and quota counts."""
+        return {
+            **self._stats,
+            "quota_used": self.daily_quota - self.remaining,
+            "quota_remaining": self.remaining,
+            "cached_queries": len(self._cache),
+        }
@@ -0,0 +1,479 @@
+"""Streaming heavy-hitter tracking for message activity leaderboards.
+
+This module provides in-memory Space-Saving sketches that track the most
+active users per channel and the most active channels per guild over sliding
+windows (1h, 24h and 7d). The stats commands can answer "Top Contributors" and
+"Most Active Channels" from these sketches instead of running a
+``GROUP BY ... ORDER BY count DESC`` over the messages table on every call.
+
+Each window is split into fixed-size buckets, each holding its own sketch.
+A query merges the live buckets, so the effective window can overshoot the
+requested span by at most one bucket. Sketch state is periodically
+checkpointed to the ``activity_topk_checkpoints`` table so the trackers
+survive restarts.
+"""
+
+import heapq
+import json
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+# Scope names used as the first component of sketch keys and in checkpoints
+SCOPE_CHANNEL_USERS = "channel_users"
+SCOPE_GUILD_CHANNELS = "guild_channels"
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """Configuration for a sliding window.
+
+    Attributes:
+        name: The window name used by callers and in checkpoints.
+        span: The window length in seconds.
+        bucket_seconds: The width of each bucket in seconds.
+    """
+
+    name: str
+    span: int
+    bucket_seconds: int
+
+
+WINDOWS: dict[str, WindowSpec] = {
+    "1h": WindowSpec("1h", 3600, 300),
+    "24h": WindowSpec("24h", 86400, 3600),
+    "7d": WindowSpec("7d", 604800, 21600),
+}
+
+
+class SpaceSaving:
+    """Space-Saving sketch for approximate top-k counting.
+
+    The sketch keeps at most ``capacity`` counters. When a new key arrives and
+    the sketch is full, the key with the smallest count is evicted and the new
+    key inherits its count (recorded as the error bound). Reported counts are
+    therefore upper bounds that overshoot by at most ``error``.
+
+    While no eviction has happened the sketch is exact.
+    """
+
+    __slots__ = ("capacity", "counts", "errors", "evictions", "_heap")
+
+    def __init__(self, capacity: int = 64) -> None:
+        """Initialize an empty sketch.
+
+        Args:
+            capacity: Maximum number of counters to keep.
+        """
+        self.capacity = capacity
+        self.counts: dict[int, int] = {}
+        self.errors: dict[int, int] = {}
+        self.evictions = 0
+        # Lazy min-heap of (count, key); stale entries are skipped on pop
+        self._heap: list[tuple[int, int]] = []
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether every reported count is exact (no evictions have occurred)."""
+        return self.evictions == 0
+
+    def add(self, key: int, amount: int = 1) -> None:
+        """Count an occurrence of a key.
+
+        Args:
+            key: The key to count.
+            amount: How many occurrences to add.
+        """
+        count = self.counts.get(key)
+        if count is not None:
+            count += amount
+        elif len(self.counts) < self.capacity:
+            count = amount
+            self.errors[key] = 0
+        else:
+            min_count, min_key = self._pop_min()
+            del self.counts[min_key]
+            del self.errors[min_key]
+            self.evictions += 1
+            count = min_count + amount
+            self.errors[key] = min_count
+
+        self.counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+
+        # Rebuild the heap when stale entries start to dominate
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> tuple[int, int]:
+        """Pop the current minimum counter, skipping stale heap entries.
+
+        Returns:
+            A (count, key) tuple for the smallest live counter.
+        """
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return count, key
+
+    def top(self, n: int) -> list[tuple[int, int]]:
+        """Return the n keys with the highest counts.
+
+        Args:
+            n: Number of entries to return.
+
+        Returns:
+            A list of (key, count) tuples, highest count first.
+        """
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+    def to_json(self) -> str:
+        """Serialize the sketch for checkpointing.
+
+        Returns:
+            A JSON string with the counters and eviction count.
+        """
+        return json.dumps(
+            {
+                "capacity": self.capacity,
+                "evictions": self.evictions,
+                "counters": [
+                    [key, count, self.errors.get(key, 0)]
+                    for key, count in self.counts.items()
+                ],
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: str | dict[str, Any]) -> "SpaceSaving":
+        """Rebuild a sketch from its checkpointed form.
+
+        Args:
+            payload: The JSON string (or already decoded dict) from to_json.
+
+        Returns:
+            The restored sketch.
+        """
+        data = json.loads(payload) if isinstance(payload, str) else payload
+        sketch = cls(capacity=data.get("capacity", 64))
+        sketch.evictions = data.get("evictions", 0)
+        for key, count, error in data.get("counters", []):
+            sketch.counts[int(key)] = count
+            sketch.errors[int(key)] = error
+        sketch._heap = [(c, k) for k, c in sketch.counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+
+def merge_top(
+    sketches: Iterable[SpaceSaving],
+    n: int,
+    among: set[int] | None = None,
+) -> tuple[list[tuple[int, int]], bool]:
+    """Merge several sketches and return the combined top entries.
+
+    Args:
+        sketches: The sketches to merge (typically the live buckets of a window).
+        n: Number of entries to return.
+        among: Optional set of keys to restrict the result to.
+
+    Returns:
+        A tuple of the (key, count) list and whether all merged sketches were exact.
+    """
+    totals: dict[int, int] = {}
+    exact = True
+    for sketch in sketches:
+        exact = exact and sketch.is_exact
+        for key, count in sketch.counts.items():
+            if among is not None and key not in among:
+                continue
+            totals[key] = totals.get(key, 0) + count
+    return heapq.nlargest(n, totals.items(), key=lambda item: item[1]), exact
+
+
+class ActivityTopKTracker:
+    """Per-guild and per-channel heavy-hitter trackers over sliding windows.
+
+    Two kinds of sketches are maintained for every window in ``WINDOWS``:
+
+    - ``channel_users``: the most active users of each channel (or thread)
+    - ``guild_channels``: the most active channels of each guild
+
+    Leaderboard lookups return ``None`` whenever the tracker cannot answer
+    reliably (the window is longer than the tracked history, or a filtered
+    query hit a sketch that has evicted counters), so callers can fall back to
+    the exact SQL path.
+    """
+
+    def __init__(
+        self,
+        user_capacity: int = 64,
+        channel_capacity: int = 512,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            user_capacity: Counters kept per bucket for per-channel user sketches.
+            channel_capacity: Counters kept per bucket for per-guild channel sketches.
+            logger: Logger instance to use for logging.
+        """
+        self.user_capacity = user_capacity
+        self.channel_capacity = channel_capacity
+        self.logger = logger or logging.getLogger("heavy_hitters")
+        # (scope, scope_id, window) -> {bucket_start: sketch}
+        self._buckets: dict[tuple[str, int, str], dict[int, SpaceSaving]] = {}
+        # Buckets modified since the last checkpoint
+        self._dirty: set[tuple[str, int, str, int]] = set()
+        # Epoch seconds since which every ingested message has been observed
+        self.tracked_since = time.time()
+        self.observed = 0
+
+    def observe(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        timestamp: float | None = None,
+    ) -> None:
+        """Record a message in every window it falls into.
+
+        Args:
+            guild_id: The guild the message was posted in.
+            channel_id: The channel or thread the message was posted in.
+            user_id: The author of the message.
+            timestamp: Message creation time in epoch seconds (defaults to now).
+        """
+        now = time.time()
+        ts = now if timestamp is None else timestamp
+        for spec in WINDOWS.values():
+            if ts <= now - spec.span:
+                continue
+            bucket_start = int(ts - ts % spec.bucket_seconds)
+            self._add(SCOPE_CHANNEL_USERS, channel_id, spec, bucket_start, user_id)
+            self._add(SCOPE_GUILD_CHANNELS, guild_id, spec, bucket_start, channel_id)
+        self.observed += 1
+
+    def _add(
+        self, scope: str, scope_id: int, spec: WindowSpec, bucket_start: int, key: int
+    ) -> None:
+        """Count a key in a single bucket, creating the bucket if needed."""
+        buckets = self._buckets.setdefault((scope, scope_id, spec.name), {})
+        sketch = buckets.get(bucket_start)
+        if sketch is None:
+            capacity = (
+                self.user_capacity
+                if scope == SCOPE_CHANNEL_USERS
+                else self.channel_capacity
+            )
+            sketch = buckets[bucket_start] = SpaceSaving(capacity)
+        sketch.add(key)
+        self._dirty.add((scope, scope_id, spec.name, bucket_start))
+
+    def covers(self, window: str) -> bool:
+        """Check whether the tracker has observed the whole window.
+
+        Args:
+            window: The window name.
+
+        Returns:
+            True if the tracked history is at least as long as the window.
+        """
+        spec = WINDOWS.get(window)
+        return spec is not None and time.time() - self.tracked_since >= spec.span
+
+    def _live_sketches(
+        self, scope: str, scope_id: int, window: str
+    ) -> list[SpaceSaving]:
+        """Return the sketches of the buckets that overlap the window."""
+        spec = WINDOWS[window]
+        cutoff = time.time() - spec.span - spec.bucket_seconds
+        buckets = self._buckets.get((scope, scope_id, window), {})
+        return [sketch for start, sketch in buckets.items() if start > cutoff]
+
+    def top_users(
+        self, channel_id: int, window: str, n: int = 5
+    ) -> list[dict[str, int]] | None:
+        """Get the most active users of a channel.
+
+        Args:
+            channel_id: The channel or thread ID.
+            window: The window name (see ``WINDOWS``).
+            n: Number of users to return.
+
+        Returns:
+            A list of {"user_id", "message_count"} dicts, or None if the tracker
+            cannot answer for this window.
+        """
+        if not self.covers(window):
+            return None
+        top, _ = merge_top(
+            self._live_sketches(SCOPE_CHANNEL_USERS, channel_id, window), n
+        )
+        return [{"user_id": key, "message_count": count} for key, count in top]
+
+    def top_channels(
+        self,
+        guild_id: int,
+        window: str,
+        n: int = 5,
+        among: Iterable[int] | None = None,
+    ) -> list[dict[str, int]] | None:
+        """Get the most active channels of a guild.
+
+        Args:
+            guild_id: The guild ID.
+            window: The window name (see ``WINDOWS``).
+            n: Number of channels to return.
+            among: Optional channel IDs to restrict the leaderboard to. Filtered
+                results are only returned when the sketches are exact.
+
+        Returns:
+            A list of {"channel_id", "message_count"} dicts, or None if the
+            tracker cannot answer for this window.
+        """
+        if not self.covers(window):
+            return None
+        top, exact = merge_top(
+            self._live_sketches(SCOPE_GUILD_CHANNELS, guild_id, window),
+            n,
+            among=set(among) if among is not None else None,
+        )
+        if among is not None and not exact:
+            return None
+        return [{"channel_id": key, "message_count": count} for key, count in top]
+
+    def prune(self) -> int:
+        """Drop buckets that have fallen out of their window.
+
+        Returns:
+            The number of buckets removed.
+        """
+        now = time.time()
+        removed = 0
+        for key in list(self._buckets):
+            spec = WINDOWS[key[2]]
+            cutoff = now - spec.span - spec.bucket_seconds
+            buckets = self._buckets[key]
+            for start in [start for start in buckets if start <= cutoff]:
+                del buckets[start]
+                self._dirty.discard((*key, start))
+                removed += 1
+            if not buckets:
+                del self._buckets[key]
+        return removed
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get tracker statistics.
+
+        Returns:
+            A dictionary with bucket counts, counters held and coverage.
+        """
+        return {
+            "observed": self.observed,
+            "sketch_keys": len(self._buckets),
+            "buckets": sum(len(b) for b in self._buckets.values()),
+            "counters": sum(
+                len(s.counts) for b in self._buckets.values() for s in b.values()
+            ),
+            "tracked_seconds": time.time() - self.tracked_since,
+        }
+
+    @staticmethod
+    def _to_datetime(epoch: float) -> datetime:
+        """Convert epoch seconds to the naive UTC datetimes used in the database."""
+        return datetime.fromtimestamp(epoch, UTC).replace(tzinfo=None)
+
+    async def checkpoint(self, db: Any) -> int:
+        """Persist modified buckets and delete expired ones.
+
+        Args:
+            db: The Database instance to write to.
+
+        Returns:
+            The number of buckets written.
+        """
+        self.prune()
+        dirty, self._dirty = self._dirty, set()
+        tracked_since = self._to_datetime(self.tracked_since)
+        rows = [
+            (
+                scope,
+                scope_id,
+                window,
+                self._to_datetime(start),
+                self._buckets[(scope, scope_id, window)][start].to_json(),
+                tracked_since,
+            )
+            for scope, scope_id, window, start in dirty
+            if start in self._buckets.get((scope, scope_id, window), {})
+        ]
+        try:
+            if rows:
+                await db.execute_many(
+                    """
+                    INSERT INTO activity_topk_checkpoints(scope, scope_id, window_name, bucket_start, counters, tracked_since, updated_at)
+                    VALUES($1,$2,$3,$4,$5::jsonb,$6,NOW())
+                    ON CONFLICT (scope, scope_id, window_name, bucket_start)
+                    DO UPDATE SET counters = EXCLUDED.counters, tracked_since = EXCLUDED.tracked_since, updated_at = NOW()
+                    """,
+                    rows,
+                )
+            now = time.time()
+            for spec in WINDOWS.values():
+                await db.execute(
+                    "DELETE FROM activity_topk_checkpoints WHERE window_name = $1 AND bucket_start <= $2",
+                    spec.name,
+                    self._to_datetime(now - spec.span - spec.bucket_seconds),
+                )
+        except Exception:
+            # Keep the buckets dirty so the next checkpoint retries them
+            self._dirty |= dirty
+            raise
+        return len(rows)
+
+    async def restore(self, db: Any) -> int:
+        """Load checkpointed buckets from the database.
+
+        Buckets already present in memory are merged with the checkpointed
+        counts, so messages observed before the restore are kept.
+
+        Args:
+            db: The Database instance to read from.
+
+        Returns:
+            The number of buckets restored.
+        """
+        rows = await db.fetch(
+            """
+            SELECT scope, scope_id, window_name, bucket_start, counters, tracked_since
+            FROM activity_topk_checkpoints
+            """,
+            use_cache=False,
+        )
+        restored = 0
+        earliest = self.tracked_since
+        for row in rows:
+            if row["window_name"] not in WINDOWS:
+                continue
+            key = (row["scope"], row["scope_id"], row["window_name"])
+            start = int(row["bucket_start"].replace(tzinfo=UTC).timestamp())
+            sketch = SpaceSaving.from_json(row["counters"])
+            buckets = self._buckets.setdefault(key, {})
+            current = buckets.get(start)
+            if current is not None:
+                for counter_key, count in current.counts.items():
+                    sketch.add(counter_key, count)
+            buckets[start] = sketch
+            earliest = min(
+                earliest, row["tracked_since"].replace(tzinfo=UTC).timestamp()
+            )
+            restored += 1
+        self.tracked_since = earliest
+        self.prune()
+        self.logger.info(f"Restored {restored} activity top-k buckets")
+        return restored
@@ -1,26 +1,172 @@
 """HTTP client utility module.
 
 This module provides a shared HTTP client for making HTTP requests,
-with connection pooling and other optimizations.
+with connection pooling and other optimizations. GET responses can be served
+through an HTTP cache that honours Cache-Control and revalidates stale
+entries with conditional requests (If-None-Match / If-Modified-Since).
 """
 
 import asyncio
+import contextlib
+import hashlib
+import json
 import logging
+import sqlite3
+import threading
 import time
-from collections import defaultdict
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from pathlib import Path
 from typing import Any
+from urllib.parse import urlparse
 
 import aiohttp
 from aiohttp import ClientResponse, ClientSession, ClientTimeout, TraceConfig
+from multidict import CIMultiDict
 
+from utils.connection_pool import RecyclingConnector
+from utils.latency_histogram import LatencyHistogram, normalize_endpoint
+
+# Upper bounds in seconds of the rate limiter wait-time histogram buckets
+WAIT_BUCKETS = (0.0, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Errors after which the idle connections to the host are assumed dead too
+CONNECTION_ERRORS = (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError)
+
+# Headers of a 304 response that update the cached response
+REVALIDATION_HEADERS = (
+    "Cache-Control",
+    "Expires",
+    "Date",
+    "Age",
+    "ETag",
+    "Last-Modified",
+)
 
-class RateLimiter:
-    """Rate limiter for HTTP requests.
 
-    This class implements a token bucket rate limiter to prevent overwhelming
-    external services with too many requests in a short period of time.
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Parse a Retry-After header into seconds to wait.
+
+    Args:
+        value: The header value, either delay seconds or an HTTP date.
+        now: The current Unix time, for HTTP dates.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """Token bucket and waiter queue of one domain.
+
+    Attributes:
+        base_rate: The configured requests per second.
+        rate: The current requests per second, lowered after rate limiting.
+        burst: The bucket capacity.
+        tokens: The tokens currently available.
+        blocked_until: Monotonic time before which no request may start.
+        waiters: Requests waiting for a token, in arrival order.
+        wait_histogram: Count of acquisitions per wait-time bucket.
     """
 
+    __slots__ = (
+        "base_rate",
+        "rate",
+        "burst",
+        "tokens",
+        "updated",
+        "blocked_until",
+        "waiters",
+        "timer",
+        "wait_histogram",
+        "acquired",
+        "waited",
+        "total_wait",
+        "max_wait",
+        "rate_limited_responses",
+    )
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        """Create a full bucket.
+
+        Args:
+            rate: Requests per second.
+            burst: Bucket capacity.
+            now: The current monotonic time.
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.blocked_until = 0.0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.timer: asyncio.TimerHandle | None = None
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS) + 1)
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited_responses = 0
+
+    def refill(self, now: float) -> None:
+        """Add the tokens earned since the last refill."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def can_start(self, now: float) -> bool:
+        """Whether a request may take a token right now."""
+        return self.tokens >= 1 and now >= self.blocked_until
+
+    def delay(self, now: float) -> float:
+        """Seconds until the next token is available."""
+        return max(self.blocked_until - now, (1 - self.tokens) / self.rate, 0.0)
+
+    def record_wait(self, seconds: float) -> None:
+        """Count one acquisition in the wait-time histogram."""
+        self.acquired += 1
+        if seconds > 0:
+            self.waited += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+        self.wait_histogram[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+
+class RateLimiter:
+    """Per-domain token bucket rate limiter for HTTP requests.
+
+    Each domain has its own bucket, so throttling one domain never delays
+    requests to another. Requests that can't start immediately wait in the
+    domain's FIFO queue, which is drained by a single timer per domain
+    scheduled for when the next token is due. No lock is needed: bucket
+    state is only changed synchronously on the event loop.
+
+    The limiter adapts to the responses it is told about through
+    ``update_from_response``: ``Retry-After`` and exhausted
+    ``X-RateLimit-*`` quotas pause the domain until the given time, and a
+    ``429`` without either halves the domain's rate. The rate recovers
+    gradually as requests succeed again.
+    """
+
+    # Lowest fraction of the configured rate adaptive reduction goes to
+    MIN_RATE_FACTOR = 0.05
+    # Fraction of the configured rate recovered per successful response
+    RECOVERY_STEP = 0.1
+
     def __init__(
         self,
         requests_per_second: float = 10.0,
@@ -40,15 +186,16 @@ class RateLimiter:
         self.default_burst = burst_size
         self.per_domain_limits = per_domain_limits or {}
         self.logger = logger or logging.getLogger("rate_limiter")
+        self._buckets: dict[str, TokenBucket] = {}
 
-        # Token buckets for each domain: {domain: (tokens, last_refill_time)}
-        self._buckets: dict[str, tuple[float, float]] = {}
-        self._lock = asyncio.Lock()
-
-        # Queues for waiting requests when rate limited
-        self._waiting_requests: defaultdict[str, list[asyncio.Future]] = defaultdict(
-            list
-        )
+    def _bucket(self, domain: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rate, burst = self.per_domain_limits.get(
+                domain, (self.default_rate, self.default_burst)
+            )
+            bucket = self._buckets[domain] = TokenBucket(rate, burst, now)
+        return bucket
 
     async def acquire(self, domain: str) -> None:
         """Acquire a token for a request to the specified domain.
@@ -58,72 +205,152 @@ class RateLimiter:
         Args:
             domain: The domain to acquire a token for.
         """
-        async with self._lock:
-            # Get rate limits for this domain
-            rate, burst = self.per_domain_limits.get(
-                domain, (self.default_rate, self.default_burst)
+        now = time.monotonic()
+        bucket = self._bucket(domain, now)
+        bucket.refill(now)
+
+        # Only take a token directly if nobody is queued ahead
+        if not bucket.waiters and bucket.can_start(now):
+            bucket.tokens -= 1
+            bucket.record_wait(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        bucket.waiters.append(future)
+        self._schedule(domain, bucket, now)
+        self.logger.debug(
+            f"Rate limited for {domain}, {len(bucket.waiters)} waiting, "
+            f"next token in {bucket.delay(now):.2f}s"
+        )
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                with contextlib.suppress(ValueError):
+                    bucket.waiters.remove(future)
+            else:
+                # Granted a token just as it was cancelled; give it back
+                bucket.tokens += 1
+            raise
+        bucket.record_wait(time.monotonic() - now)
+
+    def _schedule(self, domain: str, bucket: TokenBucket, now: float) -> None:
+        """Arm the domain's timer for when its next token is due."""
+        if bucket.timer is None and bucket.waiters:
+            bucket.timer = asyncio.get_running_loop().call_later(
+                bucket.delay(now), self._release, domain
             )
 
-            # Initialize bucket if not exists
-            if domain not in self._buckets:
-                self._buckets[domain] = (burst, time.time())
-
-            # Refill the bucket
-            tokens, last_refill = self._buckets[domain]
-            now = time.time()
-            elapsed = now - last_refill
-            tokens = min(burst, tokens + elapsed * rate)
-
-            # If we have a token, consume it and return immediately
-            if tokens >= 1:
-                self._buckets[domain] = (tokens - 1, now)
-                return
-
-            # Calculate wait time until next token
-            wait_time = (1 - tokens) / rate
-            self._buckets[domain] = (0, now)
-
-            # Create a future to wait on
-            future = asyncio.Future()
-            self._waiting_requests[domain].append(future)
-
-            self.logger.debug(f"Rate limited for {domain}, waiting {wait_time:.2f}s")
-
-        # Schedule token release
-        asyncio.create_task(self._release_token(domain, wait_time))
-
-        # Wait for our turn
-        await future
-
-    async def _release_token(self, domain: str, wait_time: float) -> None:
-        """Release a token after the specified wait time.
+    def _release(self, domain: str) -> None:
+        """Hand out available tokens to waiters in arrival order."""
+        bucket = self._buckets[domain]
+        bucket.timer = None
+        now = time.monotonic()
+        bucket.refill(now)
+        while bucket.waiters and bucket.can_start(now):
+            future = bucket.waiters.popleft()
+            if future.done():
+                continue
+            bucket.tokens -= 1
+            future.set_result(None)
+        self._schedule(domain, bucket, now)
+
+    def update_from_response(
+        self, domain: str, status: int, headers: Mapping[str, str] | None = None
+    ) -> None:
+        """Adapt the domain's limit to a response.
 
         Args:
-            domain: The domain to release a token for.
-            wait_time: Time to wait before releasing the token.
+            domain: The domain that responded.
+            status: The response status code.
+            headers: The response headers.
         """
-        await asyncio.sleep(wait_time)
-
-        async with self._lock:
-            # Update the bucket
-            tokens, last_refill = self._buckets[domain]
-            now = time.time()
-            elapsed = now - last_refill
-            rate, burst = self.per_domain_limits.get(
-                domain, (self.default_rate, self.default_burst)
+        headers = headers or {}
+        now = time.monotonic()
+        bucket = self._bucket(domain, now)
+
+        pause = None
+        if status in (429, 503):
+            pause = parse_retry_after(headers.get("Retry-After"))
+        remaining = headers.get("X-RateLimit-Remaining")
+        if pause is None and remaining is not None:
+            try:
+                exhausted = float(remaining) <= 0
+            except ValueError:
+                exhausted = False
+            if exhausted:
+                pause = self._reset_after(headers)
+
+        if status == 429:
+            bucket.rate_limited_responses += 1
+            if pause is None:
+                # No hint from the server: back off multiplicatively
+                bucket.rate = max(
+                    bucket.base_rate * self.MIN_RATE_FACTOR, bucket.rate / 2
+                )
+                pause = 1 / bucket.rate
+            self.logger.warning(
+                f"Rate limited by {domain}: pausing {pause:.2f}s, "
+                f"rate {bucket.rate:.2f}/s"
+            )
+        elif status < 400 and bucket.rate < bucket.base_rate:
+            bucket.rate = min(
+                bucket.base_rate,
+                bucket.rate + bucket.base_rate * self.RECOVERY_STEP,
             )
-            tokens = min(burst, tokens + elapsed * rate)
-
-            # If we have waiting requests and tokens, release one
-            if self._waiting_requests[domain] and tokens >= 1:
-                future = self._waiting_requests[domain].pop(0)
-                if not future.done():
-                    future.set_result(None)
 
-                # Update bucket
-                self._buckets[domain] = (tokens - 1, now)
+        if pause is not None and pause > 0:
+            bucket.refill(now)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.blocked_until = max(bucket.blocked_until, now + pause)
+            if bucket.timer is not None:
+                bucket.timer.cancel()
+                bucket.timer = None
+            self._schedule(domain, bucket, now)
+
+    @staticmethod
+    def _reset_after(headers: Mapping[str, str]) -> float | None:
+        """Seconds until an exhausted X-RateLimit quota resets."""
+        for name in ("X-RateLimit-Reset-After", "X-RateLimit-Reset"):
+            value = headers.get(name)
+            if value is None:
+                continue
+            try:
+                reset = float(value)
+            except ValueError:
+                continue
+            # Large values are Unix timestamps rather than delays
+            if reset > 1_000_000_000:
+                reset -= time.time()
+            return max(0.0, reset)
+        return None
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Get per-domain limiter statistics.
 
-                self.logger.debug(f"Released token for {domain}")
+        Returns:
+            A dictionary mapping each domain to its current rate, queue
+            length, wait totals and wait-time histogram. Histogram keys are
+            the bucket upper bounds in milliseconds.
+        """
+        labels = [f"<={b * 1000:g}ms" for b in WAIT_BUCKETS] + [
+            f">{WAIT_BUCKETS[-1] * 1000:g}ms"
+        ]
+        return {
+            domain: {
+                "rate": bucket.rate,
+                "base_rate": bucket.base_rate,
+                "tokens": bucket.tokens,
+                "waiting": len(bucket.waiters),
+                "acquired": bucket.acquired,
+                "waited": bucket.waited,
+                "avg_wait": bucket.total_wait / bucket.waited if bucket.waited else 0.0,
+                "max_wait": bucket.max_wait,
+                "rate_limited_responses": bucket.rate_limited_responses,
+                "wait_histogram": dict(zip(labels, bucket.wait_histogram, strict=True)),
+            }
+            for domain, bucket in self._buckets.items()
+        }
 
 
 class CircuitBreaker:
@@ -204,15 +431,352 @@ class CircuitBreaker:
                 self._open_circuits[endpoint] = True
 
 
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    """Parse a Cache-Control header.
+
+    Args:
+        value: The header value.
+
+    Returns:
+        Lowercase directive names mapped to their argument, or None for
+        directives without one.
+    """
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: float | None = None) -> float:
+    """Get the seconds a response may be reused without revalidation.
+
+    Uses ``max-age``, or else ``Expires`` relative to ``Date``, minus the
+    ``Age`` the response already had. ``no-cache`` and ``no-store`` responses
+    must always be revalidated.
+
+    Args:
+        headers: The response headers.
+        now: The current Unix time, used when the response has no Date.
+
+    Returns:
+        The remaining lifetime in seconds, 0 if the response is stale.
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives or "no-store" in directives:
+        return 0.0
+
+    now = time.time() if now is None else now
+    try:
+        age = float(headers.get("Age") or 0)
+    except ValueError:
+        age = 0.0
+
+    if directives.get("max-age") is not None:
+        try:
+            return max(0.0, float(directives["max-age"]) - age)
+        except ValueError:
+            return 0.0
+
+    try:
+        expires = parsedate_to_datetime(headers.get("Expires")).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+    try:
+        date = parsedate_to_datetime(headers.get("Date")).timestamp()
+    except (TypeError, ValueError):
+        date = now
+    return max(0.0, expires - date - age)
+
+
+@dataclass
+class CachedResponse:
+    """A fully read GET response, as stored in the HTTP cache.
+
+    Attributes:
+        url: The requested URL.
+        status: The HTTP status code.
+        headers: The response headers.
+        body: The response body.
+        stored_at: Unix time the body was downloaded or last revalidated.
+        expires_at: Unix time the server's freshness lifetime ends.
+        from_cache: Whether the body was served from the cache.
+        revalidated: Whether the server confirmed the cached body with a 304.
+    """
+
+    url: str
+    status: int
+    headers: CIMultiDict
+    body: bytes
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+    from_cache: bool = False
+    revalidated: bool = False
+
+    @property
+    def etag(self) -> str | None:
+        """The ETag validator, if any."""
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self) -> str | None:
+        """The Last-Modified validator, if any."""
+        return self.headers.get("Last-Modified")
+
+    def is_fresh(self, ttl: float | None = None, now: float | None = None) -> bool:
+        """Whether the response can be reused without revalidation.
+
+        Args:
+            ttl: Seconds after ``stored_at`` the response stays fresh,
+                overriding the server's lifetime.
+            now: The current Unix time.
+        """
+        now = time.time() if now is None else now
+        expires_at = self.expires_at if ttl is None else self.stored_at + ttl
+        return expires_at > now
+
+    def text(self, encoding: str | None = None) -> str:
+        """Decode the body using the Content-Type charset, UTF-8 by default."""
+        if encoding is None:
+            content_type = self.headers.get("Content-Type", "")
+            _, _, charset = content_type.partition("charset=")
+            encoding = charset.split(";")[0].strip().strip('"') or "utf-8"
+        try:
+            return self.body.decode(encoding, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Parse the body as JSON."""
+        return json.loads(self.body)
+
+
+class HTTPCache:
+    """LRU cache of GET responses with an optional SQLite backing file.
+
+    Responses are stored when they are successful, not marked ``no-store``,
+    and either fresh for a while or carrying a validator (ETag or
+    Last-Modified) so they can be revalidated with a conditional request.
+
+    Requests sent with cookies or an Authorization header are cached under
+    their credentials and only kept in memory, never written to the file.
+    ``Set-Cookie`` headers are never cached. The file is read and written in
+    a worker thread so the event loop does not wait on SQLite.
+
+    Attributes:
+        max_entries: Maximum number of responses kept in memory.
+        max_body_bytes: Largest body that is cached.
+        path: SQLite file holding cached responses, or None for memory only.
+        max_disk_age: Seconds after which responses are pruned from the file.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_body_bytes: int = 1024 * 1024,
+        path: Path | str | None = None,
+        max_disk_age: float = 7 * 86400,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of responses kept in memory.
+            max_body_bytes: Largest body that is cached.
+            path: SQLite file to persist responses in, or None for memory only.
+            max_disk_age: Seconds after which responses are pruned from the file.
+        """
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.path = Path(path) if path is not None else None
+        self.max_disk_age = max_disk_age
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger("http_cache")
+
+    def __len__(self) -> int:
+        """Get the number of responses held in memory."""
+        return len(self._entries)
+
+    @staticmethod
+    def credentials(
+        headers: Mapping[str, str] | None = None,
+        cookies: Mapping[str, Any] | None = None,
+    ) -> list[tuple[str, str]]:
+        """Get the cookies and Authorization header a request is sent with."""
+        found = [(f"cookie:{k}", str(v)) for k, v in (cookies or {}).items()]
+        found += [
+            ("authorization", str(v))
+            for k, v in (headers or {}).items()
+            if k.lower() == "authorization"
+        ]
+        return sorted(found)
+
+    @staticmethod
+    def key(
+        url: str,
+        params: Mapping[str, Any] | None = None,
+        credentials: list[tuple[str, str]] | None = None,
+    ) -> str:
+        """Build the cache key of a GET request.
+
+        Args:
+            url: The requested URL.
+            params: Query parameters.
+            credentials: The request's credentials, from ``credentials``.
+        """
+        query = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        parts: list[Any] = [url, query]
+        if credentials:
+            parts.append(credentials)
+        return hashlib.sha256(
+            json.dumps(parts, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    def storable(self, response: CachedResponse, ttl: float | None = None) -> bool:
+        """Whether a response from the server may be cached.
+
+        Args:
+            response: The downloaded response.
+            ttl: The caller's freshness override, if any.
+        """
+        directives = parse_cache_control(response.headers.get("Cache-Control"))
+        return (
+            response.status == 200
+            and "no-store" not in directives
+            and len(response.body) <= self.max_body_bytes
+            and (
+                response.is_fresh(ttl)
+                or response.etag is not None
+                or response.last_modified is not None
+            )
+        )
+
+    def _db(self) -> sqlite3.Connection | None:
+        """Open the backing file on first use; disable it if that fails."""
+        if self._conn is None and self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                with self._conn:
+                    self._conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS responses (
+                            key TEXT PRIMARY KEY,
+                            url TEXT NOT NULL,
+                            status INTEGER NOT NULL,
+                            headers TEXT NOT NULL,
+                            body BLOB NOT NULL,
+                            expires_at REAL NOT NULL,
+                            stored_at REAL NOT NULL
+                        )
+                        """
+                    )
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE stored_at < ?",
+                        (time.time() - self.max_disk_age,),
+                    )
+            except (OSError, sqlite3.Error) as e:
+                self.logger.warning(f"HTTP cache file {self.path} unavailable: {e}")
+                self.path = None
+                self._conn = None
+        return self._conn
+
+    async def get(self, key: str) -> CachedResponse | None:
+        """Get a cached response from memory, then from disk."""
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+            return response
+        if self.path is None:
+            return None
+
+        response = await asyncio.to_thread(self._load, key)
+        if response is not None:
+            self._remember(key, response)
+        return response
+
+    async def set(
+        self, key: str, response: CachedResponse, persist: bool = True
+    ) -> None:
+        """Store a response in memory and, unless ``persist`` is False, on disk."""
+        if "Set-Cookie" in response.headers:
+            headers = response.headers.copy()
+            headers.popall("Set-Cookie")
+            response = replace(response, headers=headers)
+        self._remember(key, response)
+        if persist and self.path is not None:
+            await asyncio.to_thread(self._store, key, response)
+
+    def _load(self, key: str) -> CachedResponse | None:
+        """Read a response from the backing file."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT url, status, headers, body, stored_at, expires_at FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Reading the HTTP cache failed: {e}")
+                return None
+        if row is None:
+            return None
+        url, status, headers, body, stored_at, expires_at = row
+        return CachedResponse(
+            url, status, CIMultiDict(json.loads(headers)), body, stored_at, expires_at
+        )
+
+    def _store(self, key: str, response: CachedResponse) -> None:
+        """Write a response to the backing file."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            key,
+                            response.url,
+                            response.status,
+                            json.dumps(list(response.headers.items())),
+                            response.body,
+                            response.expires_at,
+                            response.stored_at,
+                        ),
+                    )
+            except sqlite3.Error as e:
+                self.logger.warning(f"Writing the HTTP cache failed: {e}")
+
+    def _remember(self, key: str, response: CachedResponse) -> None:
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the backing file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
 class HTTPClient:
     """HTTP client utility class with connection pooling.
 
     This class provides a shared aiohttp ClientSession that can be reused
     across the application, improving performance by reusing connections.
     Features include:
-    - Connection pooling
+    - Connection pooling, recycling connections by age and after errors
     - Request retries with exponential backoff
     - Circuit breaker pattern for failing endpoints
+    - Conditional-request response cache (``get_cached``)
     - Detailed request metrics
     """
 
@@ -222,11 +786,14 @@ class HTTPClient:
         max_connections: int = 100,
         max_keepalive_connections: int = 30,
         keepalive_timeout: int = 60,
+        max_connection_age: float = 600.0,
         retry_attempts: int = 3,
         retry_start_timeout: float = 0.1,
         circuit_breaker: CircuitBreaker | None = None,
         rate_limiter: RateLimiter | None = None,
         max_concurrent_requests: int = 100,
+        cache: HTTPCache | None = None,
+        max_endpoints: int = 256,
         logger: logging.Logger | None = None,
     ) -> None:
         """Initialize the HTTP client.
@@ -236,22 +803,30 @@ class HTTPClient:
             max_connections: Maximum number of connections to keep in the pool.
             max_keepalive_connections: Maximum number of connections to keep alive.
             keepalive_timeout: Time in seconds to keep connections alive.
+            max_connection_age: Time in seconds after which a connection is
+                closed and replaced, however busy it is.
             retry_attempts: Maximum number of retry attempts for failed requests.
             retry_start_timeout: Initial timeout in seconds for retry backoff.
             circuit_breaker: Circuit breaker instance to use.
             rate_limiter: Rate limiter instance to use.
             max_concurrent_requests: Maximum number of concurrent requests allowed.
+            cache: Response cache used by ``get_cached``; in memory by default.
+            max_endpoints: Maximum number of endpoints with their own stats;
+                the least recently used are evicted beyond this.
             logger: Logger instance to use for logging.
         """
         self.timeout = timeout
         self.max_connections = max_connections
         self.max_keepalive_connections = max_keepalive_connections
         self.keepalive_timeout = keepalive_timeout
+        self.max_connection_age = max_connection_age
         self.retry_attempts = retry_attempts
         self.retry_start_timeout = retry_start_timeout
         self.circuit_breaker = circuit_breaker or CircuitBreaker(logger=logger)
         self.rate_limiter = rate_limiter or RateLimiter(logger=logger)
         self.max_concurrent_requests = max_concurrent_requests
+        self.cache = cache if cache is not None else HTTPCache()
+        self.max_endpoints = max_endpoints
         self.logger = logger or logging.getLogger("http_client")
         self._session: ClientSession | None = None
         self._lock = asyncio.Lock()
@@ -264,10 +839,14 @@ class HTTPClient:
             "circuit_breaks": 0,
             "rate_limited": 0,
             "backpressure_applied": 0,
-            "request_times": [],  # List of request times in seconds
+            "evicted_endpoints": 0,
             "status_codes": {},  # Count of responses by status code
-            "endpoints": {},  # Stats by endpoint
+            "endpoints": OrderedDict(),  # Stats by normalized endpoint, LRU order
         }
+        self._latency = LatencyHistogram()
+        self._cache_stats: OrderedDict[str, dict[str, int]] = OrderedDict()
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._flight_waiters: dict[tuple, int] = {}
 
     async def get_session(self) -> ClientSession:
         """Get the shared ClientSession, creating it if it doesn't exist.
@@ -284,22 +863,19 @@ class HTTPClient:
                     async def on_request_start(
                         session, trace_config_ctx, params
                     ) -> None:
-                        trace_config_ctx.start = time.time()
+                        trace_config_ctx.start = time.perf_counter()
 
                     async def on_request_end(session, trace_config_ctx, params) -> None:
                         if hasattr(trace_config_ctx, "start"):
-                            duration = time.time() - trace_config_ctx.start
-                            self._stats["request_times"].append(duration)
-                            # Keep only the last 1000 request times
-                            if len(self._stats["request_times"]) > 1000:
-                                self._stats["request_times"] = self._stats[
-                                    "request_times"
-                                ][-1000:]
+                            self._record_latency(
+                                params.url, time.perf_counter() - trace_config_ctx.start
+                            )
 
                     trace_config.on_request_start.append(on_request_start)
                     trace_config.on_request_end.append(on_request_end)
 
-                    connector = aiohttp.TCPConnector(
+                    connector = RecyclingConnector(
+                        max_connection_age=self.max_connection_age,
                         limit=self.max_connections,
                         limit_per_host=self.max_keepalive_connections,
                         ttl_dns_cache=300,  # Cache DNS results for 5 minutes
@@ -331,14 +907,13 @@ class HTTPClient:
         trace_config = TraceConfig()
 
         async def on_request_start(session, trace_config_ctx, params) -> None:
-            trace_config_ctx.start = time.time()
+            trace_config_ctx.start = time.perf_counter()
 
         async def on_request_end(session, trace_config_ctx, params) -> None:
             if hasattr(trace_config_ctx, "start"):
-                duration = time.time() - trace_config_ctx.start
-                self._stats["request_times"].append(duration)
-                if len(self._stats["request_times"]) > 1000:
-                    self._stats["request_times"] = self._stats["request_times"][-1000:]
+                self._record_latency(
+                    params.url, time.perf_counter() - trace_config_ctx.start
+                )
 
         trace_config.on_request_start.append(on_request_start)
         trace_config.on_request_end.append(on_request_end)
@@ -397,11 +972,73 @@ class HTTPClient:
                     # Either not a session error, or we've exhausted retries
                     raise
 
+    def _connector(self) -> RecyclingConnector | None:
+        """Get the connector of the shared session, if it is open."""
+        if self._session is None or self._session.closed:
+            return None
+        connector = self._session.connector
+        return connector if isinstance(connector, RecyclingConnector) else None
+
+    def recycle_connections(self) -> int:
+        """Close idle pooled connections that have outlived their maximum age.
+
+        Unlike recreating the session, this keeps the DNS cache and all other
+        warm connections.
+
+        Returns:
+            The number of connections closed.
+        """
+        connector = self._connector()
+        return connector.recycle_idle() if connector else 0
+
+    def _drop_host_connections(self, url: str) -> None:
+        """Close the idle connections to a URL's host after a connection error."""
+        connector = self._connector()
+        host = urlparse(url).hostname
+        if connector and host:
+            dropped = connector.drop_host(host)
+            if dropped:
+                self.logger.debug(
+                    f"Dropped {dropped} idle connections to {host} after an error"
+                )
+
+    async def prewarm(self, urls: list[str], timeout: float = 5.0) -> int:
+        """Open pooled connections to hosts before they are first needed.
+
+        Sends a HEAD request to each URL so that the DNS lookup, TCP connect
+        and TLS handshake are done ahead of time. Failures are logged and
+        ignored.
+
+        Args:
+            urls: URLs on the hosts to connect to.
+            timeout: Timeout per request in seconds.
+
+        Returns:
+            The number of hosts that answered.
+        """
+        session = await self.get_session()
+
+        async def warm(url: str) -> bool:
+            try:
+                async with session.head(
+                    url, allow_redirects=False, timeout=ClientTimeout(total=timeout)
+                ):
+                    return True
+            except (aiohttp.ClientError, TimeoutError) as e:
+                self.logger.debug(f"Pre-warming {url} failed: {e}")
+                return False
+
+        results = await asyncio.gather(*(warm(url) for url in urls))
+        warmed = sum(results)
+        self.logger.info(f"Pre-warmed connections to {warmed}/{len(urls)} hosts")
+        return warmed
+
     async def close(self) -> None:
-        """Close the shared ClientSession."""
+        """Close the shared ClientSession and the cache file."""
         if self._session and not self._session.closed:
             await self._session.close()
             self.logger.debug("Closed HTTP client session")
+        self.cache.close()
 
     async def get(
         self,
@@ -430,8 +1067,6 @@ class HTTPClient:
             The response from the server.
         """
         # Extract domain for circuit breaker and rate limiter
-        from urllib.parse import urlparse
-
         parsed_url = urlparse(url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
 
@@ -481,16 +1116,8 @@ class HTTPClient:
             request_timeout = ClientTimeout(total=timeout or self.timeout)
 
             # Update endpoint stats
-            if domain not in self._stats["endpoints"]:
-                self._stats["endpoints"][domain] = {
-                    "requests": 0,
-                    "errors": 0,
-                    "timeouts": 0,
-                    "retries": 0,
-                    "rate_limited": 0,
-                    "backpressure_applied": 0,
-                }
-            self._stats["endpoints"][domain]["requests"] += 1
+            endpoint_stats = self._endpoint_stats(url)
+            endpoint_stats["requests"] += 1
             self._stats["requests"] += 1
 
             # Retry logic with exponential backoff
@@ -512,6 +1139,9 @@ class HTTPClient:
                     self._stats["status_codes"][status] = (
                         self._stats["status_codes"].get(status, 0) + 1
                     )
+                    self.rate_limiter.update_from_response(
+                        domain, response.status, response.headers
+                    )
 
                     # Check if we should retry based on status code
                     if (
@@ -520,9 +1150,7 @@ class HTTPClient:
                     ):
                         retry_count += 1
                         self._stats["retries"] += 1
-                        self._stats["endpoints"][domain]["retries"] = (
-                            self._stats["endpoints"][domain].get("retries", 0) + 1
-                        )
+                        endpoint_stats["retries"] += 1
                         self.logger.warning(
                             f"Retrying GET {url} due to status {response.status} "
                             f"(attempt {retry_count}/{self.retry_attempts})"
@@ -541,9 +1169,7 @@ class HTTPClient:
 
                 except TimeoutError:
                     self._stats["timeouts"] += 1
-                    self._stats["endpoints"][domain]["timeouts"] = (
-                        self._stats["endpoints"][domain].get("timeouts", 0) + 1
-                    )
+                    endpoint_stats["timeouts"] += 1
                     self.logger.warning(f"Request timed out: GET {url}")
 
                     # Retry on timeout if attempts remain
@@ -563,10 +1189,10 @@ class HTTPClient:
 
                 except Exception as e:
                     self._stats["errors"] += 1
-                    self._stats["endpoints"][domain]["errors"] = (
-                        self._stats["endpoints"][domain].get("errors", 0) + 1
-                    )
+                    endpoint_stats["errors"] += 1
                     self.logger.error(f"Error making request: GET {url} - {str(e)}")
+                    if isinstance(e, CONNECTION_ERRORS):
+                        self._drop_host_connections(url)
 
                     # Retry on certain exceptions if attempts remain
                     if retry_count < self.retry_attempts and isinstance(
@@ -591,6 +1217,184 @@ class HTTPClient:
             # Always release the semaphore
             self._request_semaphore.release()
 
+    async def get_cached(
+        self,
+        url: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        ttl: float | None = None,
+        **kwargs,
+    ) -> CachedResponse:
+        """Make a GET request through the response cache.
+
+        A fresh cached response is returned without a request. A stale one
+        with an ETag or Last-Modified is revalidated with If-None-Match /
+        If-Modified-Since, and a 304 refreshes it without downloading the
+        body again. If revalidation fails with a connection error, the stale
+        response is served instead of raising. Responses to requests with
+        cookies or an Authorization header are cached for those credentials
+        only, and in memory only.
+
+        Concurrent calls for the same URL, parameters, headers and cookies
+        share one request: later callers wait for the request already in
+        flight and get its response (or exception). The request is not
+        cancelled while any caller is still waiting for it.
+
+        Args:
+            url: URL to request.
+            params: Query parameters.
+            headers: HTTP headers.
+            ttl: Seconds the response stays fresh, overriding the server's
+                Cache-Control and Expires (including ``no-cache``).
+                ``no-store`` responses are never cached.
+            **kwargs: Additional arguments to pass to ``get``.
+
+        Returns:
+            The fully read response.
+        """
+        endpoint = normalize_endpoint(url)
+        counts = self._bounded_entry(
+            self._cache_stats,
+            endpoint,
+            lambda: {
+                "hits": 0,
+                "revalidated": 0,
+                "misses": 0,
+                "stale": 0,
+                "coalesced": 0,
+            },
+        )
+        credentials = HTTPCache.credentials(headers, kwargs.get("cookies"))
+        key = HTTPCache.key(url, params, credentials)
+        cached = await self.cache.get(key)
+        if cached is not None and cached.is_fresh(ttl):
+            counts["hits"] += 1
+            return replace(cached, from_cache=True, revalidated=False)
+
+        flight_key = self._flight_key("GET", url, params, headers, kwargs)
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch_cached(
+                    url,
+                    params,
+                    headers,
+                    ttl,
+                    key,
+                    cached,
+                    counts,
+                    persist=not credentials,
+                    **kwargs,
+                )
+            )
+            self._in_flight[flight_key] = task
+            task.add_done_callback(lambda done: self._forget_flight(flight_key, done))
+        else:
+            counts["coalesced"] += 1
+            self.logger.debug(f"Coalesced GET {endpoint} with a request in flight")
+        self._flight_waiters[flight_key] = self._flight_waiters.get(flight_key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._flight_waiters.get(flight_key) == 1 and not task.done():
+                # Unregister right away so a caller arriving before the task
+                # has finished cancelling starts a new request instead of
+                # joining this one
+                self._forget_flight(flight_key, task)
+                task.cancel()
+            raise
+        finally:
+            remaining = self._flight_waiters.pop(flight_key) - 1
+            if remaining:
+                self._flight_waiters[flight_key] = remaining
+
+    def _forget_flight(self, flight_key: tuple, task: asyncio.Future) -> None:
+        """Unregister an in-flight request unless a newer one took its key."""
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+
+    @staticmethod
+    def _flight_key(
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None,
+        headers: Mapping[str, str] | None,
+        kwargs: Mapping[str, Any],
+    ) -> tuple:
+        """Build the key under which identical requests are coalesced."""
+
+        def items(mapping: Mapping[str, Any] | None) -> tuple:
+            return tuple(
+                sorted((str(k).lower(), str(v)) for k, v in (mapping or {}).items())
+            )
+
+        return (
+            method,
+            url,
+            items(params),
+            items(headers),
+            tuple(sorted((k, repr(v)) for k, v in kwargs.items() if k != "cookies")),
+            items(kwargs.get("cookies")),
+        )
+
+    async def _fetch_cached(
+        self,
+        url: str,
+        params: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        ttl: float | None,
+        key: str,
+        cached: CachedResponse | None,
+        counts: dict[str, int],
+        persist: bool = True,
+        **kwargs,
+    ) -> CachedResponse:
+        """Send the request of ``get_cached`` and update the cache."""
+        endpoint = normalize_endpoint(url)
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            async with await self.get(
+                url, params=params, headers=request_headers, **kwargs
+            ) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, TimeoutError) as e:
+            if cached is None:
+                raise
+            counts["stale"] += 1
+            self.logger.warning(f"Serving stale cached GET {endpoint} after error: {e}")
+            return replace(cached, from_cache=True, revalidated=False)
+
+        now = time.time()
+        if response.status == 304 and cached is not None:
+            counts["revalidated"] += 1
+            for name in REVALIDATION_HEADERS:
+                if name in response.headers:
+                    cached.headers[name] = response.headers[name]
+            cached.stored_at = now
+            cached.expires_at = now + freshness_lifetime(cached.headers, now)
+            await self.cache.set(key, cached, persist)
+            return replace(cached, from_cache=True, revalidated=True)
+
+        counts["misses"] += 1
+        response_headers = CIMultiDict(response.headers)
+        result = CachedResponse(
+            url=url,
+            status=response.status,
+            headers=response_headers,
+            body=body,
+            stored_at=now,
+            expires_at=now + freshness_lifetime(response_headers, now),
+        )
+        if self.cache.storable(result, ttl):
+            await self.cache.set(key, result, persist)
+        return result
+
     async def post(
         self,
         url: str,
@@ -620,8 +1424,6 @@ class HTTPClient:
             The response from the server.
         """
         # Extract domain for circuit breaker and rate limiter
-        from urllib.parse import urlparse
-
         parsed_url = urlparse(url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
 
@@ -671,16 +1473,8 @@ class HTTPClient:
             request_timeout = ClientTimeout(total=timeout or self.timeout)
 
             # Update endpoint stats
-            if domain not in self._stats["endpoints"]:
-                self._stats["endpoints"][domain] = {
-                    "requests": 0,
-                    "errors": 0,
-                    "timeouts": 0,
-                    "retries": 0,
-                    "rate_limited": 0,
-                    "backpressure_applied": 0,
-                }
-            self._stats["endpoints"][domain]["requests"] += 1
+            endpoint_stats = self._endpoint_stats(url)
+            endpoint_stats["requests"] += 1
             self._stats["requests"] += 1
 
             # Retry logic with exponential backoff
@@ -703,6 +1497,9 @@ class HTTPClient:
                     self._stats["status_codes"][status] = (
                         self._stats["status_codes"].get(status, 0) + 1
                     )
+                    self.rate_limiter.update_from_response(
+                        domain, response.status, response.headers
+                    )
 
                     # Check if we should retry based on status code
                     if (
@@ -711,9 +1508,7 @@ class HTTPClient:
                     ):
                         retry_count += 1
                         self._stats["retries"] += 1
-                        self._stats["endpoints"][domain]["retries"] = (
-                            self._stats["endpoints"][domain].get("retries", 0) + 1
-                        )
+                        endpoint_stats["retries"] += 1
                         self.logger.warning(
                             f"Retrying POST {url} due to status {response.status} "
                             f"(attempt {retry_count}/{self.retry_attempts})"
@@ -732,9 +1527,7 @@ class HTTPClient:
 
                 except TimeoutError:
                     self._stats["timeouts"] += 1
-                    self._stats["endpoints"][domain]["timeouts"] = (
-                        self._stats["endpoints"][domain].get("timeouts", 0) + 1
-                    )
+                    endpoint_stats["timeouts"] += 1
                     self.logger.warning(f"Request timed out: POST {url}")
 
                     # Retry on timeout if attempts remain
@@ -754,10 +1547,10 @@ class HTTPClient:
 
                 except Exception as e:
                     self._stats["errors"] += 1
-                    self._stats["endpoints"][domain]["errors"] = (
-                        self._stats["endpoints"][domain].get("errors", 0) + 1
-                    )
+                    endpoint_stats["errors"] += 1
                     self.logger.error(f"Error making request: POST {url} - {str(e)}")
+                    if isinstance(e, CONNECTION_ERRORS):
+                        self._drop_host_connections(url)
 
                     # Retry on certain exceptions if attempts remain
                     if retry_count < self.retry_attempts and isinstance(
@@ -809,8 +1602,6 @@ class HTTPClient:
             True if the download was successful, False otherwise.
         """
         # Extract domain for circuit breaker and rate limiter
-        from urllib.parse import urlparse
-
         parsed_url = urlparse(url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
 
@@ -860,16 +1651,8 @@ class HTTPClient:
             request_timeout = ClientTimeout(total=timeout or self.timeout)
 
             # Update endpoint stats
-            if domain not in self._stats["endpoints"]:
-                self._stats["endpoints"][domain] = {
-                    "requests": 0,
-                    "errors": 0,
-                    "timeouts": 0,
-                    "retries": 0,
-                    "rate_limited": 0,
-                    "backpressure_applied": 0,
-                }
-            self._stats["endpoints"][domain]["requests"] += 1
+            endpoint_stats = self._endpoint_stats(url)
+            endpoint_stats["requests"] += 1
             self._stats["requests"] += 1
 
             # Retry logic with exponential backoff
@@ -886,6 +1669,9 @@ class HTTPClient:
                         self._stats["status_codes"][status] = (
                             self._stats["status_codes"].get(status, 0) + 1
                         )
+                        self.rate_limiter.update_from_response(
+                            domain, response.status, response.headers
+                        )
 
                         # Check if we should retry based on status code
                         if (
@@ -894,9 +1680,7 @@ class HTTPClient:
                         ):
                             retry_count += 1
                             self._stats["retries"] += 1
-                            self._stats["endpoints"][domain]["retries"] = (
-                                self._stats["endpoints"][domain].get("retries", 0) + 1
-                            )
+                            endpoint_stats["retries"] += 1
                             self.logger.warning(
                                 f"Retrying download {url} due to status {response.status} "
                                 f"(attempt {retry_count}/{self.retry_attempts})"
@@ -924,9 +1708,7 @@ class HTTPClient:
 
                 except TimeoutError:
                     self._stats["timeouts"] += 1
-                    self._stats["endpoints"][domain]["timeouts"] = (
-                        self._stats["endpoints"][domain].get("timeouts", 0) + 1
-                    )
+                    endpoint_stats["timeouts"] += 1
                     self.logger.warning(f"Download timed out: {url}")
 
                     # Retry on timeout if attempts remain
@@ -946,10 +1728,10 @@ class HTTPClient:
 
                 except Exception as e:
                     self._stats["errors"] += 1
-                    self._stats["endpoints"][domain]["errors"] = (
-                        self._stats["endpoints"][domain].get("errors", 0) + 1
-                    )
+                    endpoint_stats["errors"] += 1
                     self.logger.error(f"Error downloading file: {url} - {str(e)}")
+                    if isinstance(e, CONNECTION_ERRORS):
+                        self._drop_host_connections(url)
 
                     # Retry on certain exceptions if attempts remain
                     if retry_count < self.retry_attempts and isinstance(
@@ -981,32 +1763,102 @@ class HTTPClient:
             A dictionary with statistics.
         """
         stats = self._stats.copy()
-
-        # Calculate some additional metrics if we have request times
-        if stats.get("request_times"):
-            times = stats["request_times"]
-            stats["avg_request_time"] = sum(times) / len(times)
-            stats["min_request_time"] = min(times)
-            stats["max_request_time"] = max(times)
-            # Calculate 95th percentile
-            sorted_times = sorted(times)
-            idx = int(len(sorted_times) * 0.95)
-            stats["p95_request_time"] = sorted_times[idx]
-
+        stats["endpoints"] = self.get_endpoint_stats()
+        stats["latency"] = self._latency.summary()
+
+        if self._latency.count:
+            stats["avg_request_time"] = self._latency.total / self._latency.count
+            stats["min_request_time"] = self._latency.min
+            stats["max_request_time"] = self._latency.max
+            stats["p95_request_time"] = self._latency.percentile(0.95)
+
+        stats["rate_limits"] = self.rate_limiter.get_stats()
+        connector = self._connector()
+        stats["connections"] = connector.get_stats() if connector else {}
+        stats["cache"] = {
+            "entries": len(self.cache),
+            "endpoints": {
+                endpoint: dict(counts) for endpoint, counts in self._cache_stats.items()
+            },
+        }
+        for outcome in ("hits", "revalidated", "misses", "stale", "coalesced"):
+            stats["cache"][outcome] = sum(
+                counts[outcome] for counts in self._cache_stats.values()
+            )
+        # Requests that were never sent: fresh hits and coalesced duplicates
+        stats["cache"]["requests_saved"] = (
+            stats["cache"]["hits"] + stats["cache"]["coalesced"]
+        )
+        stats["cache"]["in_flight"] = len(self._in_flight)
         return stats
 
     def get_endpoint_stats(self, endpoint: str | None = None) -> dict[str, Any]:
         """Get statistics for a specific endpoint or all endpoints.
 
+        Endpoints are URLs without their query string and with IDs replaced
+        by ``{id}``; each has request counts and a latency summary.
+
         Args:
-            endpoint: The endpoint to get statistics for, or None for all endpoints.
+            endpoint: The endpoint (or a URL of it) to get statistics for, or
+                None for all endpoints.
 
         Returns:
             A dictionary with endpoint statistics.
         """
+
+        def export(entry: dict[str, Any]) -> dict[str, Any]:
+            return {**entry, "latency": entry["latency"].summary()}
+
+        endpoints = self._stats["endpoints"]
         if endpoint:
-            return self._stats.get("endpoints", {}).get(endpoint, {}).copy()
-        return self._stats.get("endpoints", {}).copy()
+            entry = endpoints.get(normalize_endpoint(endpoint))
+            return export(entry) if entry is not None else {}
+        return {name: export(entry) for name, entry in endpoints.items()}
+
+    def _bounded_entry(self, table: OrderedDict, key: str, factory: Any) -> Any:
+        """Get a table entry, creating it and evicting the least recently used.
+
+        Args:
+            table: An endpoint table, least recently used first.
+            key: The endpoint.
+            factory: Creates the entry of a new endpoint.
+
+        Returns:
+            The endpoint's entry.
+        """
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = factory()
+            while len(table) > self.max_endpoints:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return entry
+
+    def _endpoint_stats(self, url: object) -> dict[str, Any]:
+        """Get the stats entry of the endpoint a URL belongs to."""
+        endpoint = normalize_endpoint(url)
+        endpoints = self._stats["endpoints"]
+        if endpoint not in endpoints and len(endpoints) >= self.max_endpoints:
+            self._stats["evicted_endpoints"] += 1
+        return self._bounded_entry(
+            endpoints,
+            endpoint,
+            lambda: {
+                "requests": 0,
+                "errors": 0,
+                "timeouts": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "backpressure_applied": 0,
+                "latency": LatencyHistogram(),
+            },
+        )
+
+    def _record_latency(self, url: object, seconds: float) -> None:
+        """Record a request duration overall and for its endpoint."""
+        self._latency.record(seconds)
+        self._endpoint_stats(url)["latency"].record(seconds)
 
     def reset_stats(self) -> None:
         """Reset statistics."""
@@ -1018,7 +1870,9 @@ class HTTPClient:
             "circuit_breaks": 0,
             "rate_limited": 0,
             "backpressure_applied": 0,
-            "request_times": [],
+            "evicted_endpoints": 0,
             "status_codes": {},
-            "endpoints": {},
+            "endpoints": OrderedDict(),
         }
+        self._latency = LatencyHistogram()
+        self._cache_stats = OrderedDict()
@@ -0,0 +1,454 @@
+"""HyperLogLog sketches for approximate distinct-user counts.
+
+This module provides a small HyperLogLog implementation and a tracker that
+maintains one sketch per (guild, channel, hour) from the message ingestion
+path. Sketches are stored as ``bytea`` in the ``unique_user_sketches`` table;
+any time window can then be answered by merging the hourly sketches instead
+of running ``COUNT(DISTINCT user_id)`` over the messages table.
+
+Merging is a register-wise maximum, which is idempotent: merging the same
+sketch twice does not change the estimate. The tracker relies on this to
+combine in-memory state with checkpointed rows without double counting.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+# Pseudo channel ID holding the guild-wide sketch for each hour
+GUILD_CHANNEL_ID = 0
+
+DEFAULT_PRECISION = 12
+
+_SPARSE = 1
+_DENSE = 0
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(value: int) -> int:
+    """Mix an integer ID into a uniformly distributed 64-bit hash (splitmix64)."""
+    z = (value + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over integer IDs.
+
+    With the default precision of 12 the sketch uses 4096 one-byte registers
+    and has a standard error of about 1.6%. Small cardinalities are estimated
+    with linear counting, which is close to exact.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        """Initialize an empty sketch.
+
+        Args:
+            precision: Number of index bits; the sketch has 2**precision registers.
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @property
+    def relative_error(self) -> float:
+        """The standard error of the estimate as a fraction."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: int) -> None:
+        """Add an ID to the sketch.
+
+        Args:
+            value: The integer ID to count.
+        """
+        h = _hash64(value)
+        tail_bits = 64 - self.precision
+        index = h >> tail_bits
+        rank = tail_bits - (h & ((1 << tail_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merge another sketch into this one in place.
+
+        Args:
+            other: A sketch with the same precision.
+
+        Raises:
+            ValueError: If the precisions differ.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """Estimate the number of distinct IDs added.
+
+        Returns:
+            The estimated cardinality.
+        """
+        m = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0**-r for r in self.registers)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the sketch for storage.
+
+        Sparse sketches (few non-zero registers) are stored as index/rank
+        pairs, which keeps quiet channel-hours down to a few bytes.
+
+        Returns:
+            The encoded sketch.
+        """
+        nonzero = [(i, r) for i, r in enumerate(self.registers) if r]
+        if len(nonzero) * 3 < len(self.registers):
+            out = bytearray((self.precision, _SPARSE))
+            for index, rank in nonzero:
+                out += index.to_bytes(2, "big")
+                out.append(rank)
+            return bytes(out)
+        return bytes((self.precision, _DENSE)) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Rebuild a sketch from its stored form.
+
+        Args:
+            data: Bytes produced by to_bytes.
+
+        Returns:
+            The decoded sketch.
+
+        Raises:
+            ValueError: If the encoding is not recognised.
+        """
+        sketch = cls(data[0])
+        if data[1] == _DENSE:
+            sketch.registers[:] = data[2:]
+        elif data[1] == _SPARSE:
+            for offset in range(2, len(data), 3):
+                index = int.from_bytes(data[offset : offset + 2], "big")
+                sketch.registers[index] = data[offset + 2]
+        else:
+            raise ValueError(f"Unknown sketch encoding: {data[1]}")
+        return sketch
+
+
+def merge_all(sketches: Iterable[HyperLogLog]) -> HyperLogLog:
+    """Merge any number of sketches into a new one.
+
+    Args:
+        sketches: The sketches to merge.
+
+    Returns:
+        A new sketch holding the union.
+    """
+    result = HyperLogLog()
+    for sketch in sketches:
+        result.merge(sketch)
+    return result
+
+
+class UniqueUserSketches:
+    """Hourly distinct-user sketches per channel and per guild.
+
+    Every observed message is added to the sketch of its channel and to the
+    guild-wide sketch (stored under ``GUILD_CHANNEL_ID``) for the hour it was
+    posted in. Modified sketches are flushed to the database periodically;
+    hours older than the previous one are then dropped from memory.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        """Initialize the tracker.
+
+        Args:
+            logger: Logger instance to use for logging.
+        """
+        self.logger = logger or logging.getLogger("hyperloglog")
+        # (guild_id, channel_id, hour_start) -> sketch
+        self._sketches: dict[tuple[int, int, int], HyperLogLog] = {}
+        self._dirty: set[tuple[int, int, int]] = set()
+        # Keys whose checkpointed registers have already been merged in
+        self._synced: set[tuple[int, int, int]] = set()
+        # Guilds whose coverage marker has been written
+        self._covered: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+        # First full hour observed live; older hours may only be partially known
+        started = time.time()
+        self.tracked_since = int(started - started % 3600) + 3600
+        self.observed = 0
+
+    @property
+    def relative_error(self) -> float:
+        """The standard error of estimates returned by the tracker."""
+        return 1.04 / math.sqrt(1 << DEFAULT_PRECISION)
+
+    @staticmethod
+    def _to_datetime(epoch: int) -> datetime:
+        """Convert epoch seconds to the naive UTC datetimes used in the database."""
+        return datetime.fromtimestamp(epoch, UTC).replace(tzinfo=None)
+
+    @staticmethod
+    def _from_datetime(value: datetime) -> int:
+        """Convert a naive UTC datetime to epoch seconds."""
+        return int(value.replace(tzinfo=UTC).timestamp())
+
+    def observe(
+        self, guild_id: int, channel_id: int, user_id: int, timestamp: float
+    ) -> None:
+        """Record a message author in the channel and guild sketches.
+
+        Args:
+            guild_id: The guild the message was posted in.
+            channel_id: The channel or thread the message was posted in.
+            user_id: The author of the message.
+            timestamp: Message creation time in epoch seconds.
+        """
+        hour_start = int(timestamp - timestamp % 3600)
+        for key in (
+            (guild_id, channel_id, hour_start),
+            (guild_id, GUILD_CHANNEL_ID, hour_start),
+        ):
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = HyperLogLog()
+            sketch.add(user_id)
+            self._dirty.add(key)
+        self.observed += 1
+
+    async def flush(self, db: Any) -> int:
+        """Write modified sketches to the database.
+
+        Sketches that have not been merged with their stored row yet are
+        merged first, so a restart mid-hour does not lose earlier users.
+
+        Args:
+            db: The Database instance to write to.
+
+        Returns:
+            The number of sketches written.
+        """
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, set()
+            try:
+                written = await self._write(db, dirty)
+            except Exception:
+                # Keep the sketches dirty so the next flush retries them
+                self._dirty |= dirty
+                raise
+            self._evict()
+            return written
+
+    async def _write(self, db: Any, keys: set[tuple[int, int, int]]) -> int:
+        """Merge unsynced sketches with stored rows and upsert them."""
+        if not keys:
+            return 0
+
+        unsynced = [key for key in keys if key not in self._synced]
+        if unsynced:
+            rows = await db.fetch(
+                """
+                SELECT s.guild_id, s.channel_id, s.hour_start, s.registers
+                FROM unique_user_sketches s
+                JOIN unnest($1::bigint[], $2::bigint[], $3::timestamp[])
+                    AS k(guild_id, channel_id, hour_start)
+                USING (guild_id, channel_id, hour_start)
+                """,
+                [key[0] for key in unsynced],
+                [key[1] for key in unsynced],
+                [self._to_datetime(key[2]) for key in unsynced],
+                use_cache=False,
+            )
+            for row in rows:
+                key = (
+                    row["guild_id"],
+                    row["channel_id"],
+                    self._from_datetime(row["hour_start"]),
+                )
+                self._sketches[key].merge(HyperLogLog.from_bytes(row["registers"]))
+
+        await db.execute_many(
+            """
+            INSERT INTO unique_user_sketches(guild_id, channel_id, hour_start, registers, updated_at)
+            VALUES($1,$2,$3,$4,NOW())
+            ON CONFLICT (guild_id, channel_id, hour_start)
+            DO UPDATE SET registers = EXCLUDED.registers, updated_at = NOW()
+            """,
+            [
+                (
+                    guild_id,
+                    channel_id,
+                    self._to_datetime(hour_start),
+                    self._sketches[(guild_id, channel_id, hour_start)].to_bytes(),
+                )
+                for guild_id, channel_id, hour_start in keys
+            ],
+        )
+        self._synced.update(unsynced)
+
+        new_guilds = {key[0] for key in keys} - self._covered
+        if new_guilds:
+            await db.execute_many(
+                """
+                INSERT INTO unique_user_sketch_coverage(guild_id, tracked_since)
+                VALUES($1,$2)
+                ON CONFLICT (guild_id) DO NOTHING
+                """,
+                [
+                    (guild_id, self._to_datetime(self.tracked_since))
+                    for guild_id in new_guilds
+                ],
+            )
+            self._covered |= new_guilds
+        return len(keys)
+
+    def _evict(self) -> None:
+        """Drop flushed sketches older than the previous hour from memory."""
+        now = time.time()
+        cutoff = now - now % 3600 - 3600
+        for key in [k for k in self._sketches if k[2] < cutoff]:
+            if key not in self._dirty:
+                del self._sketches[key]
+                self._synced.discard(key)
+
+    async def backfill(
+        self, db: Any, guild_id: int, since: datetime, until: datetime
+    ) -> int:
+        """Build sketches for a guild's stored message history.
+
+        The history is processed one day at a time and flushed after each day
+        to bound memory use. Because merging is idempotent, hours that already
+        have sketches are safe to backfill again.
+
+        Args:
+            db: The Database instance to read from and write to.
+            guild_id: The guild to backfill.
+            since: Naive UTC start of the period.
+            until: Naive UTC end of the period.
+
+        Returns:
+            The number of hourly channel sketches built.
+        """
+        built = 0
+        day_start = since
+        while day_start < until:
+            day_end = min(day_start + timedelta(days=1), until)
+            rows = await db.fetch(
+                """
+                SELECT channel_id, date_trunc('hour', created_at) AS hour_start,
+                       array_agg(DISTINCT user_id) AS user_ids
+                FROM messages
+                WHERE server_id = $1 AND created_at >= $2 AND created_at < $3
+                GROUP BY channel_id, date_trunc('hour', created_at)
+                """,
+                guild_id,
+                day_start,
+                day_end,
+                use_cache=False,
+            )
+            for row in rows:
+                timestamp = self._from_datetime(row["hour_start"])
+                for user_id in row["user_ids"]:
+                    self.observe(guild_id, row["channel_id"], user_id, timestamp)
+            built += len(rows)
+            await self.flush(db)
+            day_start = day_end
+
+        await self.mark_backfilled(db, guild_id, since)
+        self.logger.info(
+            f"Backfilled {built} unique-user sketches for guild {guild_id}"
+        )
+        return built
+
+    async def mark_backfilled(self, db: Any, guild_id: int, since: datetime) -> None:
+        """Extend a guild's coverage after its history was loaded into sketches.
+
+        Args:
+            db: The Database instance to write to.
+            guild_id: The guild that was backfilled.
+            since: Start of the backfilled period.
+        """
+        await db.execute(
+            """
+            INSERT INTO unique_user_sketch_coverage(guild_id, tracked_since)
+            VALUES($1,$2)
+            ON CONFLICT (guild_id)
+            DO UPDATE SET tracked_since = LEAST(unique_user_sketch_coverage.tracked_since, EXCLUDED.tracked_since)
+            """,
+            guild_id,
+            since,
+        )
+        self._covered.add(guild_id)
+
+    async def estimate(
+        self,
+        db: Any,
+        guild_id: int,
+        since: datetime,
+        channel_id: int = GUILD_CHANNEL_ID,
+    ) -> int | None:
+        """Estimate the distinct users of a channel or guild since a time.
+
+        The window is widened to the start of the hour containing ``since``.
+
+        Args:
+            db: The Database instance to read from.
+            guild_id: The guild ID.
+            since: Naive UTC start of the window.
+            channel_id: The channel ID, or GUILD_CHANNEL_ID for the whole guild.
+
+        Returns:
+            The estimated count, or None if the sketches do not cover the window.
+        """
+        tracked_since = await db.fetchval(
+            "SELECT tracked_since FROM unique_user_sketch_coverage WHERE guild_id = $1",
+            guild_id,
+            use_cache=False,
+        )
+        if tracked_since is None or tracked_since > since:
+            return None
+
+        start = self._from_datetime(since)
+        start -= start % 3600
+        rows = await db.fetch(
+            """
+            SELECT registers FROM unique_user_sketches
+            WHERE guild_id = $1 AND channel_id = $2 AND hour_start >= $3
+            """,
+            guild_id,
+            channel_id,
+            self._to_datetime(start),
+            use_cache=False,
+        )
+        merged = merge_all(HyperLogLog.from_bytes(row["registers"]) for row in rows)
+        # Include sketches that have not been flushed yet
+        for (g, c, hour_start), sketch in list(self._sketches.items()):
+            if g == guild_id and c == channel_id and hour_start >= start:
+                merged.merge(sketch)
+        return merged.count()
+
+    def get_stats(self) -> dict[str, int]:
+        """Get tracker statistics.
+
+        Returns:
+            A dictionary with the number of sketches held and pending flush.
+        """
+        return {
+            "observed": self.observed,
+            "sketches": len(self._sketches),
+            "dirty": len(self._dirty),
+        }
@@ -0,0 +1,140 @@
+"""Constant-memory latency histograms.
+
+``LatencyHistogram`` counts durations in logarithmic buckets, so recording is
+O(1) and memory is fixed no matter how many requests are made, while
+percentiles stay within a few percent of the exact value. ``normalize_endpoint``
+turns request URLs into low-cardinality endpoint names, so that stats can be
+kept per endpoint without one entry per query string or ID.
+"""
+
+import math
+import re
+from urllib.parse import urlsplit
+
+# Path segments replaced by {id}: numbers, UUIDs and long hex or base64-ish tokens
+ID_SEGMENT = re.compile(
+    r"^(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|[0-9a-f]{16,}|(?=[A-Za-z0-9_-]*\d)[A-Za-z0-9_-]{24,})$",
+    re.IGNORECASE,
+)
+
+
+def normalize_endpoint(url: object) -> str:
+    """Get the endpoint name of a URL.
+
+    The query string and fragment are dropped and ID-like path segments are
+    replaced by ``{id}``, e.g. ``https://discord.com/api/webhooks/123/abc...``
+    becomes ``https://discord.com/api/webhooks/{id}/{id}``.
+
+    Args:
+        url: The request URL, as a string or yarl.URL.
+
+    Returns:
+        The normalized endpoint.
+    """
+    parts = urlsplit(str(url))
+    segments = [
+        "{id}" if ID_SEGMENT.match(segment) else segment
+        for segment in parts.path.split("/")
+    ]
+    return f"{parts.scheme}://{parts.netloc}{'/'.join(segments)}"
+
+
+class LatencyHistogram:
+    """Histogram of durations in logarithmic buckets.
+
+    Bucket ``i`` holds durations up to ``min_value * growth**i``; the default
+    growth of 2^(1/4) bounds the relative error of a percentile by about 9%
+    when the bucket's geometric midpoint is reported.
+
+    Attributes:
+        min_value: Upper bound of the first bucket, in seconds.
+        growth: Ratio between consecutive bucket bounds.
+        counts: Number of durations per bucket.
+        count: Total number of durations recorded.
+        total: Sum of all durations, in seconds.
+        min: Smallest duration recorded.
+        max: Largest duration recorded.
+    """
+
+    __slots__ = (
+        "min_value",
+        "growth",
+        "_log_growth",
+        "counts",
+        "count",
+        "total",
+        "min",
+        "max",
+    )
+
+    def __init__(
+        self, min_value: float = 1e-4, max_value: float = 300.0, growth: float = 2**0.25
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            min_value: Upper bound of the first bucket, in seconds.
+            max_value: Durations above this share the last bucket.
+            growth: Ratio between consecutive bucket bounds.
+        """
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        buckets = math.ceil(math.log(max_value / min_value) / self._log_growth) + 1
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a duration."""
+        if seconds <= self.min_value:
+            index = 0
+        else:
+            index = min(
+                len(self.counts) - 1,
+                math.ceil(math.log(seconds / self.min_value) / self._log_growth),
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Estimate a percentile.
+
+        Args:
+            p: The percentile as a fraction, e.g. 0.95.
+
+        Returns:
+            The estimated duration in seconds, 0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p * self.count))
+        index = 0
+        seen = self.counts[0]
+        while seen < rank:
+            index += 1
+            seen += self.counts[index]
+        if index == len(self.counts) - 1:
+            # The overflow bucket has no upper bound
+            return self.max
+        upper = self.min_value * self.growth**index
+        estimate = upper / math.sqrt(self.growth) if index else upper
+        # The exact extremes are known, so never report beyond them
+        return min(max(estimate, self.min), self.max)
+
+    def summary(self) -> dict[str, float | int]:
+        """Get the count, mean, percentiles and maximum in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
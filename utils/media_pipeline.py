@@ -0,0 +1,201 @@
+"""Concurrent, bounded-memory media downloads for reposting.
+
+``fetch_media`` downloads a set of URLs concurrently through the shared
+HTTP client. Each body is streamed into its own ``SpooledTemporaryFile``,
+which stays in memory while small and spills to an anonymous temporary file
+when large, so concurrent reposts never share (or have to clean up) a
+directory. A download is rejected before its body is read when
+``Content-Length`` exceeds the upload limit, and aborted as soon as the
+streamed bytes exceed it when the length isn't announced.
+
+``pack_uploads`` groups the fetched media into messages that respect
+Discord's limits on attachments per message and bytes per upload.
+"""
+
+import asyncio
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from tempfile import SpooledTemporaryFile
+from urllib.parse import urlsplit
+
+import aiohttp
+import discord
+
+# Discord allows at most 10 attachments per message
+MAX_ATTACHMENTS = 10
+
+# Bodies up to this size stay in memory; larger ones spill to a temporary file
+SPOOL_BYTES = 1024 * 1024
+
+# Size of the chunks read from the response stream
+CHUNK_BYTES = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchedMedia:
+    """A downloaded file, ready to be attached to a message.
+
+    Attributes:
+        url: The URL the file was downloaded from.
+        filename: The attachment file name.
+        size: The size of the body in bytes.
+        buffer: The body, positioned at its start.
+        content_type: The media type announced by the server, if any.
+    """
+
+    url: str
+    filename: str
+    size: int
+    buffer: SpooledTemporaryFile = field(repr=False)
+    content_type: str | None = None
+
+    @property
+    def is_image(self) -> bool:
+        """Whether the file is an image, by media type or file name."""
+        content_type = self.content_type or mimetypes.guess_type(self.filename)[0]
+        return bool(content_type and content_type.startswith("image/"))
+
+    def to_file(self) -> discord.File:
+        """Wrap the buffer in a ``discord.File``, which closes it after sending."""
+        self.buffer.seek(0)
+        return discord.File(self.buffer, filename=self.filename)
+
+    def close(self) -> None:
+        """Release the buffer."""
+        self.buffer.close()
+
+
+class _TooLargeError(Exception):
+    """Raised while streaming a body that exceeds the size limit."""
+
+
+def media_filename(url: str, fallback: str) -> str:
+    """Get an attachment file name from a URL's path.
+
+    Args:
+        url: The media URL.
+        fallback: Base name to use when the path has no usable name.
+
+    Returns:
+        The last path segment, or ``fallback`` with the path's extension.
+    """
+    name = os.path.basename(urlsplit(url).path)
+    if name and "." in name:
+        return name
+    return fallback + (os.path.splitext(name)[1] or "")
+
+
+async def _fetch_one(
+    http_client, url: str, filename: str, max_bytes: int
+) -> FetchedMedia | None:
+    """Stream one URL into a spooled buffer, or None if it failed or is too large."""
+    try:
+        response = await http_client.get(url)
+    except (aiohttp.ClientError, TimeoutError) as e:
+        logger.error(f"Failed to download {url}: {e}")
+        return None
+
+    buffer = SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    try:
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(
+                response.request_info, (), status=response.status
+            )
+        if response.content_length is not None and response.content_length > max_bytes:
+            raise _TooLargeError(
+                f"announced {response.content_length} bytes, limit {max_bytes}"
+            )
+        size = 0
+        async for chunk in response.content.iter_chunked(CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _TooLargeError(f"more than {max_bytes} bytes")
+            buffer.write(chunk)
+    except _TooLargeError as e:
+        logger.info(f"Skipping {url}: {e}")
+        buffer.close()
+        return None
+    except (aiohttp.ClientError, TimeoutError) as e:
+        logger.error(f"Failed to download {url}: {e}")
+        buffer.close()
+        return None
+    finally:
+        # Closing instead of releasing stops an oversize body from being read
+        response.close()
+
+    buffer.seek(0)
+    return FetchedMedia(
+        url=url,
+        filename=filename,
+        size=size,
+        buffer=buffer,
+        content_type=response.content_type,
+    )
+
+
+async def fetch_media(
+    http_client,
+    urls: list[str],
+    max_bytes: int,
+    name_prefix: str = "media",
+    concurrency: int = 4,
+) -> list[FetchedMedia]:
+    """Download media concurrently into spooled buffers.
+
+    Args:
+        http_client: The bot's HTTPClient.
+        urls: The URLs to download.
+        max_bytes: Largest file accepted, usually the guild's upload limit.
+        name_prefix: Prefix of the file names of URLs without a usable name.
+        concurrency: Maximum number of simultaneous downloads.
+
+    Returns:
+        The downloaded files in the order of ``urls``; failed and oversize
+        downloads are left out.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    names: set[str] = set()
+
+    async def fetch(counter: int, url: str) -> FetchedMedia | None:
+        filename = media_filename(url, f"{name_prefix}_{counter}")
+        if filename in names:
+            filename = f"{counter}_{filename}"
+        names.add(filename)
+        async with semaphore:
+            return await _fetch_one(http_client, url, filename, max_bytes)
+
+    results = await asyncio.gather(
+        *(fetch(counter, url) for counter, url in enumerate(urls, start=1))
+    )
+    return [media for media in results if media is not None]
+
+
+def pack_uploads(media: list[FetchedMedia], max_bytes: int) -> list[list[FetchedMedia]]:
+    """Group files into messages within the attachment and upload limits.
+
+    Args:
+        media: The files, in the order they should be posted.
+        max_bytes: Largest total upload per message.
+
+    Returns:
+        Lists of files, one per message, keeping the original order.
+    """
+    messages: list[list[FetchedMedia]] = []
+    current: list[FetchedMedia] = []
+    current_bytes = 0
+    for item in media:
+        if current and (
+            len(current) >= MAX_ATTACHMENTS or current_bytes + item.size > max_bytes
+        ):
+            messages.append(current)
+            current = []
+            current_bytes = 0
+        current.append(item)
+        current_bytes += item.size
+    if current:
+        messages.append(current)
+    return messages
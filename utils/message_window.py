@@ -0,0 +1,329 @@
+"""In-memory window of recent messages per channel.
+
+The stats listeners append every archived guild message to a bounded ring
+buffer for its channel and keep it in sync with edits and deletions. Commands
+that work on "the last N messages" of a channel (``/summarize``,
+``/moderate``) use ``load_recent_messages``, which reads from here before
+going to the message archive, and only calls the Discord API for gaps.
+
+Memory is bounded twice: each channel keeps at most ``per_channel`` messages,
+and an estimate of the total size across channels is capped at
+``max_bytes``. When the cap is exceeded, the channels that were least
+recently written or read are dropped first.
+"""
+
+import logging
+import sys
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+import discord
+
+logger = logging.getLogger("message_window")
+
+# Rough per-record overhead: the slotted object, its ints, datetime and name
+RECORD_OVERHEAD = 200
+
+
+class CachedMessage:
+    """Compact record of a recent message.
+
+    Attributes:
+        id: The message ID.
+        author_id: The author's user ID.
+        author_name: The author's display name when the message was seen.
+        is_bot: Whether the author is a bot.
+        content: The current message content.
+        created_at: When the message was created (naive UTC).
+    """
+
+    __slots__ = ("id", "author_id", "author_name", "is_bot", "content", "created_at")
+
+    def __init__(
+        self,
+        id: int,
+        author_id: int,
+        author_name: str,
+        is_bot: bool,
+        content: str,
+        created_at: datetime,
+    ) -> None:
+        self.id = id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.is_bot = is_bot
+        self.content = content
+        self.created_at = created_at
+
+    @classmethod
+    def from_message(cls, message: Any) -> "CachedMessage":
+        """Build a record from a discord.Message."""
+        return cls(
+            message.id,
+            message.author.id,
+            message.author.display_name,
+            message.author.bot,
+            message.content,
+            message.created_at.replace(tzinfo=None),
+        )
+
+    @property
+    def size(self) -> int:
+        """Approximate memory used by this record in bytes."""
+        return RECORD_OVERHEAD + sys.getsizeof(self.content)
+
+    def __repr__(self) -> str:
+        return f"CachedMessage(id={self.id}, author_id={self.author_id})"
+
+
+class RecentMessageWindow:
+    """Ring buffers of the most recent messages per channel with LRU eviction.
+
+    Attributes:
+        per_channel: Maximum number of messages kept per channel.
+        max_bytes: Approximate memory budget across all channels.
+    """
+
+    def __init__(self, per_channel: int = 200, max_bytes: int = 32 * 1024**2) -> None:
+        self.per_channel = per_channel
+        self.max_bytes = max_bytes
+        self._channels: OrderedDict[int, deque[CachedMessage]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted_channels = 0
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self._channels.values())
+
+    def add(self, channel_id: int, record: CachedMessage) -> None:
+        """Append a message to its channel's buffer.
+
+        Args:
+            channel_id: The channel or thread the message was posted in.
+            record: The message record.
+        """
+        messages = self._channels.get(channel_id)
+        if messages is None:
+            messages = self._channels[channel_id] = deque()
+        else:
+            self._channels.move_to_end(channel_id)
+
+        messages.append(record)
+        self.bytes += record.size
+        if len(messages) > self.per_channel:
+            self.bytes -= messages.popleft().size
+        self._enforce_budget(keep=channel_id)
+
+    def update_content(
+        self, channel_id: int, message_id: int, content: str
+    ) -> str | None:
+        """Apply an edit to a buffered message.
+
+        Args:
+            channel_id: The channel the message was posted in.
+            message_id: The edited message ID.
+            content: The new content.
+
+        Returns:
+            The previous content, or None if the message isn't buffered.
+        """
+        record = self.get(channel_id, message_id)
+        if record is None:
+            return None
+        old_content = record.content
+        self.bytes -= record.size
+        record.content = content
+        self.bytes += record.size
+        self._enforce_budget(keep=channel_id)
+        return old_content
+
+    def get(self, channel_id: int, message_id: int) -> CachedMessage | None:
+        """Find a buffered message, searching from the newest."""
+        for record in reversed(self._channels.get(channel_id, ())):
+            if record.id == message_id:
+                return record
+        return None
+
+    def remove(self, message_ids: Iterable[int], channel_id: int | None = None) -> int:
+        """Drop deleted messages.
+
+        Args:
+            message_ids: The deleted message IDs.
+            channel_id: The channel they were in, or None to search all.
+
+        Returns:
+            The number of records removed.
+        """
+        ids = set(message_ids)
+        if channel_id is None:
+            channel_ids = list(self._channels)
+        elif channel_id in self._channels:
+            channel_ids = [channel_id]
+        else:
+            return 0
+
+        removed = 0
+        for cid in channel_ids:
+            messages = self._channels[cid]
+            kept = deque(r for r in messages if r.id not in ids)
+            if len(kept) != len(messages):
+                removed += len(messages) - len(kept)
+                self.bytes -= sum(r.size for r in messages if r.id in ids)
+                self._channels[cid] = kept
+        return removed
+
+    def recent(self, channel_id: int, limit: int) -> list[CachedMessage]:
+        """Get up to ``limit`` of a channel's most recent messages, newest first.
+
+        The buffer only holds messages seen since it started, so callers must
+        treat a short result as partial rather than as the full history.
+
+        Args:
+            channel_id: The channel or thread ID.
+            limit: Maximum number of messages to return.
+
+        Returns:
+            The buffered messages, newest first.
+        """
+        messages = self._channels.get(channel_id)
+        if not messages:
+            self.misses += 1
+            return []
+        self._channels.move_to_end(channel_id)
+        result = [messages[-i] for i in range(1, min(limit, len(messages)) + 1)]
+        if len(result) >= limit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+    def _enforce_budget(self, keep: int) -> None:
+        """Evict least recently used channels until under the memory budget."""
+        while self.bytes > self.max_bytes and len(self._channels) > 1:
+            channel_id = next(iter(self._channels))
+            if channel_id == keep:
+                self._channels.move_to_end(keep)
+                continue
+            messages = self._channels.pop(channel_id)
+            self.bytes -= sum(record.size for record in messages)
+            self.evicted_channels += 1
+            logger.debug(f"Evicted {len(messages)} buffered messages of {channel_id}")
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get buffer statistics.
+
+        Returns:
+            A dictionary with sizes, hit counts and evictions.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "channels": len(self._channels),
+            "messages": len(self),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evicted_channels": self.evicted_channels,
+        }
+
+
+async def load_recent_messages(
+    channel: Any,
+    limit: int,
+    window: RecentMessageWindow | None = None,
+    db: Any = None,
+) -> list[CachedMessage]:
+    """Get the last messages of a channel, newest first.
+
+    Served from the recent-message window when it holds enough of the
+    channel, otherwise from the message archive using the
+    (channel_id, created_at) index. The Discord API is only used to fill
+    gaps: messages newer than the archive's latest (e.g. while the stats
+    listeners are paused for a comprehensive save) and older history the
+    archive doesn't have.
+
+    Args:
+        channel: The discord channel or thread to read.
+        limit: Number of messages to return.
+        window: The bot's recent-message window, if any.
+        db: The Database instance, if any.
+
+    Returns:
+        The messages, newest first.
+    """
+    if window is not None:
+        recent = window.recent(channel.id, limit)
+        if len(recent) >= limit:
+            return recent
+
+    rows = []
+    if db is not None:
+        try:
+            rows = await db.fetch(
+                """
+                SELECT message_id, user_id, COALESCE(user_nick, user_name) AS author_name,
+                       is_bot, content, created_at
+                FROM messages
+                WHERE channel_id = $1 AND deleted IS NOT TRUE
+                ORDER BY created_at DESC
+                LIMIT $2
+                """,
+                channel.id,
+                limit,
+                use_cache=False,
+            )
+        except Exception as e:
+            logger.warning(f"Reading channel {channel.id} from the archive failed: {e}")
+
+    archived = [
+        CachedMessage(
+            row["message_id"],
+            row["user_id"],
+            row["author_name"] or str(row["user_id"]),
+            row["is_bot"],
+            row["content"] or "",
+            row["created_at"],
+        )
+        for row in rows
+    ]
+    if not archived:
+        return await _fetch_history(channel, limit)
+
+    # Newer messages the archive hasn't caught up with
+    newer = []
+    last_message_id = getattr(channel, "last_message_id", None)
+    if last_message_id is not None and last_message_id > archived[0].id:
+        newer = await _fetch_history(channel, limit, after=archived[0].id)
+
+    # Older history the archive is missing
+    older = []
+    missing = limit - len(newer) - len(archived)
+    if missing > 0:
+        older = await _fetch_history(channel, missing, before=archived[-1].id)
+
+    logger.debug(
+        f"Loaded {limit} messages of {channel.id}: {len(archived)} archived, "
+        f"{len(newer) + len(older)} from the API"
+    )
+    return (newer + archived + older)[:limit]
+
+
+async def _fetch_history(
+    channel: Any,
+    limit: int,
+    before: int | None = None,
+    after: int | None = None,
+) -> list[CachedMessage]:
+    """Read channel history from the Discord API, newest first."""
+    return [
+        CachedMessage.from_message(message)
+        async for message in channel.history(
+            limit=limit,
+            before=discord.Object(id=before) if before else None,
+            after=discord.Object(id=after) if after else None,
+            oldest_first=False,
+        )
+    ]
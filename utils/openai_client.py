@@ -0,0 +1,294 @@
+"""Shared async OpenAI client.
+
+This module provides a single OpenAI client for the whole bot, registered in
+the service container as ``openai``. Calls go through one pooled
+``AsyncOpenAI`` client so connections are reused instead of a new client
+(and TLS handshake) per call, and never block the event loop. A global
+semaphore caps the number of requests in flight; the SDK applies the timeout
+and retries rate-limited, timed out and 5xx requests with backoff. Token
+usage and latency are recorded per model, and deterministic calls can opt in
+to an in-memory response cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Any
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+
+class ResponseCache:
+    """LRU cache of API responses with a time to live.
+
+    Attributes:
+        max_entries: Maximum number of responses kept.
+        ttl: Seconds a response stays valid.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(kind: str, params: dict[str, Any]) -> str:
+        """Hash a request into a cache key."""
+        payload = json.dumps([kind, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """Get a cached response if it hasn't expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response, evicting the least recently used one if full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class OpenAIService:
+    """Pooled async OpenAI client with concurrency limits and metrics.
+
+    The underlying client is created on first use, so the bot starts (and
+    unrelated commands work) without an API key configured.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None,
+        base_url: str | None = None,
+        max_concurrency: int = 8,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        max_connections: int = 20,
+        cache_size: int = 256,
+        cache_ttl: float = 3600.0,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            api_key: The OpenAI API key.
+            base_url: Alternative API base URL, e.g. a local stub server.
+            max_concurrency: Maximum number of requests in flight at once.
+            timeout: Timeout in seconds for each request attempt.
+            max_retries: Retries for rate-limited, timed out and 5xx requests.
+            max_connections: Size of the HTTP connection pool.
+            cache_size: Maximum number of cached responses; 0 disables caching.
+            cache_ttl: Seconds a cached response stays valid.
+            logger: Logger instance to use for logging.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.logger = logger or logging.getLogger("openai_client")
+        self.cache = ResponseCache(cache_size, cache_ttl) if cache_size else None
+        self._client: AsyncOpenAI | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "rate_limited": 0,
+            "queued": 0,
+            "max_in_flight": 0,
+        }
+        self._tokens: defaultdict[str, dict[str, int]] = defaultdict(
+            lambda: {"prompt_tokens": 0, "completion_tokens": 0, "requests": 0}
+        )
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    @property
+    def configured(self) -> bool:
+        """Whether an API key is available."""
+        return bool(self.api_key)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared AsyncOpenAI client, created on first use.
+
+        Raises:
+            openai.OpenAIError: If no API key is configured.
+        """
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=openai.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    )
+                ),
+            )
+            self.logger.debug(
+                f"Created OpenAI client with max_concurrency={self.max_concurrency}, "
+                f"timeout={self.timeout}s, max_retries={self.max_retries}"
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the client and its connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self.logger.debug("Closed OpenAI client")
+
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        cache: bool = False,
+        **params: Any,
+    ) -> str:
+        """Run a chat completion.
+
+        Args:
+            messages: The chat messages.
+            model: The model to use.
+            cache: Whether to serve and store the response in the cache. Only
+                use for deterministic requests (e.g. temperature 0).
+            **params: Additional completion parameters (max_tokens, ...).
+
+        Returns:
+            The text of the first choice, stripped; empty if there is none.
+
+        Raises:
+            openai.OpenAIError: If the request fails after retries.
+        """
+        request = {"model": model, "messages": messages, **params}
+        response = await self._request(
+            "chat", request, cache, self.client.chat.completions.create
+        )
+        if not response.choices or not response.choices[0].message.content:
+            return ""
+        return response.choices[0].message.content.strip()
+
+    async def embed(
+        self, texts: list[str], model: str, cache: bool = True
+    ) -> list[list[float]]:
+        """Get embedding vectors for texts.
+
+        Args:
+            texts: The texts to embed.
+            model: The embedding model to use.
+            cache: Whether to serve and store the response in the cache.
+
+        Returns:
+            One embedding per text, in order.
+
+        Raises:
+            openai.OpenAIError: If the request fails after retries.
+        """
+        request = {"model": model, "input": texts}
+        response = await self._request(
+            "embeddings", request, cache, self.client.embeddings.create
+        )
+        return [item.embedding for item in response.data]
+
+    async def _request(
+        self, kind: str, request: dict[str, Any], cache: bool, call: Any
+    ) -> Any:
+        """Send a request through the cache, semaphore and metrics."""
+        key = None
+        if cache and self.cache is not None:
+            key = ResponseCache.key(kind, request)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if self._semaphore.locked():
+            self._stats["queued"] += 1
+        async with self._semaphore:
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(
+                self._stats["max_in_flight"], self._in_flight
+            )
+            self._stats["requests"] += 1
+            start = time.perf_counter()
+            try:
+                response = await call(**request)
+            except openai.APITimeoutError:
+                self._stats["timeouts"] += 1
+                self._stats["errors"] += 1
+                self.logger.warning(f"OpenAI {kind} request timed out")
+                raise
+            except openai.RateLimitError:
+                self._stats["rate_limited"] += 1
+                self._stats["errors"] += 1
+                self.logger.warning(f"OpenAI {kind} request rate limited")
+                raise
+            except openai.OpenAIError as e:
+                self._stats["errors"] += 1
+                self.logger.error(f"OpenAI {kind} request failed: {e}")
+                raise
+            finally:
+                self._in_flight -= 1
+                self._latencies.append(time.perf_counter() - start)
+
+        usage = getattr(response, "usage", None)
+        model_stats = self._tokens[request["model"]]
+        model_stats["requests"] += 1
+        if usage is not None:
+            model_stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            model_stats["completion_tokens"] += (
+                getattr(usage, "completion_tokens", 0) or 0
+            )
+
+        if key is not None:
+            self.cache.set(key, response)
+        return response
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get request, token, latency and cache statistics.
+
+        Returns:
+            A dictionary of statistics.
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        stats: dict[str, Any] = dict(self._stats)
+        stats["in_flight"] = self._in_flight
+        stats["latency_p50_ms"] = percentile(0.5) * 1000
+        stats["latency_p95_ms"] = percentile(0.95) * 1000
+        stats["models"] = {model: dict(t) for model, t in self._tokens.items()}
+        stats["total_tokens"] = sum(
+            t["prompt_tokens"] + t["completion_tokens"] for t in self._tokens.values()
+        )
+        if self.cache is not None:
+            stats["cache_entries"] = len(self.cache)
+            stats["cache_hits"] = self.cache.hits
+            stats["cache_misses"] = self.cache.misses
+        return stats
@@ -0,0 +1,418 @@
+"""Incremental Parquet export of message history for offline analytics.
+
+This module streams the ``messages``, ``reactions`` and ``attachments`` rows of
+a guild through a server-side cursor and writes them to Parquet files on local
+disk, one row group per fetched batch, so memory use is bounded by the batch
+size rather than the size of the export.
+
+Output layout::
+
+    <output_dir>/<table>/guild_id=<id>/month=<YYYY-MM>/part-<first_message_id>.parquet
+
+Partitions are derived from the message snowflake, so reactions and
+attachments land in the same month as their message. Each run only exports
+messages newer than the last exported snowflake, which is tracked per table
+and guild in ``<output_dir>/_export_state.json``. Reactions and attachments
+are exported together with their message, so reactions added to a message
+after it was exported are not picked up by later runs. A ``start`` before the
+last exported message is rejected rather than exporting parts of the range
+twice; remove the table's entry from the state file to export it again.
+
+Parquet encoding and file writes run in a worker thread, so a large export
+doesn't block the event loop.
+
+Requires the optional ``pyarrow`` dependency (``pip install .[analytics]``).
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Any
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+from utils.exceptions import ExternalServiceError, ValidationError
+
+DISCORD_EPOCH_MS = 1420070400000
+DEFAULT_EXPORT_DIR = Path("exports")
+STATE_FILE = "_export_state.json"
+
+
+def snowflake_to_datetime(snowflake: int) -> datetime:
+    """Get the creation time encoded in a Discord snowflake.
+
+    Args:
+        snowflake: The Discord ID.
+
+    Returns:
+        The naive UTC creation time.
+    """
+    ms = (snowflake >> 22) + DISCORD_EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000, UTC).replace(tzinfo=None)
+
+
+def datetime_to_snowflake(value: datetime) -> int:
+    """Get the smallest snowflake created at or after a time.
+
+    Args:
+        value: A naive UTC or timezone-aware datetime.
+
+    Returns:
+        The lower-bound snowflake for that time.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    ms = int(value.timestamp() * 1000) - DISCORD_EPOCH_MS
+    return max(ms, 0) << 22
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """Definition of an exported table.
+
+    Attributes:
+        name: The table name, used as the top-level output directory.
+        query: Query selecting the columns in ``columns`` order. Takes the
+            guild ID and the exclusive lower and upper message ID bounds.
+        columns: Column names and Arrow types of the output schema.
+    """
+
+    name: str
+    query: str
+    columns: tuple[tuple[str, str], ...]
+
+    def schema(self) -> "pa.Schema":
+        """Build the Arrow schema for this table."""
+        return pa.schema(
+            [
+                (
+                    column,
+                    pa.timestamp("us")
+                    if type_name == "timestamp"
+                    else getattr(pa, type_name)(),
+                )
+                for column, type_name in self.columns
+            ]
+        )
+
+
+EXPORT_TABLES: dict[str, ExportTable] = {
+    "messages": ExportTable(
+        name="messages",
+        query="""
+            SELECT message_id, created_at, content, user_id, user_name, user_nick,
+                   server_id, channel_id, channel_name, is_bot, deleted, reference
+            FROM messages
+            WHERE server_id = $1 AND message_id > $2 AND message_id < $3
+            ORDER BY message_id
+        """,
+        columns=(
+            ("message_id", "int64"),
+            ("created_at", "timestamp"),
+            ("content", "string"),
+            ("user_id", "int64"),
+            ("user_name", "string"),
+            ("user_nick", "string"),
+            ("server_id", "int64"),
+            ("channel_id", "int64"),
+            ("channel_name", "string"),
+            ("is_bot", "bool_"),
+            ("deleted", "bool_"),
+            ("reference", "int64"),
+        ),
+    ),
+    "reactions": ExportTable(
+        name="reactions",
+        query="""
+            SELECT r.message_id, r.user_id, r.unicode_emoji, r.emoji_id, r.emoji_name,
+                   r.animated, r.is_custom_emoji, r.date, r.removed, m.channel_id
+            FROM reactions r
+            JOIN messages m ON m.message_id = r.message_id
+            WHERE m.server_id = $1 AND r.message_id > $2 AND r.message_id < $3
+            ORDER BY r.message_id
+        """,
+        columns=(
+            ("message_id", "int64"),
+            ("user_id", "int64"),
+            ("unicode_emoji", "string"),
+            ("emoji_id", "int64"),
+            ("emoji_name", "string"),
+            ("animated", "bool_"),
+            ("is_custom_emoji", "bool_"),
+            ("date", "timestamp"),
+            ("removed", "bool_"),
+            ("channel_id", "int64"),
+        ),
+    ),
+    "attachments": ExportTable(
+        name="attachments",
+        query="""
+            SELECT a.id, a.message_id, a.filename, a.url, a.size, a.height, a.width,
+                   a.is_spoiler, m.channel_id
+            FROM attachments a
+            JOIN messages m ON m.message_id = a.message_id
+            WHERE m.server_id = $1 AND a.message_id > $2 AND a.message_id < $3
+            ORDER BY a.message_id
+        """,
+        columns=(
+            ("id", "int64"),
+            ("message_id", "int64"),
+            ("filename", "string"),
+            ("url", "string"),
+            ("size", "int64"),
+            ("height", "int32"),
+            ("width", "int32"),
+            ("is_spoiler", "bool_"),
+            ("channel_id", "int64"),
+        ),
+    ),
+}
+
+
+@dataclass
+class ExportResult:
+    """Summary of an export run for one guild.
+
+    Attributes:
+        guild_id: The exported guild.
+        rows: Rows written per table.
+        files: Parquet files written.
+        last_message_id: Highest exported message ID per table.
+    """
+
+    guild_id: int
+    rows: dict[str, int] = field(default_factory=dict)
+    files: list[Path] = field(default_factory=list)
+    last_message_id: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_rows(self) -> int:
+        """Total rows written across all tables."""
+        return sum(self.rows.values())
+
+
+class ParquetExporter:
+    """Stream message history into partitioned Parquet files.
+
+    Attributes:
+        db: The Database instance to read from.
+        output_dir: Root directory for the export.
+        batch_size: Rows fetched per cursor round trip and written per row group.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        output_dir: Path | str = DEFAULT_EXPORT_DIR,
+        batch_size: int = 50000,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the exporter.
+
+        Args:
+            db: The Database instance to read from.
+            output_dir: Root directory for the export.
+            batch_size: Rows per cursor fetch and per Parquet row group.
+            logger: Logger instance to use for logging.
+
+        Raises:
+            ExternalServiceError: If pyarrow is not installed.
+        """
+        if pa is None:
+            raise ExternalServiceError(
+                service_name="pyarrow",
+                message="Parquet export requires pyarrow (pip install .[analytics])",
+            )
+        self.db = db
+        self.output_dir = Path(output_dir)
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger("parquet_export")
+
+    @property
+    def state_path(self) -> Path:
+        """Path of the file tracking the last exported snowflake."""
+        return self.output_dir / STATE_FILE
+
+    def load_state(self) -> dict[str, int]:
+        """Load the last exported message ID per table and guild.
+
+        Returns:
+            A mapping of "<table>:<guild_id>" to message ID.
+        """
+        if not self.state_path.exists():
+            return {}
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def save_state(self, state: dict[str, int]) -> None:
+        """Atomically write the export state.
+
+        Args:
+            state: A mapping of "<table>:<guild_id>" to message ID.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+
+    async def export_guild(
+        self,
+        guild_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tables: list[str] | None = None,
+    ) -> ExportResult:
+        """Export a guild's history, resuming after the last exported message.
+
+        Args:
+            guild_id: The guild to export.
+            start: Optional naive UTC lower bound on message creation time.
+            end: Optional naive UTC upper bound on message creation time.
+            tables: Tables to export (defaults to all of EXPORT_TABLES).
+
+        Returns:
+            A summary of the rows and files written.
+
+        Raises:
+            ValueError: If an unknown table is requested.
+            ValidationError: If ``start`` is before the last message already
+                exported for one of the tables.
+        """
+        result = ExportResult(guild_id=guild_id)
+        state = await asyncio.to_thread(self.load_state)
+        upper = datetime_to_snowflake(end) if end else 2**63 - 1
+
+        selected = []
+        for table_name in tables or list(EXPORT_TABLES):
+            table = EXPORT_TABLES.get(table_name)
+            if table is None:
+                raise ValueError(f"Unknown export table: {table_name}")
+            selected.append(table)
+
+        # Check every table before writing anything
+        if start is not None:
+            for table in selected:
+                state_key = f"{table.name}:{guild_id}"
+                if datetime_to_snowflake(start) <= state.get(state_key, 0):
+                    exported_until = snowflake_to_datetime(state[state_key])
+                    raise ValidationError(
+                        field="start",
+                        message=(
+                            f"{table.name} for guild {guild_id} is already exported "
+                            f"up to {exported_until:%Y-%m-%d %H:%M} UTC. Use a later "
+                            f"start, or remove '{state_key}' from {self.state_path} "
+                            f"to export it again."
+                        ),
+                    )
+
+        for table in selected:
+            state_key = f"{table.name}:{guild_id}"
+            lower = state.get(state_key, 0)
+            if start is not None:
+                lower = datetime_to_snowflake(start) - 1
+
+            rows, files, last_id = await self._export_table(
+                table, guild_id, lower, upper
+            )
+            result.rows[table.name] = rows
+            result.files.extend(files)
+            if last_id is not None:
+                result.last_message_id[table.name] = last_id
+                state[state_key] = last_id
+                await asyncio.to_thread(self.save_state, state)
+
+            self.logger.info(
+                f"Exported {rows} {table.name} rows for guild {guild_id} "
+                f"into {len(files)} files"
+            )
+
+        return result
+
+    async def _export_table(
+        self, table: ExportTable, guild_id: int, lower: int, upper: int
+    ) -> tuple[int, list[Path], int | None]:
+        """Stream one table into month-partitioned Parquet files.
+
+        Rows arrive ordered by message ID, so partitions are visited in order
+        and only one writer is open at a time.
+
+        Returns:
+            The number of rows written, the files written and the highest
+            exported message ID (None if nothing was exported).
+        """
+        schema = table.schema()
+        column_names = [column for column, _ in table.columns]
+        writer = None
+        partition = None
+        files: list[Path] = []
+        rows = 0
+        last_id = None
+
+        try:
+            async for batch in self.db.stream(
+                table.query, guild_id, lower, upper, batch_size=self.batch_size
+            ):
+                for month, group in groupby(
+                    batch,
+                    key=lambda record: snowflake_to_datetime(
+                        record["message_id"]
+                    ).strftime("%Y-%m"),
+                ):
+                    records = list(group)
+                    if month != partition:
+                        if writer is not None:
+                            await asyncio.to_thread(writer.close)
+                        path = self._partition_path(
+                            table, guild_id, month, records[0]["message_id"]
+                        )
+                        writer = await asyncio.to_thread(
+                            self._open_writer, path, schema
+                        )
+                        files.append(path)
+                        partition = month
+
+                    columns = {
+                        name: [record[name] for record in records]
+                        for name in column_names
+                    }
+                    await asyncio.to_thread(
+                        self._write_row_group, writer, columns, schema
+                    )
+
+                rows += len(batch)
+                last_id = batch[-1]["message_id"]
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.close)
+
+        return rows, files, last_id
+
+    def _partition_path(
+        self, table: ExportTable, guild_id: int, month: str, first_message_id: int
+    ) -> Path:
+        """Get the file path for a new part in a month partition."""
+        directory = (
+            self.output_dir / table.name / f"guild_id={guild_id}" / f"month={month}"
+        )
+        return directory / f"part-{first_message_id}.parquet"
+
+    @staticmethod
+    def _open_writer(path: Path, schema: "pa.Schema") -> "pq.ParquetWriter":
+        """Create a part's directory and open its writer; runs in a thread."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return pq.ParquetWriter(path, schema, compression="zstd")
+
+    @staticmethod
+    def _write_row_group(
+        writer: "pq.ParquetWriter", columns: dict[str, list], schema: "pa.Schema"
+    ) -> None:
+        """Encode a batch and write it as one row group; runs in a thread."""
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
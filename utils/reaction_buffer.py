@@ -0,0 +1,301 @@
+"""Coalescing write buffer for reaction events.
+
+Reaction storms on polls and announcements fire hundreds of raw reaction
+add/remove events per second. Instead of opening a transaction per event, the
+stats listeners record each event here, keyed by (message, user, emoji). Only
+the final state of each key survives the window, so add/remove flapping
+collapses to at most one write. A flush applies the net changes with one bulk
+upsert for reactions that ended up added and one bulk update for reactions
+that ended up removed, then adjusts the per-message reaction counts and the
+daily emoji usage rollups for the rows that actually changed.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+logger = logging.getLogger("reaction_buffer")
+
+# Adds to the per-(guild, emoji, day) usage counters
+EMOJI_USAGE_UPSERT = """
+    INSERT INTO emoji_usage_daily(guild_id, emoji_key, day, emoji_id, emoji_name, reaction_count, message_count)
+    VALUES($1,$2,$3,$4,$5,$6,$7)
+    ON CONFLICT (guild_id, emoji_key, day) DO UPDATE SET
+        reaction_count = emoji_usage_daily.reaction_count + EXCLUDED.reaction_count,
+        message_count = emoji_usage_daily.message_count + EXCLUDED.message_count,
+        emoji_name = EXCLUDED.emoji_name
+"""
+
+# Adds to the live reaction count of a message and emoji
+REACTION_COUNT_UPSERT = """
+    INSERT INTO message_reaction_counts(message_id, emoji_key, guild_id, channel_id, emoji_id, emoji_name, count)
+    VALUES($1,$2,$3,$4,$5,$6,$7)
+    ON CONFLICT (message_id, emoji_key) DO UPDATE SET
+        count = message_reaction_counts.count + EXCLUDED.count
+"""
+
+# Net additions: insert new rows or revive removed ones. RETURNING only yields
+# rows that actually changed, so duplicates don't inflate the counts.
+BULK_REACTION_UPSERT = """
+    INSERT INTO reactions(unicode_emoji, message_id, user_id, emoji_name, animated, emoji_id, url, date, is_custom_emoji)
+    SELECT * FROM unnest(
+        $1::varchar[], $2::bigint[], $3::bigint[], $4::varchar[], $5::boolean[],
+        $6::bigint[], $7::varchar[], $8::timestamp[], $9::boolean[]
+    )
+    ON CONFLICT (message_id, user_id, emoji_key) DO UPDATE SET removed = FALSE WHERE reactions.removed
+    RETURNING message_id, user_id, emoji_key
+"""
+
+# Net removals: mark the rows that are still present as removed
+BULK_REACTION_REMOVE = """
+    UPDATE reactions r SET removed = TRUE
+    FROM unnest($1::bigint[], $2::bigint[], $3::varchar[]) AS t(message_id, user_id, emoji_key)
+    WHERE r.message_id = t.message_id
+      AND r.user_id = t.user_id
+      AND r.emoji_key = t.emoji_key
+      AND NOT r.removed
+    RETURNING r.message_id, r.user_id, r.emoji_key
+"""
+
+REACTION_COUNT_DECREMENT = """
+    UPDATE message_reaction_counts SET count = GREATEST(count - $3, 0)
+    WHERE message_id = $1 AND emoji_key = $2
+"""
+
+
+@dataclass(slots=True)
+class PendingReaction:
+    """The latest state of one (message, user, emoji) within a window.
+
+    Attributes:
+        added: Whether the last event was an add.
+        guild_id: The guild the message belongs to, if any.
+        channel_id: The channel the message belongs to.
+        emoji_id: The custom emoji ID, or None for unicode emoji.
+        emoji_name: The emoji name (the emoji itself for unicode emoji).
+        animated: Whether the custom emoji is animated.
+        date: When the last event was received.
+    """
+
+    added: bool
+    guild_id: int | None
+    channel_id: int
+    emoji_id: int | None
+    emoji_name: str
+    animated: bool
+    date: datetime
+
+
+class ReactionBuffer:
+    """Collapse reaction events per (message, user, emoji) between flushes.
+
+    Attributes:
+        window: Seconds to wait after the first buffered event before flushing.
+        max_pending: Number of pending keys that triggers an early flush.
+        events: Total events recorded.
+        absorbed: Events that replaced a pending event for the same key and so
+            needed no write of their own.
+        flushes: Number of flushes that wrote something.
+        rows_changed: Reactions rows inserted or updated by flushes.
+    """
+
+    def __init__(self, window: float = 1.0, max_pending: int = 5000) -> None:
+        self.window = window
+        self.max_pending = max_pending
+        self._pending: dict[tuple[int, int, str], PendingReaction] = {}
+        self.events = 0
+        self.absorbed = 0
+        self.flushes = 0
+        self.rows_changed = 0
+        self.last_flush_seconds = 0.0
+        # Serializes flushes: an overlapping flush could mark a reaction as
+        # removed before the flush adding it has committed, and lock the
+        # count rows in a different order
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, payload: Any, added: bool, emoji_key: str) -> bool:
+        """Record a raw reaction add or remove event.
+
+        Args:
+            payload: The raw reaction action event payload.
+            added: True for an add event, False for a remove event.
+            emoji_key: The normalized key of the payload's emoji.
+
+        Returns:
+            True if this is the first pending event, i.e. a flush should be
+            scheduled.
+        """
+        key = (payload.message_id, payload.user_id, emoji_key)
+        first = not self._pending
+        self.events += 1
+        if key in self._pending:
+            self.absorbed += 1
+        self._pending[key] = PendingReaction(
+            added=added,
+            guild_id=payload.guild_id,
+            channel_id=payload.channel_id,
+            emoji_id=payload.emoji.id,
+            emoji_name=payload.emoji.name,
+            animated=bool(payload.emoji.animated),
+            date=datetime.now().replace(tzinfo=None),
+        )
+        return first
+
+    @property
+    def full(self) -> bool:
+        """Whether the buffer should be flushed before the window ends."""
+        return len(self._pending) >= self.max_pending
+
+    def drain(self) -> dict[tuple[int, int, str], PendingReaction]:
+        """Take all pending events, leaving the buffer empty."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    async def flush(self, db: Any) -> tuple[int, int]:
+        """Write the net changes of the current window.
+
+        Args:
+            db: The Database instance to write to.
+
+        Returns:
+            The number of reactions rows added and removed.
+
+        Raises:
+            Exception: If the database writes fail; the drained events are
+                lost, like a failed per-event write would be.
+        """
+        async with self._flush_lock:
+            pending = self.drain()
+            if not pending:
+                return 0, 0
+            return await self._write(db, pending)
+
+    async def _write(
+        self, db: Any, pending: dict[tuple[int, int, str], PendingReaction]
+    ) -> tuple[int, int]:
+        """Apply drained events in one transaction."""
+        started = time.perf_counter()
+        adds = {key: p for key, p in pending.items() if p.added}
+        removes = {key: p for key, p in pending.items() if not p.added}
+
+        async with await db.transaction() as trans:
+            added_rows = []
+            if adds:
+                columns: list[list] = [[] for _ in range(9)]
+                for (message_id, user_id, _), p in adds.items():
+                    custom = p.emoji_id is not None
+                    values = (
+                        None if custom else p.emoji_name,
+                        message_id,
+                        user_id,
+                        p.emoji_name,
+                        p.animated if custom else None,
+                        p.emoji_id,
+                        f"https://cdn.discordapp.com/emojis/{p.emoji_id}.{'gif' if p.animated else 'png'}"
+                        if custom
+                        else None,
+                        p.date,
+                        custom,
+                    )
+                    for column, value in zip(columns, values, strict=True):
+                        column.append(value)
+                added_rows = await trans.conn.fetch(BULK_REACTION_UPSERT, *columns)
+
+            removed_rows = []
+            if removes:
+                keys = list(removes)
+                removed_rows = await trans.conn.fetch(
+                    BULK_REACTION_REMOVE,
+                    [k[0] for k in keys],
+                    [k[1] for k in keys],
+                    [k[2] for k in keys],
+                )
+
+            # Metadata for each (message, emoji) and (guild, emoji, day) comes
+            # from any of the pending adds that changed a row
+            increments: dict[tuple[int, str], list] = {}
+            usage: dict[tuple[int, str, date], list] = {}
+            for row in added_rows:
+                p = adds[row["message_id"], row["user_id"], row["emoji_key"]]
+                increments.setdefault((row["message_id"], row["emoji_key"]), [0, p])[
+                    0
+                ] += 1
+                if p.guild_id is not None:
+                    usage.setdefault(
+                        (p.guild_id, row["emoji_key"], p.date.date()), [0, p]
+                    )[0] += 1
+
+            if increments:
+                await trans.conn.executemany(
+                    REACTION_COUNT_UPSERT,
+                    [
+                        (
+                            message_id,
+                            emoji_key,
+                            p.guild_id,
+                            p.channel_id,
+                            p.emoji_id,
+                            p.emoji_name,
+                            count,
+                        )
+                        for (message_id, emoji_key), (count, p) in sorted(
+                            increments.items(), key=lambda item: item[0]
+                        )
+                    ],
+                )
+
+            if usage:
+                await trans.conn.executemany(
+                    EMOJI_USAGE_UPSERT,
+                    [
+                        (guild_id, emoji_key, day, p.emoji_id, p.emoji_name, count, 0)
+                        for (guild_id, emoji_key, day), (count, p) in sorted(
+                            usage.items(), key=lambda item: item[0]
+                        )
+                    ],
+                )
+
+            decrements = Counter(
+                (row["message_id"], row["emoji_key"]) for row in removed_rows
+            )
+            if decrements:
+                await trans.conn.executemany(
+                    REACTION_COUNT_DECREMENT,
+                    [
+                        (message_id, emoji_key, count)
+                        for (message_id, emoji_key), count in sorted(decrements.items())
+                    ],
+                )
+
+        self.flushes += 1
+        self.rows_changed += len(added_rows) + len(removed_rows)
+        self.last_flush_seconds = time.perf_counter() - started
+        logger.debug(
+            f"Flushed {len(pending)} reaction keys "
+            f"({len(added_rows)} added, {len(removed_rows)} removed) "
+            f"in {self.last_flush_seconds * 1000:.1f}ms"
+        )
+        return len(added_rows), len(removed_rows)
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get buffer statistics.
+
+        Returns:
+            A dictionary with event, absorption and flush counters.
+        """
+        return {
+            "pending": len(self._pending),
+            "events": self.events,
+            "absorbed": self.absorbed,
+            "absorbed_ratio": self.absorbed / self.events if self.events else 0.0,
+            "flushes": self.flushes,
+            "rows_changed": self.rows_changed,
+            "last_flush_ms": self.last_flush_seconds * 1000,
+        }
@@ -0,0 +1,252 @@
+"""Guarded execution of generated SQL.
+
+``/admin ask_db`` runs SQL written by a language model against the production
+database. ``SafeQueryRunner`` puts every such query behind the same guards:
+
+- Only a single SELECT (or WITH ... SELECT) statement is accepted.
+- The query is wrapped in an outer ``LIMIT`` so it can never return more
+  than ``row_limit`` rows.
+- It runs in a read-only transaction with a ``SET LOCAL statement_timeout``,
+  so a runaway plan is cancelled by the server and releases its connection.
+- ``EXPLAIN`` estimates its cost first, and queries above ``max_cost`` are
+  rejected without being executed.
+- Results are cached by (normalized SQL, arguments) for ``cache_ttl``
+  seconds, so repeated questions are answered without running the query.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import asyncpg
+
+from utils.exceptions import QueryError
+
+READ_ONLY_START = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+@dataclass
+class SafeQueryResult:
+    """The outcome of a guarded query.
+
+    Attributes:
+        rows: The result rows, at most the runner's row limit.
+        sql: The statement that was executed, including the outer LIMIT.
+        estimated_cost: The planner's total cost estimate.
+        estimated_rows: The planner's row estimate.
+        cached: Whether the rows were served from the cache.
+        truncated: Whether the row limit was reached.
+    """
+
+    rows: list = field(default_factory=list)
+    sql: str = ""
+    estimated_cost: float = 0.0
+    estimated_rows: int = 0
+    cached: bool = False
+    truncated: bool = False
+
+
+def strip_statement(sql: str) -> str:
+    """Remove surrounding whitespace and trailing semicolons."""
+    return sql.strip().rstrip(";").strip()
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize a statement for use as a cache key.
+
+    Whitespace outside string literals is collapsed and keywords are
+    compared case-insensitively; literals are kept as written.
+    """
+    parts = re.split(r"('(?:[^']|'')*')", strip_statement(sql))
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).lower()
+        for i, part in enumerate(parts)
+    ).strip()
+
+
+def validate_read_only(sql: str) -> str:
+    """Check that the SQL is a single read-only statement.
+
+    Args:
+        sql: The generated SQL.
+
+    Returns:
+        The statement without trailing semicolons.
+
+    Raises:
+        QueryError: If the SQL is not a single SELECT or WITH statement.
+    """
+    statement = strip_statement(sql)
+    if not READ_ONLY_START.match(statement):
+        raise QueryError(
+            query=sql, message="❌ Only SELECT queries can be run from ask_db"
+        )
+    # Semicolons outside string literals would start another statement
+    if ";" in re.sub(r"'(?:[^']|'')*'", "", statement):
+        raise QueryError(query=sql, message="❌ Only a single SQL statement can be run")
+    return statement
+
+
+def apply_row_limit(statement: str, row_limit: int) -> str:
+    """Wrap a statement so it returns at most ``row_limit`` rows.
+
+    The wrapper keeps any ORDER BY or LIMIT of the original query intact, and
+    one row more than the limit is requested so truncation can be reported.
+    """
+    return f"SELECT * FROM (\n{statement}\n) AS ask_db_result LIMIT {row_limit + 1}"
+
+
+class SafeQueryRunner:
+    """Run generated SELECT queries under cost, time and row limits."""
+
+    def __init__(
+        self,
+        db: Any,
+        max_cost: float = 100_000.0,
+        statement_timeout: float = 10.0,
+        row_limit: int = 500,
+        cache_ttl: float = 300.0,
+        cache_size: int = 128,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            db: The Database instance.
+            max_cost: Highest planner cost estimate allowed to run.
+            statement_timeout: Seconds after which the server cancels a query.
+            row_limit: Maximum number of rows returned.
+            cache_ttl: Seconds results stay cached; 0 disables caching.
+            cache_size: Maximum number of cached results.
+            logger: Logger instance to use for logging.
+        """
+        self.db = db
+        self.max_cost = max_cost
+        self.statement_timeout = statement_timeout
+        self.row_limit = row_limit
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.logger = logger or logging.getLogger("safe_query")
+        self._cache: OrderedDict[tuple, tuple[float, SafeQueryResult]] = OrderedDict()
+        self._stats = {
+            "queries": 0,
+            "cache_hits": 0,
+            "rejected_cost": 0,
+            "timeouts": 0,
+        }
+
+    async def run(self, sql: str, *args: Any) -> SafeQueryResult:
+        """Run a generated query if it is read-only and cheap enough.
+
+        Args:
+            sql: The generated SQL.
+            *args: Query parameters.
+
+        Returns:
+            The rows and the planner's estimates.
+
+        Raises:
+            QueryError: If the query is not a single SELECT, its estimated
+                cost is above the ceiling, it exceeds the statement timeout,
+                or it fails.
+        """
+        statement = validate_read_only(sql)
+        key = (normalize_sql(statement), args)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        limited = apply_row_limit(statement, self.row_limit)
+        self._stats["queries"] += 1
+        try:
+            async with self.db.pool.acquire() as conn:
+                async with conn.transaction(readonly=True):
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {int(self.statement_timeout * 1000)}"
+                    )
+                    plan = await conn.fetchval(
+                        f"EXPLAIN (FORMAT JSON) {limited}", *args
+                    )
+                    cost, estimated_rows = self._plan_estimates(plan)
+                    if cost > self.max_cost:
+                        self._stats["rejected_cost"] += 1
+                        self.logger.warning(
+                            f"Rejected generated query with estimated cost {cost:.0f} "
+                            f"(ceiling {self.max_cost:.0f})"
+                        )
+                        raise QueryError(
+                            query=statement,
+                            message=(
+                                f"❌ Query is too expensive to run (estimated cost "
+                                f"{cost:,.0f}, limit {self.max_cost:,.0f}). Try a narrower question."
+                            ),
+                        )
+                    rows = await conn.fetch(limited, *args)
+        except asyncpg.QueryCanceledError as e:
+            self._stats["timeouts"] += 1
+            raise QueryError(
+                query=statement,
+                message=f"❌ Query was cancelled after {self.statement_timeout:g}s",
+            ) from e
+        except asyncpg.PostgresError as e:
+            raise QueryError(
+                query=statement,
+                message=f"❌ **Database Error**\n**Error Code:** {getattr(e, 'sqlstate', 'Unknown')}\n**Message:** {e}",
+            ) from e
+
+        result = SafeQueryResult(
+            rows=list(rows[: self.row_limit]),
+            sql=limited,
+            estimated_cost=cost,
+            estimated_rows=estimated_rows,
+            truncated=len(rows) > self.row_limit,
+        )
+        self._set_cached(key, result)
+        return result
+
+    @staticmethod
+    def _plan_estimates(plan: Any) -> tuple[float, int]:
+        """Extract the total cost and row estimate from an EXPLAIN JSON plan."""
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        top = plan[0]["Plan"]
+        return float(top["Total Cost"]), int(top["Plan Rows"])
+
+    def _get_cached(self, key: tuple) -> SafeQueryResult | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        self._stats["cache_hits"] += 1
+        return SafeQueryResult(
+            rows=result.rows,
+            sql=result.sql,
+            estimated_cost=result.estimated_cost,
+            estimated_rows=result.estimated_rows,
+            cached=True,
+            truncated=result.truncated,
+        )
+
+    def _set_cached(self, key: tuple, result: SafeQueryResult) -> None:
+        if self.cache_ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_stats(self) -> dict[str, int]:
+        """Get runner statistics.
+
+        Returns:
+            A dictionary with query, cache and rejection counts.
+        """
+        return {**self._stats, "cached_results": len(self._cache)}
@@ -0,0 +1,284 @@
+"""In-process vector search for schema descriptions.
+
+``/ask_db`` only needs the few schema descriptions closest to a question, out
+of a ``schema_embeddings`` table of a few dozen rows. Instead of an embedding
+request and an ivfflat query per question, this module provides:
+
+- ``EmbeddingCache``: an LRU of question embeddings keyed by the normalized
+  question text, backed by a SQLite file so embeddings survive restarts. The
+  file is read and written in a worker thread, off the event loop.
+- ``SchemaIndex``: the ``schema_embeddings`` vectors loaded into a normalized
+  NumPy matrix, searched by exact cosine similarity. The table is re-checked
+  at most every ``refresh_interval`` seconds and reloaded when its row count
+  or latest ``updated_at`` changes.
+
+NumPy is an optional dependency (``pip install .[ml]``); without it
+``SchemaIndex.available`` is False and callers fall back to pgvector.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+DEFAULT_CACHE_PATH = Path(".cache") / "question_embeddings.sqlite3"
+
+logger = logging.getLogger("schema_index")
+
+
+def normalize_question(text: str) -> str:
+    """Normalize a question so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", text).strip().casefold().rstrip("?!. ")
+
+
+class EmbeddingCache:
+    """LRU cache of question embeddings with an optional SQLite backing file.
+
+    Attributes:
+        max_entries: Maximum number of embeddings kept in memory.
+        path: SQLite file holding every cached embedding, or None for memory
+            only.
+        hits: Lookups served from memory or disk.
+        misses: Lookups that need an embedding request.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, path: Path | str | None = DEFAULT_CACHE_PATH
+    ) -> None:
+        self.max_entries = max_entries
+        self.path = Path(path) if path is not None else None
+        self._entries: OrderedDict[str, list[float]] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """Build the cache key for a question embedded with a model."""
+        return hashlib.sha256(
+            f"{model}\0{normalize_question(text)}".encode()
+        ).hexdigest()
+
+    def _db(self) -> sqlite3.Connection | None:
+        """Open the backing file on first use; disable it if that fails."""
+        if self._conn is None and self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Embedding cache file {self.path} unavailable: {e}")
+                self.path = None
+                self._conn = None
+        return self._conn
+
+    async def get(self, key: str) -> list[float] | None:
+        """Get a cached embedding from memory, then from disk."""
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+        if self.path is not None:
+            vector = await asyncio.to_thread(self._load, key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, vector: list[float]) -> None:
+        """Store an embedding in memory and on disk."""
+        self._remember(key, vector)
+        if self.path is not None:
+            await asyncio.to_thread(self._store, key, vector)
+
+    def _load(self, key: str) -> list[float] | None:
+        """Read an embedding from the backing file."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Reading the embedding cache failed: {e}")
+                return None
+        return array("f", row[0]).tolist() if row is not None else None
+
+    def _store(self, key: str, vector: list[float]) -> None:
+        """Write an embedding to the backing file."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        (key, array("f", vector).tobytes()),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Writing the embedding cache failed: {e}")
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the backing file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get cache statistics.
+
+        Returns:
+            A dictionary with the size and hit counts.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SchemaIndex:
+    """Exact cosine top-k over the schema_embeddings table, held in memory.
+
+    Attributes:
+        refresh_interval: Seconds between checks for table changes.
+        descriptions: The loaded descriptions, one per matrix row.
+        loads: Number of times the table was (re)loaded.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0) -> None:
+        self.refresh_interval = refresh_interval
+        self.descriptions: list[str] = []
+        self._matrix: Any = None
+        self._signature: tuple | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+    @property
+    def available(self) -> bool:
+        """Whether NumPy is installed so the index can be used."""
+        return np is not None
+
+    async def refresh(self, db: Any, force: bool = False) -> bool:
+        """Reload the vectors if the table changed since the last load.
+
+        Args:
+            db: The Database instance.
+            force: Check the table even if checked recently.
+
+        Returns:
+            True if the vectors were reloaded.
+        """
+        if (
+            not force
+            and self._signature is not None
+            and time.monotonic() - self._checked_at < self.refresh_interval
+        ):
+            return False
+
+        async with self._lock:
+            row = await db.fetchrow(
+                """
+                SELECT COUNT(*) AS rows, MAX(updated_at) AS updated_at
+                FROM schema_embeddings
+                WHERE embedding IS NOT NULL
+                """,
+                use_cache=False,
+            )
+            self._checked_at = time.monotonic()
+            signature = (row["rows"], row["updated_at"])
+            if signature == self._signature:
+                return False
+
+            rows = await db.fetch(
+                """
+                SELECT description, embedding::real[] AS embedding
+                FROM schema_embeddings
+                WHERE embedding IS NOT NULL
+                ORDER BY id
+                """,
+                use_cache=False,
+            )
+            self.load([(r["description"], r["embedding"]) for r in rows])
+            self._signature = signature
+            logger.info(f"Loaded {len(rows)} schema embeddings into memory")
+            return True
+
+    def load(self, rows: list[tuple[str, list[float]]]) -> None:
+        """Replace the index contents.
+
+        Args:
+            rows: (description, embedding) pairs.
+        """
+        self.descriptions = [description for description, _ in rows]
+        if rows:
+            matrix = np.asarray([vector for _, vector in rows], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1, norms)
+        else:
+            self._matrix = None
+        self.loads += 1
+
+    def search(self, vector: list[float], top_k: int) -> list[str]:
+        """Get the descriptions most similar to a vector.
+
+        Args:
+            vector: The query embedding.
+            top_k: Number of results to return.
+
+        Returns:
+            Descriptions ordered by descending cosine similarity.
+        """
+        if self._matrix is None or top_k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+        scores = self._matrix @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.descriptions[i] for i in top]
@@ -2,14 +2,16 @@
 
 This module provides semantic search over database schema descriptions
 using PostgreSQL's pgvector extension, replacing the previous FAISS implementation.
+Question embeddings are cached, and when NumPy is installed the schema vectors
+are searched in memory (see ``utils.schema_index``) instead of with a query.
 """
 
 import logging
 from typing import TYPE_CHECKING
 
-from openai import OpenAI
-
 import config
+from utils.openai_client import OpenAIService
+from utils.schema_index import EmbeddingCache, SchemaIndex
 
 if TYPE_CHECKING:
     from utils.db import Database
@@ -26,27 +28,59 @@ class SchemaSearchError(Exception):
     pass
 
 
-def get_openai_client() -> OpenAI:
-    """Get OpenAI client for embeddings."""
-    if not config.openai_api_key:
+_default_service: OpenAIService | None = None
+embedding_cache = EmbeddingCache()
+schema_index = SchemaIndex()
+
+
+def get_openai_service(service: OpenAIService | None = None) -> OpenAIService:
+    """Get the OpenAI service to use for embeddings and SQL generation.
+
+    Args:
+        service: The bot's shared service, if available. Otherwise a
+            module-wide service is created once and reused.
+
+    Returns:
+        A configured OpenAI service
+
+    Raises:
+        SchemaSearchError: If no API key is configured
+    """
+    global _default_service
+    if service is None:
+        if _default_service is None:
+            _default_service = OpenAIService(api_key=config.openai_api_key)
+        service = _default_service
+    if not service.configured:
         raise SchemaSearchError("OpenAI API key not configured")
-    return OpenAI(api_key=config.openai_api_key)
+    return service
+
+
+async def get_embedding(service: OpenAIService, text: str) -> list[float]:
+    """Get embedding vector for a text string.
 
+    Embeddings are cached by normalized text, so repeated questions don't
+    need a request.
+    """
+    key = EmbeddingCache.key(EMBEDDING_MODEL, text)
+    cached = await embedding_cache.get(key)
+    if cached is not None:
+        return cached
 
-def get_embedding(client: OpenAI, text: str) -> list[float]:
-    """Get embedding vector for a text string."""
     try:
-        response = client.embeddings.create(model=EMBEDDING_MODEL, input=[text])
-        return response.data[0].embedding
+        embeddings = await service.embed([text], model=EMBEDDING_MODEL, cache=False)
     except Exception as e:
         logger.error(f"Failed to get embedding: {e}")
         raise SchemaSearchError(f"Failed to generate embedding: {e}") from e
+    await embedding_cache.set(key, embeddings[0])
+    return embeddings[0]
 
 
 async def search_schema(
     db: "Database",
     query: str,
     top_k: int = DEFAULT_TOP_K,
+    openai_service: OpenAIService | None = None,
 ) -> list[str]:
     """Search for relevant schema descriptions using semantic similarity.
 
@@ -54,6 +88,7 @@ async def search_schema(
         db: Database instance for queries
         query: The user's question to find relevant schema for
         top_k: Number of results to return
+        openai_service: The bot's shared OpenAI service
 
     Returns:
         List of schema description strings, ordered by relevance
@@ -63,8 +98,14 @@ async def search_schema(
     """
     try:
         # Get embedding for the query
-        client = get_openai_client()
-        query_embedding = get_embedding(client, query)
+        service = get_openai_service(openai_service)
+        query_embedding = await get_embedding(service, query)
+
+        # Exact search over the vectors held in memory
+        if schema_index.available:
+            await schema_index.refresh(db)
+            if len(schema_index):
+                return schema_index.search(query_embedding, top_k)
 
         # Convert to PostgreSQL vector format
         embedding_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
@@ -190,6 +231,7 @@ async def generate_sql(
     channel_id: int | None = None,
     user_id: int | None = None,
     model: str = "gpt-4",
+    openai_service: OpenAIService | None = None,
 ) -> str:
     """Generate SQL from a natural language question.
 
@@ -200,6 +242,7 @@ async def generate_sql(
         channel_id: Current Discord channel ID
         user_id: User ID of the person asking
         model: OpenAI model to use
+        openai_service: The bot's shared OpenAI service
 
     Returns:
         Generated SQL query string
@@ -208,12 +251,13 @@ async def generate_sql(
         SchemaSearchError: If SQL generation fails
     """
     try:
-        client = get_openai_client()
+        service = get_openai_service(openai_service)
         prompt = build_sql_prompt(
             question, schema_chunks, server_id, channel_id, user_id
         )
 
-        response = client.chat.completions.create(
+        # Deterministic, so repeated questions are served from the cache
+        text = await service.chat(
             model=model,
             messages=[
                 {
@@ -223,10 +267,13 @@ async def generate_sql(
                 {"role": "user", "content": prompt},
             ],
             temperature=0,
+            cache=True,
         )
 
-        return response.choices[0].message.content.strip()
+        return text
 
+    except SchemaSearchError:
+        raise
     except Exception as e:
         logger.error(f"SQL generation failed: {e}")
         raise SchemaSearchError(f"Failed to generate SQL: {e}") from e
@@ -1,10 +1,38 @@
+"""Webhook delivery over a shared session with per-webhook send queues.
+
+Each webhook URL gets one long-lived ``discord.Webhook`` bound to the
+HTTP client's shared session, so log messages reuse warm connections instead
+of opening (and closing) a new session per send. Sends are queued per
+webhook and delivered by a background task paced by a token bucket that
+matches Discord's webhook limit. While a send waits for its turn, later sends
+with the same options are packed into the same message, up to Discord's
+limits of 10 embeds, 10 files and 2000 characters of content. If the queue is
+still full, new sends are dropped and counted.
+"""
+
 import asyncio
+import io
 import logging
+from collections import deque
 from contextlib import asynccontextmanager
+from typing import Any
 
+import discord
 from discord import Webhook
 
 import config
+from utils.http_client import RateLimiter
+
+# Discord's per-message limits
+MAX_EMBEDS = 10
+MAX_FILES = 10
+MAX_CONTENT = 2000
+MAX_EMBED_CHARS = 6000
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Discord allows 5 requests per 2 seconds per webhook
+WEBHOOK_RATE = 2.5
+WEBHOOK_BURST = 5
 
 
 class _DisabledWebhook:
@@ -15,22 +43,176 @@ class _DisabledWebhook:
         pass
 
 
+def _file_size(file: discord.File) -> int:
+    """Get the size of a file's contents without reading it."""
+    fp = file.fp
+    try:
+        if isinstance(fp, io.BytesIO):
+            return fp.getbuffer().nbytes
+        position = fp.tell()
+        size = fp.seek(0, io.SEEK_END)
+        fp.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+class _Batch:
+    """One pending webhook message, possibly packing several sends."""
+
+    __slots__ = ("content", "embeds", "files", "options", "file_bytes", "sends")
+
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.content: list[str] = []
+        self.embeds: list[discord.Embed] = []
+        self.files: list[discord.File] = []
+        self.options = options
+        self.file_bytes = 0
+        self.sends = 0
+
+    def fits(
+        self,
+        options: dict[str, Any],
+        content: str | None,
+        embeds: list[discord.Embed],
+        files: list[discord.File],
+        file_bytes: int,
+    ) -> bool:
+        """Whether a send can be packed into this message."""
+        if _options_key(options) != _options_key(self.options):
+            return False
+        names = {file.filename for file in self.files}
+        content_length = sum(len(part) + 1 for part in self.content)
+        return (
+            len(self.embeds) + len(embeds) <= MAX_EMBEDS
+            and len(self.files) + len(files) <= MAX_FILES
+            and self.file_bytes + file_bytes <= MAX_UPLOAD_BYTES
+            and content_length + len(content or "") <= MAX_CONTENT
+            and sum(len(e) for e in self.embeds) + sum(len(e) for e in embeds)
+            <= MAX_EMBED_CHARS
+            and not any(file.filename in names for file in files)
+        )
+
+    def add(
+        self,
+        content: str | None,
+        embeds: list[discord.Embed],
+        files: list[discord.File],
+        file_bytes: int,
+    ) -> None:
+        """Pack a send into this message."""
+        if content:
+            self.content.append(content)
+        self.embeds.extend(embeds)
+        self.files.extend(files)
+        self.file_bytes += file_bytes
+        self.sends += 1
+
+
+def _options_key(options: dict[str, Any]) -> dict[str, Any]:
+    """Make send options comparable (AllowedMentions has no __eq__)."""
+    return {
+        name: value.to_dict() if hasattr(value, "to_dict") else value
+        for name, value in options.items()
+    }
+
+
+class _WebhookState:
+    """The webhook object, queue and counters of one webhook URL."""
+
+    __slots__ = (
+        "url",
+        "webhook",
+        "pending",
+        "worker",
+        "sent",
+        "merged",
+        "dropped",
+        "errors",
+    )
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.webhook: Webhook | None = None
+        self.pending: deque[_Batch] = deque()
+        self.worker: asyncio.Task | None = None
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.errors = 0
+
+
+class QueuedWebhook:
+    """Webhook-like handle whose ``send`` enqueues instead of sending."""
+
+    def __init__(self, manager: "WebhookManager", state: _WebhookState) -> None:
+        """Initialize the handle of a managed webhook."""
+        self._manager = manager
+        self._state = state
+
+    async def send(
+        self,
+        content: str | None = None,
+        *,
+        embed: discord.Embed | None = None,
+        embeds: list[discord.Embed] | None = None,
+        file: discord.File | None = None,
+        files: list[discord.File] | None = None,
+        **options: Any,
+    ) -> None:
+        """Queue a message for delivery.
+
+        Accepts the arguments of ``discord.Webhook.send``. Delivery happens in
+        the background; failures are logged rather than raised.
+        """
+        self._manager.enqueue(
+            self._state,
+            content,
+            ([embed] if embed else []) + list(embeds or []),
+            ([file] if file else []) + list(files or []),
+            options,
+        )
+
+
 class WebhookManager:
-    def __init__(self, http_client) -> None:
+    """Persistent webhooks with queued, packed and rate-limited delivery.
+
+    Attributes:
+        http_client: The HTTP client whose shared session the webhooks use.
+        max_pending: Maximum number of queued messages per webhook.
+        rate_limiter: Paces deliveries per webhook.
+    """
+
+    def __init__(self, http_client, max_pending: int = 100) -> None:
+        """Initialize the manager.
+
+        Args:
+            http_client: The bot's HTTPClient.
+            max_pending: Maximum number of queued messages per webhook; sends
+                that can't be packed into a queued message beyond this are
+                dropped.
+        """
         self.http_client = http_client
+        self.max_pending = max_pending
         self.logger = logging.getLogger(__name__)
+        self.rate_limiter = RateLimiter(
+            requests_per_second=WEBHOOK_RATE,
+            burst_size=WEBHOOK_BURST,
+            logger=self.logger,
+        )
         self._disabled_webhook = _DisabledWebhook()
+        self._webhooks: dict[str, _WebhookState] = {}
 
     @asynccontextmanager
-    async def get_webhook(self, webhook_url: str, max_retries: int = 2):
-        """Context manager for webhook operations with automatic session management.
+    async def get_webhook(self, webhook_url: str):
+        """Context manager yielding the webhook of a URL.
 
         Args:
             webhook_url: The webhook URL to use
-            max_retries: Maximum number of retries on session errors
 
         Yields:
-            discord.Webhook: Ready-to-use webhook instance, or a no-op webhook if disabled
+            A webhook whose ``send`` queues the message, or a no-op webhook
+            if webhooks are disabled
         """
         # In staging mode with webhooks disabled, return a no-op webhook
         if not config.webhooks_enabled:
@@ -38,39 +220,107 @@ class WebhookManager:
             yield self._disabled_webhook
             return
 
-        session = None
-        retry_count = 0
-
-        while retry_count <= max_retries:
-            try:
-                # Get a fresh session for this operation
-                session = await self.http_client.get_fresh_session()
-                webhook = Webhook.from_url(webhook_url, session=session)
-
-                yield webhook
-                break  # Success, exit retry loop
-
-            except Exception as e:
-                error_msg = str(e).lower()
-                if "session is closed" in error_msg or "cannot reuse" in error_msg:
-                    retry_count += 1
-                    self.logger.warning(
-                        f"Session error on webhook operation (attempt {retry_count}/{max_retries + 1}): {e}"
-                    )
-
-                    if session and not session.closed:
-                        await session.close()
-                    session = None
-
-                    if retry_count <= max_retries:
-                        await asyncio.sleep(0.1 * retry_count)  # Brief backoff
-                        continue
-                    else:
-                        raise
-                else:
-                    # Non-session error, don't retry
-                    raise
-            finally:
-                # Always clean up the session
-                if session and not session.closed:
-                    await session.close()
+        state = self._webhooks.get(webhook_url)
+        if state is None:
+            state = self._webhooks[webhook_url] = _WebhookState(webhook_url)
+        yield QueuedWebhook(self, state)
+
+    def enqueue(
+        self,
+        state: _WebhookState,
+        content: str | None,
+        embeds: list[discord.Embed],
+        files: list[discord.File],
+        options: dict[str, Any],
+    ) -> None:
+        """Queue a send, packing it into a pending message when possible."""
+        options.pop("wait", None)
+        file_bytes = sum(_file_size(file) for file in files)
+        # Only the newest pending message takes more sends, to keep their order
+        if state.pending and state.pending[-1].fits(
+            options, content, embeds, files, file_bytes
+        ):
+            state.pending[-1].add(content, embeds, files, file_bytes)
+            state.merged += 1
+        elif len(state.pending) >= self.max_pending:
+            state.dropped += 1
+            if state.dropped % 100 == 1:
+                self.logger.warning(
+                    f"Webhook queue full, dropped {state.dropped} messages so far"
+                )
+            return
+        else:
+            batch = _Batch(options)
+            batch.add(content, embeds, files, file_bytes)
+            state.pending.append(batch)
+
+        if state.worker is None or state.worker.done():
+            state.worker = asyncio.create_task(self._drain(state))
+
+    async def _drain(self, state: _WebhookState) -> None:
+        """Deliver a webhook's queued messages in order."""
+        while state.pending:
+            await self.rate_limiter.acquire(state.url)
+            batch = state.pending.popleft()
+            await self._deliver(state, batch)
+
+    async def _deliver(self, state: _WebhookState, batch: _Batch) -> None:
+        """Send one packed message; failures are logged, not raised."""
+        try:
+            webhook = await self._get_bound_webhook(state)
+            await webhook.send(
+                content="\n".join(batch.content) or discord.utils.MISSING,
+                embeds=batch.embeds or discord.utils.MISSING,
+                files=batch.files or discord.utils.MISSING,
+                **batch.options,
+            )
+            state.sent += 1
+        except Exception as e:
+            # Anything else, such as a timeout, would end the worker and strand
+            # the rest of the queue
+            state.errors += 1
+            self.logger.error(
+                f"Webhook delivery of {batch.sends} queued messages failed: {e}"
+            )
+        finally:
+            for file in batch.files:
+                file.close()
+
+    async def _get_bound_webhook(self, state: _WebhookState) -> Webhook:
+        """Get the webhook object, binding it to the current shared session."""
+        session = await self.http_client.get_session()
+        if state.webhook is None or state.webhook.session is not session:
+            state.webhook = Webhook.from_url(state.url, session=session)
+        return state.webhook
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Wait for queued messages to be delivered.
+
+        Args:
+            timeout: Seconds to wait before giving up on remaining messages.
+        """
+        workers = [
+            state.worker
+            for state in self._webhooks.values()
+            if state.worker is not None and not state.worker.done()
+        ]
+        if workers:
+            _, still_running = await asyncio.wait(workers, timeout=timeout)
+            for worker in still_running:
+                worker.cancel()
+
+    def get_stats(self) -> dict[str, int]:
+        """Get delivery statistics across all webhooks.
+
+        Returns:
+            Counts of delivered, packed, dropped, failed and pending messages.
+        """
+        states = self._webhooks.values()
+        return {
+            "webhooks": len(self._webhooks),
+            "sent": sum(state.sent for state in states),
+            "merged": sum(state.merged for state in states),
+            "dropped": sum(state.dropped for state in states),
+            "errors": sum(state.errors for state in states),
+            "pending": sum(len(state.pending) for state in states),
+        }